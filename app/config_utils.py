@@ -1,148 +1,286 @@
-"""
-Module with utilities needed to manage configuration files
-"""
-import collections
-
-from confluence.models import json_model
-from utilities.json_utils import JsonDataFile
-
-
-class Config(object):
-    """Class to manage the configuration for PageManager class
-    in json format
-    """
-
-    MANDATORY_CONFIG_LIST = [
-        # mandatory confluence settings
-        json_model.JSON_ATTR_HOST_URL,          # confluence host URL (with port)
-        json_model.JSON_ATTR_USER,              # user authentication in confluence
-        json_model.JSON_ATTR_PASS,              # password authentication in confluence
-        # mandatory template settings
-        json_model.JSON_ATTR_SOURCE,            # html template source: URL or file path
-        # mandatory confluence page settings
-        json_model.JSON_ATTR_SPACE_KEY,         # space in which page will be generated
-        json_model.JSON_ATTR_PARENT_PAGE_ID,    # id of the parent page container
-        json_model.JSON_ATTR_PAGE_TITLE         # title of the page to be generated
-    ]
-
-    def __init__(self, json_file):
-        # type: (str) -> None
-        """Constructor method
-
-        :param json_file: path to the json config file
-        """
-        self._json_data_obj = JsonDataFile(json_file)
-        self._template_variables = collections.OrderedDict()
-        # validate config file structure and variables
-        self._validate_mandatory_configuration()
-        self._validate_template_variables()
-
-    @property
-    def template_variables(self):
-        # type: () -> dict
-        """Returns a dictionary with the template variables
-        $VarName = value
-
-        :return: a dictionary with the template variables
-        """
-        return self._template_variables
-
-    def _validate_mandatory_configuration(self):
-        # type: () -> None
-        """Validates that json file has the mandatory values needed
-        for the configuration, if one is not configured, an exception
-        will be raised.
-
-        :return: None.
-        :raises AttributeError:
-            if mandatory configuration attribute is not configured
-        """
-        for config_attr in Config.MANDATORY_CONFIG_LIST:
-            if not self._json_data_obj.has_json_attribute(config_attr):
-                raise AttributeError(
-                    "configuration file does not contain mandatory "
-                    "attribute \"{attr}\". Please be sure to add it and "
-                    "configure it in: \"{config_file}\"".format(
-                        attr=config_attr,
-                        config_file=self._json_data_obj.file_name))
-
-    def _validate_template_variables(self):
-        # type: () -> None
-        """Searches on the json configuration if there are variables
-        starting with '$' character and it loads them into the template
-        variable dictionary from the instance to be available as an interface
-
-        :return: None.
-        """
-        for var_name, var_value in self._json_data_obj.json_model_dict.items():
-            if var_name.startswith('$'):
-                self._template_variables[var_name] = var_value
-
-    def get_host_url(self):
-        # type: () -> str
-        """Returns the value of the host configured on the json file
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_model.JSON_ATTR_HOST_URL
-        )
-
-    def get_user(self):
-        # type: () -> str
-        """Returns the value of the user configured on the json file
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_model.JSON_ATTR_USER
-        )
-
-    def get_password(self):
-        # type: () -> str
-        """Returns the value of the password configured on the json file
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_model.JSON_ATTR_PASS
-        )
-
-    def get_space_key(self):
-        # type: () -> str
-        """Returns the value of the confluence space configured on the json file
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_model.JSON_ATTR_SPACE_KEY
-        )
-
-    def get_parent_page_id(self):
-        # type: () -> str
-        """Returns the value of the parent page id number configured on the json file
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_model.JSON_ATTR_PARENT_PAGE_ID
-        )
-
-    def get_page_title(self):
-        # type: () -> str
-        """Returns the value of the title of the confluence page
-        configured on the json file
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_model.JSON_ATTR_PAGE_TITLE
-        )
-
-    def get_source(self):
-        # type: () -> str
-        """Returns the value of the template source configured on the json file
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_model.JSON_ATTR_SOURCE
-        )
-
-    def get_value_from_json_variable(self, json_variable_name):
-        # type: (str) -> str
-        """Checks if json file has the json variable given inside its content
-        and returns the value of it
-
-        :param json_variable_name:
-        :return:
-        """
-        return self._json_data_obj.get_value_from_json_ref(
-            json_variable_name
-        )
+"""
+Module with utilities needed to manage configuration files
+"""
+import collections
+import os
+import threading
+import types
+
+from confluence.models import json_model
+from utilities.json_utils import JsonDataFile
+from utils.hash_utils import get_file_sha256
+from utils.template_engine import VariableSubstitution
+
+# prefix of the config values that are retrieved from environment variables
+# format ex. 'user' : 'env.OS_VAR_USER'
+ENV_PREFIX = "env."
+
+# text shown instead of the password in the repr of a snapshot
+MASKED_VALUE = '******'
+
+
+class ConfigSnapshot(collections.namedtuple(
+    'ConfigSnapshot',
+    [
+        'file_hash',            # sha256 of the json config file
+        'host_url',             # confluence host URL (with port)
+        'user',                 # user (resolved from environment if 'env.' is used)
+        'user_ref',             # user value as configured in json file
+        'password',             # password (resolved from environment if 'env.' is used)
+        'password_ref',         # password value as configured in json file
+        'source',               # html template source: URL or file path
+        'space_key',            # space in which page will be generated
+        'parent_page_id',       # id of the parent page container
+        'page_title',           # title of the page to be generated
+        'template_variables',   # read only mapping with $ variables
+    ]
+)):
+    """Immutable snapshot of a configuration file with all its values resolved.
+    (namedtuple instances are frozen and have no instance __dict__)
+
+    The password is masked in its repr (and in the password_ref, unless
+    it references an environment variable).
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        values = self._asdict()
+        if values['password'] is not None:
+            values['password'] = MASKED_VALUE
+        if values['password_ref'] is not None and not is_env_reference(values['password_ref']):
+            values['password_ref'] = MASKED_VALUE
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(field_name, value) for field_name, value in values.items()))
+
+
+# precompiled schema: (snapshot field, json attribute, mandatory)
+CONFIG_SCHEMA = (
+    ('host_url', json_model.JSON_ATTR_HOST_URL, True),
+    ('user_ref', json_model.JSON_ATTR_USER, True),
+    ('password_ref', json_model.JSON_ATTR_PASS, True),
+    ('source', json_model.JSON_ATTR_SOURCE, True),
+    ('space_key', json_model.JSON_ATTR_SPACE_KEY, True),
+    ('parent_page_id', json_model.JSON_ATTR_PARENT_PAGE_ID, True),
+    ('page_title', json_model.JSON_ATTR_PAGE_TITLE, True),
+)
+
+# snapshots already built: {file hash: (ConfigSnapshot, VariableSubstitution)}
+# (the environment variables of the snapshots are resolved again on every load)
+_SNAPSHOT_CACHE = {}
+_SNAPSHOT_CACHE_LOCK = threading.Lock()
+
+
+def is_env_reference(value):
+    # type: (str) -> bool
+    """Returns True if a config value references an environment variable ('env.' prefix)
+    """
+    return isinstance(value, str) and ENV_PREFIX in value.lower().strip()
+
+
+def resolve_env_value(value):
+    # type: (str) -> str
+    """Returns the value of the environment variable referenced by a config
+    value with 'env.' prefix (None if the variable does not exist).
+    Values without the prefix are returned as they are.
+
+    :param value: config value. ex. 'env.OS_VAR_USER'
+    :return: resolved value
+    """
+    if is_env_reference(value):
+        env_var = value.strip().replace(ENV_PREFIX, "")
+        return os.environ.get(env_var)
+    return value
+
+
+def build_config_snapshot(json_data_obj, file_hash):
+    # type: (JsonDataFile, str) -> ConfigSnapshot
+    """Validates the json data against the config schema and returns
+    an immutable snapshot with all its values resolved.
+
+    :param json_data_obj: JsonDataFile instance of the config file
+    :param file_hash: sha256 of the config file
+    :return: ConfigSnapshot
+    :raises AttributeError:
+        if mandatory configuration attributes are not configured
+    """
+    values = {}
+    missing_attributes = []
+    for field_name, json_attr, mandatory in CONFIG_SCHEMA:
+        if not json_data_obj.has_json_attribute(json_attr):
+            if mandatory:
+                missing_attributes.append(json_attr)
+            values[field_name] = None
+            continue
+        values[field_name] = json_data_obj.get_value_from_json_ref(json_attr)
+    if missing_attributes:
+        raise AttributeError(
+            "configuration file does not contain mandatory "
+            "attributes {attrs}. Please be sure to add them and "
+            "configure them in: \"{config_file}\"".format(
+                attrs=', '.join('"{}"'.format(attr) for attr in missing_attributes),
+                config_file=json_data_obj.file_name))
+
+    # variables starting with '$' character are template variables
+    template_variables = collections.OrderedDict(
+        (var_name, var_value)
+        for var_name, var_value in json_data_obj.json_model_dict.items()
+        if var_name.startswith('$'))
+
+    return ConfigSnapshot(
+        file_hash=file_hash,
+        user=resolve_env_value(values['user_ref']),
+        password=resolve_env_value(values['password_ref']),
+        template_variables=types.MappingProxyType(template_variables),
+        **values
+    )
+
+
+def load_config_snapshot(json_file):
+    # type: (str) -> (ConfigSnapshot, VariableSubstitution)
+    """Returns the snapshot of a config file (and its template substitution
+    engine). Snapshots are cached by file hash, so loading again a file
+    that did not change does not parse nor validate it again. The 'env.'
+    values (user and password) are not cached: they are resolved again
+    from the current environment on every load.
+
+    :param json_file: path to the json config file
+    :return: tuple (ConfigSnapshot, VariableSubstitution)
+    """
+    file_hash = get_file_sha256(json_file)
+    with _SNAPSHOT_CACHE_LOCK:
+        cached_snapshot = _SNAPSHOT_CACHE.get(file_hash)
+    if cached_snapshot is None:
+        snapshot = build_config_snapshot(JsonDataFile(json_file), file_hash)
+        cached_snapshot = (snapshot, VariableSubstitution(snapshot.template_variables))
+        with _SNAPSHOT_CACHE_LOCK:
+            _SNAPSHOT_CACHE[file_hash] = cached_snapshot
+        return cached_snapshot
+
+    snapshot, template_substitution = cached_snapshot
+    user = resolve_env_value(snapshot.user_ref)
+    password = resolve_env_value(snapshot.password_ref)
+    if user != snapshot.user or password != snapshot.password:
+        snapshot = snapshot._replace(user=user, password=password)
+    return snapshot, template_substitution
+
+
+def clear_config_snapshot_cache():
+    # type: () -> None
+    """Removes all the cached config snapshots
+    """
+    with _SNAPSHOT_CACHE_LOCK:
+        _SNAPSHOT_CACHE.clear()
+
+
+class Config(object):
+    """Class to manage the configuration for PageManager class
+    in json format.
+
+    All the values are resolved and validated once when the config
+    is loaded (see ConfigSnapshot), getters do not access json data.
+    """
+
+    ENV_PREFIX = ENV_PREFIX
+
+    MANDATORY_CONFIG_LIST = [
+        json_attr for _, json_attr, mandatory in CONFIG_SCHEMA if mandatory
+    ]
+
+    def __init__(self, json_file):
+        # type: (str) -> None
+        """Constructor method
+
+        :param json_file: path to the json config file
+        """
+        self._json_file = json_file
+        self._json_data_obj = None
+        # validate config file structure and variables
+        self._snapshot, self._template_substitution = load_config_snapshot(json_file)
+
+    @property
+    def snapshot(self):
+        # type: () -> ConfigSnapshot
+        """Returns the immutable snapshot with the resolved config values
+        """
+        return self._snapshot
+
+    @property
+    def template_variables(self):
+        # type: () -> dict
+        """Returns a read only dictionary with the template variables
+        $VarName = value
+
+        :return: a dictionary with the template variables
+        """
+        return self._snapshot.template_variables
+
+    @property
+    def template_substitution(self):
+        # type: () -> VariableSubstitution
+        """Returns the substitution engine of the template variables.
+        It is built only once per config file content.
+        """
+        return self._template_substitution
+
+    def get_host_url(self):
+        # type: () -> str
+        """Returns the value of the host configured on the json file
+        """
+        return self._snapshot.host_url
+
+    def get_user(self):
+        # type: () -> str
+        """Returns the value of the user configured on the json file
+        (resolved from environment variable if 'env.' prefix is used,
+        when the config is loaded. See snapshot.user_ref for the raw value)
+        """
+        return self._snapshot.user
+
+    def get_password(self):
+        # type: () -> str
+        """Returns the value of the password configured on the json file
+        (resolved from environment variable if 'env.' prefix is used,
+        when the config is loaded. See snapshot.password_ref for the raw value)
+        """
+        return self._snapshot.password
+
+    def get_space_key(self):
+        # type: () -> str
+        """Returns the value of the confluence space configured on the json file
+        """
+        return self._snapshot.space_key
+
+    def get_parent_page_id(self):
+        # type: () -> str
+        """Returns the value of the parent page id number configured on the json file
+        """
+        return self._snapshot.parent_page_id
+
+    def get_page_title(self):
+        # type: () -> str
+        """Returns the value of the title of the confluence page
+        configured on the json file
+        """
+        return self._snapshot.page_title
+
+    def get_source(self):
+        # type: () -> str
+        """Returns the value of the template source configured on the json file
+        """
+        return self._snapshot.source
+
+    def get_value_from_json_variable(self, json_variable_name):
+        # type: (str) -> str
+        """Checks if json file has the json variable given inside its content
+        and returns the value of it
+
+        :param json_variable_name:
+        :return:
+        """
+        # json data is only loaded when a value outside of the snapshot is needed
+        if self._json_data_obj is None:
+            self._json_data_obj = JsonDataFile(self._json_file)
+        return self._json_data_obj.get_value_from_json_ref(
+            json_variable_name
+        )
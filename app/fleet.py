@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to generate the confluence pages of many configuration
+files in one process (fleet mode)
+"""
+
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+
+from app import config_utils
+from app.page_manager import PageManager
+from confluence import confluence_api
+from confluence.page_index import PageIndex
+from confluence.template_cache import TemplateCache
+
+# get main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# result of the generation of one config
+FleetResult = collections.namedtuple(
+    'FleetResult',
+    ['config_file', 'page_title', 'page_id', 'error', 'load_time', 'generate_time']
+)
+
+
+class FleetReport(object):
+    """Results of a fleet run
+    """
+
+    def __init__(self, results, wall_time):
+        # type: (list[FleetResult], float) -> None
+        self._results = results
+        self._wall_time = wall_time
+
+    @property
+    def results(self):
+        # type: () -> list[FleetResult]
+        """Returns the result of every config in the same order they were given
+        """
+        return self._results
+
+    @property
+    def wall_time(self):
+        # type: () -> float
+        """Returns the total time in seconds of the run
+        """
+        return self._wall_time
+
+    @property
+    def failed(self):
+        # type: () -> list[FleetResult]
+        """Returns the results of the configs whose page could not be generated
+        """
+        return [result for result in self._results if result.error is not None]
+
+    def summary(self):
+        # type: () -> str
+        """Returns a one line summary of the run
+        """
+        return "{total} configs in {wall:.2f}s: {ok} generated, {failed} failed".format(
+            total=len(self._results),
+            wall=self._wall_time,
+            ok=len(self._results) - len(self.failed),
+            failed=len(self.failed))
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns the report as a json serializable dictionary
+        """
+        return {
+            'wall_time': self._wall_time,
+            'results': [
+                {
+                    'config_file': result.config_file,
+                    'page_title': result.page_title,
+                    'page_id': result.page_id,
+                    'error': None if result.error is None else str(result.error),
+                    'load_time': result.load_time,
+                    'generate_time': result.generate_time
+                } for result in self._results
+            ]
+        }
+
+
+class FleetRunner(object):
+    """Generates the pages of many configuration files with bounded concurrency.
+
+    All the configs are loaded first. Then the pages are generated over
+    a pool of workers that share:
+    - one pooled and authenticated client per (host, user)
+    - the template cache and the page index
+    """
+
+    def __init__(self, config_files, max_workers=4, overwrite_page=False,
+                 user=None, password=None, page_index=None, template_cache=None,
+                 stage_profiler=None):
+        # type: (list[str], [int], [bool], [str], [str], [PageIndex], [TemplateCache], [StageProfiler]) -> None
+        """
+
+        :param config_files: list of json config file paths
+        :param max_workers: (optional) max number of pages generated at the same time
+        :param overwrite_page: (optional) overwrite the pages that already exist
+        :param user: (optional) user for all the configs (instead of config value)
+        :param password: (optional) password for all the configs (instead of config value)
+        :param page_index: (optional) shared PageIndex (default persistent one if None)
+        :param template_cache: (optional) shared TemplateCache (default one if None)
+        :param stage_profiler: (optional) StageProfiler in which the stages
+            of all the pages are measured
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers should be at least 1: '{}'".format(max_workers))
+        self._config_files = list(config_files)
+        self._max_workers = max_workers
+        self._overwrite_page = overwrite_page
+        self._user = user
+        self._password = password
+        self._page_index = page_index if page_index is not None else PageIndex()
+        self._template_cache = template_cache if template_cache is not None else TemplateCache()
+        self._stage_profiler = stage_profiler
+        # shared clients: {(host, user): ConfluenceApi}
+        self._clients = {}
+        self._authenticated_clients = set()
+        self._clients_lock = threading.Lock()
+
+    @staticmethod
+    def find_config_files(path):
+        # type: (str) -> list[str]
+        """Returns the config files from a directory or a manifest file.
+
+        - directory: all the '.json' files inside it (sorted).
+        - manifest '.json' file: a json list of config file paths.
+        - any other manifest file: one config file path per line
+          (empty lines and lines starting with '#' are ignored).
+
+        Relative paths of a manifest are relative to the manifest directory.
+
+        :param path: directory or manifest file path
+        :return: list of config file paths
+        """
+        if os.path.isdir(path):
+            return sorted(
+                os.path.join(path, file_name) for file_name in os.listdir(path)
+                if file_name.lower().endswith('.json'))
+
+        manifest_dir = os.path.dirname(os.path.abspath(path))
+        with open(path, 'r') as file_obj:
+            if path.lower().endswith('.json'):
+                config_files = json.load(file_obj)
+            else:
+                config_files = [line.strip() for line in file_obj
+                                if line.strip() and not line.strip().startswith('#')]
+        return [os.path.normpath(os.path.join(manifest_dir, config_file))
+                for config_file in config_files]
+
+    def _attach_shared_client(self, page_manager):
+        # type: (PageManager) -> None
+        """Attaches the shared client of the host/user of the page manager.
+        The first page manager of each client authenticates it.
+        """
+        client_key = (page_manager.config_obj.get_host_url(), page_manager.user)
+        with self._clients_lock:
+            client = self._clients.get(client_key)
+            if client is None:
+                client = confluence_api.ConfluenceApi(
+                    client_key[0],
+                    page_manager.user,
+                    page_manager.password,
+                    pool_size=self._max_workers
+                )
+                self._clients[client_key] = client
+            page_manager.attach_client(
+                client, authenticated=client_key in self._authenticated_clients)
+            if not page_manager.is_authenticated:
+                page_manager.authenticate_client()
+                self._authenticated_clients.add(client_key)
+
+    def _generate(self, config_file, config_obj, load_time):
+        # type: (str, config_utils.Config, float) -> FleetResult
+        """Generates the page of one config. Errors are returned into the result.
+        """
+        start_time = time.perf_counter()
+        page_title = config_obj.get_page_title()
+        try:
+            page_manager = PageManager(
+                config_obj,
+                user=self._user,
+                password=self._password,
+                page_index=self._page_index,
+                template_cache=self._template_cache,
+                stage_profiler=self._stage_profiler
+            )
+            self._attach_shared_client(page_manager)
+            page = page_manager.generate_page(overwrite_page=self._overwrite_page)
+        except Exception as ex:
+            LOGGER.error("Page of config '%s' could not be generated: %s", config_file, ex)
+            return FleetResult(config_file, page_title, None, ex,
+                               load_time, time.perf_counter() - start_time)
+        return FleetResult(config_file, page_title, page.id_number if page else None, None,
+                           load_time, time.perf_counter() - start_time)
+
+    def run(self):
+        # type: () -> FleetReport
+        """Loads all the configs and generates their pages
+
+        :return: FleetReport with one result per config file
+        """
+        run_start = time.perf_counter()
+        results = [None] * len(self._config_files)
+        configs = []
+        for config_index, config_file in enumerate(self._config_files):
+            load_start = time.perf_counter()
+            try:
+                config_obj = config_utils.Config(config_file)
+            except Exception as ex:
+                LOGGER.error("Config '%s' could not be loaded: %s", config_file, ex)
+                results[config_index] = FleetResult(
+                    config_file, None, None, ex, time.perf_counter() - load_start, 0.0)
+                continue
+            configs.append((config_index, config_file, config_obj,
+                            time.perf_counter() - load_start))
+        LOGGER.info("%s configs loaded. Generating pages with %s workers",
+                    len(configs), self._max_workers)
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = dict(
+                    (executor.submit(self._generate, config_file, config_obj, load_time),
+                     config_index)
+                    for config_index, config_file, config_obj, load_time in configs)
+                for future in concurrent.futures.as_completed(futures):
+                    result = future.result()
+                    results[futures[future]] = result
+                    LOGGER.info("[%s] %s (load %.3fs, generate %.3fs)",
+                                'OK' if result.error is None else 'FAILED',
+                                result.config_file, result.load_time, result.generate_time)
+        finally:
+            self.close()
+
+        report = FleetReport(results, time.perf_counter() - run_start)
+        LOGGER.info("Fleet run finished: %s", report.summary())
+        return report
+
+    def close(self):
+        # type: () -> None
+        """Closes all the shared clients
+        """
+        with self._clients_lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+            self._authenticated_clients.clear()
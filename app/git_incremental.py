@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to select the publish jobs affected by the changes of a git range.
+
+Only the docstrings and definitions of the functions are rendered, so a
+groovy file is affected only if a changed line (in the base or in the head
+version) is inside the span of one of its documented functions. Publish
+jobs are affected if their source is an affected file or contains one.
+"""
+
+import collections
+import logging
+import os
+
+from utils import git_utils
+from utils.parser import GroovyFile
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+GROOVY_FILE_EXTENSION = '.groovy'
+
+# groovy file with documentation changes
+# - path: absolute path of the file (in the working tree)
+# - functions: names of the changed functions (in the base or head version)
+AffectedFile = collections.namedtuple('AffectedFile', ['path', 'functions'])
+
+
+def get_changed_functions(groovy_file, file_content, line_ranges):
+    # type: (str, str, list[tuple]) -> set[str]
+    """Returns the names of the functions of a file version whose span
+    overlaps with any of the changed line ranges
+
+    :param groovy_file: path of the groovy file
+    :param file_content: content of the version of the file
+    :param line_ranges: list of (first line, last line) changed in that version
+    """
+    changed_functions = set()
+    if not line_ranges:
+        return changed_functions
+    for function_obj in GroovyFile(groovy_file, file_content).get_groovy_functions().values():
+        for first_line, last_line in line_ranges:
+            if first_line <= function_obj.end_line and last_line >= function_obj.start_line:
+                changed_functions.add(function_obj.name)
+                break
+    return changed_functions
+
+
+def get_affected_files(path, base, head, sources=None):
+    # type: (str, str, str, [list[str]]) -> list[AffectedFile]
+    """Returns the groovy files whose documented functions changed between two revisions
+
+    :param path: file or directory inside the git repository
+    :param base: base revision
+    :param head: head revision
+    :param sources: (optional) only the changes of these files / directories
+    :return: list of AffectedFile
+    """
+    repo_root = git_utils.get_repo_root(path)
+    pathspecs = [os.path.relpath(os.path.realpath(source), repo_root) for source in sources or []]
+    affected_files = []
+    for relative_path, file_changes in git_utils.get_changed_lines(
+            repo_root, base, head, pathspecs).items():
+        if not relative_path.lower().endswith(GROOVY_FILE_EXTENSION):
+            continue
+        groovy_file = os.path.join(repo_root, relative_path)
+        changed_functions = set()
+        for revision, line_ranges in ((base, file_changes.old_lines), (head, file_changes.new_lines)):
+            if line_ranges:
+                changed_functions |= get_changed_functions(
+                    groovy_file,
+                    git_utils.get_file_at_revision(repo_root, revision, relative_path),
+                    line_ranges)
+        if changed_functions:
+            LOGGER.debug("Documentation changed in '%s': %s",
+                         relative_path, ', '.join(sorted(changed_functions)))
+            affected_files.append(AffectedFile(groovy_file, sorted(changed_functions)))
+    return affected_files
+
+
+def is_source_affected(source, affected_files):
+    # type: (str, list[AffectedFile]) -> bool
+    """Returns True if a source (groovy file or directory) is or contains an affected file
+    """
+    source = os.path.realpath(source)
+    for affected_file in affected_files:
+        if affected_file.path == source or affected_file.path.startswith(source.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+
+def select_affected_jobs(jobs, git_range):
+    # type: (list[dict], str) -> list[dict]
+    """Returns the publish jobs (dicts with 'source') affected by a git range.
+    The changes are read once per repository of the sources.
+
+    :param jobs: list of publish jobs
+    :param git_range: 'base..head' revisions
+    :return: affected jobs (in the same order)
+    """
+    base, head = git_utils.parse_git_range(git_range)
+    sources_by_repo = collections.OrderedDict()
+    # {source directory: repository root} (git is only run once per directory)
+    repo_roots = {}
+    for job in jobs:
+        source_dir = job['source'] if os.path.isdir(job['source']) else os.path.dirname(
+            os.path.abspath(job['source']))
+        if source_dir not in repo_roots:
+            repo_roots[source_dir] = git_utils.get_repo_root(source_dir)
+        sources_by_repo.setdefault(repo_roots[source_dir], []).append(job['source'])
+    affected_files = []
+    for repo_root, sources in sources_by_repo.items():
+        affected_files.extend(get_affected_files(repo_root, base, head, sources))
+    affected_jobs = [job for job in jobs if is_source_affected(job['source'], affected_files)]
+    LOGGER.info("%s of %s publish jobs affected by '%s' (%s changed groovy files)",
+                len(affected_jobs), len(jobs), git_range, len(affected_files))
+    return affected_jobs
@@ -0,0 +1,522 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the publish pipeline of groovy documentation:
+groovy files -> function block of the template page -> target page.
+
+A GroovydocPublisher keeps its caches between publishes, so a long
+running process (see app.publisher_daemon) only parses the groovy
+files that changed and only renders them again when the file or
+the template changed.
+"""
+
+import collections
+import logging
+import os
+import threading
+import time
+
+from app import page_sharding
+from confluence.bulk_publisher import PageSpec
+from confluence.exceptions import HttpNotFoundError
+from confluence.template_cache import TemplateCache
+from utils import profiler
+from utils.groovy_renderer import GroovyPageRenderer
+from utils.hash_utils import get_file_sha256
+from utils.hash_utils import get_text_sha256
+from utils.parser import GroovyDocParser
+from utils.search_index import SearchIndexBuilder
+from utils.symbol_table import SymbolTable
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# result of the publish of one target page
+# - source: groovy file or directory published
+# - files: number of groovy files published
+# - functions: number of functions rendered
+# - version: new version number of the target page
+PublishResult = collections.namedtuple(
+    'PublishResult',
+    ['source', 'target_page', 'title', 'version', 'files', 'functions', 'seconds']
+)
+
+
+class GroovydocPublisher(object):
+    """Publishes the documentation of groovy files into a target page.
+
+    Caches kept between publishes:
+    - parse cache: parsed GroovyFile per path, reused while the
+      modification time and size of the file are the same.
+    - render cache: rendered functions per (template, path, page), reused
+      while the file was not parsed again and the template and the
+      symbols (linked references) are the same.
+    - template cache: TemplateCache (template downloaded on version changes).
+
+    The publisher is thread safe, so one instance can be shared by
+    the workers of a pool (all of them using the same pooled client).
+    """
+
+    GROOVY_FILE_EXTENSION = '.groovy'
+
+    def __init__(self, confluence_api_obj, template_cache=None, stage_profiler=None):
+        # type: (ConfluenceApi, [TemplateCache], [StageProfiler]) -> None
+        """
+
+        :param confluence_api_obj: ConfluenceApi instance used for all the publishes
+        :param template_cache: (optional) TemplateCache (default one if None)
+        :param stage_profiler: (optional) StageProfiler in which the stages
+            of all the publishes are measured
+        """
+        self._confluence_api = confluence_api_obj
+        self._template_cache = template_cache if template_cache is not None else TemplateCache()
+        self._stage_profiler = stage_profiler if stage_profiler is not None else profiler.NULL_PROFILER
+        # {file path: (file key, GroovyFile)}
+        self._parse_cache = {}
+        # {template sha256: GroovyPageRenderer}
+        self._renderers = {}
+        # {(template sha256, file path): (file key, rendered functions)}
+        self._render_cache = {}
+        self._cache_stats = collections.Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def find_groovy_files(cls, source):
+        # type: (str) -> list[str]
+        """Returns the groovy files of a source
+
+        :param source: groovy file or directory (searched recursively)
+        :return: sorted list of groovy file paths
+        :raises IOError: if the source does not exist
+        """
+        if os.path.isfile(source):
+            return [os.path.normpath(source)]
+        if not os.path.isdir(source):
+            raise IOError("Groovy file or directory does not exist: '{}'".format(source))
+        groovy_files = []
+        for dir_path, dir_names, file_names in os.walk(source):
+            dir_names.sort()
+            groovy_files.extend(
+                os.path.normpath(os.path.join(dir_path, file_name)) for file_name in file_names
+                if file_name.lower().endswith(cls.GROOVY_FILE_EXTENSION))
+        return sorted(groovy_files)
+
+    @classmethod
+    def get_source_hash(cls, source):
+        # type: (str) -> str
+        """Returns the content hash of a source: sha256 of the paths
+        (relative to the source) and contents of its groovy files
+
+        :param source: groovy file or directory
+        :return: hex digest string
+        """
+        source_dir = source if os.path.isdir(source) else os.path.dirname(source)
+        return get_text_sha256('\n'.join(
+            '{} {}'.format(os.path.relpath(groovy_file, source_dir).replace(os.sep, '/'),
+                           get_file_sha256(groovy_file))
+            for groovy_file in cls.find_groovy_files(source)))
+
+    @staticmethod
+    def _get_file_key(groovy_file):
+        # type: (str) -> tuple
+        """Returns the key of the current state of a file (modification time and size)
+        """
+        file_stat = os.stat(groovy_file)
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def parse_file(self, groovy_file):
+        # type: (str) -> (tuple, GroovyFile)
+        """Returns the parsed groovy file (parse cache is used if it did not change)
+
+        :param groovy_file: path to the groovy file
+        :return: tuple (file key, GroovyFile)
+        """
+        groovy_file = os.path.abspath(groovy_file)
+        file_key = self._get_file_key(groovy_file)
+        with self._lock:
+            cached = self._parse_cache.get(groovy_file)
+        if cached is not None and cached[0] == file_key:
+            self._count('parse_hits')
+            return cached
+        self._count('parse_misses')
+        cached = (file_key, GroovyDocParser.parse_file(groovy_file))
+        with self._lock:
+            self._parse_cache[groovy_file] = cached
+        return cached
+
+    def get_renderer(self, template_content):
+        # type: (str) -> (str, GroovyPageRenderer)
+        """Returns the renderer of a template content (reused while it does not change)
+
+        :param template_content: storage format content of the template page
+        :return: tuple (template sha256, GroovyPageRenderer)
+        :raises ValueError: if the template has no function block
+        """
+        template_key = get_text_sha256(template_content)
+        with self._lock:
+            renderer = self._renderers.get(template_key)
+        if renderer is None:
+            renderer = GroovyPageRenderer(template_content)
+            with self._lock:
+                self._renderers[template_key] = renderer
+        return template_key, renderer
+
+    def render_file(self, template_key, renderer, groovy_file, file_key, groovy_file_obj,
+                    symbol_table, page_id):
+        # type: (str, GroovyPageRenderer, str, tuple, GroovyFile, SymbolTable, str) -> str
+        """Returns the rendered functions of a parsed file (render cache is used
+        if the file, the template and the symbols did not change)
+        """
+        cache_key = (template_key, groovy_file, str(page_id))
+        render_key = (file_key, symbol_table.get_signature())
+        with self._lock:
+            cached = self._render_cache.get(cache_key)
+        if cached is not None and cached[0] == render_key:
+            self._count('render_hits')
+            return cached[1]
+        self._count('render_misses')
+        rendered_functions = renderer.render_functions(
+            groovy_file_obj.get_groovy_functions().values(), symbol_table, page_id, groovy_file)
+        with self._lock:
+            self._render_cache[cache_key] = (render_key, rendered_functions)
+        return rendered_functions
+
+    def _parse_source(self, source):
+        # type: (str) -> list[tuple]
+        """Returns the parsed groovy files of a source
+
+        :return: list of (absolute path, file key, GroovyFile)
+        """
+        parsed_files = []
+        for groovy_file in self.find_groovy_files(source):
+            file_key, groovy_file_obj = self.parse_file(groovy_file)
+            parsed_files.append((os.path.abspath(groovy_file), file_key, groovy_file_obj))
+        return parsed_files
+
+    @staticmethod
+    def _add_symbols(symbol_table, source, parsed_files, page_id):
+        # type: (SymbolTable, str, list[tuple], str) -> None
+        """Adds the functions of the parsed files of a source to a symbol table
+        (file names relative to the source directory)
+        """
+        source_dir = source if os.path.isdir(source) else os.path.dirname(source)
+        for groovy_file, _, groovy_file_obj in parsed_files:
+            symbol_table.add_file(
+                groovy_file_obj,
+                page_id,
+                os.path.relpath(groovy_file, os.path.abspath(source_dir)).replace(os.sep, '/'))
+
+    def build_symbol_table(self, jobs):
+        # type: (list[dict]) -> SymbolTable
+        """Returns the symbol table of the functions of many publish jobs.
+        Sources are parsed through the parse cache, so the publishes of
+        the jobs reuse them.
+
+        :param jobs: list of dicts with 'source' and 'target_page'
+        :return: SymbolTable instance
+        """
+        symbol_table = SymbolTable()
+        with self._stage_profiler.stage(profiler.STAGE_PARSE):
+            for job in jobs:
+                self._add_symbols(symbol_table, job['source'],
+                                  self._parse_source(job['source']), job['target_page'])
+        return symbol_table
+
+    def build_search_index(self, jobs):
+        # type: (list[dict]) -> SearchIndexBuilder
+        """Returns the search index of the functions of many publish jobs
+        (sources are parsed through the parse cache)
+
+        :param jobs: list of dicts with 'source' and 'target_page'
+        :return: SearchIndexBuilder instance
+        """
+        search_index = SearchIndexBuilder()
+        for job in jobs:
+            source_dir = job['source'] if os.path.isdir(job['source']) else os.path.dirname(job['source'])
+            for groovy_file, _, groovy_file_obj in self._parse_source(job['source']):
+                search_index.add_file(
+                    groovy_file_obj,
+                    job['target_page'],
+                    os.path.relpath(groovy_file, os.path.abspath(source_dir)).replace(os.sep, '/'))
+        return search_index
+
+    def resolve_page_titles(self, symbol_table):
+        # type: (SymbolTable) -> None
+        """Sets the titles of the target pages of a symbol table
+        (one metadata only request per page), so functions can be
+        linked from other pages and from the index page
+        """
+        for page_id in symbol_table.get_page_ids():
+            symbol_table.set_page_title(page_id, self._confluence_api.get_content_title(page_id))
+
+    def publish_index(self, symbol_table, index_page):
+        # type: (SymbolTable, str) -> PublishResult
+        """Publishes the A-Z index of a symbol table into the generated section
+        of the index page (its ${groovy.target} placeholder on the first publish)
+
+        :param symbol_table: SymbolTable (with the titles of its pages)
+        :param index_page: id of the index page
+        :return: PublishResult instance
+        """
+        start_time = time.perf_counter()
+        with self._stage_profiler.stage(profiler.STAGE_RENDER):
+            index_content = GroovyPageRenderer.render_generated_section(symbol_table.render_index())
+        with self._stage_profiler.stage(profiler.STAGE_FETCH_TARGET):
+            index_page_obj = self._confluence_api.get_content(index_page)
+        with self._stage_profiler.stage(profiler.STAGE_PUBLISH):
+            updated_page = self._confluence_api.update_page_with_retry(
+                index_page,
+                GroovyPageRenderer.render_target(index_page_obj.content, index_content),
+                index_page_obj.title,
+                str(int(index_page_obj.version) + 1)
+            )
+        LOGGER.info("Index page '%s' (v.%s) published (%s functions)",
+                    index_page_obj.title, updated_page.version, len(symbol_table))
+        return PublishResult(
+            None,
+            str(index_page),
+            index_page_obj.title,
+            updated_page.version,
+            0,
+            len(symbol_table),
+            time.perf_counter() - start_time
+        )
+
+    def _count(self, stat_name):
+        # type: (str) -> None
+        with self._lock:
+            self._cache_stats[stat_name] += 1
+
+    def get_cache_info(self):
+        # type: () -> dict
+        """Returns the size and the hits / misses of the caches
+        """
+        with self._lock:
+            cache_info = dict(self._cache_stats)
+            cache_info.update({
+                'parsed_files': len(self._parse_cache),
+                'rendered_files': len(self._render_cache),
+                'templates': len(self._renderers)
+            })
+        return cache_info
+
+    def clear_caches(self):
+        # type: () -> None
+        """Removes the parsed and rendered files from memory
+        (the template cache is kept)
+        """
+        with self._lock:
+            self._parse_cache.clear()
+            self._render_cache.clear()
+            self._renderers.clear()
+
+    def publish(self, source, template_page, target_page, symbol_table=None):
+        # type: (str, str, str, [SymbolTable]) -> PublishResult
+        """Publishes the documentation of a groovy file or directory into
+        the generated section of the target page (its ${groovy.target}
+        placeholder on the first publish, see GroovyPageRenderer.render_target).
+
+        :param source: groovy file or directory (all its groovy files in path order)
+        :param template_page: id of the template page with the function block
+        :param target_page: id of the page in which the documentation is generated
+        :param symbol_table: (optional) SymbolTable of the library, to link the functions
+            referenced in the descriptions. If None, only the functions of the
+            source are linked.
+        :return: PublishResult instance
+        """
+        start_time = time.perf_counter()
+
+        with self._stage_profiler.stage(profiler.STAGE_PARSE):
+            parsed_files = self._parse_source(source)
+            if symbol_table is None:
+                symbol_table = SymbolTable()
+                self._add_symbols(symbol_table, source, parsed_files, target_page)
+
+        # template page is only downloaded again when its version changes
+        with self._stage_profiler.stage(profiler.STAGE_FETCH_TEMPLATE):
+            template_raw_content = self._template_cache.get_content(
+                self._confluence_api, template_page)
+
+        with self._stage_profiler.stage(profiler.STAGE_EXTRACT_TEMPLATE):
+            template_key, renderer = self.get_renderer(template_raw_content)
+
+        with self._stage_profiler.stage(profiler.STAGE_RENDER):
+            final_content_page = renderer.render_generated_section(''.join(
+                self.render_file(template_key, renderer, groovy_file, file_key, groovy_file_obj,
+                                 symbol_table, target_page)
+                for groovy_file, file_key, groovy_file_obj in parsed_files))
+
+        with self._stage_profiler.stage(profiler.STAGE_FETCH_TARGET):
+            target_page_obj = self._confluence_api.get_content(target_page)
+            target_page_final_content = renderer.render_target(
+                target_page_obj.content,
+                final_content_page
+            )
+            new_version = str(int(target_page_obj.version) + 1)
+
+        # the target page could be edited by someone else while the content
+        # is rendered. On version conflicts only the version number is fetched
+        # again, so there is no need to rerun the whole pipeline.
+        with self._stage_profiler.stage(profiler.STAGE_PUBLISH):
+            updated_page = self._confluence_api.update_page_with_retry(
+                target_page,
+                target_page_final_content,
+                target_page_obj.title,
+                new_version
+            )
+
+        LOGGER.info("Page '%s' (v.%s) published from '%s' (%s files)",
+                    target_page_obj.title, updated_page.version, source, len(parsed_files))
+        return PublishResult(
+            source,
+            str(target_page),
+            target_page_obj.title,
+            updated_page.version,
+            len(parsed_files),
+            sum(len(groovy_file_obj.get_groovy_functions())
+                for _, _, groovy_file_obj in parsed_files),
+            time.perf_counter() - start_time
+        )
+
+    def publish_sharded(self, source, template_page, target_page, strategy=page_sharding.SHARD_BY_SIZE,
+                        budget=None, symbol_table=None, manifest_dir=None, force=False):
+        # type: (str, str, str, [str], [int], [SymbolTable], [str], [bool]) -> PublishResult
+        """Publishes the documentation of a groovy file or directory into child
+        pages (shards) of the target page, and an overview of the shards into
+        the generated section of the target page (see app.page_sharding).
+
+        Only the shards (and the overview) whose content changed since the
+        last publish are published; shards that no longer exist (child pages
+        of the target page with a shard title) are deleted.
+
+        :param source: groovy file or directory (all its groovy files in path order)
+        :param template_page: id of the template page with the function block
+        :param target_page: id of the parent page of the shards
+        :param strategy: (optional) shard strategy: 'size', 'count' or 'file'
+        :param budget: (optional) max bytes ('size') or functions ('count') per shard
+        :param symbol_table: (optional) SymbolTable of the library. The functions of
+            the source are moved to the pages of their shards.
+        :param manifest_dir: (optional) directory of the shard manifests
+        :param force: (optional) if set, all the shards are published
+        :return: PublishResult instance of the target page
+        :raises ShardPublishError: if some shards could not be published
+            (the published ones are kept in the manifest)
+        """
+        start_time = time.perf_counter()
+
+        with self._stage_profiler.stage(profiler.STAGE_PARSE):
+            parsed_files = self._parse_source(source)
+            if symbol_table is None:
+                symbol_table = SymbolTable()
+                self._add_symbols(symbol_table, source, parsed_files, target_page)
+
+        with self._stage_profiler.stage(profiler.STAGE_FETCH_TEMPLATE):
+            template_raw_content = self._template_cache.get_content(
+                self._confluence_api, template_page)
+
+        with self._stage_profiler.stage(profiler.STAGE_EXTRACT_TEMPLATE):
+            _, renderer = self.get_renderer(template_raw_content)
+
+        with self._stage_profiler.stage(profiler.STAGE_FETCH_TARGET):
+            target_page_obj = self._confluence_api.get_content(target_page)
+
+        with self._stage_profiler.stage(profiler.STAGE_RENDER):
+            # sizes of the functions without links (links depend on the shards)
+            source_dir = source if os.path.isdir(source) else os.path.dirname(source)
+            functions = {}
+            shard_items = []
+            for groovy_file, _, groovy_file_obj in parsed_files:
+                file_name = os.path.relpath(groovy_file, os.path.abspath(source_dir)).replace(os.sep, '/')
+                for function_obj in groovy_file_obj.get_groovy_functions().values():
+                    functions[(file_name, function_obj.name)] = function_obj
+                    shard_items.append(page_sharding.ShardItem(
+                        file_name, function_obj.name,
+                        len(renderer.render_function(function_obj, file_name=file_name))))
+            shards = page_sharding.plan_shards(shard_items, target_page_obj.title, strategy, budget)
+            for shard in shards:
+                symbol_table.set_page_title(shard.title, shard.title)
+                for item in shard.items:
+                    symbol_table.set_symbol_page(item.file, item.function, shard.title, target_page)
+
+            manifest = page_sharding.ShardManifest(target_page, manifest_dir)
+            page_specs = []
+            shard_hashes = {}
+            for shard in shards:
+                rendered_functions = ''.join(
+                    renderer.render_function(functions[(item.file, item.function)],
+                                             symbol_table, shard.title, item.file)
+                    for item in shard.items)
+                shard_hashes[shard.title] = get_text_sha256(rendered_functions)
+                if force or manifest.get_hash(shard.title) != shard_hashes[shard.title]:
+                    page_specs.append(PageSpec(
+                        shard.title,
+                        str(target_page),
+                        renderer.render_generated_section(rendered_functions)))
+            overview_content = page_sharding.render_overview(shards)
+            overview_hash = get_text_sha256(overview_content)
+
+        with self._stage_profiler.stage(profiler.STAGE_PUBLISH):
+            failed_titles = []
+            if page_specs:
+                bulk_report = self._confluence_api.publish_pages(page_specs, target_page_obj.space_key)
+                for result in bulk_report.results:
+                    if result.error is not None:
+                        failed_titles.append(result.spec.title)
+                        manifest.shards.pop(result.spec.title, None)
+                        continue
+                    manifest.shards[result.spec.title] = {
+                        'hash': shard_hashes[result.spec.title],
+                        'page_id': str(result.page.id_number)
+                    }
+
+            # stale shards: child pages of the target page with a shard title
+            # (the manifest of the last publish may be missing) and the ones
+            # of the manifest (ex. published with another title of the target page)
+            stale_page_ids = dict((title, manifest.shards[title]['page_id'])
+                                  for title in set(manifest.shards) - set(shard_hashes))
+            for child_page in self._confluence_api.get_child_pages(target_page, expand=[]):
+                if child_page.title not in shard_hashes \
+                        and page_sharding.is_shard_title(child_page.title, target_page_obj.title):
+                    stale_page_ids[child_page.title] = child_page.id_number
+            for title in sorted(stale_page_ids):
+                LOGGER.info("Shard '%s' no longer exists: page deleted", title)
+                try:
+                    self._confluence_api.delete_content(stale_page_ids[title])
+                except HttpNotFoundError:
+                    pass
+                manifest.shards.pop(title, None)
+
+            version = target_page_obj.version
+            if failed_titles:
+                manifest.save()
+                raise page_sharding.ShardPublishError(
+                    "{} of {} shards of page '{}' could not be published: {}".format(
+                        len(failed_titles), len(shards), target_page_obj.title,
+                        ', '.join(failed_titles)))
+            if force or manifest.overview_hash != overview_hash:
+                # the target page could be edited by someone else while the
+                # shards are published (only the version is fetched again)
+                version = self._confluence_api.update_page_with_retry(
+                    target_page,
+                    renderer.render_target(
+                        target_page_obj.content,
+                        renderer.render_generated_section(overview_content)),
+                    target_page_obj.title,
+                    str(int(target_page_obj.version) + 1)
+                ).version
+                manifest.overview_hash = overview_hash
+            manifest.save()
+
+        LOGGER.info("Page '%s' (v.%s) published from '%s' (%s files) into %s shards: "
+                    "%s published, %s unchanged", target_page_obj.title, version, source,
+                    len(parsed_files), len(shards), len(page_specs), len(shards) - len(page_specs))
+        return PublishResult(
+            source,
+            str(target_page),
+            target_page_obj.title,
+            version,
+            len(parsed_files),
+            sum(len(groovy_file_obj.get_groovy_functions())
+                for _, _, groovy_file_obj in parsed_files),
+            time.perf_counter() - start_time
+        )
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a local output backend: the documentation of groovy files
+is written as static HTML files into a directory (no Confluence server).
+
+The function block of a local template is rendered with the same
+placeholders as the Confluence pipeline. Builds are incremental:
+- a manifest in the output directory keeps the state (modification
+  time and size) of every groovy file and the hash of every output.
+- groovy files that did not change (same template) are not parsed again.
+- outputs are only written when their content hash changed, with
+  atomic renames, and outputs of removed files / functions are deleted
+  (with their directories once they are empty).
+
+The index page is written at the root of the output directory and the
+outputs of the groovy files into its 'files' subdirectory, so a groovy
+file can not overwrite the index page (ex. a root index.groovy).
+
+Anchor and code macros of the template are rendered as HTML; templates
+with other confluence macros or links are rejected.
+"""
+
+import collections
+import html
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+from app.groovydoc_publisher import GroovydocPublisher
+from utils.groovy_renderer import GroovyPageRenderer
+from utils.groovy_renderer import TARGET_PLACEHOLDER
+from utils.hash_utils import get_text_sha256
+from utils.parser import GroovyDocParser
+from utils.symbol_table import get_symbol_name
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# output modes: one HTML file per groovy file or per function
+OUTPUT_PER_FILE = 'file'
+OUTPUT_PER_FUNCTION = 'function'
+
+OUTPUT_MODES = (OUTPUT_PER_FILE, OUTPUT_PER_FUNCTION)
+
+# placeholder of the page template replaced by the title of the page
+PAGE_TITLE_PLACEHOLDER = '${groovy.page_title}'
+
+DEFAULT_PAGE_TEMPLATE = (
+    '<!DOCTYPE html>\n'
+    '<html>\n<head>\n<meta charset="utf-8">\n'
+    '<title>' + PAGE_TITLE_PLACEHOLDER + '</title>\n'
+    '</head>\n<body>\n' + TARGET_PLACEHOLDER + '\n</body>\n</html>\n'
+)
+
+INDEX_FILE_NAME = 'index.html'
+
+# subdirectory of the outputs of the groovy files (next to the index page)
+SOURCE_OUTPUT_DIR = 'files'
+
+# anchor macros of the rendered functions (storage format), rendered as HTML anchors
+REGEX_ANCHOR_MACRO = re.compile(
+    r'<ac:structured-macro[^>]*ac:name="anchor"[^>]*><ac:parameter ac:name="">([^<]*)'
+    r'</ac:parameter></ac:structured-macro>')
+
+# code macros (storage format), rendered as <pre><code> with their escaped CDATA body
+REGEX_CODE_MACRO = re.compile(
+    r'<ac:structured-macro[^>]*ac:name="code"[^>]*>(.*?)</ac:structured-macro>', re.DOTALL)
+
+# CDATA sections of a code macro body ("]]>" in the code splits the body in sections)
+REGEX_CDATA = re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.DOTALL)
+
+# confluence elements left after the conversion (not supported in HTML)
+REGEX_STORAGE_ELEMENT = re.compile(r'<((?:ac|ri):[\w-]+)')
+
+# result of a build
+# - written: outputs written (new or changed)
+# - unchanged: outputs whose content did not change
+# - removed: outputs deleted (their groovy file / function no longer exists)
+# - parsed: groovy files parsed (the others did not change since the last build)
+HtmlBuildReport = collections.namedtuple(
+    'HtmlBuildReport',
+    ['written', 'unchanged', 'removed', 'parsed', 'seconds']
+)
+
+
+def convert_storage_to_html(content):
+    # type: (str) -> str
+    """Returns storage format content with its anchor macros rendered
+    as HTML anchors and its code macros as <pre><code> blocks
+    """
+    def replace_code_macro(code_match):
+        code = ''.join(REGEX_CDATA.findall(code_match.group(1)))
+        return '<pre><code>{}</code></pre>'.format(html.escape(code, quote=False))
+    content = REGEX_CODE_MACRO.sub(replace_code_macro, content)
+    return REGEX_ANCHOR_MACRO.sub(r'<a id="\1"></a>', content)
+
+
+class HtmlOutputBuilder(object):
+    """Writes the documentation of groovy files as static HTML files
+    """
+
+    MANIFEST_FILE_NAME = '.groovydoc-manifest.json'
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, output_dir, template_content, page_template=None, mode=OUTPUT_PER_FILE):
+        # type: (str, str, [str], [str]) -> None
+        """
+
+        :param output_dir: directory in which the HTML files are written
+        :param template_content: template with the function block
+            (${groovy.function_block.open} ... ${groovy.function_block.close})
+        :param page_template: (optional) HTML of each page with the ${groovy.target}
+            and ${groovy.page_title} placeholders (a minimal HTML page by default)
+        :param mode: (optional) one HTML file per groovy file ('file') or per function ('function')
+        :raises ValueError: if the template has no function block, has confluence
+            elements that can not be rendered as HTML or the mode is unknown
+        """
+        if mode not in OUTPUT_MODES:
+            raise ValueError("Unknown output mode '{}' (expected one of: {})".format(
+                mode, ', '.join(OUTPUT_MODES)))
+        self._output_dir = output_dir
+        self._renderer = GroovyPageRenderer(template_content)
+        storage_elements = sorted(set(REGEX_STORAGE_ELEMENT.findall(
+            convert_storage_to_html(self._renderer.function_section))))
+        if storage_elements:
+            raise ValueError("Function block of the template contains confluence elements "
+                             "that can not be rendered as HTML: {}".format(', '.join(storage_elements)))
+        self._page_template = page_template if page_template is not None else DEFAULT_PAGE_TEMPLATE
+        self._mode = mode
+        # outputs only depend on the file when these did not change (the outputs
+        # of a build into another subdirectory are removed)
+        self._build_key = get_text_sha256('\n'.join([template_content, self._page_template, mode, SOURCE_OUTPUT_DIR]))
+        self._manifest_file = os.path.join(output_dir, HtmlOutputBuilder.MANIFEST_FILE_NAME)
+
+    def _load_manifest(self):
+        # type: () -> dict
+        """Returns the manifest of the last build (empty one if there is none
+        or it was written with another template / mode)
+        """
+        empty_manifest = {'version': HtmlOutputBuilder.MANIFEST_VERSION,
+                          'build_key': self._build_key, 'sources': {}, 'outputs': {}}
+        if not os.path.exists(self._manifest_file):
+            return empty_manifest
+        try:
+            with open(self._manifest_file, 'r', encoding='utf-8') as file_obj:
+                manifest = json.load(file_obj)
+        except (IOError, ValueError) as ex:
+            LOGGER.warning("Manifest '%s' could not be read, full build: %s", self._manifest_file, ex)
+            return empty_manifest
+        if manifest.get('version') != HtmlOutputBuilder.MANIFEST_VERSION:
+            return empty_manifest
+        if manifest.get('build_key') != self._build_key:
+            # outputs are kept (their hashes avoid rewriting unchanged files)
+            LOGGER.info("Template or mode changed since the last build, all the files are rendered")
+            return dict(empty_manifest, outputs=manifest.get('outputs', {}))
+        return manifest
+
+    def _write_atomic(self, relative_path, content):
+        # type: (str, str) -> None
+        """Writes an output file (temporary file renamed over the target)
+        """
+        output_file = os.path.join(self._output_dir, relative_path)
+        output_dir = os.path.dirname(output_file)
+        os.makedirs(output_dir, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file_obj:
+                file_obj.write(content)
+            os.replace(temp_path, output_file)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _remove_output(self, relative_path):
+        # type: (str) -> None
+        """Removes an output file and its directories once they are empty
+        (ex. the directory of a groovy file in 'function' mode)
+        """
+        os.remove(os.path.join(self._output_dir, relative_path))
+        output_dir = os.path.dirname(relative_path.replace('/', os.sep))
+        while output_dir:
+            try:
+                os.rmdir(os.path.join(self._output_dir, output_dir))
+            except OSError:
+                # not empty
+                return
+            output_dir = os.path.dirname(output_dir)
+
+    def _render_page(self, title, body):
+        # type: (str, str) -> str
+        return self._page_template.replace(PAGE_TITLE_PLACEHOLDER, html.escape(title)).replace(
+            TARGET_PLACEHOLDER, convert_storage_to_html(body))
+
+    def _render_source(self, groovy_file, relative_source):
+        # type: (str, str) -> (dict, list[str])
+        """Parses and renders a groovy file
+
+        :return: tuple ({output relative path: content}, function names)
+        """
+        groovy_functions = GroovyDocParser.parse_file(groovy_file).get_groovy_functions()
+        output_base = '{}/{}'.format(SOURCE_OUTPUT_DIR, os.path.splitext(relative_source)[0])
+        outputs = collections.OrderedDict()
+        if self._mode == OUTPUT_PER_FILE:
+            outputs[output_base + '.html'] = self._render_page(
+                relative_source, self._renderer.render_functions(
+                    groovy_functions.values(), file_name=relative_source))
+        else:
+            for function_name, function_obj in groovy_functions.items():
+                outputs['{}/{}.html'.format(output_base, function_name)] = self._render_page(
+                    get_symbol_name(function_name, relative_source),
+                    self._renderer.render_function(function_obj, file_name=relative_source))
+        return outputs, list(groovy_functions.keys())
+
+    def _render_index(self, sources):
+        # type: (dict) -> str
+        """Returns the index page with the links to all the outputs
+        """
+        index_content = ['<ul>']
+        for relative_source in sorted(sources):
+            source_entry = sources[relative_source]
+            if self._mode == OUTPUT_PER_FILE:
+                index_content.append('<li><a href="{}">{}</a> ({})</li>'.format(
+                    html.escape(source_entry['outputs'][0]), html.escape(relative_source),
+                    html.escape(', '.join(source_entry['functions']))))
+                continue
+            index_content.append('<li>{}<ul>'.format(html.escape(relative_source)))
+            for output, function_name in zip(source_entry['outputs'], source_entry['functions']):
+                index_content.append('<li><a href="{}">{}</a></li>'.format(
+                    html.escape(output), html.escape(function_name)))
+            index_content.append('</ul></li>')
+        index_content.append('</ul>')
+        return self._render_page('Index', '\n'.join(index_content))
+
+    def build(self, source, force=False):
+        # type: (str, [bool]) -> HtmlBuildReport
+        """Builds the HTML documentation of a groovy file or directory
+
+        :param source: groovy file or directory (searched recursively)
+        :param force: (optional) if set, all the files are parsed and written again
+            (outputs of the last build that no longer exist are still removed)
+        :return: HtmlBuildReport instance
+        """
+        start_time = time.perf_counter()
+        previous_manifest = self._load_manifest()
+        # outputs of the last build are only reused without force
+        reused_manifest = previous_manifest if not force else dict(previous_manifest, sources={}, outputs={})
+        source_dir = source if os.path.isdir(source) else os.path.dirname(source)
+
+        sources = {}
+        outputs = {}
+        written = unchanged = parsed = 0
+        for groovy_file in GroovydocPublisher.find_groovy_files(source):
+            relative_source = os.path.relpath(groovy_file, source_dir).replace(os.sep, '/')
+            file_stat = os.stat(groovy_file)
+            file_key = [file_stat.st_mtime_ns, file_stat.st_size]
+            previous_entry = reused_manifest['sources'].get(relative_source)
+            if previous_entry is not None and previous_entry['file_key'] == file_key and all(
+                    output in reused_manifest['outputs']
+                    and os.path.exists(os.path.join(self._output_dir, output))
+                    for output in previous_entry['outputs']):
+                sources[relative_source] = previous_entry
+                for output in previous_entry['outputs']:
+                    outputs[output] = reused_manifest['outputs'][output]
+                    unchanged += 1
+                continue
+
+            parsed += 1
+            rendered_outputs, function_names = self._render_source(groovy_file, relative_source)
+            for output, content in rendered_outputs.items():
+                content_hash = get_text_sha256(content)
+                outputs[output] = content_hash
+                if reused_manifest['outputs'].get(output) == content_hash \
+                        and os.path.exists(os.path.join(self._output_dir, output)):
+                    unchanged += 1
+                    continue
+                self._write_atomic(output, content)
+                written += 1
+            sources[relative_source] = {
+                'file_key': file_key,
+                'outputs': list(rendered_outputs.keys()),
+                'functions': function_names
+            }
+
+        index_content = self._render_index(sources)
+        index_hash = get_text_sha256(index_content)
+        if reused_manifest['outputs'].get(INDEX_FILE_NAME) == index_hash \
+                and os.path.exists(os.path.join(self._output_dir, INDEX_FILE_NAME)):
+            unchanged += 1
+        else:
+            self._write_atomic(INDEX_FILE_NAME, index_content)
+            written += 1
+        outputs[INDEX_FILE_NAME] = index_hash
+
+        removed = 0
+        for output in previous_manifest['outputs']:
+            output_file = os.path.join(self._output_dir, output)
+            if output not in outputs and os.path.exists(output_file):
+                self._remove_output(output)
+                removed += 1
+
+        self._write_atomic(HtmlOutputBuilder.MANIFEST_FILE_NAME, json.dumps({
+            'version': HtmlOutputBuilder.MANIFEST_VERSION,
+            'build_key': self._build_key,
+            'sources': sources,
+            'outputs': outputs
+        }, sort_keys=True))
+
+        report = HtmlBuildReport(written, unchanged, removed, parsed, time.perf_counter() - start_time)
+        LOGGER.info("HTML build of '%s' into '%s': %s written, %s unchanged, %s removed "
+                    "(%s groovy files parsed) in %.3fs", source, self._output_dir,
+                    written, unchanged, removed, parsed, report.seconds)
+        return report
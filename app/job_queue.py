@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a durable queue (SQLite in WAL mode) of page publish jobs.
+
+Every page of a publish run is one job with its status, number of
+attempts and the content hash of its sources and template version.
+An interrupted run is resumed by enqueueing the same jobs again: jobs
+already done with the same content hash are not published again. Several worker processes
+can drain the same queue file: jobs are claimed in a write transaction,
+so each job is only claimed by one worker at a time.
+"""
+
+import collections
+import contextlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from utils.cache_utils import get_cache_dir
+from utils.hash_utils import get_text_sha256
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# status of the jobs
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+JOB_STATUSES = (JOB_PENDING, JOB_RUNNING, JOB_DONE, JOB_FAILED)
+
+# job of the queue
+QueuedJob = collections.namedtuple(
+    'QueuedJob',
+    ['job_id', 'run_id', 'source', 'template_page', 'target_page', 'content_hash',
+     'status', 'attempts', 'worker', 'error', 'updated_at']
+)
+
+
+def get_worker_id():
+    # type: () -> str
+    """Returns an id of the current worker (host, process and thread)
+    """
+    return '{}:{}:{}'.format(socket.gethostname(), os.getpid(), threading.current_thread().name)
+
+
+def get_content_hash(source_hash, template_version):
+    # type: (str, str) -> str
+    """Returns the content hash of a job: a job is published again when
+    its sources or its template page changed
+
+    :param source_hash: hash of the sources (see GroovydocPublisher.get_source_hash)
+    :param template_version: version number of the template page
+    :return: hex digest string
+    """
+    return get_text_sha256('{} {}'.format(source_hash, template_version))
+
+
+class JobQueue(object):
+    """Durable queue of publish jobs.
+
+    A job is identified by its run and its target page. A claimed job
+    is leased to its worker: if the worker dies, the job can be claimed
+    again once the lease expires. Failed jobs are retried until they
+    reach the max number of attempts.
+    """
+
+    DEFAULT_FILE_NAME = 'publish_queue.sqlite'
+
+    # seconds to wait for the lock of the database held by other workers
+    BUSY_TIMEOUT = 30.0
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "  job_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        "  run_id TEXT NOT NULL,"
+        "  source TEXT NOT NULL,"
+        "  template_page TEXT NOT NULL,"
+        "  target_page TEXT NOT NULL,"
+        "  content_hash TEXT,"
+        "  status TEXT NOT NULL,"
+        "  attempts INTEGER NOT NULL DEFAULT 0,"
+        "  worker TEXT,"
+        "  error TEXT,"
+        "  claimed_at REAL,"
+        "  updated_at REAL NOT NULL,"
+        "  UNIQUE (run_id, target_page))",
+        "CREATE INDEX IF NOT EXISTS jobs_run_status ON jobs (run_id, status)",
+    )
+
+    _COLUMNS = ("job_id, run_id, source, template_page, target_page, content_hash, "
+                "status, attempts, worker, error, updated_at")
+
+    def __init__(self, db_file=None, max_attempts=3, lease_timeout=600.0):
+        # type: ([str], [int], [float]) -> None
+        """
+
+        :param db_file: (optional) path of the SQLite file of the queue.
+            if None, the file is created in the local cache directory.
+        :param max_attempts: (optional) number of attempts of a job before it is failed
+        :param lease_timeout: (optional) seconds after which a running job whose
+            worker did not finish it can be claimed by another worker
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts should be at least 1: '{}'".format(max_attempts))
+        if db_file is None:
+            db_file = os.path.join(get_cache_dir(), JobQueue.DEFAULT_FILE_NAME)
+        self._db_file = db_file
+        self._max_attempts = max_attempts
+        self._lease_timeout = lease_timeout
+        self._lock = threading.Lock()
+        # autocommit mode: write transactions are opened explicitly (BEGIN IMMEDIATE)
+        self._connection = sqlite3.connect(
+            db_file, timeout=JobQueue.BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            for statement in JobQueue._SCHEMA:
+                self._connection.execute(statement)
+
+    @property
+    def db_file(self):
+        # type: () -> str
+        """Returns the path of the SQLite file of the queue
+        """
+        return self._db_file
+
+    def close(self):
+        # type: () -> None
+        """Closes the connection to the queue database
+        """
+        with self._lock:
+            self._connection.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Write transaction. The database lock is taken at the beginning
+        (BEGIN IMMEDIATE), so reads inside it are not changed by other workers.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def enqueue(self, run_id, source, template_page, target_page, content_hash=None):
+        # type: (str, str, str, str, [str]) -> bool
+        """Adds the publish job of a target page to a run.
+
+        If the run already has a job for the page:
+        - a job done with the same sources, template page and content hash is kept
+          (not published again).
+        - a pending or running job with the same sources is kept as it is.
+        - otherwise (failed, changed or without content hash) the job is updated
+          and set pending again (attempts reset).
+
+        :param run_id: name of the publish run
+        :param source: groovy file or directory to publish
+        :param template_page: id of the template page with the function block
+        :param target_page: id of the page in which the documentation is generated
+        :param content_hash: (optional) hash of the sources and the template version
+            (see get_content_hash)
+        :return: True if the job is pending after the call (new or changed)
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT source, template_page, content_hash, status FROM jobs "
+                "WHERE run_id = ? AND target_page = ?",
+                (run_id, str(target_page))).fetchone()
+            if row is None:
+                connection.execute(
+                    "INSERT INTO jobs (run_id, source, template_page, target_page, "
+                    "content_hash, status, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, source, str(template_page), str(target_page),
+                     content_hash, JOB_PENDING, now))
+                return True
+            if row[:3] == (source, str(template_page), content_hash):
+                if row[3] in (JOB_PENDING, JOB_RUNNING):
+                    return row[3] == JOB_PENDING
+                if row[3] == JOB_DONE and content_hash is not None:
+                    return False
+            connection.execute(
+                "UPDATE jobs SET source = ?, template_page = ?, content_hash = ?, status = ?, "
+                "attempts = 0, worker = NULL, error = NULL, claimed_at = NULL, updated_at = ? "
+                "WHERE run_id = ? AND target_page = ?",
+                (source, str(template_page), content_hash, JOB_PENDING, now,
+                 run_id, str(target_page)))
+            return True
+
+    def claim(self, run_id, worker=None):
+        # type: (str, [str]) -> QueuedJob
+        """Claims the next job of a run: a pending job, a failed job with
+        attempts left or a running job whose lease expired.
+
+        :param run_id: name of the publish run
+        :param worker: (optional) id of the worker (default: host, process and thread)
+        :return: claimed QueuedJob (status running). None if there is nothing left to claim.
+        """
+        worker = worker or get_worker_id()
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT job_id FROM jobs WHERE run_id = ? AND ("
+                "  status = ?"
+                "  OR (status = ? AND attempts < ?)"
+                "  OR (status = ? AND claimed_at < ?)"
+                ") ORDER BY job_id LIMIT 1",
+                (run_id, JOB_PENDING, JOB_FAILED, self._max_attempts,
+                 JOB_RUNNING, now - self._lease_timeout)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, "
+                "claimed_at = ?, updated_at = ? WHERE job_id = ?",
+                (JOB_RUNNING, worker, now, now, row[0]))
+            return QueuedJob(*connection.execute(
+                "SELECT {} FROM jobs WHERE job_id = ?".format(JobQueue._COLUMNS),
+                (row[0],)).fetchone())
+
+    def _finish(self, job, status, error):
+        # type: (QueuedJob, str, [str]) -> bool
+        """Sets the final status of a claimed job (only if the worker still owns it)
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = ? AND worker = ?",
+                (status, error, time.time(), job.job_id, JOB_RUNNING, job.worker))
+        if cursor.rowcount == 0:
+            LOGGER.warning("Job %s (page '%s') is no longer owned by worker '%s' "
+                           "(lease expired?)", job.job_id, job.target_page, job.worker)
+            return False
+        return True
+
+    def complete(self, job):
+        # type: (QueuedJob) -> bool
+        """Marks a claimed job as done
+
+        :param job: QueuedJob returned by claim
+        :return: False if the job was no longer owned by its worker
+        """
+        return self._finish(job, JOB_DONE, None)
+
+    def fail(self, job, error):
+        # type: (QueuedJob, str) -> bool
+        """Marks a claimed job as failed. It is claimed again while it has attempts left.
+
+        :param job: QueuedJob returned by claim
+        :param error: error message of the attempt
+        :return: False if the job was no longer owned by its worker
+        """
+        return self._finish(job, JOB_FAILED, str(error))
+
+    def release_running(self, run_id):
+        # type: (str) -> int
+        """Sets the running jobs of a run pending again, without waiting for their
+        lease (only safe when no other worker of the run is alive)
+
+        :param run_id: name of the publish run
+        :return: number of released jobs
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, claimed_at = NULL, updated_at = ? "
+                "WHERE run_id = ? AND status = ?",
+                (JOB_PENDING, time.time(), run_id, JOB_RUNNING))
+        return cursor.rowcount
+
+    def retry_failed(self, run_id):
+        # type: (str) -> int
+        """Sets the failed jobs of a run pending again with their attempts reset
+
+        :param run_id: name of the publish run
+        :return: number of jobs set pending
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, error = NULL, updated_at = ? "
+                "WHERE run_id = ? AND status = ?",
+                (JOB_PENDING, time.time(), run_id, JOB_FAILED))
+        return cursor.rowcount
+
+    def get_counts(self, run_id):
+        # type: (str) -> dict
+        """Returns the number of jobs of a run per status
+
+        :param run_id: name of the publish run
+        :return: dictionary {status: number of jobs}
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status",
+                (run_id,)).fetchall()
+        counts = dict((status, 0) for status in JOB_STATUSES)
+        counts.update(rows)
+        return counts
+
+    def get_jobs(self, run_id, status=None):
+        # type: (str, [str]) -> list[QueuedJob]
+        """Returns the jobs of a run (in enqueue order)
+
+        :param run_id: name of the publish run
+        :param status: (optional) only the jobs with this status
+        """
+        query = "SELECT {} FROM jobs WHERE run_id = ?".format(JobQueue._COLUMNS)
+        params = [run_id]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY job_id", params).fetchall()
+        return [QueuedJob(*row) for row in rows]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module to split the documentation of a big library into child pages
+(shards) of the target page, which gets an overview of the shards.
+
+Shards are planned by size budget (bytes of rendered functions),
+function count or source file. Functions are never split. For the size
+and count budgets, shard boundaries are content defined: once a shard
+is half full, it ends after a function whose name hash matches a
+pattern. A change in one function then only moves the boundaries
+around it, so the other shards keep the same functions and content.
+
+Shards of the size and count budgets are titled after the parent page
+and their position ('Parent - Part 2'), shards of the file strategy
+after their file. A function inserted at a boundary then only changes
+the content of the shards, so their pages are updated instead of being
+deleted and created again with another title.
+
+A shard manifest keeps the content hash and page id of every published
+shard: only changed shards are published again. Shards that no longer
+exist are found in the child pages of the parent page (see
+is_shard_title), so they are deleted even without the manifest of a
+previous publish (ex. on a new build agent).
+"""
+
+import collections
+import html
+import json
+import logging
+import os
+import re
+import tempfile
+import zlib
+
+from utils.cache_utils import get_cache_dir
+from utils.symbol_table import get_anchor_link
+from utils.symbol_table import get_function_anchor
+from utils.symbol_table import get_symbol_name
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+SHARD_BY_SIZE = 'size'
+SHARD_BY_COUNT = 'count'
+SHARD_BY_FILE = 'file'
+
+SHARD_STRATEGIES = (SHARD_BY_SIZE, SHARD_BY_COUNT, SHARD_BY_FILE)
+
+# default budgets of the strategies (bytes / functions per shard)
+DEFAULT_SHARD_BUDGETS = {
+    SHARD_BY_SIZE: 256 * 1024,
+    SHARD_BY_COUNT: 50
+}
+
+# a shard may end after a function if crc32(name) % modulus == 0
+BOUNDARY_MODULUS = 4
+
+# title of the shards of the size and count budgets (position starts at 1)
+SHARD_PART_TITLE_FORMAT = '{parent} - Part {number}'
+
+# extension of the groovy files (titles of the shards of the file strategy)
+GROOVY_FILE_EXTENSION = '.groovy'
+
+# function to place in a shard
+# - file: path of the groovy file (relative to the source)
+# - size: bytes of the rendered function
+ShardItem = collections.namedtuple('ShardItem', ['file', 'function', 'size'])
+
+# planned child page: title and its ShardItems
+Shard = collections.namedtuple('Shard', ['title', 'items'])
+
+
+class ShardPublishError(Exception):
+    """Raised when some shards could not be published"""
+
+
+def _is_boundary(function_name):
+    # type: (str) -> bool
+    return zlib.crc32(function_name.encode('utf-8')) % BOUNDARY_MODULUS == 0
+
+
+def _get_unique_title(title, titles):
+    # type: (str, set) -> str
+    """Returns the title, with a counter if it is already used
+    """
+    unique_title = title
+    counter = 2
+    while unique_title in titles:
+        unique_title = '{} ({})'.format(title, counter)
+        counter += 1
+    titles.add(unique_title)
+    return unique_title
+
+
+def plan_shards(items, parent_title, strategy=SHARD_BY_SIZE, budget=None):
+    # type: (list[ShardItem], str, [str], [int]) -> list[Shard]
+    """Splits the functions into shards
+
+    :param items: list of ShardItem (in page order)
+    :param parent_title: title of the parent page (prefix of the shard titles)
+    :param strategy: (optional) 'size', 'count' or 'file'
+    :param budget: (optional) max bytes ('size') or functions ('count') per shard.
+        A function bigger than the size budget gets its own shard.
+    :return: list of Shard
+    :raises ValueError: if the strategy or the budget is not valid
+    """
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError("Unknown shard strategy '{}' (expected one of: {})".format(
+            strategy, ', '.join(SHARD_STRATEGIES)))
+    shards = []
+    if strategy == SHARD_BY_FILE:
+        titles = set()
+        items_by_file = collections.OrderedDict()
+        for item in items:
+            items_by_file.setdefault(item.file, []).append(item)
+        for file_name, file_items in items_by_file.items():
+            shards.append(Shard(
+                _get_unique_title('{} - {}'.format(parent_title, file_name), titles), file_items))
+        return shards
+
+    if budget is None:
+        budget = DEFAULT_SHARD_BUDGETS[strategy]
+    if budget < 1:
+        raise ValueError("Shard budget should be at least 1: '{}'".format(budget))
+
+    def get_measure(item):
+        return item.size if strategy == SHARD_BY_SIZE else 1
+
+    def add_shard(shard_items):
+        shards.append(Shard(
+            SHARD_PART_TITLE_FORMAT.format(parent=parent_title, number=len(shards) + 1),
+            shard_items))
+
+    shard_items = []
+    shard_measure = 0
+    for item in items:
+        if shard_items and shard_measure + get_measure(item) > budget:
+            add_shard(shard_items)
+            shard_items = []
+            shard_measure = 0
+        shard_items.append(item)
+        shard_measure += get_measure(item)
+        if shard_measure * 2 >= budget and _is_boundary(item.function):
+            add_shard(shard_items)
+            shard_items = []
+            shard_measure = 0
+    if shard_items:
+        add_shard(shard_items)
+    return shards
+
+
+def is_shard_title(title, parent_title):
+    # type: (str, str) -> bool
+    """Returns True if a child page title is the title of a shard of the
+    parent page (of any strategy), so stale shards can be found in the
+    child pages without deleting other children of the parent page
+    """
+    shard_title_match = re.match(r'{} - (.+)$'.format(re.escape(parent_title)), title)
+    if shard_title_match is None:
+        return False
+    shard_name = re.sub(r' \(\d+\)$', '', shard_title_match.group(1))
+    return re.match(r'Part \d+$', shard_name) is not None \
+        or shard_name.lower().endswith(GROOVY_FILE_EXTENSION)
+
+
+def render_overview(shards):
+    # type: (list[Shard]) -> str
+    """Returns the overview of the shards in storage format: one row per
+    shard with the link to its page and the links to its functions
+    """
+    overview_content = ['<table><tbody><tr><th>Page</th><th>Functions</th></tr>']
+    for shard in shards:
+        overview_content.append(
+            '<tr><td><ac:link><ri:page ri:content-title="{title}"/></ac:link></td>'
+            '<td>{functions}</td></tr>'.format(
+                title=html.escape(shard.title),
+                functions=', '.join(
+                    get_anchor_link(get_function_anchor(item.function, item.file),
+                                    get_symbol_name(item.function, item.file), shard.title)
+                    for item in shard.items)))
+    overview_content.append('</tbody></table>')
+    return ''.join(overview_content)
+
+
+class ShardManifest(object):
+    """Content hashes and page ids of the published shards of a parent page
+    (json file in the local cache directory)
+    """
+
+    def __init__(self, parent_page, manifest_dir=None):
+        # type: (str, [str]) -> None
+        """
+
+        :param parent_page: id of the parent page of the shards
+        :param manifest_dir: (optional) directory of the manifests
+            (default: 'shards' of the cache directory)
+        """
+        manifest_dir = manifest_dir if manifest_dir is not None else get_cache_dir('shards')
+        self._manifest_dir = manifest_dir
+        self._manifest_file = os.path.join(manifest_dir, '{}.json'.format(parent_page))
+        self.shards = {}
+        self.overview_hash = None
+        if os.path.exists(self._manifest_file):
+            try:
+                with open(self._manifest_file, 'r', encoding='utf-8') as file_obj:
+                    manifest = json.load(file_obj)
+                self.shards = manifest['shards']
+                self.overview_hash = manifest['overview_hash']
+            except (IOError, ValueError, KeyError) as ex:
+                LOGGER.warning("Shard manifest '%s' could not be read, all the shards "
+                               "are published: %s", self._manifest_file, ex)
+
+    def get_hash(self, title):
+        # type: (str) -> str
+        """Returns the content hash of a published shard (None if unknown)
+        """
+        return self.shards.get(title, {}).get('hash')
+
+    def save(self):
+        # type: () -> None
+        """Writes the manifest (temporary file renamed over the manifest file)
+        """
+        os.makedirs(self._manifest_dir, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self._manifest_dir, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file_obj:
+                json.dump({'shards': self.shards, 'overview_hash': self.overview_hash},
+                          file_obj, sort_keys=True)
+            os.replace(temp_path, self._manifest_file)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
@@ -0,0 +1,471 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a long running publisher of groovy documentation.
+
+Publish jobs are received over a local HTTP port or a unix socket and
+run by a bounded pool of workers that share one GroovydocPublisher
+(warm parse, render and template caches) and one pooled client.
+
+HTTP interface (json):
+- POST /jobs        {"source": ..., "template_page": ..., "target_page": ..., "wait": false}
+                    (Content-Type: application/json)
+                    202 with the queued job (200 with the finished job if "wait")
+                    403 if the source is not inside the source roots of the daemon
+                    415 if the body is not json
+                    503 if the queue is full
+- GET  /jobs/<id>   status of a job
+- GET  /metrics     queue depth, workers, job counters and timings, cache info
+- GET  /health      200 while the daemon is running
+
+If the server has a token, the requests (except /health) must send it
+in an 'Authorization: Bearer <token>' header (401 otherwise).
+"""
+
+import collections
+import hmac
+import http.server
+import itertools
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# status of the publish jobs
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the job queue is full"""
+
+
+class SourceNotAllowedError(Exception):
+    """Raised when a job is submitted with a source outside the source roots"""
+
+
+class PublishJob(object):
+    """Publish job of a groovy file or directory into a target page
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, source, template_page, target_page):
+        # type: (str, str, str) -> None
+        """
+
+        :param source: groovy file or directory to publish
+        :param template_page: id of the template page with the function block
+        :param target_page: id of the page in which the documentation is generated
+        """
+        self.id = str(next(PublishJob._ids))
+        self.source = source
+        self.template_page = str(template_page)
+        self.target_page = str(target_page)
+        self.status = JOB_QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    @property
+    def finished(self):
+        # type: () -> bool
+        """Returns True if the job is done or failed
+        """
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        # type: ([float]) -> bool
+        """Waits until the job is finished
+
+        :param timeout: (optional) max seconds to wait
+        :return: True if the job is finished
+        """
+        return self._finished.wait(timeout)
+
+    def start(self):
+        # type: () -> None
+        """Marks the job as running
+        """
+        self.status = JOB_RUNNING
+        self.started_at = time.time()
+
+    def finish(self, result=None, error=None):
+        # type: ([PublishResult], [Exception]) -> None
+        """Marks the job as done (or failed if there is an error)
+        and wakes up the clients waiting for it
+        """
+        self.status = JOB_DONE if error is None else JOB_FAILED
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self._finished.set()
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns the job as a json serializable dictionary
+        """
+        return {
+            'id': self.id,
+            'source': self.source,
+            'template_page': self.template_page,
+            'target_page': self.target_page,
+            'status': self.status,
+            'result': None if self.result is None else dict(self.result._asdict()),
+            'error': None if self.error is None else str(self.error),
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class PublisherDaemon(object):
+    """Runs publish jobs with a bounded pool of workers.
+
+    Jobs wait in a bounded queue: submits are rejected (QueueFullError)
+    when it is full, so the clients can retry later instead of piling up
+    jobs in memory. The last finished jobs are kept to answer status requests.
+    """
+
+    def __init__(self, publisher, max_workers=4, max_queue=100, history_size=1000,
+                 source_roots=None):
+        # type: (GroovydocPublisher, [int], [int], [int], [list]) -> None
+        """
+
+        :param publisher: GroovydocPublisher shared by the workers
+        :param max_workers: (optional) number of jobs run at the same time
+        :param max_queue: (optional) max number of jobs waiting for a worker
+        :param history_size: (optional) number of finished jobs kept in memory
+        :param source_roots: (optional) directories in which the sources of
+            the jobs must be (symbolic links resolved). if None, any source is published.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers should be at least 1: '{}'".format(max_workers))
+        if max_queue < 1:
+            raise ValueError("max_queue should be at least 1: '{}'".format(max_queue))
+        self._publisher = publisher
+        self._source_roots = None if source_roots is None else [
+            os.path.realpath(source_root) for source_root in source_roots]
+        self._max_workers = max_workers
+        self._history_size = history_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = collections.OrderedDict()
+        self._workers = []
+        self._running = 0
+        self._max_queue_depth = 0
+        self._counters = collections.Counter()
+        self._wait_time = 0.0
+        self._run_time = 0.0
+        self._started_at = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        # type: () -> None
+        """Starts the workers
+        """
+        self._started_at = time.time()
+        for index in range(self._max_workers):
+            worker = threading.Thread(
+                target=self._work, name='publisher-worker-{}'.format(index), daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        LOGGER.info("Publisher started with %s workers (max queue: %s)",
+                    self._max_workers, self._queue.maxsize)
+
+    def stop(self, timeout=None):
+        # type: ([float]) -> None
+        """Stops the workers once the queued jobs are finished
+
+        :param timeout: (optional) max seconds to wait for each worker
+        """
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        LOGGER.info("Publisher stopped")
+
+    def is_allowed_source(self, source):
+        # type: (str) -> bool
+        """Returns True if the source is inside one of the source roots
+        (always True if the daemon has no source roots)
+        """
+        if self._source_roots is None:
+            return True
+        real_source = os.path.realpath(source)
+        return any(os.path.commonpath([source_root, real_source]) == source_root
+                   for source_root in self._source_roots)
+
+    def submit(self, source, template_page, target_page):
+        # type: (str, str, str) -> PublishJob
+        """Queues a publish job
+
+        :param source: groovy file or directory to publish
+        :param template_page: id of the template page with the function block
+        :param target_page: id of the page in which the documentation is generated
+        :return: queued PublishJob
+        :raises SourceNotAllowedError: if the source is not inside the source roots
+        :raises QueueFullError: if the job queue is full
+        """
+        if not self.is_allowed_source(source):
+            raise SourceNotAllowedError("Source is not inside the source roots: '{}'".format(source))
+        job = PublishJob(source, template_page, target_page)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise QueueFullError("Job queue is full ({} jobs)".format(self._queue.maxsize))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._counters['submitted'] += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+            self._trim_history()
+        LOGGER.debug("Job %s queued: '%s' -> page '%s'", job.id, source, target_page)
+        return job
+
+    def get_job(self, job_id):
+        # type: (str) -> PublishJob
+        """Returns a job by id (None if it is unknown or no longer in the history)
+        """
+        with self._lock:
+            return self._jobs.get(str(job_id))
+
+    def _trim_history(self):
+        # type: () -> None
+        """Removes the oldest finished jobs over the history size (lock must be held)
+        """
+        finished_ids = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished_ids[:max(0, len(self._jobs) - self._history_size)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        # type: () -> None
+        """Worker loop: runs queued jobs until a stop sentinel (None) is received
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.start()
+            with self._lock:
+                self._running += 1
+                self._wait_time += job.started_at - job.submitted_at
+            try:
+                result = self._publisher.publish(job.source, job.template_page, job.target_page)
+            except Exception as ex:
+                LOGGER.error("Job %s ('%s' -> page '%s') failed: %s",
+                             job.id, job.source, job.target_page, ex)
+                job.finish(error=ex)
+            else:
+                job.finish(result=result)
+            with self._lock:
+                self._running -= 1
+                self._counters[job.status] += 1
+                self._run_time += job.finished_at - job.started_at
+
+    def get_metrics(self):
+        # type: () -> dict
+        """Returns the metrics of the daemon as a json serializable dictionary
+        """
+        with self._lock:
+            finished = self._counters[JOB_DONE] + self._counters[JOB_FAILED]
+            started = finished + self._running
+            metrics = {
+                'uptime': time.time() - self._started_at if self._started_at else 0.0,
+                'workers': self._max_workers,
+                'running': self._running,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_queue_depth,
+                'queue_size': self._queue.maxsize,
+                'submitted': self._counters['submitted'],
+                'rejected': self._counters['rejected'],
+                'done': self._counters[JOB_DONE],
+                'failed': self._counters[JOB_FAILED],
+                'avg_wait_time': self._wait_time / started if started else 0.0,
+                'avg_run_time': self._run_time / finished if finished else 0.0
+            }
+        metrics['caches'] = self._publisher.get_cache_info()
+        return metrics
+
+
+class PublisherRequestHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP handler of the publisher daemon (see module docstring)
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    # seconds the clients are asked to wait when the queue is full
+    RETRY_AFTER = 5
+
+    # max size in bytes of the body of a job request
+    MAX_BODY_SIZE = 64 * 1024
+
+    def address_string(self):
+        # unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, data, headers=None):
+        # type: (int, dict, [dict]) -> None
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _is_authorized(self):
+        # type: () -> bool
+        """Returns True if the server has no token or the request sends it.
+        A 401 response is sent otherwise.
+        """
+        token = self.server.token
+        if token is None:
+            return True
+        authorization = self.headers.get('Authorization', '')
+        if hmac.compare_digest(authorization.encode('utf-8'), 'Bearer {}'.format(token).encode('utf-8')):
+            return True
+        self._send_json(401, {'error': 'missing or invalid token'}, {'WWW-Authenticate': 'Bearer'})
+        return False
+
+    def _read_job_request(self):
+        # type: () -> dict
+        """Returns the json body of a job request. An error response
+        is sent (and None returned) if the body is not a json object.
+        """
+        content_length = int(self.headers.get('Content-Length') or 0)
+        if content_length > self.MAX_BODY_SIZE:
+            # the body is not read: the connection cannot be reused
+            self.close_connection = True
+            self._send_json(413, {'error': 'request body over {} bytes'.format(self.MAX_BODY_SIZE)})
+            return None
+        request_body = self.rfile.read(content_length)
+        if self.headers.get_content_type() != 'application/json':
+            self._send_json(415, {'error': 'Content-Type should be application/json'})
+            return None
+        try:
+            request = json.loads(request_body.decode('utf-8'))
+        except ValueError as ex:
+            self._send_json(400, {'error': 'invalid job: {}'.format(ex)})
+            return None
+        if not isinstance(request, dict):
+            self._send_json(400, {'error': 'invalid job: not a json object'})
+            return None
+        return request
+
+    def do_GET(self):
+        daemon = self.server.publisher_daemon
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif not self._is_authorized():
+            return
+        elif path == '/metrics':
+            self._send_json(200, daemon.get_metrics())
+        elif path.startswith('/jobs/'):
+            job = daemon.get_job(path[len('/jobs/'):])
+            if job is None:
+                self._send_json(404, {'error': 'unknown job'})
+            else:
+                self._send_json(200, job.to_dict())
+        else:
+            self._send_json(404, {'error': 'unknown path'})
+
+    def do_POST(self):
+        daemon = self.server.publisher_daemon
+        if self.path.split('?', 1)[0].rstrip('/') != '/jobs':
+            self.close_connection = True
+            self._send_json(404, {'error': 'unknown path'})
+            return
+        if not self._is_authorized():
+            self.close_connection = True
+            return
+        request = self._read_job_request()
+        if request is None:
+            return
+        try:
+            source = request['source']
+            template_page = request['template_page']
+            target_page = request['target_page']
+            if not isinstance(source, str):
+                raise TypeError("source should be a string: '{}'".format(source))
+        except (KeyError, TypeError) as ex:
+            self._send_json(400, {'error': 'invalid job: {}'.format(ex)})
+            return
+        try:
+            job = daemon.submit(source, template_page, target_page)
+        except SourceNotAllowedError as ex:
+            self._send_json(403, {'error': str(ex)})
+            return
+        except QueueFullError as ex:
+            self._send_json(503, {'error': str(ex)}, {'Retry-After': str(self.RETRY_AFTER)})
+            return
+        if request.get('wait'):
+            job.wait()
+            self._send_json(200, job.to_dict())
+        else:
+            self._send_json(202, job.to_dict())
+
+
+class PublisherHTTPServer(http.server.ThreadingHTTPServer):
+    """HTTP server (local port) of the publisher daemon
+    """
+
+    def __init__(self, server_address, publisher_daemon, token=None):
+        # type: (tuple, PublisherDaemon, [str]) -> None
+        self.publisher_daemon = publisher_daemon
+        self.token = token
+        http.server.ThreadingHTTPServer.__init__(self, server_address, PublisherRequestHandler)
+
+
+class PublisherUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server (unix socket) of the publisher daemon
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, publisher_daemon, token=None):
+        # type: (str, PublisherDaemon, [str]) -> None
+        self.publisher_daemon = publisher_daemon
+        self.token = token
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, PublisherRequestHandler)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def create_server(publisher_daemon, host='127.0.0.1', port=0, socket_path=None, token=None):
+    # type: (PublisherDaemon, [str], [int], [str], [str]) -> socketserver.BaseServer
+    """Returns the server of the daemon (call serve_forever to start it)
+
+    :param publisher_daemon: PublisherDaemon that runs the jobs
+    :param host: (optional) host of the HTTP port
+    :param port: (optional) HTTP port (0: any free port)
+    :param socket_path: (optional) unix socket path. If set, it is used instead of the port
+    :param token: (optional) shared token the clients must send
+        ('Authorization: Bearer <token>' header)
+    :return: server instance
+    """
+    if socket_path:
+        return PublisherUnixServer(socket_path, publisher_daemon, token)
+    return PublisherHTTPServer((host, port), publisher_daemon, token)
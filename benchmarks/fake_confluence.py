@@ -0,0 +1,715 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+In-process fake Confluence REST server for benchmarks.
+
+It implements the subset of the REST API used by ConfluenceApi:
+- GET    /rest/api/user/current
+- GET    /rest/api/content                  (by title and space key)
+- POST   /rest/api/content                  (create page)
+- GET    /rest/api/content/{id}             (expand: version, space, body.storage)
+- PUT    /rest/api/content/{id}             (update page, version must be current + 1)
+- DELETE /rest/api/content/{id}
+- GET    /rest/api/content/{id}/child/page  (paginated)
+- GET    /rest/api/content/search           (CQL of type, space, ancestor, id and lastmodified, paginated)
+- GET    /rest/api/content/{id}/child/attachment  (by file name)
+- POST   /rest/api/content/{id}/child/attachment  (multipart upload)
+- POST   /rest/api/content/{id}/child/attachment/{attachment id}/data  (new version)
+- GET    /download/attachments/{id}/{file name}
+
+Pages and attachments are kept in memory with their version number.
+Latency, throttling (429 with Retry-After) and error injection are configurable.
+
+Usage:
+    with FakeConfluenceServer(latency=0.02) as server:
+        page_id = server.create_page('My Page', '<p>content</p>')
+        api = ConfluenceApi(server.url, 'user', 'password')
+"""
+
+import datetime
+import http.server
+import itertools
+import json
+import logging
+import mimetypes
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+REST_API_PATH = '/rest/api'
+
+DEFAULT_SPACE_KEY = 'BENCH'
+
+# date formats of the lastmodified conditions of the CQL queries
+CQL_DATE_FORMATS = ('%Y/%m/%d %H:%M', '%Y-%m-%d %H:%M', '%Y/%m/%d', '%Y-%m-%d')
+
+# supported CQL: conditions joined with 'and' and an optional order by lastmodified
+REGEX_CQL_CONDITION = re.compile(
+    r'\s*(?P<field>type|space|ancestor|id|lastmodified)\s*(?P<operator>>=|=|in)\s*'
+    r'(?P<value>"(?:[^"\\]|\\.)*"|\([^)]*\)|[\w.-]+)\s*(?:$|and\b)', re.IGNORECASE)
+REGEX_CQL_ORDER = re.compile(r'\s+order\s+by\s+lastmodified(?:\s+(asc|desc))?\s*$', re.IGNORECASE)
+REGEX_CQL_ESCAPE = re.compile(r'\\(.)')
+
+
+class FakeConfluenceStore(object):
+    """Thread safe in-memory store of the pages of the fake server
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._attachments = {}
+        self._ids = itertools.count(100000)
+
+    def create(self, title, space_key, body, parent_id=None):
+        # type: (str, str, str, [str]) -> dict
+        """Creates a page. Returns None if the title already exists in the space
+        """
+        with self._lock:
+            if self._find(title, space_key) is not None:
+                return None
+            page = {
+                'id': str(next(self._ids)),
+                'title': title,
+                'space_key': space_key,
+                'parent_id': parent_id,
+                'version': 1,
+                'body': body,
+                'when': datetime.datetime.utcnow().isoformat() + 'Z'
+            }
+            self._pages[page['id']] = page
+            return dict(page)
+
+    def update(self, page_id, title, body, version):
+        # type: (str, str, str, int) -> (dict, str)
+        """Updates a page with the next version.
+        Returns a tuple (page, error): error is 'not_found' or 'conflict'
+        """
+        with self._lock:
+            page = self._pages.get(page_id)
+            if page is None:
+                return None, 'not_found'
+            if version != page['version'] + 1:
+                return None, 'conflict'
+            page['version'] = version
+            page['title'] = title or page['title']
+            page['body'] = body
+            page['when'] = datetime.datetime.utcnow().isoformat() + 'Z'
+            return dict(page), None
+
+    def get(self, page_id):
+        # type: (str) -> dict
+        with self._lock:
+            page = self._pages.get(page_id)
+            return dict(page) if page is not None else None
+
+    def delete(self, page_id):
+        # type: (str) -> bool
+        with self._lock:
+            return self._pages.pop(page_id, None) is not None
+
+    def find(self, title, space_key):
+        # type: (str, str) -> dict
+        with self._lock:
+            page = self._find(title, space_key)
+            return dict(page) if page is not None else None
+
+    def _find(self, title, space_key):
+        # type: (str, str) -> dict
+        for page in self._pages.values():
+            if page['title'] == title and page['space_key'] == space_key:
+                return page
+        return None
+
+    def children(self, page_id):
+        # type: (str) -> list[dict]
+        with self._lock:
+            return [dict(page) for page in self._pages.values() if page['parent_id'] == page_id]
+
+    def pages(self):
+        # type: () -> list[dict]
+        with self._lock:
+            return [dict(page) for page in self._pages.values()]
+
+    def ancestor_ids(self, page_id):
+        # type: (str) -> list[str]
+        """Returns the ids of the ancestors of a page, from the root page to the parent
+        """
+        with self._lock:
+            ancestor_ids = []
+            page = self._pages.get(page_id)
+            while page is not None and page['parent_id']:
+                ancestor_ids.insert(0, page['parent_id'])
+                page = self._pages.get(page['parent_id'])
+            return ancestor_ids
+
+    def set_last_modified(self, page_id, when):
+        # type: (str, datetime.datetime) -> None
+        """Changes the last modification time of a page (ex. to test searches by date)
+        """
+        with self._lock:
+            self._pages[page_id]['when'] = when.isoformat() + 'Z'
+
+    def add_attachment(self, page_id, title, data, comment=None, media_type=None):
+        # type: (str, str, bytes, [str], [str]) -> (dict, str)
+        """Attaches a file to a page.
+        Returns a tuple (attachment, error): error is 'not_found' or 'exists'
+        """
+        with self._lock:
+            if page_id not in self._pages:
+                return None, 'not_found'
+            if self._find_attachment(page_id, title) is not None:
+                return None, 'exists'
+            attachment = {
+                'id': 'att{}'.format(next(self._ids)),
+                'page_id': page_id,
+                'title': title,
+                'version': 1,
+                'data': data,
+                'comment': comment,
+                'media_type': media_type
+            }
+            self._attachments[attachment['id']] = attachment
+            return dict(attachment), None
+
+    def update_attachment(self, page_id, attachment_id, data, comment=None):
+        # type: (str, str, bytes, [str]) -> dict
+        """Uploads a new version of an attachment. Returns None if it does not exist
+        """
+        with self._lock:
+            attachment = self._attachments.get(attachment_id)
+            if attachment is None or attachment['page_id'] != page_id:
+                return None
+            attachment['version'] += 1
+            attachment['data'] = data
+            attachment['comment'] = comment
+            return dict(attachment)
+
+    def find_attachment(self, page_id, title):
+        # type: (str, str) -> dict
+        with self._lock:
+            attachment = self._find_attachment(page_id, title)
+            return dict(attachment) if attachment is not None else None
+
+    def _find_attachment(self, page_id, title):
+        # type: (str, str) -> dict
+        for attachment in self._attachments.values():
+            if attachment['page_id'] == page_id and attachment['title'] == title:
+                return attachment
+        return None
+
+
+class FakeConfluenceServer(object):
+    """Fake Confluence server run in a background thread of the process
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=None, error_rate=0.0,
+                 error_status=500, retry_after=0.1, seed=None, host='127.0.0.1', port=0):
+        # type: ([float], [float], [float], [float], [int], [float], [int], [str], [int]) -> None
+        """
+
+        :param latency: (optional) seconds added to every response
+        :param jitter: (optional) max random seconds added to the latency
+        :param rate_limit: (optional) max requests per second. Requests over
+            the limit are answered with 429 and a Retry-After header.
+        :param error_rate: (optional) probability (0..1) of answering a request
+            with an injected error
+        :param error_status: (optional) HTTP status of the injected errors
+        :param retry_after: (optional) seconds of the Retry-After header of 429 responses
+        :param seed: (optional) seed of the random jitter / errors
+        :param host: (optional) host to listen on
+        :param port: (optional) port to listen on (0: any free port)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        # if set, attachment downloads are closed after half of the data
+        self.interrupt_downloads = False
+        self.store = FakeConfluenceStore()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        # token bucket of the rate limit
+        self._rate_limit = rate_limit
+        self._tokens = rate_limit
+        self._tokens_updated = time.monotonic()
+        self._tokens_lock = threading.Lock()
+        # request counters
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'throttled': 0, 'injected_errors': 0}
+
+        self._http_server = http.server.ThreadingHTTPServer((host, port), _FakeConfluenceHandler)
+        self._http_server.daemon_threads = True
+        self._http_server.fake_server = self
+        self._thread = None
+
+    @property
+    def url(self):
+        # type: () -> str
+        """Returns the base URL of the server. ex. http://127.0.0.1:8080
+        """
+        host, port = self._http_server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        # type: () -> FakeConfluenceServer
+        """Starts serving requests in a background thread
+        """
+        self._thread = threading.Thread(
+            target=self._http_server.serve_forever, name='fake-confluence', daemon=True)
+        self._thread.start()
+        LOGGER.debug("Fake confluence server listening on %s", self.url)
+        return self
+
+    def stop(self):
+        # type: () -> None
+        """Stops the server
+        """
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        # type: () -> FakeConfluenceServer
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def create_page(self, title, body, space_key=DEFAULT_SPACE_KEY, parent_id=None):
+        # type: (str, str, [str], [str]) -> str
+        """Creates a page directly in the store (ex. to seed a benchmark)
+
+        :return: id of the new page
+        """
+        page = self.store.create(title, space_key, body, parent_id)
+        if page is None:
+            raise ValueError("Page '{}' already exists in space '{}'".format(title, space_key))
+        return page['id']
+
+    def reset_stats(self):
+        # type: () -> None
+        with self._stats_lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def count(self, stat_name):
+        # type: (str) -> None
+        with self._stats_lock:
+            self.stats[stat_name] += 1
+
+    def get_delay(self):
+        # type: () -> float
+        """Returns the seconds a response is delayed
+        """
+        if not self.jitter:
+            return self.latency
+        with self._random_lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def inject_error(self):
+        # type: () -> bool
+        """Returns True if the current request should fail
+        """
+        if not self.error_rate:
+            return False
+        with self._random_lock:
+            return self._random.random() < self.error_rate
+
+    def acquire_token(self):
+        # type: () -> bool
+        """Returns False if the request is over the rate limit
+        """
+        if self._rate_limit is None:
+            return True
+        with self._tokens_lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._rate_limit,
+                self._tokens + (now - self._tokens_updated) * self._rate_limit)
+            self._tokens_updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class _FakeConfluenceHandler(http.server.BaseHTTPRequestHandler):
+    """Handler of the requests of the fake server
+    """
+
+    # keep alive connections (like a real server behind a pool)
+    protocol_version = 'HTTP/1.1'
+    # headers and body are sent together (no delayed ACK stalls)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    REGEX_CONTENT_ID = re.compile(r'^/content/(\d+)$')
+    REGEX_CHILD_PAGES = re.compile(r'^/content/(\d+)/child/page$')
+    REGEX_ATTACHMENTS = re.compile(r'^/content/(\d+)/child/attachment$')
+    REGEX_ATTACHMENT_DATA = re.compile(r'^/content/(\d+)/child/attachment/(\w+)/data$')
+    REGEX_DOWNLOAD = re.compile(r'^/download/attachments/(\d+)/([^/]+)$')
+
+    @property
+    def fake_server(self):
+        # type: () -> FakeConfluenceServer
+        return self.server.fake_server
+
+    def log_message(self, message_format, *args):
+        LOGGER.debug("%s - %s", self.address_string(), message_format % args)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method):
+        # type: (str) -> None
+        """Applies latency, throttling and error injection
+        and dispatches the request
+        """
+        fake_server = self.fake_server
+        fake_server.count('requests')
+        request_body = self._read_body()
+        delay = fake_server.get_delay()
+        if delay:
+            time.sleep(delay)
+
+        if not fake_server.acquire_token():
+            fake_server.count('throttled')
+            self._send_json(429, {'message': 'Rate limit exceeded'},
+                            {'Retry-After': str(fake_server.retry_after)})
+            return
+        if fake_server.inject_error():
+            fake_server.count('injected_errors')
+            self._send_json(fake_server.error_status, {'message': 'Injected error'})
+            return
+        if 'Authorization' not in self.headers:
+            self._send_json(401, {'message': 'Authentication required'})
+            return
+
+        url = urllib.parse.urlsplit(self.path)
+        download_match = self.REGEX_DOWNLOAD.match(url.path)
+        if download_match and method == 'GET':
+            self._send_download(download_match.group(1), urllib.parse.unquote(download_match.group(2)))
+            return
+        if not url.path.startswith(REST_API_PATH):
+            self._send_json(404, {'message': 'Not found: {}'.format(url.path)})
+            return
+        path = url.path[len(REST_API_PATH):].rstrip('/')
+        params = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            self._dispatch(method, path, params, request_body)
+        except (ValueError, KeyError, TypeError) as ex:
+            self._send_json(400, {'message': 'Bad request: {}'.format(ex)})
+
+    def _dispatch(self, method, path, params, request_body):
+        # type: (str, str, dict, bytes) -> None
+        """Runs the REST API operation of the request
+        """
+        store = self.fake_server.store
+        content_id_match = self.REGEX_CONTENT_ID.match(path)
+        child_pages_match = self.REGEX_CHILD_PAGES.match(path)
+        attachments_match = self.REGEX_ATTACHMENTS.match(path)
+        attachment_data_match = self.REGEX_ATTACHMENT_DATA.match(path)
+
+        if path == '/user/current' and method == 'GET':
+            self._send_json(200, {'type': 'known', 'username': 'benchmark',
+                                  'displayName': 'Benchmark User'})
+
+        elif path == '/content' and method == 'GET':
+            page = store.find(params.get('title'), params.get('spaceKey'))
+            results = [self._page_json(page, params)] if page is not None else []
+            self._send_json(200, {
+                'results': results,
+                'start': 0,
+                'limit': 25,
+                'size': len(results),
+                '_links': {'base': self.fake_server.url}
+            })
+
+        elif path == '/content' and method == 'POST':
+            data = json.loads(request_body)
+            ancestors = data.get('ancestors') or [{}]
+            page = store.create(
+                data['title'],
+                data['space']['key'],
+                data['body']['storage']['value'],
+                ancestors[-1].get('id'))
+            if page is None:
+                self._send_json(400, {'message': 'A page with this title already exists'})
+                return
+            self._send_json(200, self._page_json(page))
+
+        elif content_id_match and method == 'GET':
+            page = store.get(content_id_match.group(1))
+            if page is None:
+                self._send_json(404, {'message': 'No content found'})
+                return
+            self._send_json(200, self._page_json(page, params))
+
+        elif content_id_match and method == 'PUT':
+            data = json.loads(request_body)
+            page, error = store.update(
+                content_id_match.group(1),
+                data.get('title'),
+                data['body']['storage']['value'],
+                int(data['version']['number']))
+            if error == 'not_found':
+                self._send_json(404, {'message': 'No content found'})
+            elif error == 'conflict':
+                self._send_json(409, {'message': 'Version must be incremented on update'})
+            else:
+                self._send_json(200, self._page_json(page))
+
+        elif content_id_match and method == 'DELETE':
+            if not store.delete(content_id_match.group(1)):
+                self._send_json(404, {'message': 'No content found'})
+                return
+            self._send_empty(204)
+
+        elif path == '/content/search' and method == 'GET':
+            pages = self._search_pages(params['cql'])
+            start = int(params.get('start', 0))
+            limit = int(params.get('limit', 25))
+            results = pages[start:start + limit]
+            links = {'base': self.fake_server.url}
+            if start + limit < len(pages):
+                links['next'] = '{}/content/search?{}'.format(REST_API_PATH, urllib.parse.urlencode(
+                    {'cql': params['cql'], 'start': start + limit, 'limit': limit}))
+            self._send_json(200, {
+                'results': [self._page_json(page, params) for page in results],
+                'start': start,
+                'limit': limit,
+                'size': len(results),
+                '_links': links
+            })
+
+        elif child_pages_match and method == 'GET':
+            children = store.children(child_pages_match.group(1))
+            start = int(params.get('start', 0))
+            limit = int(params.get('limit', 25))
+            results = children[start:start + limit]
+            links = {'base': self.fake_server.url}
+            if start + limit < len(children):
+                links['next'] = '{}/content/{}/child/page?start={}&limit={}'.format(
+                    REST_API_PATH, child_pages_match.group(1), start + limit, limit)
+            self._send_json(200, {
+                'results': [self._page_json(page, params) for page in results],
+                'start': start,
+                'limit': limit,
+                'size': len(results),
+                '_links': links
+            })
+
+        elif attachments_match and method == 'GET':
+            attachment = store.find_attachment(attachments_match.group(1), params.get('filename'))
+            results = [self._attachment_json(attachment)] if attachment is not None else []
+            self._send_json(200, {'results': results, 'start': 0, 'limit': 50, 'size': len(results)})
+
+        elif attachments_match and method == 'POST':
+            fields, file_name, data = self._parse_multipart(request_body)
+            attachment, error = store.add_attachment(
+                attachments_match.group(1), file_name, data, fields.get('comment'),
+                mimetypes.guess_type(file_name)[0] or 'application/octet-stream')
+            if error == 'not_found':
+                self._send_json(404, {'message': 'No content found'})
+            elif error == 'exists':
+                self._send_json(400, {'message': 'Cannot add a new attachment with same file name'})
+            else:
+                self._send_json(200, {'results': [self._attachment_json(attachment)], 'size': 1})
+
+        elif attachment_data_match and method == 'POST':
+            fields, _, data = self._parse_multipart(request_body)
+            attachment = store.update_attachment(
+                attachment_data_match.group(1), attachment_data_match.group(2), data,
+                fields.get('comment'))
+            if attachment is None:
+                self._send_json(404, {'message': 'No attachment found'})
+            else:
+                self._send_json(200, self._attachment_json(attachment))
+
+        else:
+            self._send_json(404, {'message': 'Not found: {} {}'.format(method, path)})
+
+    def _page_json(self, page, params=None):
+        # type: (dict, [dict]) -> dict
+        """Returns the REST API representation of a page.
+        The body is only included if it is expanded (or no expand is given)
+        """
+        expand = (params or {}).get('expand')
+        page_json = {
+            'id': page['id'],
+            'type': 'page',
+            'status': 'current',
+            'title': page['title'],
+            'space': {'key': page['space_key']},
+            'version': {'number': page['version'], 'when': page['when']},
+            'ancestors': [{'id': ancestor_id}
+                          for ancestor_id in self.fake_server.store.ancestor_ids(page['id'])],
+            '_links': {
+                'base': self.fake_server.url,
+                'webui': '/pages/viewpage.action?pageId={}'.format(page['id']),
+                'tinyui': '/x/{}'.format(page['id'])
+            }
+        }
+        if expand is None or 'body.storage' in expand:
+            page_json['body'] = {
+                'storage': {'value': page['body'], 'representation': 'storage'}
+            }
+        return page_json
+
+    def _search_pages(self, cql):
+        # type: (str) -> list[dict]
+        """Returns the pages that match a CQL query
+
+        :raises ValueError: if the query is not supported by the fake server
+        """
+        store = self.fake_server.store
+        order_match = REGEX_CQL_ORDER.search(cql)
+        conditions = cql[:order_match.start()] if order_match else cql
+        pages = store.pages()
+        position = 0
+        while position < len(conditions):
+            condition_match = REGEX_CQL_CONDITION.match(conditions, position)
+            if condition_match is None:
+                raise ValueError('CQL not supported: {}'.format(cql))
+            position = condition_match.end()
+            field = condition_match.group('field').lower()
+            operator = condition_match.group('operator').lower()
+            value = condition_match.group('value')
+            if value.startswith('"'):
+                value = REGEX_CQL_ESCAPE.sub(r'\1', value[1:-1])
+            if field == 'type' and operator == '=':
+                pages = [page for page in pages if value == 'page']
+            elif field == 'space' and operator == '=':
+                pages = [page for page in pages if page['space_key'] == value]
+            elif field == 'ancestor' and operator == '=':
+                pages = [page for page in pages if value in store.ancestor_ids(page['id'])]
+            elif field == 'id' and operator == 'in':
+                page_ids = {page_id.strip() for page_id in value.strip('()').split(',')}
+                pages = [page for page in pages if page['id'] in page_ids]
+            elif field == 'lastmodified' and operator == '>=':
+                since = self._parse_cql_date(value)
+                pages = [page for page in pages
+                         if datetime.datetime.fromisoformat(page['when'].rstrip('Z')) >= since]
+            else:
+                raise ValueError('CQL condition not supported: {}'.format(condition_match.group(0)))
+        if order_match:
+            pages.sort(key=lambda page: page['when'], reverse=(order_match.group(1) or '').lower() == 'desc')
+        else:
+            pages.sort(key=lambda page: int(page['id']))
+        return pages
+
+    @staticmethod
+    def _parse_cql_date(value):
+        # type: (str) -> datetime.datetime
+        for date_format in CQL_DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(value, date_format)
+            except ValueError:
+                pass
+        raise ValueError('CQL date not supported: {}'.format(value))
+
+    def _attachment_json(self, attachment):
+        # type: (dict) -> dict
+        """Returns the REST API representation of an attachment
+        """
+        return {
+            'id': attachment['id'],
+            'type': 'attachment',
+            'title': attachment['title'],
+            'version': {'number': attachment['version']},
+            'metadata': {'comment': attachment['comment'], 'mediaType': attachment['media_type']},
+            'extensions': {'mediaType': attachment['media_type'], 'fileSize': len(attachment['data']),
+                           'comment': attachment['comment']},
+            '_links': {
+                'download': '/download/attachments/{}/{}?version={}'.format(
+                    attachment['page_id'], urllib.parse.quote(attachment['title']),
+                    attachment['version'])
+            }
+        }
+
+    def _parse_multipart(self, request_body):
+        # type: (bytes) -> (dict, str, bytes)
+        """Returns the form fields, the file name and the file data of a
+        multipart/form-data body
+
+        :raises ValueError: if the body is not complete
+        """
+        boundary_match = re.search(r'boundary=([^;]+)', self.headers.get('Content-Type', ''))
+        if boundary_match is None:
+            raise ValueError('multipart boundary not found')
+        parts = request_body.split(b'--' + boundary_match.group(1).strip('"').encode('utf-8'))
+        if len(parts) < 3 or parts[0] or parts[-1] != b'--\r\n':
+            raise ValueError('incomplete multipart body')
+        fields = {}
+        file_name = file_data = None
+        for part in parts[1:-1]:
+            headers, _, value = part[2:-2].partition(b'\r\n\r\n')
+            disposition = re.search(r'name="([^"]*)"(?:; filename="([^"]*)")?', headers.decode('utf-8'))
+            if disposition.group(2) is not None:
+                file_name, file_data = urllib.parse.unquote(disposition.group(2)), value
+            else:
+                fields[disposition.group(1)] = value.decode('utf-8')
+        if file_name is None:
+            raise ValueError('file field not found')
+        return fields, file_name, file_data
+
+    def _send_download(self, page_id, file_name):
+        # type: (str, str) -> None
+        """Sends the data of an attachment
+        (only half of it, then the connection is closed, if downloads are interrupted)
+        """
+        attachment = self.fake_server.store.find_attachment(page_id, file_name)
+        if attachment is None:
+            self._send_json(404, {'message': 'No attachment found'})
+            return
+        data = attachment['data']
+        self.send_response(200)
+        self.send_header('Content-Type', attachment['media_type'])
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.fake_server.interrupt_downloads:
+            self.wfile.write(data[:len(data) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+    def _read_body(self):
+        # type: () -> bytes
+        content_length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(content_length) if content_length else b''
+
+    def _send_json(self, status, data, headers=None):
+        # type: (int, dict, [dict]) -> None
+        # compact json, like the server (see StorageBodyExtractor)
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for header_name, header_value in (headers or {}).items():
+            self.send_header(header_name, header_value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status):
+        # type: (int) -> None
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Performance regression suite with stored baselines.
+
+Each benchmark measures the best time per operation (seconds) of a hot
+path and it is compared with the baseline stored in baselines.json.
+The run fails (exit code 1) if a metric is slower than its baseline
+beyond the tolerance. Results are written as json (one file per run,
+in the local cache directory by default) so trends can be tracked
+across commits. Benchmarks faster than 10us per operation are reported
+but do not fail the run (their ratio is dominated by noise).
+
+Times are normalized with a calibration loop run with every suite
+(pure python work), so a slower or busier machine does not report
+every benchmark as a regression. Benchmarks over the tolerance are
+measured again (--confirm) before the run fails.
+
+Usage (from repository root):
+    python -m benchmarks.regression_suite
+    python -m benchmarks.regression_suite --update-baselines
+    python -m benchmarks.regression_suite -b parse_groovy_file -r results.json
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from benchmarks.fake_confluence import FakeConfluenceServer
+from benchmarks.template_substitution import build_case
+from benchmarks.throughput import TEMPLATE_CONTENT
+from benchmarks.throughput import write_groovy_file
+from confluence.confluence_api import ConfluenceApi
+from confluence.confluence_api import Page
+from utils.cache_utils import get_cache_dir
+from utils.groovy_renderer import GroovyPageRenderer
+from utils.parser import GroovyFile
+from utils.template_engine import VariableSubstitution
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINES_FILE = os.path.join(BENCHMARKS_DIR, 'baselines.json')
+# sub directory of the local cache with the results of the runs
+RESULTS_CACHE_SUB_DIR = 'benchmark_results'
+
+# default max slowdown accepted over the baseline (0.25: 25% slower)
+DEFAULT_TOLERANCE = 0.25
+
+# benchmarks whose baseline is faster than this (seconds per operation)
+# never fail the run: their ratio is dominated by the noise of the machine
+MIN_GATED_SECONDS = 10e-6
+
+# name of the calibration measure in the baselines / results
+CALIBRATION = 'calibration'
+
+# result of one benchmark
+# - seconds: best time per operation
+# - baseline: seconds of the baseline (None if there is no baseline)
+# - ratio: seconds / baseline (normalized with the calibration of both runs)
+# - gated: False if the benchmark is too fast to fail the run (see MIN_GATED_SECONDS)
+BenchmarkResult = collections.namedtuple(
+    'BenchmarkResult',
+    ['name', 'seconds', 'baseline', 'ratio', 'regression', 'gated']
+)
+
+
+def measure_calibration(repeat):
+    # type: (int) -> float
+    """Best time of a fixed pure python workload (speed of this machine / run)
+    """
+    def workload():
+        values = {}
+        for index in range(20000):
+            values['key-{}'.format(index % 500)] = index * 2
+        return sorted(values.items())
+    return min(timeit.repeat(workload, number=5, repeat=repeat))
+
+
+def time_per_operation(function, repeat):
+    # type: (callable, int) -> float
+    """Best time per call of a fast function. The function is called
+    in loops of at least 0.2 seconds (see timeit.Timer.autorange),
+    so the resolution of the timer does not count.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(number=number, repeat=repeat)) / number
+
+
+def bench_parse_groovy_file(work_dir, repeat):
+    # type: (str, int) -> float
+    """Parse of a groovy file with 200 documented functions
+    """
+    groovy_file = os.path.join(work_dir, 'parse.groovy')
+    write_groovy_file(groovy_file, 200)
+    return min(timeit.repeat(lambda: GroovyFile(groovy_file), number=1, repeat=repeat))
+
+
+def bench_render_function(work_dir, repeat):
+    # type: (str, int) -> float
+    """Rendering of one function with the function block of a template
+    """
+    groovy_file = os.path.join(work_dir, 'render.groovy')
+    write_groovy_file(groovy_file, 100)
+    functions = list(GroovyFile(groovy_file).get_groovy_functions().values())
+    renderer = GroovyPageRenderer(TEMPLATE_CONTENT)
+
+    def render_all():
+        for function_obj in functions:
+            renderer.render_function(function_obj)
+    return time_per_operation(render_all, repeat) / len(functions)
+
+
+def bench_page_construction(work_dir, repeat):
+    # type: (str, int) -> float
+    """Construction of a Page from the json of a 100 KiB page
+    """
+    json_data = {
+        'id': '123456',
+        'type': 'page',
+        'title': 'Benchmark Page',
+        'space': {'key': 'BENCH'},
+        'version': {'number': 42},
+        'body': {'storage': {'value': '<p>lorem ipsum dolor sit amet</p>' * 3000,
+                             'representation': 'storage'}},
+        '_links': {'base': 'http://confluence', 'tinyui': '/x/ABC', 'webui': '/display/BENCH/Page'}
+    }
+    return time_per_operation(lambda: Page(json_data), repeat)
+
+
+def bench_template_substitution(work_dir, repeat):
+    # type: (str, int) -> float
+    """Substitution of 50 variables in a 200 KiB template
+    """
+    variables, template = build_case(50, 200 * 1024)
+    substitution = VariableSubstitution(variables)
+    return min(timeit.repeat(lambda: substitution.substitute(template), number=1, repeat=repeat))
+
+
+def bench_client_request(work_dir, repeat):
+    # type: (str, int) -> float
+    """Overhead of a content request of the client (fake server without latency)
+    """
+    with FakeConfluenceServer() as server:
+        page_id = server.create_page('Benchmark', '<p>content</p>' * 100)
+        with ConfluenceApi(server.url, 'benchmark', 'benchmark') as api:
+            number = 50
+            # first request opens the pooled connection
+            api.get_content(page_id)
+            return min(timeit.repeat(
+                lambda: api.get_content(page_id), number=number, repeat=repeat)) / number
+
+
+BENCHMARKS = collections.OrderedDict([
+    ('parse_groovy_file', bench_parse_groovy_file),
+    ('render_function', bench_render_function),
+    ('page_construction', bench_page_construction),
+    ('template_substitution', bench_template_substitution),
+    ('client_request', bench_client_request),
+])
+
+
+def load_baselines(baselines_file):
+    # type: (str) -> dict
+    """Returns the stored baselines {benchmark name: seconds}
+    """
+    if not os.path.exists(baselines_file):
+        return {}
+    with open(baselines_file, 'r') as file_obj:
+        return json.load(file_obj).get('benchmarks', {})
+
+
+def save_baselines(baselines_file, results, calibration):
+    # type: (str, list[BenchmarkResult], float) -> None
+    """Stores the seconds of the results as the new baselines
+    (benchmarks not run keep their previous baseline, scaled
+    to the calibration of this run)
+    """
+    baselines = load_baselines(baselines_file)
+    previous_calibration = baselines.pop(CALIBRATION, None)
+    if previous_calibration:
+        for name in baselines:
+            baselines[name] *= calibration / previous_calibration
+    baselines.update((result.name, result.seconds) for result in results)
+    baselines[CALIBRATION] = calibration
+    with open(baselines_file, 'w') as file_obj:
+        json.dump({
+            'updated': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'benchmarks': collections.OrderedDict(sorted(baselines.items()))
+        }, file_obj, indent=2)
+        file_obj.write('\n')
+
+
+def get_git_commit():
+    # type: () -> str
+    """Returns the current git commit (None if it is not available)
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=BENCHMARKS_DIR,
+            stderr=subprocess.DEVNULL
+        ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names, repeat):
+    # type: (list[str], int) -> (collections.OrderedDict, float)
+    """Runs the benchmarks. The calibration is measured before each
+    benchmark and its best time is used (noise of the machine only
+    makes measures slower).
+
+    :return: tuple ({benchmark name: seconds}, calibration seconds)
+    """
+    measures = collections.OrderedDict()
+    calibration = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in names:
+            calibration_run = measure_calibration(repeat)
+            calibration = calibration_run if calibration is None else min(calibration, calibration_run)
+            measures[name] = BENCHMARKS[name](work_dir, repeat)
+    return measures, calibration
+
+
+def compare_with_baselines(measures, baselines, tolerance, calibration=None):
+    # type: (dict, dict, float, [float]) -> list[BenchmarkResult]
+    """Compares the measures with their baselines
+
+    :param calibration: (optional) calibration seconds of this run.
+        If set (and stored in the baselines), ratios are normalized.
+    """
+    speed_factor = 1.0
+    if calibration and baselines.get(CALIBRATION):
+        speed_factor = baselines[CALIBRATION] / calibration
+    results = []
+    for name, seconds in measures.items():
+        baseline = baselines.get(name)
+        ratio = seconds * speed_factor / baseline if baseline else None
+        gated = baseline is None or baseline >= MIN_GATED_SECONDS
+        results.append(BenchmarkResult(
+            name,
+            seconds,
+            baseline,
+            ratio,
+            gated and ratio is not None and ratio > 1.0 + tolerance,
+            gated
+        ))
+    return results
+
+
+def main():
+    """Main Function
+    """
+    parser = argparse.ArgumentParser(description='regression_suite.py')
+    parser.add_argument(
+        '-b', '--benchmark',
+        action='append',
+        choices=list(BENCHMARKS.keys()),
+        help='benchmark to run (can be repeated). All of them by default')
+    parser.add_argument(
+        '-t', '--tolerance',
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help='max slowdown accepted over the baseline (0.25: 25%% slower)')
+    parser.add_argument(
+        '-n', '--repeat',
+        type=int,
+        default=7,
+        help='number of runs per benchmark (best time is used)')
+    parser.add_argument(
+        '--confirm',
+        type=int,
+        default=2,
+        help='number of times a regression is measured again before failing the run')
+    parser.add_argument(
+        '--no-calibration',
+        action='store_true',
+        help='if this flag is set, times are compared without normalization')
+    parser.add_argument(
+        '--baselines',
+        default=DEFAULT_BASELINES_FILE,
+        help='json file with the baselines')
+    parser.add_argument(
+        '--update-baselines',
+        action='store_true',
+        help='if this flag is set, results are stored as the new baselines '
+             '(the run never fails)')
+    parser.add_argument(
+        '-r', '--results',
+        default=None,
+        help='json file in which the results are written '
+             '(default: <cache dir>/{}/<time>-<commit>.json)'.format(RESULTS_CACHE_SUB_DIR))
+    args = parser.parse_args()
+
+    names = args.benchmark or list(BENCHMARKS.keys())
+    baselines = load_baselines(args.baselines)
+    measures, calibration = run_benchmarks(names, args.repeat)
+    results = compare_with_baselines(
+        measures, baselines, args.tolerance, None if args.no_calibration else calibration)
+    # regressions are measured again (best time is kept) so a noisy
+    # moment of the machine does not fail the run
+    for _ in range(args.confirm):
+        regressions = [result.name for result in results if result.regression]
+        if not regressions or args.update_baselines:
+            break
+        retry_measures, retry_calibration = run_benchmarks(regressions, args.repeat)
+        for name, seconds in retry_measures.items():
+            measures[name] = min(measures[name], seconds)
+        calibration = min(calibration, retry_calibration)
+        results = compare_with_baselines(
+            measures, baselines, args.tolerance, None if args.no_calibration else calibration)
+
+    print('{:<24} {:>14} {:>14} {:>8}'.format('benchmark', 'seconds/op', 'baseline', 'ratio'))
+    for result in results:
+        print('{:<24} {:>14.3e} {:>14} {:>8} {}'.format(
+            result.name,
+            result.seconds,
+            '-' if result.baseline is None else '{:.3e}'.format(result.baseline),
+            '-' if result.ratio is None else '{:.2f}'.format(result.ratio),
+            'REGRESSION' if result.regression else '' if result.gated else '(not gated)'))
+
+    commit = get_git_commit()
+    results_file = args.results
+    if results_file is None:
+        results_file = os.path.join(get_cache_dir(RESULTS_CACHE_SUB_DIR), '{}-{}.json'.format(
+            datetime.datetime.now().strftime('%Y%m%d-%H%M%S'), (commit or 'unknown')[:10]))
+    with open(results_file, 'w') as file_obj:
+        json.dump({
+            'time': datetime.datetime.now().isoformat(),
+            'commit': commit,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'tolerance': args.tolerance,
+            CALIBRATION: calibration,
+            'results': [dict(result._asdict()) for result in results]
+        }, file_obj, indent=2)
+
+    if args.update_baselines:
+        save_baselines(args.baselines, results, calibration)
+        print("Baselines updated: {}".format(args.baselines))
+        return
+
+    if any(result.regression for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Benchmark of the template variable substitution:
+replace loop (one scan + copy per variable) vs one pass substitution.
+
+Usage (from repository root):
+    python -m benchmarks.template_substitution
+"""
+
+import argparse
+import timeit
+
+from utils.template_engine import VariableSubstitution
+
+
+def build_case(variables_count, template_size):
+    # type: (int, int) -> (dict, str)
+    """Returns a dictionary of variables and a template of about
+    'template_size' characters that uses all of them
+    """
+    variables = dict(('$Var{}'.format(index), 'value-{}'.format(index))
+                     for index in range(variables_count))
+    filler = '<p>lorem ipsum dolor sit amet</p>\n'
+    chunks = []
+    template_length = 0
+    index = 0
+    while template_length < template_size:
+        chunk = filler + '<span>$Var{}</span>\n'.format(index % variables_count)
+        chunks.append(chunk)
+        template_length += len(chunk)
+        index += 1
+    return variables, ''.join(chunks)
+
+
+def replace_loop(variables, template):
+    # type: (dict, str) -> str
+    """Previous implementation: 'in' scan + str.replace for each variable
+    """
+    for template_key, value in variables.items():
+        if template_key in template:
+            template = template.replace(template_key, value)
+    return template
+
+
+def main():
+    """Main Function
+    """
+    parser = argparse.ArgumentParser(description='template_substitution.py')
+    parser.add_argument(
+        '-s', '--template-size',
+        type=int,
+        default=200 * 1024,
+        help='size in characters of the template')
+    parser.add_argument(
+        '-n', '--repeat',
+        type=int,
+        default=5,
+        help='number of runs per case (best time is reported)')
+    args = parser.parse_args()
+
+    print("{:>10} {:>14} {:>14} {:>8}".format('variables', 'loop (ms)', 'one pass (ms)', 'speedup'))
+    for variables_count in (10, 100, 500, 1000):
+        variables, template = build_case(variables_count, args.template_size)
+        substitution = VariableSubstitution(variables)
+        loop_time = min(timeit.repeat(
+            lambda: replace_loop(variables, template), number=1, repeat=args.repeat))
+        one_pass_time = min(timeit.repeat(
+            lambda: substitution.substitute(template), number=1, repeat=args.repeat))
+        print("{:>10} {:>14.2f} {:>14.2f} {:>7.1f}x".format(
+            variables_count, loop_time * 1000, one_pass_time * 1000, loop_time / one_pass_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+End-to-end throughput benchmark of the publish pipeline
+against the in-process fake Confluence server.
+
+Each job runs the same steps as groovydoc-parser.py with the real client
+code (template cache revalidation, render, target page fetch and update)
+and the throughput and latency percentiles are reported for each
+concurrency level. The groovy file is parsed once (local CPU work).
+
+Usage (from repository root):
+    python -m benchmarks.throughput -c 1,4,8,16 -n 200 --latency 20
+"""
+
+import argparse
+import concurrent.futures
+import json
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.fake_confluence import FakeConfluenceServer
+from confluence.confluence_api import ConfluenceApi
+from confluence.template_cache import TemplateCache
+from utils.groovy_renderer import GroovyPageRenderer
+from utils.log_utils import configure_logger
+from utils.parser import GroovyDocParser
+
+TEMPLATE_CONTENT = (
+    '<h1>Library</h1>'
+    '${groovy.function_block.open}'
+    '<h2>${groovy.title}</h2><p>${groovy.header}</p>${groovy.description}'
+    '<h3>Parameters</h3>${groovy.parameters}'
+    '<h3>Returns</h3><p>${groovy.returns}</p>'
+    '<ac:structured-macro ac:name="code"><ac:plain-text-body>'
+    '<![CDATA[${groovy.function_code}]]></ac:plain-text-body></ac:structured-macro>'
+    '${groovy.function_block.close}'
+)
+
+TARGET_CONTENT = '<p>Generated documentation:</p>${groovy.target}'
+
+
+def write_groovy_file(file_path, functions_count):
+    # type: (str, int) -> None
+    """Writes a synthetic groovy file with documented functions
+    """
+    with open(file_path, 'w') as file_obj:
+        for index in range(functions_count):
+            file_obj.write(
+                '/**\n'
+                ' * Runs the step number {index} of the pipeline.\n'
+                ' * The step is only run if the stage is enabled.\n'
+                ' * @param name (String) name of the stage\n'
+                ' * @param retries (int) number of retries of the step\n'
+                ' * @return the result of the step\n'
+                ' */\n'
+                'def runStep{index}(String name, int retries) {{\n'
+                '    return name\n'
+                '}}\n\n'.format(index=index))
+
+
+def percentile(sorted_values, percent):
+    # type: (list[float], float) -> float
+    """Returns the percentile of sorted values (nearest rank)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(percent / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def publish_job(api, template_cache, template_page_id, target_page_id, groovy_functions):
+    # type: (ConfluenceApi, TemplateCache, str, str, list) -> float
+    """Runs one publish of the pipeline. Returns its latency in seconds
+    """
+    start_time = time.perf_counter()
+    template_content = template_cache.get_content(api, template_page_id)
+    renderer = GroovyPageRenderer(template_content)
+    generated_content = renderer.render(groovy_functions)
+    target_page = api.get_content(target_page_id)
+    api.update_page_with_retry(
+        target_page_id,
+        renderer.render_target(target_page.content, generated_content),
+        target_page.title,
+        str(int(target_page.version) + 1)
+    )
+    return time.perf_counter() - start_time
+
+
+def run_level(server, concurrency, jobs, template_page_id, target_page_ids,
+              groovy_functions, cache_dir):
+    # type: (FakeConfluenceServer, int, int, str, list, list, str) -> dict
+    """Runs the jobs of one concurrency level and returns its results
+    """
+    server.reset_stats()
+    latencies = []
+    errors = 0
+    template_cache = TemplateCache(cache_dir=cache_dir)
+    with ConfluenceApi(server.url, 'benchmark', 'benchmark', pool_size=concurrency) as api:
+        start_time = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(publish_job, api, template_cache, template_page_id,
+                                target_page_ids[index % len(target_page_ids)], groovy_functions)
+                for index in range(jobs)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    latencies.append(future.result())
+                except Exception:
+                    errors += 1
+        wall_time = time.perf_counter() - start_time
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'jobs': jobs,
+        'errors': errors,
+        'wall_time': wall_time,
+        'pages_per_second': len(latencies) / wall_time if wall_time else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'server': dict(server.stats)
+    }
+
+
+def main():
+    """Main Function
+    """
+    parser = argparse.ArgumentParser(description='throughput.py')
+    parser.add_argument(
+        '-c', '--concurrency',
+        default='1,4,8,16',
+        help='comma separated concurrency levels (workers)')
+    parser.add_argument(
+        '-n', '--jobs',
+        type=int,
+        default=100,
+        help='number of publish jobs per concurrency level')
+    parser.add_argument(
+        '-f', '--file',
+        default=None,
+        help='groovy file to publish (a synthetic one is generated by default)')
+    parser.add_argument(
+        '--functions',
+        type=int,
+        default=50,
+        help='number of functions of the synthetic groovy file')
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=20.0,
+        help='latency of the fake server in milliseconds')
+    parser.add_argument(
+        '--jitter',
+        type=float,
+        default=5.0,
+        help='max random latency added in milliseconds')
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        default=None,
+        help='requests per second accepted by the fake server (429 over it)')
+    parser.add_argument(
+        '--error-rate',
+        type=float,
+        default=0.0,
+        help='probability (0..1) of an injected server error per request')
+    parser.add_argument(
+        '-o', '--output',
+        default=None,
+        help='path of a json file in which the results are written')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="error",
+        help='log level of the client code '
+             '[ critical > error > warning > info > debug > off ]')
+    args = parser.parse_args()
+
+    configure_logger(logging.getLogger(), args.log_level)
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        groovy_file = args.file
+        if groovy_file is None:
+            groovy_file = os.path.join(work_dir, 'library.groovy')
+            write_groovy_file(groovy_file, args.functions)
+        groovy_functions = list(GroovyDocParser.parse_file(groovy_file).get_groovy_functions().values())
+
+        with FakeConfluenceServer(
+            latency=args.latency / 1000.0,
+            jitter=args.jitter / 1000.0,
+            rate_limit=args.rate_limit,
+            error_rate=args.error_rate,
+            seed=0
+        ) as server:
+            template_page_id = server.create_page('Template', TEMPLATE_CONTENT)
+            # one target page per worker of the highest level (version conflicts
+            # of concurrent updates of a page are retried by the client)
+            target_page_ids = [
+                server.create_page('Target {}'.format(index), TARGET_CONTENT)
+                for index in range(max(concurrency_levels))
+            ]
+
+            results = []
+            print('{:>5} {:>6} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+                'conc', 'jobs', 'errors', 'wall (s)', 'pages/s',
+                'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'throttled'))
+            for concurrency in concurrency_levels:
+                result = run_level(
+                    server, concurrency, args.jobs, template_page_id,
+                    target_page_ids[:concurrency], groovy_functions,
+                    os.path.join(work_dir, 'cache-{}'.format(concurrency)))
+                results.append(result)
+                print('{:>5} {:>6} {:>6} {:>9.2f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9}'.format(
+                    result['concurrency'],
+                    result['jobs'],
+                    result['errors'],
+                    result['wall_time'],
+                    result['pages_per_second'],
+                    result['p50'] * 1000,
+                    result['p95'] * 1000,
+                    result['p99'] * 1000,
+                    result['server']['throttled']))
+
+    if args.output:
+        with open(args.output, 'w') as file_obj:
+            json.dump({'functions': len(groovy_functions), 'results': results}, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a persistent checkpoint store (SQLite) of page audits.
+
+It keeps the last audit record of every page (id, version, last
+modification) and the last run of each audited tree (start time and
+last modification in the server of its pages), so the next run only
+needs to audit the pages modified since then. Records of pages whose
+audit failed have no version, so they are always audited again.
+"""
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import typing
+
+from utils.cache_utils import get_cache_dir
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+
+class AuditCheckpoint(object):
+    """Checkpoint store of the audits of page trees
+    """
+
+    DEFAULT_FILE_NAME = 'audit_checkpoint.sqlite'
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS pages ("
+        "  root_id TEXT NOT NULL,"
+        "  page_id TEXT NOT NULL,"
+        "  version TEXT,"
+        "  last_modified TEXT,"
+        "  record TEXT NOT NULL,"
+        "  PRIMARY KEY (root_id, page_id))",
+        "CREATE TABLE IF NOT EXISTS runs ("
+        "  root_id TEXT PRIMARY KEY,"
+        "  started_at TEXT NOT NULL,"
+        "  pages_audited INTEGER NOT NULL,"
+        "  last_modified TEXT)",
+    )
+
+    def __init__(self, db_file=None):
+        # type: ([str]) -> None
+        """
+
+        :param db_file: (optional) path of the SQLite file of the checkpoint.
+            if None, the file is created in the local cache directory.
+        """
+        if db_file is None:
+            db_file = os.path.join(get_cache_dir(), AuditCheckpoint.DEFAULT_FILE_NAME)
+        self._db_file = db_file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_file, check_same_thread=False)
+        with self._lock, self._connection:
+            for statement in AuditCheckpoint._SCHEMA:
+                self._connection.execute(statement)
+            # checkpoints created before the last modification of the runs was stored
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(runs)")]
+            if 'last_modified' not in columns:
+                self._connection.execute("ALTER TABLE runs ADD COLUMN last_modified TEXT")
+
+    def close(self):
+        # type: () -> None
+        """Closes the connection to the checkpoint database
+        """
+        with self._lock:
+            self._connection.close()
+
+    def get_last_run(self, root_id):
+        # type: (str) -> datetime.datetime
+        """Returns the start time of the last finished run of a tree.
+        None if the tree was never audited.
+
+        :param root_id: id of the root page of the audited tree
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT started_at FROM runs WHERE root_id = ?",
+                (str(root_id),)).fetchone()
+        if row is None:
+            return None
+        return datetime.datetime.strptime(row[0], '%Y-%m-%dT%H:%M:%S')
+
+    def get_last_modified(self, root_id):
+        # type: (str) -> str
+        """Returns the last modification (server time, as reported by the
+        server) of the pages audited until the last finished run of a tree.
+        None if the tree was never audited or no page had a modification time.
+
+        :param root_id: id of the root page of the audited tree
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT last_modified FROM runs WHERE root_id = ?",
+                (str(root_id),)).fetchone()
+        return None if row is None else row[0]
+
+    def finish_run(self, root_id, started_at, pages_audited):
+        # type: (str, datetime.datetime, int) -> None
+        """Records a finished run of a tree with the last modification of
+        its audited pages. Only called when the run completed, so an
+        interrupted run is audited again from the last checkpoint.
+
+        :param root_id: id of the root page of the audited tree
+        :param started_at: time in which the run started
+        :param pages_audited: number of pages audited in this run
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs (root_id, started_at, pages_audited, last_modified) "
+                "SELECT ?, ?, ?, MAX(last_modified) FROM pages WHERE root_id = ?",
+                (str(root_id), started_at.strftime('%Y-%m-%dT%H:%M:%S'), pages_audited,
+                 str(root_id)))
+
+    def get_known_versions(self, root_id):
+        # type: (str) -> dict
+        """Returns the versions of the audited pages of a tree
+        (None for the pages whose audit failed)
+
+        :param root_id: id of the root page of the audited tree
+        :return: dictionary {page_id: version}
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT page_id, version FROM pages WHERE root_id = ?",
+                (str(root_id),)).fetchall()
+        return dict(rows)
+
+    def store_record(self, root_id, record):
+        # type: (str, dict) -> None
+        """Adds or replaces the audit record of a page. The version of a
+        record with an error is not stored, so the page is audited again.
+
+        :param root_id: id of the root page of the audited tree
+        :param record: audit record (with 'page_id', 'version', 'last_modified' and 'error')
+        """
+        version = None if record.get('error') else record.get('version')
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(root_id, page_id, version, last_modified, record) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(root_id), str(record['page_id']), version,
+                 record.get('last_modified'), json.dumps(record)))
+
+    def get_failed_records(self, root_id):
+        # type: (str) -> list[dict]
+        """Returns the stored audit records of a tree whose audit failed
+        (no version)
+
+        :param root_id: id of the root page of the audited tree
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT record FROM pages WHERE root_id = ? AND version IS NULL ORDER BY page_id",
+                (str(root_id),)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def remove_record(self, root_id, page_id):
+        # type: (str, str) -> None
+        """Removes the audit record of a page (ex. page deleted)
+
+        :param root_id: id of the root page of the audited tree
+        :param page_id: id of the page
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM pages WHERE root_id = ? AND page_id = ?",
+                (str(root_id), str(page_id)))
+
+    def iter_records(self, root_id, batch_size=500):
+        # type: (str, [int]) -> typing.Iterable[dict]
+        """Yields the stored audit records of a tree
+        (read in batches, so the full state is never loaded in memory)
+
+        :param root_id: id of the root page of the audited tree
+        :param batch_size: (optional) number of records read per query
+        """
+        last_page_id = ''
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT page_id, record FROM pages "
+                    "WHERE root_id = ? AND page_id > ? ORDER BY page_id LIMIT ?",
+                    (str(root_id), last_page_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for page_id, record in rows:
+                yield json.loads(record)
+            last_page_id = rows[-1][0]
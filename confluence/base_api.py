@@ -1,205 +1,397 @@
-#!/usr/bin/env python
-# coding=utf-8
-"""
-Module Base Api
-"""
-
-import logging
-import requests
-import abc
-
-from confluence.exceptions import HttpNotFoundError
-
-# main logger instance
-LOGGER = logging.getLogger(__name__)
-
-
-class BaseApi(object):
-    """Base API class for application
-    """
-
-    def __init__(self, host_url, rest_api_url, user, password, headers=None):
-        # type: (str, str, str, str, dict) -> BaseApi
-        """
-
-        :param host_url: URL of the REST API application
-        :param rest_api_url: base url of the api.
-            ex. /api/v1/
-        :param user: name of the authentication user (existing in the server)
-        :param password: password string of the user
-        """
-        # authentication credentials
-        self._user = user
-        self._password = password
-        self._basic_auth = (user, password)
-        self._headers = headers
-
-        # validate host url path
-        if host_url.endswith('/'):
-            # remove / if host url has it at the end
-            host_url = host_url[:-1]
-        self._host_url = host_url
-
-        # validate rest api path
-        if not rest_api_url.startswith('/'):
-            rest_api_url = '/' + rest_api_url
-
-        # build base API URL with host name
-        self._api_base_url = '{host}{rest_api_url}'.format(
-            host=self._host_url,
-            rest_api_url=rest_api_url)
-
-    @staticmethod
-    def _handle_response_errors(path, params, response):
-        # type: (str, dict[str, str], requests.Response) -> None
-        """Handles the response gotten from requests.Response instance
-        to see if there is a problem in order to raise the exact exception
-
-        """
-        if response.status_code == 400:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 401:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 402:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 403:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 404:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise HttpNotFoundError(path, params, response)
-        elif response.status_code == 405:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 406:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 407:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 408:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-        elif response.status_code == 500:
-            LOGGER.error("API Error: {}".format(response.text))
-            raise Exception(path, params, response)
-
-    def _get(self, path, params):
-        # type: (str, dict[str, str]) -> dict
-        """HTTP GET method for Confluence Client api
-
-        :param path: path to REST API to get content
-        :param params: dictionary with the parameters
-            to add to GET message.
-        :param expand:
-        :return:
-        """
-        url = '{}/{}'.format(self._api_base_url, path)
-        # send GET request over client and expect response
-        response = requests.get(
-            url,
-            params=params,
-            headers=self._headers,
-            auth=self._basic_auth
-        )
-        # validate HTTP response to handle possible errors
-        self._handle_response_errors(path, params, response)
-        return response.json()
-
-    def _post(self, path, params, data, files=None):
-        # type: (str, dict, dict, str) -> dict
-        """HTTP POST method for Confluence Client api
-
-        :param path: path to REST API to post content
-        :param params: dictionary with the parameters
-            to add to POST message.
-        :param data: dictionary with the data to post
-        :param files:
-        :return:
-        """
-        # build base url with path
-        url = "{}/{}".format(self._api_base_url, path)
-        # send POST request over client and expect response
-        response = requests.post(
-            url,
-            json=data,
-            params=params,
-            headers=self._headers,
-            files=files,
-            auth=self._basic_auth
-        )
-        # validate HTTP response to handle possible errors
-        self._handle_response_errors(path, params, response)
-        return response.json()
-
-    def _put(self, path, params, data):
-        # type: (str, dict[str, str], dict) -> dict
-        """HTTP PUT method for Confluence Client api
-
-        :param path: path to REST API to put content
-        :param params: dictionary with the parameters
-            to add to PUT message.
-        :param data: dictionary with the data to put
-        :return:
-        """
-        # build base url with path
-        url = "{}/{}".format(self._api_base_url, path)
-        response = requests.put(
-            url,
-            json=data,
-            params=params,
-            headers=self._headers,
-            auth=self._basic_auth
-        )
-        # check HTTP response to handle errors
-        self._handle_response_errors(path, params, response)
-        return response.json()
-
-    def _delete(self, path, params):
-        # type: (str, dict) -> dict
-        """HTTP DELETE method for client api
-
-        :param path: path to REST API to delete content
-        :param params: dictionary with the parameters for DELETE Method
-        :return: None
-        """
-        # build base url with path
-        url = "{}/{}".format(self._api_base_url, path)
-        # send POST request over client and expect response
-        response = requests.delete(
-            url,
-            params=params,
-            headers=self._headers,
-            auth=self._basic_auth
-        )
-        # check HTTP response to handle errors
-        self._handle_response_errors(path, params, response)
-        return response.json()
-
-
-class Content(object):
-    """Base Class for classes related for Confluence Content
-    ex. Confluence Page
-    """
-
-    __metaclass__ = abc.ABCMeta
-
-    def __init__(self, json_data):
-        # type: (dict) -> Content
-        self._json_data_model = json_data
-
-    @property
-    def json_data_model(self):
-        # type: () -> dict
-        """Returns a dictionary with the json data model
-        retrieved from HTTP response
-        """
-        return self._json_data_model
-
-    @abc.abstractmethod
-    def _retrieve_values_from_json(self):
-        # type: () -> None
-        raise NotImplementedError("abstract method not implemented in child!")
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module Base Api
+"""
+
+import logging
+import requests
+import requests.adapters
+import abc
+import time
+
+from confluence.exceptions import HttpConflictError
+from confluence.exceptions import HttpNotFoundError
+from confluence.exceptions import HttpTooManyRequestsError
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+
+class BaseApi(object):
+    """Base API class for application
+    """
+
+    # default max number of pooled connections to the host
+    DEFAULT_POOL_SIZE = 10
+
+    # default number of times a throttled request is sent again
+    DEFAULT_THROTTLE_RETRIES = 3
+
+    # status codes of throttled requests (retried after a delay)
+    THROTTLE_STATUS_CODES = (429, 503)
+
+    # methods whose requests can be sent again with the same effect.
+    # not PUT: a page PUT carries a version number: sent again after it
+    # was applied, it is rejected with 409
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'DELETE')
+
+    # throttled status codes retried for the other methods (ex. POST, PUT): a 429
+    # request was rejected before being processed, a 503 one may have been applied
+    NON_IDEMPOTENT_RETRY_STATUS_CODES = (429,)
+
+    # max seconds waited before retrying a throttled request
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, host_url, rest_api_url, user, password, headers=None,
+                 pool_size=DEFAULT_POOL_SIZE, throttle_retries=DEFAULT_THROTTLE_RETRIES):
+        # type: (str, str, str, str, dict, int, int) -> BaseApi
+        """
+
+        :param host_url: URL of the REST API application
+        :param rest_api_url: base url of the api.
+            ex. /api/v1/
+        :param user: name of the authentication user (existing in the server)
+        :param password: password string of the user
+        :param pool_size: (optional) max number of connections kept open
+            to the host (should be >= the number of concurrent workers)
+        :param throttle_retries: (optional) number of times a throttled request
+            (429 / 503) is sent again. The 'Retry-After' header is respected.
+        """
+        # authentication credentials
+        self._user = user
+        self._password = password
+        self._basic_auth = (user, password)
+        self._headers = headers
+        self._throttle_retries = throttle_retries
+
+        # HTTP session: connections are kept alive and reused by all requests
+        self._session = requests.Session()
+        self._session.auth = self._basic_auth
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        # validate host url path
+        if host_url.endswith('/'):
+            # remove / if host url has it at the end
+            host_url = host_url[:-1]
+        self._host_url = host_url
+
+        # validate rest api path
+        if not rest_api_url.startswith('/'):
+            rest_api_url = '/' + rest_api_url
+
+        # build base API URL with host name
+        self._api_base_url = '{host}{rest_api_url}'.format(
+            host=self._host_url,
+            rest_api_url=rest_api_url)
+
+    @property
+    def host_url(self):
+        # type: () -> str
+        """Returns the URL of the host of the api (without '/' at the end)
+        """
+        return self._host_url
+
+    def close(self):
+        # type: () -> None
+        """Closes the HTTP session and its pooled connections
+        """
+        self._session.close()
+
+    def __enter__(self):
+        # type: () -> BaseApi
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _send(self, method, url, retry=True, **kwargs):
+        # type: (str, str, [bool], ...) -> requests.Response
+        """Sends an HTTP request over the session.
+        Throttled requests are sent again after the delay
+        requested by the server (or an exponential backoff).
+        Requests of non idempotent methods (ex. POST) are only
+        sent again after a 429 response.
+
+        :param method: HTTP method. ex. 'GET'
+        :param url: full url of the request
+        :param retry: (optional) if not set, throttled requests are not retried
+            (ex. bodies read from a stream that cannot be sent again)
+        :param kwargs: arguments of requests.Session.request
+        :return: requests.Response
+        """
+        retry_status_codes = self.THROTTLE_STATUS_CODES
+        if method.upper() not in self.IDEMPOTENT_METHODS:
+            retry_status_codes = self.NON_IDEMPOTENT_RETRY_STATUS_CODES
+        attempt = 0
+        while True:
+            response = self._session.request(method, url, **kwargs)
+            if response.status_code not in retry_status_codes \
+                    or not retry or attempt >= self._throttle_retries:
+                return response
+            delay = self._get_retry_delay(response, attempt)
+            LOGGER.warning("Request throttled (HTTP %s): %s %s. Retrying in %.2fs",
+                           response.status_code, method, url, delay)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _get_retry_delay(self, response, attempt):
+        # type: (requests.Response, int) -> float
+        """Returns the seconds to wait before sending a throttled request again
+        """
+        retry_after = response.headers.get('Retry-After')
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            # no header (or a http date): exponential backoff
+            delay = 0.5 * 2 ** attempt
+        return min(max(delay, 0.0), self.MAX_RETRY_DELAY)
+
+    @staticmethod
+    def _handle_response_errors(path, params, response):
+        # type: (str, dict[str, str], requests.Response) -> None
+        """Handles the response gotten from requests.Response instance
+        to see if there is a problem in order to raise the exact exception
+
+        """
+        if response.status_code == 400:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 401:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 402:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 403:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 404:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise HttpNotFoundError(path, params, response)
+        elif response.status_code == 405:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 406:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 407:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 408:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 409:
+            LOGGER.warning("API Conflict: {}".format(response.text))
+            raise HttpConflictError(path, params, response)
+        elif response.status_code == 429:
+            LOGGER.error("API Throttled: {}".format(response.text))
+            raise HttpTooManyRequestsError(path, params, response)
+        elif response.status_code == 500:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+        elif response.status_code == 503:
+            LOGGER.error("API Error: {}".format(response.text))
+            raise Exception(path, params, response)
+
+    def _get(self, path, params):
+        # type: (str, dict[str, str]) -> dict
+        """HTTP GET method for Confluence Client api
+
+        :param path: path to REST API to get content
+        :param params: dictionary with the parameters
+            to add to GET message.
+        :param expand:
+        :return:
+        """
+        url = '{}/{}'.format(self._api_base_url, path)
+        # send GET request over client and expect response
+        response = self._send(
+            'GET',
+            url,
+            params=params,
+            headers=self._headers
+        )
+        # validate HTTP response to handle possible errors
+        self._handle_response_errors(path, params, response)
+        return response.json()
+
+    def _post(self, path, params, data, files=None):
+        # type: (str, dict, dict, str) -> dict
+        """HTTP POST method for Confluence Client api
+
+        :param path: path to REST API to post content
+        :param params: dictionary with the parameters
+            to add to POST message.
+        :param data: dictionary with the data to post
+        :param files:
+        :return:
+        """
+        # build base url with path
+        url = "{}/{}".format(self._api_base_url, path)
+        # send POST request over client and expect response
+        response = self._send(
+            'POST',
+            url,
+            json=data,
+            params=params,
+            headers=self._headers,
+            files=files
+        )
+        # validate HTTP response to handle possible errors
+        self._handle_response_errors(path, params, response)
+        return response.json()
+
+    def _post_stream(self, path, params, data_stream, content_type):
+        # type: (str, dict, object, str) -> dict
+        """HTTP POST method for Confluence Client api
+        with a body that is read from a stream while it is sent
+        (ex. multipart body of a file attachment)
+
+        :param path: path to REST API to post content
+        :param params: dictionary with the parameters
+            to add to POST message.
+        :param data_stream: file-like object with the body to post
+        :param content_type: value of the Content-Type header of the body
+        :return:
+        """
+        # build base url with path
+        url = "{}/{}".format(self._api_base_url, path)
+        headers = dict(self._headers or {})
+        headers['Content-Type'] = content_type
+        # send POST request over client and expect response
+        response = self._send(
+            'POST',
+            url,
+            data=data_stream,
+            params=params,
+            headers=headers,
+            retry=False
+        )
+        # validate HTTP response to handle possible errors
+        self._handle_response_errors(path, params, response)
+        return response.json()
+
+    def _get_stream(self, path, params=None):
+        # type: (str, [dict]) -> requests.Response
+        """HTTP GET method that does not read the body of the response.
+        The caller should iterate the response content and close it.
+
+        :param path: path relative to the host URL (not to the REST API)
+            ex. /download/attachments/123/file.txt
+        :param params: (optional) dictionary with the parameters
+            to add to GET message.
+        :return: streamed requests.Response
+        """
+        url = '{}/{}'.format(self._host_url, path.lstrip('/'))
+        return self._open_stream(url, path, params)
+
+    def _get_api_stream(self, path, params=None):
+        # type: (str, [dict]) -> requests.Response
+        """HTTP GET method for Confluence Client api that does not read
+        the body of the response (ex. big page bodies).
+        The caller should iterate the response content and close it.
+
+        :param path: path to REST API to get content
+        :param params: (optional) dictionary with the parameters
+            to add to GET message.
+        :return: streamed requests.Response
+        """
+        url = '{}/{}'.format(self._api_base_url, path)
+        return self._open_stream(url, path, params)
+
+    def _open_stream(self, url, path, params):
+        # type: (str, str, [dict]) -> requests.Response
+        """Sends a streamed GET request and validates its response
+        """
+        response = self._send(
+            'GET',
+            url,
+            params=params,
+            headers=self._headers,
+            stream=True
+        )
+        try:
+            # validate HTTP response to handle possible errors
+            self._handle_response_errors(path, params, response)
+        except Exception:
+            response.close()
+            raise
+        return response
+
+    def _put(self, path, params, data):
+        # type: (str, dict[str, str], dict) -> dict
+        """HTTP PUT method for Confluence Client api
+
+        :param path: path to REST API to put content
+        :param params: dictionary with the parameters
+            to add to PUT message.
+        :param data: dictionary with the data to put
+        :return:
+        """
+        # build base url with path
+        url = "{}/{}".format(self._api_base_url, path)
+        response = self._send(
+            'PUT',
+            url,
+            json=data,
+            params=params,
+            headers=self._headers
+        )
+        # check HTTP response to handle errors
+        self._handle_response_errors(path, params, response)
+        return response.json()
+
+    def _delete(self, path, params):
+        # type: (str, dict) -> dict
+        """HTTP DELETE method for client api
+
+        :param path: path to REST API to delete content
+        :param params: dictionary with the parameters for DELETE Method
+        :return: None
+        """
+        # build base url with path
+        url = "{}/{}".format(self._api_base_url, path)
+        # send POST request over client and expect response
+        response = self._send(
+            'DELETE',
+            url,
+            params=params,
+            headers=self._headers
+        )
+        # check HTTP response to handle errors
+        self._handle_response_errors(path, params, response)
+        # Confluence answers deletes with 204 (no content)
+        if not response.content:
+            return None
+        return response.json()
+
+
+class Content(object):
+    """Base Class for classes related for Confluence Content
+    ex. Confluence Page
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    def __init__(self, json_data):
+        # type: (dict) -> Content
+        self._json_data_model = json_data
+
+    @property
+    def json_data_model(self):
+        # type: () -> dict
+        """Returns a dictionary with the json data model
+        retrieved from HTTP response
+        """
+        return self._json_data_model
+
+    @abc.abstractmethod
+    def _retrieve_values_from_json(self):
+        # type: () -> None
+        raise NotImplementedError("abstract method not implemented in child!")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the BulkPublisher class to create or update
+many confluence pages concurrently
+"""
+
+import collections
+import concurrent.futures
+import logging
+import time
+
+from confluence.exceptions import HttpNotFoundError
+from utils.hash_utils import get_text_sha256
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# page to publish:
+# - title: title of the page
+# - parent: id of an existing page or title of another page of the batch
+# - content: html (storage format) content of the page
+PageSpec = collections.namedtuple('PageSpec', ['title', 'parent', 'content'])
+
+# result of the publication of one page
+# - action: 'created', 'updated', 'unchanged' or None (error)
+PublishResult = collections.namedtuple(
+    'PublishResult',
+    ['spec', 'page', 'action', 'error', 'elapsed']
+)
+
+
+class BulkPublishReport(object):
+    """Results of a bulk publication
+    """
+
+    def __init__(self, results, wall_time):
+        # type: (list[PublishResult], float) -> None
+        self._results = results
+        self._wall_time = wall_time
+
+    @property
+    def results(self):
+        # type: () -> list[PublishResult]
+        """Returns the results of every page in the same order of the specs
+        """
+        return self._results
+
+    @property
+    def wall_time(self):
+        # type: () -> float
+        """Returns the total time in seconds of the batch
+        """
+        return self._wall_time
+
+    @property
+    def failed(self):
+        # type: () -> list[PublishResult]
+        """Returns the results of the pages that could not be published
+        """
+        return [result for result in self._results if result.error is not None]
+
+    @property
+    def succeeded(self):
+        # type: () -> list[PublishResult]
+        """Returns the results of the pages that were published
+        """
+        return [result for result in self._results if result.error is None]
+
+    def summary(self):
+        # type: () -> str
+        """Returns a one line summary of the batch
+        """
+        actions = collections.Counter(result.action for result in self.succeeded)
+        return "{total} pages in {wall:.2f}s: {created} created, {updated} updated, " \
+               "{unchanged} unchanged, {failed} failed".format(
+                   total=len(self._results),
+                   wall=self._wall_time,
+                   created=actions['created'],
+                   updated=actions['updated'],
+                   unchanged=actions['unchanged'],
+                   failed=len(self.failed))
+
+
+class BulkPublisher(object):
+    """Creates or updates a list of pages over a bounded pool of workers.
+
+    Parent pages of the batch are always published before their children
+    (children are scheduled when their parent is done). An error on one
+    page does not abort the batch; the children of a failed page
+    are reported as failed without being published.
+    """
+
+    def __init__(self, confluence_api_obj, space_key, max_workers=4,
+                 page_index=None, max_attempts=3):
+        # type: (ConfluenceApi, str, [int], [PageIndex], [int]) -> None
+        """
+
+        :param confluence_api_obj: ConfluenceApi instance
+        :param space_key: space in which the pages are published
+        :param max_workers: (optional) max number of concurrent requests
+        :param page_index: (optional) local PageIndex to resolve existing pages
+        :param max_attempts: (optional) max update attempts on version conflicts
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers should be at least 1: '{}'".format(max_workers))
+        self._api = confluence_api_obj
+        self._space_key = space_key
+        self._max_workers = max_workers
+        # entries of the host of the api (the index can be shared by many hosts)
+        self._page_index = page_index.for_host(confluence_api_obj.host_url) \
+            if page_index is not None else None
+        self._max_attempts = max_attempts
+
+    def _find_page(self, title):
+        # type: (str) -> Page
+        """Returns the existing page with that title in the space.
+        None if it does not exist.
+        """
+        try:
+            return self._api.get_page_from_title(title, self._space_key)
+        except (IndexError, HttpNotFoundError):
+            return None
+
+    def _update_indexed_page(self, spec, parent_id):
+        # type: (PageSpec, str) -> (Page, str)
+        """Updates the page from the local index (if indexed).
+        The page is not updated if the content hash of the index and the
+        content of the page are the same as the content to publish.
+
+        :return: tuple (page, action). (None, None) if the page is not
+            indexed or does not exist anymore.
+        """
+        if self._page_index is None:
+            return None, None
+        index_entry = self._page_index.lookup(self._space_key, spec.title)
+        if index_entry is None:
+            return None, None
+        content_hash = get_text_sha256(spec.content)
+        try:
+            if index_entry.content_hash == content_hash:
+                # only read when the content is expected to be unchanged
+                page = self._api.get_content(index_entry.page_id)
+                if page.content == spec.content:
+                    self._page_index.store_page(page, content_hash)
+                    return page, 'unchanged'
+            page = self._api.update_page_with_retry(
+                page_id=index_entry.page_id,
+                new_content=spec.content,
+                new_title=spec.title,
+                new_parent=parent_id,
+                max_attempts=self._max_attempts
+            )
+        except HttpNotFoundError:
+            self._page_index.invalidate(index_entry.page_id)
+            return None, None
+        self._page_index.store_page(page, content_hash)
+        return page, 'updated'
+
+    def _publish(self, spec, parent_id):
+        # type: (PageSpec, str) -> PublishResult
+        """Publishes one page. Errors are returned into the result.
+        """
+        start_time = time.perf_counter()
+        try:
+            page, action = self._update_indexed_page(spec, parent_id)
+            if page is None:
+                action = 'updated'
+                existing_page = self._find_page(spec.title)
+                if existing_page is None:
+                    action = 'created'
+                    page = self._api.create_page(
+                        page_title=spec.title,
+                        space_key=self._space_key,
+                        page_content=spec.content,
+                        parent_page_id=parent_id
+                    )
+                elif existing_page.content == spec.content:
+                    action = 'unchanged'
+                    page = existing_page
+                else:
+                    page = self._api.update_page_with_retry(
+                        page_id=existing_page.id_number,
+                        new_content=spec.content,
+                        new_title=spec.title,
+                        new_version=str(int(existing_page.version) + 1),
+                        new_parent=parent_id,
+                        max_attempts=self._max_attempts
+                    )
+                if self._page_index is not None:
+                    self._page_index.store_page(page, get_text_sha256(spec.content))
+        except Exception as ex:
+            LOGGER.error("Page '%s' could not be published: %s", spec.title, ex)
+            return PublishResult(spec, None, None, ex, time.perf_counter() - start_time)
+        LOGGER.debug("Page '%s' %s (ID:%s)", spec.title, action, page.id_number)
+        return PublishResult(spec, page, action, None, time.perf_counter() - start_time)
+
+    def publish(self, page_specs):
+        # type: (list[PageSpec]) -> BulkPublishReport
+        """Publishes all the given pages (create or update).
+
+        :param page_specs: list of PageSpec (or (title, parent, content) tuples)
+        :return: BulkPublishReport with one result per spec
+        :raises ValueError: if two specs have the same title
+        """
+        page_specs = [PageSpec(*spec) for spec in page_specs]
+        batch_start = time.perf_counter()
+
+        spec_indexes = {}
+        for spec_index, spec in enumerate(page_specs):
+            if spec.title in spec_indexes:
+                raise ValueError("Duplicated page title in batch: '{}'".format(spec.title))
+            spec_indexes[spec.title] = spec_index
+
+        # children of each page of the batch
+        children = collections.defaultdict(list)
+        roots = []
+        for spec_index, spec in enumerate(page_specs):
+            if spec.parent in spec_indexes:
+                children[spec.parent].append(spec_index)
+            else:
+                roots.append(spec_index)
+
+        results = [None] * len(page_specs)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            pending = {}
+            for spec_index in roots:
+                spec = page_specs[spec_index]
+                pending[executor.submit(self._publish, spec, spec.parent)] = spec_index
+
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    spec_index = pending.pop(future)
+                    result = future.result()
+                    results[spec_index] = result
+                    child_indexes = children.pop(page_specs[spec_index].title, [])
+                    if result.error is None:
+                        for child_index in child_indexes:
+                            child_future = executor.submit(
+                                self._publish, page_specs[child_index], result.page.id_number)
+                            pending[child_future] = child_index
+                    else:
+                        self._fail_subtree(page_specs, children, child_indexes, results)
+
+        # pages never scheduled (parent/child cycles in the batch)
+        for spec_index, result in enumerate(results):
+            if result is None:
+                results[spec_index] = PublishResult(
+                    page_specs[spec_index], None, None,
+                    ValueError("Parent cycle detected for page '{}'".format(
+                        page_specs[spec_index].title)),
+                    0.0)
+
+        report = BulkPublishReport(results, time.perf_counter() - batch_start)
+        LOGGER.info("Bulk publish finished: %s", report.summary())
+        return report
+
+    @staticmethod
+    def _fail_subtree(page_specs, children, child_indexes, results):
+        # type: (list[PageSpec], dict, list[int], list) -> None
+        """Sets an error result on all the descendants of a failed page
+        """
+        pending_indexes = list(child_indexes)
+        while pending_indexes:
+            spec_index = pending_indexes.pop()
+            spec = page_specs[spec_index]
+            results[spec_index] = PublishResult(
+                spec, None, None,
+                Exception("Parent page '{}' could not be published".format(spec.parent)),
+                0.0)
+            pending_indexes.extend(children.pop(spec.title, []))
@@ -1,601 +1,1397 @@
-#!/usr/bin/env python
-# coding=utf-8
-"""
-Module with the ConfluenceClient class that can be instanced
-in order to use the API
-"""
-
-import abc
-import logging
-
-from confluence.exceptions import ConfluenceError
-from confluence.exceptions import ConfluencePermissionError
-from confluence.exceptions import ConfluenceNotFoundError
-
-from confluence.base_api import BaseApi
-from confluence.base_api import Content
-
-# main logger instance
-LOGGER = logging.getLogger(__name__)
-
-
-class ConfluenceApi(BaseApi):
-    """Confluence Client API class
-
-    An instance of this class is able to interact with the
-    Confluence Server API in order to retrieve information
-    or submit data into the server.
-
-    This instance should be called within 'with' statement.
-    Usage:
-
-    with ConfluenceClient('http://host.com', 'user_x', 'pass_x') as instance:
-        instance.get_content(...)
-    """
-
-    def __init__(self, confluence_url, user, password):
-        # type: (str, str, str) -> None
-        """
-
-        :param confluence_url: confluence URL (with http extension)
-            ex: http://confluence-server:8080
-        :param user: name of the user (existing in the server)
-        :param password: password string of the user
-        """
-        # Host and authentication credentials
-        headers = {"X-Atlassian-Token": "nocheck"}
-        super().__init__(confluence_url, "/rest/api", user, password, headers)
-
-    def create_page(self, page_title, space_key, page_content,
-                    parent_page_id=None, content_type='page'):
-        # type: (str, str, str, [str], [str]) -> Page
-        """Creates a new page in Confluence inside the space_key given,
-        under the parent_page_id as a child page
-
-        :param page_title: String with the title of the page
-            that will be created
-        :param space_key: String with the space key in confluence
-            in which the page will exists.
-        :param page_content: HTML String Content of the page
-            that will be created
-        :param parent_page_id: (optional) String with the ID number
-            of the parent page in which the page will be created as a child page
-        :param content_type: (optional) argument for content
-            ('page' as default)
-        :return: Page Content Object
-        :rtype: Page
-        """
-        # json structure for a new page
-        data = {
-            'type': content_type,
-            'title': page_title,
-            'space': {
-                'key': space_key
-            },
-            'body': {
-                'storage': {
-                    'value': page_content,
-                    'representation': 'storage'
-                }
-            }
-        }
-        if parent_page_id:
-            data['ancestors'] = [{
-                'type': content_type,
-                'id': parent_page_id
-            }]
-
-        response = self._post('content', {}, data)
-        # create new page object from response gotten
-        new_page = Page(response)
-        return new_page
-
-    def update_page(self,
-                    page_id,
-                    new_content,
-                    new_title,
-                    new_version,
-                    new_parent=None,
-                    edit_message=None
-                    ):
-        # type: (str, str, str, str, int, str) -> Page
-        """Updates an existing page in Confluence with the given page ID.
-
-        Properties that can be updated:
-        - the content of the page
-        - the title of the page
-        - the version of the page
-        - the parent of the page
-
-        :param page_id: The confluence page unique ID.
-        :param new_content: The new content to update in the page.
-        :param new_title: The new title for the page
-        :param new_version: This should be the current version + 1.
-        :param new_parent: (optional) The new parent content unique id.
-        :param edit_message: (optional) Edit message.
-        :param expand: (optional) A list of properties to be expanded
-                on the resulting content object.
-        :rtype: Page
-        """
-        # json structure to update a confluence page
-        data = {
-            'type': 'page',
-            'title': new_title,
-            'body': {
-                'storage': {
-                    'value': new_content,
-                    'representation': 'storage'
-                }
-            },
-            'version': {
-                'number': new_version
-            }
-        }
-
-        if edit_message:
-            data['version']['message'] = edit_message
-
-        if new_parent:
-            data['ancestors'] = [{
-                'id': new_parent
-            }]
-
-        content_path = 'content/{}'.format(page_id)
-        response = self._put(content_path, {}, data)
-        # create new page object from response gotten
-        new_page = Page(response)
-        return new_page
-
-    def delete_content(self, content_id, content_status='current'):
-        # type: (str, [str]) -> None
-        """Deletes the content in Confluence with the given ID
-
-        :param content_id: String with the ID number of the content
-            (ex. page id of confluence page)
-        :param content_status: String with the status in which
-            content will be deleted / purged
-            values: 'current', 'trashed'
-        :return: None
-        """
-        url_delete_content = 'content/{}'.format(content_id)
-        #
-        self._delete(
-            path=url_delete_content,
-            params={'status': content_status}
-        )
-
-    def get_content(self, content_id, content_status='current', expand=None):
-        # type: (str, [str], [list]) -> Page
-        """
-
-        :param content_id: id number of the content to search for
-            ex. page_id = 1291392
-        :param content_status:
-        :param expand:
-        :return: Page instance
-        """
-        url_get_content = 'content/{}'.format(content_id)
-        params = {'status': content_status}
-
-        # when expand is None, default values should be used
-        # in order to retrieve the default page content
-        # body.storage contains the HTML content of the page
-        if expand is None:
-            expand = ['history', 'space', 'version', 'body.storage']
-            # add expand on the request parameters
-            params['expand'] = ','.join(expand)
-
-        response = self._get(
-            path=url_get_content,
-            params=params
-        )
-        # Create Page Object with all data abstracted from request
-        new_page = Page(response)
-        return new_page
-
-    def content_exists(self, content_id, content_status='current'):
-        # type: (str, [str]) -> bool
-        """
-
-        :param content_id: id number of the content to search for
-            ex. page_id = 1291392
-        :param content_status:
-        :param expand:
-        :return: Page instance
-        """
-        url_get_content = 'content/{}'.format(content_id)
-        content_exists = True
-
-        try:
-            # try to get the content. If no exception is thrown,
-            # the content exists.
-            self._get(
-                path=url_get_content,
-                params={'status': content_status}
-            )
-        except ConfluenceNotFoundError as ex:
-            LOGGER.info("Content with ID '{content_id}' not found: {ex}".format(
-                content_id=content_id,
-                ex=ex))
-            # Content does not exists
-            content_exists = False
-        return content_exists
-
-    def page_exists(self, title, space):
-        # type: (str, str) -> bool
-        """Returns True if the page with the given title and space exists.
-        Otherwise returns False.
-
-        :param title: title of the confluence page to search
-        :param space: space in which the confluence page is contained
-        :return: bool
-        """
-
-        page_exists = True
-        content_params = {
-            'title': title,
-            'spaceKey': space
-        }
-        try:
-            json_response = self._get(
-                path='content',
-                params=content_params
-            )
-            # instance a page object from json API response
-            # to validate that it exits. If not, an IndexError
-            # exception will be thrown.
-            Page(json_response)
-        except ConfluenceNotFoundError as ex:
-            LOGGER.info(
-                "Page with title '{page_title}' "
-                "not found in space key '{space_key}': {ex}".format(
-                    page_title=title,
-                    space_key=space,
-                    ex=ex))
-            # the content (page) does not exists
-            page_exists = False
-        except ConfluenceError as ex:
-            # some other error happened
-            raise ex
-        except IndexError:
-            # IndexError is thrown by Page object constructor
-            # when it cannot be created due that API json results
-            # array is empty. Meaning the page does not exist.
-            page_exists = False
-        return page_exists
-
-    def get_page_from_title(self, page_title, space_key, expand=None):
-        # type: (str, str, list) -> Page
-        """Searches in confluence server for a page that correspond
-        to the page title and space key given.
-
-        If the page exists, a new Page instance will be created
-        that will have and API to retrieve its content (like HTML)
-
-        :param page_title: title of the page to look for
-        :param space_key: space in which the page is located
-        :param expand: API parameter to specify the data retrieved of the page
-        :return: Page instance
-        """
-        params = {
-            'title': page_title,
-            'spaceKey': space_key
-        }
-
-        # when expand is None, default values should be used
-        # in order to retrieve the default page content
-        # body.storage contains the HTML content of the page
-        if expand is None:
-            expand = ['history', 'space', 'version', 'body.storage']
-            # add expand on the request parameters
-            params['expand'] = ','.join(expand)
-
-        response = self._get(
-            path='content',
-            params=params
-        )
-
-        new_page = Page(response)
-        return new_page
-
-
-class Page(Content):
-    """Class needed to abstract the content of an HTTP json response
-    that should contain a Confluence Page which was retrieve from
-    Confluence REST API.
-
-    This abstraction will retrieve the metadata from json response and
-    it will create properties into Page object mapped to those values.
-    """
-
-    def __init__(self, json_data):
-        # type: (dict) -> Page
-        super(Page, self).__init__(json_data)
-        self._id_number = None
-        self._title = None
-        self._space_key = None
-        self._content = None
-        self._permanent_link = None
-        self._base_url = None
-        self._version = None
-        self._retrieve_values_from_json()
-        LOGGER.debug("New Page Object created: %s", self)
-
-    def _retrieve_results_from_json(self):
-        # type: () -> dict
-        """Validates if json API response contains a dictionary with
-        the results with Page data.
-
-        :raises IndexError: in case 'results' is not found in api response
-        :return: the json api response with the page data
-        """
-        # attributes model reference:
-        # https://docs.atlassian.com/ConfluenceServer/rest/6.12.1/
-        json_api_results = self.json_data_model
-        # check if API response is contained inside
-        # 'results' json object
-        if 'results' in json_api_results.keys():
-            # check if results contains any data
-            # in order to retrieve values from it
-            if json_api_results['results']:
-                json_api_results = json_api_results['results'][0]
-            else:
-                raise IndexError("Page object cannot be instanced because "
-                                 "API response 'results' is empty.")
-        return json_api_results
-
-    def _validate_links_section(self, json_data_response):
-        # type: (dict) -> str
-        """Validates and retrieves _links section data
-        out of the api response in order to get links data
-        """
-        missing_value = None
-        # links
-        if '_links' in json_data_response.keys():
-            # permanent link
-            if 'tinyui' in json_data_response['_links'].keys():
-                self._permanent_link = str(json_data_response['_links']['tinyui'])
-            else:
-                missing_value = '_links.tinyui'
-        else:
-            missing_value = '_links'
-        return missing_value
-
-    def _validate_body_section(self, json_data_response):
-        # type: (dict) -> str
-        """Validates and retrieves body section data
-        out of the api response in order to get html content
-        """
-        missing_value = None
-        # body.view.value (HTML Content)
-        if 'body' in json_data_response.keys():
-            if 'storage' in json_data_response['body'].keys():
-                if 'value' in json_data_response['body']['storage'].keys():
-                    self._content = str(json_data_response['body']['storage']['value'])
-                else:
-                    missing_value = 'body.storage.value'
-            else:
-                missing_value = 'body.storage'
-        else:
-            missing_value = 'body'
-        return missing_value
-
-    def _validate_metadata_section(self, json_data_response):
-        # type: (dict) -> str
-        """Validates and retrieves metadata section data
-        out of the api response in order to get id, title and space
-        """
-        missing_value = None
-        # id
-        if 'id' in json_data_response.keys():
-            self._id_number = str(json_data_response['id'])
-        else:
-            missing_value = 'id'
-        # title
-        if 'title' in json_data_response.keys():
-            self._title = str(json_data_response['title'])
-        else:
-            missing_value = 'title'
-        # space
-        if 'space' in json_data_response.keys():
-            # space key
-            if 'key' in json_data_response['space'].keys():
-                self._space_key = str(json_data_response['space']['key'])
-            else:
-                missing_value = 'space.key'
-        else:
-            missing_value = 'space'
-        # version
-        if 'version' in json_data_response.keys():
-            # space key
-            if 'number' in json_data_response['version'].keys():
-                self._version = str(json_data_response['version']['number'])
-            else:
-                missing_value = 'version.number'
-        else:
-            missing_value = 'version'
-        return missing_value
-
-    def _retrieve_values_from_json(self):
-        # type: () -> None
-        """Retrieves the values from the HTTP response in json format
-        that are important for the page object, like id, title,
-        space, HTML content, web link.
-
-        If some value is missing, an exception will be raised
-
-        Then, it adds those values to the Page model
-        into properties of the instance
-
-        :return: None
-        :raises Exception: if a value is not present on json model
-        """
-
-        # retrieve base url for the server host from response
-        if '_links' in self.json_data_model.keys():
-            if 'base' in self.json_data_model['_links'].keys():
-                self._base_url = self.json_data_model['_links']['base']
-
-        # retrieve results dictionary with Page data from json api response
-        json_data_response = self._retrieve_results_from_json()
-
-        # retrieve _links section from API response
-        missing_value = self._validate_metadata_section(json_data_response)
-
-        if missing_value is None:
-            # retrieve _links section from API response
-            missing_value = self._validate_links_section(json_data_response)
-
-        if missing_value is None:
-            # retrieve body section from API response
-            missing_value = self._validate_body_section(json_data_response)
-
-        if missing_value is not None:
-            raise Exception("Page object cannot be instanced because "
-                            "there is a missing value in json data: "
-                            "\"{val}\"".format(val=missing_value))
-
-    @property
-    def id_number(self):
-        # type: () -> str
-        """Returns the id number of the Confluence page
-        """
-        return self._id_number
-
-    @property
-    def title(self):
-        # type: () -> str
-        """Returns the title of the Confluence page
-        """
-        return self._title
-
-    @property
-    def content(self):
-        # type: () -> str
-        """Returns the HTML content retrieved from Confluence page
-        """
-        return self._content
-
-    @property
-    def space_key(self):
-        # type: () -> str
-        """Returns the space kay name in which the Confluence page belongs to
-        """
-        return self._space_key
-
-    @property
-    def version(self):
-        # type: () -> str
-        """Returns the current version number for that Confluence page
-        """
-        return self._version
-
-    @property
-    def permanent_link(self):
-        # type: () -> str
-        """Returns the permanent link of the Confluence Page
-
-        (this link will be always point to that page
-        even if it changes it title or location)
-        """
-        return self._permanent_link
-
-    @property
-    def base_url(self):
-        # type: () -> str
-        """Returns the base url of the server host in which
-        the API response was received
-        """
-        return self._base_url
-
-    def get_page_url(self):
-        # type: () -> str
-        """Returns the permanent link of the Confluence Page
-
-        (this link will be always point to that page
-        even if it changes it title or location)
-        """
-        return self.base_url + self.permanent_link
-
-    def __str__(self):
-        # type: () -> str
-        """Returns a string representation of the current Page instance
-        with metadata like: Type, Id, Space, Title, Link, html content
-        """
-        status = "Confluence Content - " \
-                 "ID: \"{id}\" - " \
-                 "SPACE: \"{space}\" - " \
-                 "TITLE: \"{title}\" - " \
-                 "VERSION: \"{version}\" - " \
-                 "PERMALINK: \"{permalink}\" - " \
-                 "CONTENT: \"{content}\""
-        if self.content is None:
-            content_string = status.format(
-                id=self.id_number,
-                space=self.space_key,
-                title=self.title,
-                version=self.version,
-                permalink=self.permanent_link,
-                content="No Content"
-            )
-        else:
-            content_string = status.format(
-                id=self.id_number,
-                space=self.space_key,
-                title=self.title,
-                version=self.version,
-                permalink=self.permanent_link,
-                content="Yes"
-            )
-        return content_string
-
-
-class ContentError(Content):
-    """Class needed to abstract the content of an HTTP json response
-    that is an ERROR response from Confluence REST API.
-
-    ex. when page does not exist
-    """
-
-    def __init__(self, json_data):
-        # type: (dict) -> ContentError
-        super(ContentError, self).__init__(json_data)
-        self._message = None
-        self._status_code = None
-        self._retrieve_values_from_json()
-
-    def _retrieve_values_from_json(self):
-        """Retrieves the values from HTTP json response from REST API
-        that are meaningful for Error Content (message and status code)
-
-        :return: None
-        :raises Exception: if a value is not present on json model
-        """
-        missing_value = None
-        # message
-        if 'message' in self.json_data_model.keys():
-            self._message = self.json_data_model['message']
-        else:
-            missing_value = 'message'
-        # statusCode
-        if 'statusCode' in self.json_data_model.keys():
-            self._status_code = self.json_data_model['statusCode']
-        else:
-            missing_value = 'statusCode'
-
-        if missing_value is not None:
-            raise Exception("ContentError object cannot be instance because "
-                            "there is a missing value in json data: "
-                            "\"{val}\"".format(val=missing_value))
-
-    @property
-    def message(self):
-        """Returns the error message of the HTTP error response
-        """
-        return self._message
-
-    @property
-    def status_code(self):
-        """Returns the status code of the HTTP error response
-        """
-        return self._status_code
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the ConfluenceClient class that can be instanced
+in order to use the API
+"""
+
+import abc
+import datetime
+import logging
+import os
+import tempfile
+import typing
+
+from confluence.exceptions import ConfluenceError
+from confluence.exceptions import ConfluencePermissionError
+from confluence.exceptions import ConfluenceNotFoundError
+from confluence.exceptions import HttpConflictError
+
+from confluence.base_api import BaseApi
+from confluence.base_api import Content
+from confluence.bulk_publisher import BulkPublisher
+from confluence.multipart import DEFAULT_CHUNK_SIZE
+from confluence.multipart import MultipartFileStream
+from confluence.storage_analyzer import StorageBodyExtractor
+from utils.hash_utils import get_file_sha256
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+
+class ConfluenceApi(BaseApi):
+    """Confluence Client API class
+
+    An instance of this class is able to interact with the
+    Confluence Server API in order to retrieve information
+    or submit data into the server.
+
+    This instance should be called within 'with' statement.
+    Usage:
+
+    with ConfluenceApi('http://host.com', 'user_x', 'pass_x') as instance:
+        instance.get_content(...)
+
+    The HTTP connections are pooled and reused for the lifetime
+    of the instance (closed when leaving the 'with' statement).
+    """
+
+    # prefix of the content hash stored in the comment of the attachments
+    ATTACHMENT_HASH_PREFIX = 'sha256:'
+
+    # date format accepted by CQL date fields
+    CQL_DATE_FORMAT = '%Y/%m/%d %H:%M'
+
+    def __init__(self, confluence_url, user, password, pool_size=BaseApi.DEFAULT_POOL_SIZE,
+                 throttle_retries=BaseApi.DEFAULT_THROTTLE_RETRIES):
+        # type: (str, str, str, [int], [int]) -> None
+        """
+
+        :param confluence_url: confluence URL (with http extension)
+            ex: http://confluence-server:8080
+        :param user: name of the user (existing in the server)
+        :param password: password string of the user
+        :param pool_size: (optional) max number of connections kept open
+        :param throttle_retries: (optional) number of times a throttled
+            request (429 / 503) is sent again
+        """
+        # Host and authentication credentials
+        headers = {"X-Atlassian-Token": "nocheck"}
+        super().__init__(confluence_url, "/rest/api", user, password, headers, pool_size,
+                         throttle_retries)
+
+    def get_current_user(self):
+        # type: () -> dict
+        """Returns the data of the authenticated user
+        (useful to validate the credentials)
+
+        :return: dictionary with the user data (username, displayName, ...)
+        """
+        return self._get(
+            path='user/current',
+            params={}
+        )
+
+    def create_page(self, page_title, space_key, page_content,
+                    parent_page_id=None, content_type='page'):
+        # type: (str, str, str, [str], [str]) -> Page
+        """Creates a new page in Confluence inside the space_key given,
+        under the parent_page_id as a child page
+
+        :param page_title: String with the title of the page
+            that will be created
+        :param space_key: String with the space key in confluence
+            in which the page will exists.
+        :param page_content: HTML String Content of the page
+            that will be created
+        :param parent_page_id: (optional) String with the ID number
+            of the parent page in which the page will be created as a child page
+        :param content_type: (optional) argument for content
+            ('page' as default)
+        :return: Page Content Object
+        :rtype: Page
+        """
+        # json structure for a new page
+        data = {
+            'type': content_type,
+            'title': page_title,
+            'space': {
+                'key': space_key
+            },
+            'body': {
+                'storage': {
+                    'value': page_content,
+                    'representation': 'storage'
+                }
+            }
+        }
+        if parent_page_id:
+            data['ancestors'] = [{
+                'type': content_type,
+                'id': parent_page_id
+            }]
+
+        response = self._post('content', {}, data)
+        # create new page object from response gotten
+        new_page = Page(response)
+        return new_page
+
+    def update_page(self,
+                    page_id,
+                    new_content,
+                    new_title,
+                    new_version,
+                    new_parent=None,
+                    edit_message=None
+                    ):
+        # type: (str, str, str, str, int, str) -> Page
+        """Updates an existing page in Confluence with the given page ID.
+
+        Properties that can be updated:
+        - the content of the page
+        - the title of the page
+        - the version of the page
+        - the parent of the page
+
+        :param page_id: The confluence page unique ID.
+        :param new_content: The new content to update in the page.
+        :param new_title: The new title for the page
+        :param new_version: This should be the current version + 1.
+        :param new_parent: (optional) The new parent content unique id.
+        :param edit_message: (optional) Edit message.
+        :param expand: (optional) A list of properties to be expanded
+                on the resulting content object.
+        :rtype: Page
+        """
+        # json structure to update a confluence page
+        data = {
+            'type': 'page',
+            'title': new_title,
+            'body': {
+                'storage': {
+                    'value': new_content,
+                    'representation': 'storage'
+                }
+            },
+            'version': {
+                'number': new_version
+            }
+        }
+
+        if edit_message:
+            data['version']['message'] = edit_message
+
+        if new_parent:
+            data['ancestors'] = [{
+                'id': new_parent
+            }]
+
+        content_path = 'content/{}'.format(page_id)
+        response = self._put(content_path, {}, data)
+        # create new page object from response gotten
+        new_page = Page(response)
+        return new_page
+
+    def update_page_with_retry(self,
+                               page_id,
+                               new_content,
+                               new_title,
+                               new_version=None,
+                               new_parent=None,
+                               edit_message=None,
+                               max_attempts=3
+                               ):
+        # type: (str, str, str, [str], [str], [str], [int]) -> Page
+        """Updates an existing page in Confluence with optimistic concurrency.
+
+        The update is tried with the given version. If the server rejects it
+        because the page was edited in between (HTTP 409), only the current
+        version number is fetched again (metadata only request, no body)
+        and the update is retried with that version + 1.
+
+        :param page_id: The confluence page unique ID.
+        :param new_content: The new content to update in the page.
+        :param new_title: The new title for the page
+        :param new_version: (optional) expected new version (current + 1).
+            If None, the current version will be fetched before the update.
+        :param new_parent: (optional) The new parent content unique id.
+        :param edit_message: (optional) Edit message.
+        :param max_attempts: (optional) max number of update attempts
+            before the version conflict is raised to the caller.
+        :return: Page Content Object
+        :rtype: Page
+        :raises HttpConflictError: if all the update attempts had a conflict
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts should be at least 1: '{}'".format(max_attempts))
+
+        if new_version is None:
+            new_version = str(int(self.get_content_version(page_id)) + 1)
+
+        attempt = 1
+        while True:
+            try:
+                return self.update_page(
+                    page_id=page_id,
+                    new_content=new_content,
+                    new_title=new_title,
+                    new_version=new_version,
+                    new_parent=new_parent,
+                    edit_message=edit_message
+                )
+            except HttpConflictError:
+                if attempt >= max_attempts:
+                    LOGGER.error("Page '%s' could not be updated after %s attempts "
+                                 "due to version conflicts", page_id, attempt)
+                    raise
+                current_version = self.get_content_version(page_id)
+                LOGGER.info("Version conflict updating page '%s' with version '%s'. "
+                            "Retrying with current version '%s' (attempt %s/%s)",
+                            page_id, new_version, current_version, attempt + 1, max_attempts)
+                new_version = str(int(current_version) + 1)
+                attempt += 1
+
+    def get_content_version(self, content_id, content_status='current'):
+        # type: (str, [str]) -> str
+        """Returns the current version number of the content with the given ID.
+
+        Only the version metadata is requested to the server (no body),
+        so this is a cheap call compared to 'get_content'.
+
+        :param content_id: id number of the content to search for
+            ex. page_id = 1291392
+        :param content_status: status of the content ('current' by default)
+        :return: string with the current version number
+        """
+        url_get_content = 'content/{}'.format(content_id)
+        params = {
+            'status': content_status,
+            'expand': 'version'
+        }
+        response = self._get(
+            path=url_get_content,
+            params=params
+        )
+        try:
+            return str(response['version']['number'])
+        except (KeyError, TypeError):
+            raise Exception("Version number not found in API response "
+                            "for content '{}'".format(content_id))
+
+    def get_content_title(self, content_id, content_status='current'):
+        # type: (str, [str]) -> str
+        """Returns the title of the content with the given ID.
+
+        Nothing is expanded in the request (no body), so this is
+        a cheap call compared to 'get_content'.
+
+        :param content_id: id number of the content to search for
+        :param content_status: status of the content ('current' by default)
+        :return: string with the title of the content
+        """
+        url_get_content = 'content/{}'.format(content_id)
+        response = self._get(
+            path=url_get_content,
+            params={'status': content_status}
+        )
+        try:
+            return response['title']
+        except (KeyError, TypeError):
+            raise Exception("Title not found in API response "
+                            "for content '{}'".format(content_id))
+
+    def publish_pages(self, page_specs, space_key, max_workers=4, page_index=None):
+        # type: (list, str, [int], [PageIndex]) -> BulkPublishReport
+        """Creates or updates many pages concurrently
+        (see bulk_publisher.BulkPublisher).
+
+        :param page_specs: list of (title, parent, content) page specs.
+            parent can be the id of an existing page or the title of
+            another page of the list (it will be published first).
+        :param space_key: space in which the pages are published
+        :param max_workers: (optional) max number of concurrent requests
+        :param page_index: (optional) local PageIndex to resolve existing pages
+        :return: BulkPublishReport with per page results and batch wall time
+        """
+        publisher = BulkPublisher(self, space_key, max_workers=max_workers,
+                                  page_index=page_index)
+        return publisher.publish(page_specs)
+
+    def delete_content(self, content_id, content_status='current'):
+        # type: (str, [str]) -> None
+        """Deletes the content in Confluence with the given ID
+
+        :param content_id: String with the ID number of the content
+            (ex. page id of confluence page)
+        :param content_status: String with the status in which
+            content will be deleted / purged
+            values: 'current', 'trashed'
+        :return: None
+        """
+        url_delete_content = 'content/{}'.format(content_id)
+        #
+        self._delete(
+            path=url_delete_content,
+            params={'status': content_status}
+        )
+
+    def get_content(self, content_id, content_status='current', expand=None):
+        # type: (str, [str], [list]) -> Page
+        """
+
+        :param content_id: id number of the content to search for
+            ex. page_id = 1291392
+        :param content_status:
+        :param expand:
+        :return: Page instance
+        """
+        url_get_content = 'content/{}'.format(content_id)
+        params = {'status': content_status}
+
+        # when expand is None, default values should be used
+        # in order to retrieve the default page content
+        # body.storage contains the HTML content of the page
+        if expand is None:
+            expand = ['history', 'space', 'version', 'body.storage']
+            # add expand on the request parameters
+            params['expand'] = ','.join(expand)
+
+        response = self._get(
+            path=url_get_content,
+            params=params
+        )
+        # Create Page Object with all data abstracted from request
+        new_page = Page(response)
+        return new_page
+
+    def iter_content_body(self, content_id, content_status='current',
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+        # type: (str, [str], [int]) -> typing.Iterable[str]
+        """Yields the storage format (XHTML) body of a content in text chunks
+        while the response is received, without loading the whole
+        response in memory (ex. to analyze big pages).
+
+        :param content_id: id number of the content
+        :param content_status: (optional) status of the content
+        :param chunk_size: (optional) size in bytes of the received chunks
+        :return: generator of text chunks of the storage body
+        """
+        url_get_content = 'content/{}'.format(content_id)
+        params = {
+            'status': content_status,
+            'expand': 'body.storage'
+        }
+        extractor = StorageBodyExtractor()
+        response = self._get_api_stream(url_get_content, params)
+        with response:
+            for raw_chunk in response.iter_content(chunk_size=chunk_size):
+                if not raw_chunk:
+                    continue
+                text_chunk = extractor.feed(raw_chunk)
+                if text_chunk:
+                    yield text_chunk
+                if extractor.finished:
+                    break
+            text_chunk = extractor.close()
+            if text_chunk:
+                yield text_chunk
+
+    def content_exists(self, content_id, content_status='current'):
+        # type: (str, [str]) -> bool
+        """
+
+        :param content_id: id number of the content to search for
+            ex. page_id = 1291392
+        :param content_status:
+        :param expand:
+        :return: Page instance
+        """
+        url_get_content = 'content/{}'.format(content_id)
+        content_exists = True
+
+        try:
+            # try to get the content. If no exception is thrown,
+            # the content exists.
+            self._get(
+                path=url_get_content,
+                params={'status': content_status}
+            )
+        except ConfluenceNotFoundError as ex:
+            LOGGER.info("Content with ID '{content_id}' not found: {ex}".format(
+                content_id=content_id,
+                ex=ex))
+            # Content does not exists
+            content_exists = False
+        return content_exists
+
+    def page_exists(self, title, space):
+        # type: (str, str) -> bool
+        """Returns True if the page with the given title and space exists.
+        Otherwise returns False.
+
+        :param title: title of the confluence page to search
+        :param space: space in which the confluence page is contained
+        :return: bool
+        """
+
+        page_exists = True
+        content_params = {
+            'title': title,
+            'spaceKey': space
+        }
+        try:
+            json_response = self._get(
+                path='content',
+                params=content_params
+            )
+            # instance a page object from json API response
+            # to validate that it exits. If not, an IndexError
+            # exception will be thrown.
+            Page(json_response)
+        except ConfluenceNotFoundError as ex:
+            LOGGER.info(
+                "Page with title '{page_title}' "
+                "not found in space key '{space_key}': {ex}".format(
+                    page_title=title,
+                    space_key=space,
+                    ex=ex))
+            # the content (page) does not exists
+            page_exists = False
+        except ConfluenceError as ex:
+            # some other error happened
+            raise ex
+        except IndexError:
+            # IndexError is thrown by Page object constructor
+            # when it cannot be created due that API json results
+            # array is empty. Meaning the page does not exist.
+            page_exists = False
+        return page_exists
+
+    def get_page_from_title(self, page_title, space_key, expand=None):
+        # type: (str, str, list) -> Page
+        """Searches in confluence server for a page that correspond
+        to the page title and space key given.
+
+        If the page exists, a new Page instance will be created
+        that will have and API to retrieve its content (like HTML)
+
+        :param page_title: title of the page to look for
+        :param space_key: space in which the page is located
+        :param expand: API parameter to specify the data retrieved of the page
+        :return: Page instance
+        """
+        params = {
+            'title': page_title,
+            'spaceKey': space_key
+        }
+
+        # when expand is None, default values should be used
+        # in order to retrieve the default page content
+        # body.storage contains the HTML content of the page
+        if expand is None:
+            expand = ['history', 'space', 'version', 'body.storage']
+            # add expand on the request parameters
+            params['expand'] = ','.join(expand)
+
+        response = self._get(
+            path='content',
+            params=params
+        )
+
+        new_page = Page(response)
+        return new_page
+
+    def search(self, cql, limit=100, expand=None, max_results=None):
+        # type: (str, [int], [list], [int]) -> typing.Iterable[ContentSummary]
+        """Searches content with a CQL query. Results are yielded
+        while the pages of results are retrieved from the server
+        (next page is only requested when the previous one is consumed).
+
+        Only the minimal data is expanded by default (version),
+        the body of the pages is never retrieved.
+
+        :param cql: CQL query string
+            ex. 'space = DOC and type = page and lastmodified >= "2020/01/31 10:00"'
+        :param limit: (optional) number of results per request
+        :param expand: (optional) list of properties to expand in the results
+            (['version', 'space'] by default)
+        :param max_results: (optional) max number of results to yield
+        :return: generator of ContentSummary instances
+        """
+        if expand is None:
+            expand = ['version', 'space']
+        params = {
+            'cql': cql,
+            'limit': limit,
+            'start': 0
+        }
+        if expand:
+            params['expand'] = ','.join(expand)
+
+        results_count = 0
+        while True:
+            response = self._get(
+                path='content/search',
+                params=dict(params)
+            )
+            results = response.get('results', [])
+            for json_result in results:
+                yield ContentSummary(json_result)
+                results_count += 1
+                if max_results is not None and results_count >= max_results:
+                    return
+            # stop when the server does not have more results
+            has_next_link = 'next' in response.get('_links', {})
+            if not results or (not has_next_link and len(results) < params['limit']):
+                return
+            params['start'] += len(results)
+
+    @staticmethod
+    def build_modified_since_cql(since, space_key=None, ancestor_id=None,
+                                 content_type='page'):
+        # type: (datetime.datetime, [str], [str], [str]) -> str
+        """Returns the CQL query for content modified since the given time.
+
+        :param since: datetime (server time) or a CQL formatted date string
+        :param space_key: (optional) space to search in
+        :param ancestor_id: (optional) id of the page whose descendants are searched
+        :param content_type: (optional) type of the content ('page' by default)
+        :return: CQL query string
+        """
+        if isinstance(since, datetime.datetime):
+            since = since.strftime(ConfluenceApi.CQL_DATE_FORMAT)
+        cql_conditions = []
+        if content_type:
+            cql_conditions.append('type = {}'.format(content_type))
+        if space_key:
+            # quotes and backslashes of CQL strings are escaped with a backslash
+            cql_conditions.append('space = "{}"'.format(
+                space_key.replace('\\', '\\\\').replace('"', '\\"')))
+        if ancestor_id:
+            cql_conditions.append('ancestor = {}'.format(ancestor_id))
+        cql_conditions.append('lastmodified >= "{}"'.format(since))
+        return ' and '.join(cql_conditions) + ' order by lastmodified asc'
+
+    def search_modified_since(self, since, space_key=None, ancestor_id=None,
+                              content_type='page', limit=100, expand=None):
+        # type: (datetime.datetime, [str], [str], [str], [int], [list]) -> typing.Iterable[ContentSummary]
+        """Yields the content modified since the given time
+        (optionally inside a space and/or under an ancestor page).
+
+        :param since: datetime (server time) or a CQL formatted date string
+        :param space_key: (optional) space to search in
+        :param ancestor_id: (optional) id of the page whose descendants are searched
+        :param content_type: (optional) type of the content ('page' by default)
+        :param limit: (optional) number of results per request
+        :param expand: (optional) list of properties to expand in the results
+        :return: generator of ContentSummary instances
+        """
+        cql = self.build_modified_since_cql(since, space_key, ancestor_id, content_type)
+        return self.search(cql, limit=limit, expand=expand)
+
+    def get_changed_pages(self, known_versions, since, space_key=None, ancestor_id=None):
+        # type: (dict, datetime.datetime, [str], [str]) -> typing.Iterable[ContentSummary]
+        """Yields the pages modified since the given time whose version
+        is not the one already known (change detection without
+        requesting every page).
+
+        :param known_versions: dictionary {page_id: version} from the last sync
+        :param since: datetime (server time) of the last sync
+        :param space_key: (optional) space to search in
+        :param ancestor_id: (optional) id of the page whose descendants are searched
+        :return: generator of ContentSummary instances
+        """
+        for summary in self.search_modified_since(since, space_key, ancestor_id):
+            if known_versions.get(summary.id_number) != summary.version:
+                yield summary
+
+    def get_child_pages(self, page_id, limit=100, expand=None):
+        # type: (str, [int], [list]) -> typing.Iterable[ContentSummary]
+        """Yields the direct child pages of a page. The pages of results
+        are requested while the children are consumed.
+
+        :param page_id: id number of the parent page
+        :param limit: (optional) number of results per request
+        :param expand: (optional) list of properties to expand in the results
+            (['version', 'space'] by default, never the body)
+        :return: generator of ContentSummary instances
+        """
+        if expand is None:
+            expand = ['version', 'space']
+        params = {
+            'limit': limit,
+            'start': 0
+        }
+        if expand:
+            params['expand'] = ','.join(expand)
+
+        while True:
+            response = self._get(
+                path='content/{}/child/page'.format(page_id),
+                params=dict(params)
+            )
+            results = response.get('results', [])
+            for json_result in results:
+                yield ContentSummary(json_result)
+            has_next_link = 'next' in response.get('_links', {})
+            if not results or (not has_next_link and len(results) < params['limit']):
+                return
+            params['start'] += len(results)
+
+    def get_attachment(self, page_id, file_name):
+        # type: (str, str) -> Attachment
+        """Returns the attachment of the page with the given file name.
+        None if the page has no attachment with that name.
+
+        :param page_id: id number of the page that contains the attachment
+        :param file_name: name of the attached file
+        :return: Attachment instance or None
+        """
+        response = self._get(
+            path='content/{}/child/attachment'.format(page_id),
+            params={
+                'filename': file_name,
+                'expand': 'version,metadata'
+            }
+        )
+        try:
+            return Attachment(response)
+        except IndexError:
+            return None
+
+    def upload_attachment(self, page_id, file_path, file_name=None, comment=None,
+                          skip_unchanged=True, progress_callback=None,
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+        # type: (str, str, [str], [str], [bool], [callable], [int]) -> Attachment
+        """Attaches a file to a page. The file is streamed from disk
+        in chunks (never loaded fully into memory).
+
+        If the page already has an attachment with that name, a new version
+        of it is uploaded instead. The sha256 of the file is stored in the
+        attachment comment, so if the existing attachment has the same hash
+        (and 'skip_unchanged' is set) nothing is uploaded.
+
+        :param page_id: id number of the page to attach the file to
+        :param file_path: path to the local file
+        :param file_name: (optional) name of the attachment.
+            if None, the base name of the file is used.
+        :param comment: (optional) comment for the attachment
+        :param skip_unchanged: (optional) if set, the upload is skipped when
+            the existing attachment has the same content hash
+        :param progress_callback: (optional) function called with
+            (bytes_sent, total_bytes) while the file is uploaded
+        :param chunk_size: (optional) size in bytes of the chunks read from disk
+        :return: Attachment instance (uploaded or the existing one)
+        """
+        if file_name is None:
+            file_name = os.path.basename(file_path)
+        existing_attachment = self.get_attachment(page_id, file_name)
+        if existing_attachment is not None:
+            return self.update_attachment(
+                page_id,
+                existing_attachment,
+                file_path,
+                comment=comment,
+                skip_unchanged=skip_unchanged,
+                progress_callback=progress_callback,
+                chunk_size=chunk_size
+            )
+
+        LOGGER.info("Uploading attachment '%s' to page '%s'", file_name, page_id)
+        data_stream = MultipartFileStream(
+            file_path,
+            file_name=file_name,
+            fields=self._get_attachment_fields(file_path, comment),
+            progress_callback=progress_callback,
+            chunk_size=chunk_size
+        )
+        try:
+            response = self._post_stream(
+                'content/{}/child/attachment'.format(page_id),
+                {},
+                data_stream,
+                data_stream.content_type
+            )
+        finally:
+            data_stream.close()
+        return Attachment(response)
+
+    def update_attachment(self, page_id, attachment, file_path, comment=None,
+                          skip_unchanged=True, progress_callback=None,
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+        # type: (str, Attachment, str, [str], [bool], [callable], [int]) -> Attachment
+        """Uploads a new version of an existing attachment of a page.
+        The file is streamed from disk in chunks.
+
+        :param page_id: id number of the page that contains the attachment
+        :param attachment: Attachment instance (or attachment id) to update
+        :param file_path: path to the local file
+        :param comment: (optional) comment for the new version
+        :param skip_unchanged: (optional) if set, the upload is skipped when
+            the existing attachment has the same content hash.
+            (only possible when an Attachment instance is given)
+        :param progress_callback: (optional) function called with
+            (bytes_sent, total_bytes) while the file is uploaded
+        :param chunk_size: (optional) size in bytes of the chunks read from disk
+        :return: Attachment instance (uploaded or the existing one)
+        """
+        fields = self._get_attachment_fields(file_path, comment)
+        if isinstance(attachment, Attachment):
+            attachment_id = attachment.id_number
+            file_name = attachment.title
+            if skip_unchanged and attachment.content_hash is not None \
+                    and attachment.content_hash == self._get_hash_from_fields(fields):
+                LOGGER.info("Attachment '%s' of page '%s' did not change. "
+                            "There is no need to upload it.", attachment.title, page_id)
+                return attachment
+        else:
+            attachment_id = attachment
+            file_name = os.path.basename(file_path)
+
+        LOGGER.info("Uploading new version of attachment '%s' to page '%s'",
+                    attachment_id, page_id)
+        data_stream = MultipartFileStream(
+            file_path,
+            file_name=file_name,
+            fields=fields,
+            progress_callback=progress_callback,
+            chunk_size=chunk_size
+        )
+        try:
+            response = self._post_stream(
+                'content/{}/child/attachment/{}/data'.format(page_id, attachment_id),
+                {},
+                data_stream,
+                data_stream.content_type
+            )
+        finally:
+            data_stream.close()
+        return Attachment(response)
+
+    def download_attachment(self, page_id, file_name, target_path,
+                            progress_callback=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        # type: (str, str, str, [callable], [int]) -> str
+        """Downloads an attachment of a page into a local file.
+        The content is written to disk in chunks while it arrives.
+
+        :param page_id: id number of the page that contains the attachment
+        :param file_name: name of the attached file
+        :param target_path: path of the local file (or existing directory)
+        :param progress_callback: (optional) function called with
+            (bytes_received, total_bytes) while the file is downloaded.
+            total_bytes is None if the server does not report it.
+        :param chunk_size: (optional) size in bytes of the chunks written to disk
+        :return: path of the downloaded file
+        """
+        attachment = self.get_attachment(page_id, file_name)
+        if attachment is None:
+            raise Exception("Attachment '{file}' not found in page '{page}'".format(
+                file=file_name,
+                page=page_id))
+        if os.path.isdir(target_path):
+            target_path = os.path.join(target_path, attachment.title)
+
+        LOGGER.info("Downloading attachment '%s' of page '%s' into '%s'",
+                    file_name, page_id, target_path)
+        response = self._get_stream(attachment.download_link)
+        total_bytes = response.headers.get('Content-Length')
+        total_bytes = int(total_bytes) if total_bytes else attachment.file_size
+        received_bytes = 0
+        # write into a temporary file first, so an interrupted download
+        # never leaves a partial file in the target path
+        target_dir = os.path.dirname(os.path.abspath(target_path))
+        file_descriptor, temp_path = tempfile.mkstemp(dir=target_dir, suffix='.part')
+        try:
+            with response, os.fdopen(file_descriptor, 'wb') as file_obj:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if not chunk:
+                        continue
+                    file_obj.write(chunk)
+                    received_bytes += len(chunk)
+                    if progress_callback is not None:
+                        progress_callback(received_bytes, total_bytes)
+            os.replace(temp_path, target_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return target_path
+
+    def _get_attachment_fields(self, file_path, comment=None):
+        # type: (str, [str]) -> dict
+        """Returns the form fields sent together with an attachment.
+        The comment contains the sha256 hash of the file, so unchanged
+        files can be detected without downloading them.
+        """
+        file_hash = '{prefix}{hash}'.format(
+            prefix=ConfluenceApi.ATTACHMENT_HASH_PREFIX,
+            hash=get_file_sha256(file_path))
+        if comment:
+            file_hash = '{comment} [{hash}]'.format(comment=comment, hash=file_hash)
+        return {
+            'comment': file_hash,
+            'minorEdit': 'true'
+        }
+
+    @staticmethod
+    def _get_hash_from_fields(fields):
+        # type: (dict) -> str
+        """Returns the hash of the attachment from the form fields
+        """
+        return Attachment.get_hash_from_comment(fields['comment'])
+
+
+class Page(Content):
+    """Class needed to abstract the content of an HTTP json response
+    that should contain a Confluence Page which was retrieve from
+    Confluence REST API.
+
+    This abstraction will retrieve the metadata from json response and
+    it will create properties into Page object mapped to those values.
+    """
+
+    def __init__(self, json_data):
+        # type: (dict) -> Page
+        super(Page, self).__init__(json_data)
+        self._id_number = None
+        self._title = None
+        self._space_key = None
+        self._content = None
+        self._permanent_link = None
+        self._base_url = None
+        self._version = None
+        self._retrieve_values_from_json()
+        # building the string of the page is expensive (bulk operations)
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("New Page Object created: %s", self)
+
+    def _retrieve_results_from_json(self):
+        # type: () -> dict
+        """Validates if json API response contains a dictionary with
+        the results with Page data.
+
+        :raises IndexError: in case 'results' is not found in api response
+        :return: the json api response with the page data
+        """
+        # attributes model reference:
+        # https://docs.atlassian.com/ConfluenceServer/rest/6.12.1/
+        json_api_results = self.json_data_model
+        # check if API response is contained inside
+        # 'results' json object
+        if 'results' in json_api_results.keys():
+            # check if results contains any data
+            # in order to retrieve values from it
+            if json_api_results['results']:
+                json_api_results = json_api_results['results'][0]
+            else:
+                raise IndexError("Page object cannot be instanced because "
+                                 "API response 'results' is empty.")
+        return json_api_results
+
+    def _validate_links_section(self, json_data_response):
+        # type: (dict) -> str
+        """Validates and retrieves _links section data
+        out of the api response in order to get links data
+        """
+        missing_value = None
+        # links
+        if '_links' in json_data_response.keys():
+            # permanent link
+            if 'tinyui' in json_data_response['_links'].keys():
+                self._permanent_link = str(json_data_response['_links']['tinyui'])
+            else:
+                missing_value = '_links.tinyui'
+        else:
+            missing_value = '_links'
+        return missing_value
+
+    def _validate_body_section(self, json_data_response):
+        # type: (dict) -> str
+        """Validates and retrieves body section data
+        out of the api response in order to get html content
+        """
+        missing_value = None
+        # body.view.value (HTML Content)
+        if 'body' in json_data_response.keys():
+            if 'storage' in json_data_response['body'].keys():
+                if 'value' in json_data_response['body']['storage'].keys():
+                    self._content = str(json_data_response['body']['storage']['value'])
+                else:
+                    missing_value = 'body.storage.value'
+            else:
+                missing_value = 'body.storage'
+        else:
+            missing_value = 'body'
+        return missing_value
+
+    def _validate_metadata_section(self, json_data_response):
+        # type: (dict) -> str
+        """Validates and retrieves metadata section data
+        out of the api response in order to get id, title and space
+        """
+        missing_value = None
+        # id
+        if 'id' in json_data_response.keys():
+            self._id_number = str(json_data_response['id'])
+        else:
+            missing_value = 'id'
+        # title
+        if 'title' in json_data_response.keys():
+            self._title = str(json_data_response['title'])
+        else:
+            missing_value = 'title'
+        # space
+        if 'space' in json_data_response.keys():
+            # space key
+            if 'key' in json_data_response['space'].keys():
+                self._space_key = str(json_data_response['space']['key'])
+            else:
+                missing_value = 'space.key'
+        else:
+            missing_value = 'space'
+        # version
+        if 'version' in json_data_response.keys():
+            # space key
+            if 'number' in json_data_response['version'].keys():
+                self._version = str(json_data_response['version']['number'])
+            else:
+                missing_value = 'version.number'
+        else:
+            missing_value = 'version'
+        return missing_value
+
+    def _retrieve_values_from_json(self):
+        # type: () -> None
+        """Retrieves the values from the HTTP response in json format
+        that are important for the page object, like id, title,
+        space, HTML content, web link.
+
+        If some value is missing, an exception will be raised
+
+        Then, it adds those values to the Page model
+        into properties of the instance
+
+        :return: None
+        :raises Exception: if a value is not present on json model
+        """
+
+        # retrieve base url for the server host from response
+        if '_links' in self.json_data_model.keys():
+            if 'base' in self.json_data_model['_links'].keys():
+                self._base_url = self.json_data_model['_links']['base']
+
+        # retrieve results dictionary with Page data from json api response
+        json_data_response = self._retrieve_results_from_json()
+
+        # retrieve _links section from API response
+        missing_value = self._validate_metadata_section(json_data_response)
+
+        if missing_value is None:
+            # retrieve _links section from API response
+            missing_value = self._validate_links_section(json_data_response)
+
+        if missing_value is None:
+            # retrieve body section from API response
+            missing_value = self._validate_body_section(json_data_response)
+
+        if missing_value is not None:
+            raise Exception("Page object cannot be instanced because "
+                            "there is a missing value in json data: "
+                            "\"{val}\"".format(val=missing_value))
+
+    @property
+    def id_number(self):
+        # type: () -> str
+        """Returns the id number of the Confluence page
+        """
+        return self._id_number
+
+    @property
+    def title(self):
+        # type: () -> str
+        """Returns the title of the Confluence page
+        """
+        return self._title
+
+    @property
+    def content(self):
+        # type: () -> str
+        """Returns the HTML content retrieved from Confluence page
+        """
+        return self._content
+
+    @property
+    def space_key(self):
+        # type: () -> str
+        """Returns the space kay name in which the Confluence page belongs to
+        """
+        return self._space_key
+
+    @property
+    def version(self):
+        # type: () -> str
+        """Returns the current version number for that Confluence page
+        """
+        return self._version
+
+    @property
+    def permanent_link(self):
+        # type: () -> str
+        """Returns the permanent link of the Confluence Page
+
+        (this link will be always point to that page
+        even if it changes it title or location)
+        """
+        return self._permanent_link
+
+    @property
+    def base_url(self):
+        # type: () -> str
+        """Returns the base url of the server host in which
+        the API response was received
+        """
+        return self._base_url
+
+    def get_page_url(self):
+        # type: () -> str
+        """Returns the permanent link of the Confluence Page
+
+        (this link will be always point to that page
+        even if it changes it title or location)
+        """
+        return self.base_url + self.permanent_link
+
+    def __str__(self):
+        # type: () -> str
+        """Returns a string representation of the current Page instance
+        with metadata like: Type, Id, Space, Title, Link, html content
+        """
+        status = "Confluence Content - " \
+                 "ID: \"{id}\" - " \
+                 "SPACE: \"{space}\" - " \
+                 "TITLE: \"{title}\" - " \
+                 "VERSION: \"{version}\" - " \
+                 "PERMALINK: \"{permalink}\" - " \
+                 "CONTENT: \"{content}\""
+        if self.content is None:
+            content_string = status.format(
+                id=self.id_number,
+                space=self.space_key,
+                title=self.title,
+                version=self.version,
+                permalink=self.permanent_link,
+                content="No Content"
+            )
+        else:
+            content_string = status.format(
+                id=self.id_number,
+                space=self.space_key,
+                title=self.title,
+                version=self.version,
+                permalink=self.permanent_link,
+                content="Yes"
+            )
+        return content_string
+
+
+class ContentSummary(Content):
+    """Class needed to abstract the metadata of a content (without body)
+    from an HTTP json response. ex. results of a CQL search
+    """
+
+    def __init__(self, json_data):
+        # type: (dict) -> ContentSummary
+        super(ContentSummary, self).__init__(json_data)
+        self._id_number = None
+        self._content_type = None
+        self._title = None
+        self._space_key = None
+        self._version = None
+        self._last_modified = None
+        self._web_link = None
+        self._ancestor_ids = []
+        self._retrieve_values_from_json()
+
+    def _retrieve_values_from_json(self):
+        # type: () -> None
+        """Retrieves the metadata values from the HTTP response in json format
+
+        :raises Exception: if id is not present on json model
+        """
+        json_data_response = self.json_data_model
+        if 'id' not in json_data_response.keys():
+            raise Exception("ContentSummary object cannot be instanced because "
+                            "there is a missing value in json data: \"id\"")
+        self._id_number = str(json_data_response['id'])
+        self._content_type = json_data_response.get('type')
+        self._title = json_data_response.get('title')
+        self._space_key = json_data_response.get('space', {}).get('key')
+        version = json_data_response.get('version', {})
+        if 'number' in version.keys():
+            self._version = str(version['number'])
+        self._last_modified = version.get('when')
+        self._web_link = json_data_response.get('_links', {}).get('webui')
+        self._ancestor_ids = [str(ancestor['id'])
+                              for ancestor in json_data_response.get('ancestors', [])
+                              if 'id' in ancestor]
+
+    @property
+    def id_number(self):
+        # type: () -> str
+        """Returns the id number of the content
+        """
+        return self._id_number
+
+    @property
+    def content_type(self):
+        # type: () -> str
+        """Returns the type of the content (ex. page)
+        """
+        return self._content_type
+
+    @property
+    def title(self):
+        # type: () -> str
+        """Returns the title of the content
+        """
+        return self._title
+
+    @property
+    def space_key(self):
+        # type: () -> str
+        """Returns the space key of the content (None if not expanded)
+        """
+        return self._space_key
+
+    @property
+    def version(self):
+        # type: () -> str
+        """Returns the current version number (None if not expanded)
+        """
+        return self._version
+
+    @property
+    def last_modified(self):
+        # type: () -> str
+        """Returns the date of the last modification in ISO format
+        (None if version is not expanded)
+        """
+        return self._last_modified
+
+    @property
+    def web_link(self):
+        # type: () -> str
+        """Returns the web link of the content (relative to base url)
+        """
+        return self._web_link
+
+    @property
+    def ancestor_ids(self):
+        # type: () -> list[str]
+        """Returns the ids of the ancestors from the top page to the parent
+        (empty list if ancestors are not expanded)
+        """
+        return list(self._ancestor_ids)
+
+    def __str__(self):
+        # type: () -> str
+        """Returns a string representation of the current instance
+        """
+        return "Confluence Content Summary - " \
+               "ID: \"{id}\" - " \
+               "SPACE: \"{space}\" - " \
+               "TITLE: \"{title}\" - " \
+               "VERSION: \"{version}\"".format(
+                   id=self.id_number,
+                   space=self.space_key,
+                   title=self.title,
+                   version=self.version)
+
+
+class Attachment(Content):
+    """Class needed to abstract the content of an HTTP json response
+    that should contain a Confluence Attachment (file attached to a page)
+    """
+
+    def __init__(self, json_data):
+        # type: (dict) -> Attachment
+        super(Attachment, self).__init__(json_data)
+        self._id_number = None
+        self._title = None
+        self._version = None
+        self._media_type = None
+        self._file_size = None
+        self._comment = None
+        self._download_link = None
+        self._retrieve_values_from_json()
+
+    def _retrieve_values_from_json(self):
+        # type: () -> None
+        """Retrieves the values from the HTTP response in json format
+        that are important for the attachment object.
+
+        :raises IndexError: if API response 'results' is empty
+        :raises Exception: if a value is not present on json model
+        """
+        json_data_response = self.json_data_model
+        if 'results' in json_data_response.keys():
+            if json_data_response['results']:
+                json_data_response = json_data_response['results'][0]
+            else:
+                raise IndexError("Attachment object cannot be instanced because "
+                                 "API response 'results' is empty.")
+
+        missing_value = None
+        if 'id' in json_data_response.keys():
+            self._id_number = str(json_data_response['id'])
+        else:
+            missing_value = 'id'
+        if 'title' in json_data_response.keys():
+            self._title = str(json_data_response['title'])
+        else:
+            missing_value = 'title'
+        if 'download' in json_data_response.get('_links', {}).keys():
+            self._download_link = str(json_data_response['_links']['download'])
+        else:
+            missing_value = '_links.download'
+
+        if missing_value is not None:
+            raise Exception("Attachment object cannot be instanced because "
+                            "there is a missing value in json data: "
+                            "\"{val}\"".format(val=missing_value))
+
+        # optional values
+        if 'number' in json_data_response.get('version', {}).keys():
+            self._version = str(json_data_response['version']['number'])
+        extensions = json_data_response.get('extensions', {})
+        metadata = json_data_response.get('metadata', {})
+        self._media_type = extensions.get('mediaType', metadata.get('mediaType'))
+        self._comment = extensions.get('comment', metadata.get('comment'))
+        if extensions.get('fileSize') is not None:
+            self._file_size = int(extensions['fileSize'])
+
+    @staticmethod
+    def get_hash_from_comment(comment):
+        # type: (str) -> str
+        """Returns the content hash stored in an attachment comment.
+        None if the comment has no hash.
+        """
+        if not comment:
+            return None
+        prefix_index = comment.rfind(ConfluenceApi.ATTACHMENT_HASH_PREFIX)
+        if prefix_index < 0:
+            return None
+        content_hash = comment[prefix_index + len(ConfluenceApi.ATTACHMENT_HASH_PREFIX):]
+        return content_hash.rstrip(']').strip()
+
+    @property
+    def id_number(self):
+        # type: () -> str
+        """Returns the id of the attachment
+        """
+        return self._id_number
+
+    @property
+    def title(self):
+        # type: () -> str
+        """Returns the file name of the attachment
+        """
+        return self._title
+
+    @property
+    def version(self):
+        # type: () -> str
+        """Returns the current version number of the attachment
+        """
+        return self._version
+
+    @property
+    def media_type(self):
+        # type: () -> str
+        """Returns the media type of the attached file
+        """
+        return self._media_type
+
+    @property
+    def file_size(self):
+        # type: () -> int
+        """Returns the size in bytes of the attached file (None if unknown)
+        """
+        return self._file_size
+
+    @property
+    def comment(self):
+        # type: () -> str
+        """Returns the comment of the attachment
+        """
+        return self._comment
+
+    @property
+    def content_hash(self):
+        # type: () -> str
+        """Returns the sha256 of the file stored in the attachment comment
+        (None if the attachment was not uploaded by this API)
+        """
+        return self.get_hash_from_comment(self._comment)
+
+    @property
+    def download_link(self):
+        # type: () -> str
+        """Returns the download link of the attachment (relative to host)
+        """
+        return self._download_link
+
+    def __str__(self):
+        # type: () -> str
+        """Returns a string representation of the current Attachment instance
+        """
+        return "Confluence Attachment - " \
+               "ID: \"{id}\" - " \
+               "TITLE: \"{title}\" - " \
+               "VERSION: \"{version}\" - " \
+               "SIZE: \"{size}\"".format(
+                   id=self.id_number,
+                   title=self.title,
+                   version=self.version,
+                   size=self.file_size)
+
+
+class ContentError(Content):
+    """Class needed to abstract the content of an HTTP json response
+    that is an ERROR response from Confluence REST API.
+
+    ex. when page does not exist
+    """
+
+    def __init__(self, json_data):
+        # type: (dict) -> ContentError
+        super(ContentError, self).__init__(json_data)
+        self._message = None
+        self._status_code = None
+        self._retrieve_values_from_json()
+
+    def _retrieve_values_from_json(self):
+        """Retrieves the values from HTTP json response from REST API
+        that are meaningful for Error Content (message and status code)
+
+        :return: None
+        :raises Exception: if a value is not present on json model
+        """
+        missing_value = None
+        # message
+        if 'message' in self.json_data_model.keys():
+            self._message = self.json_data_model['message']
+        else:
+            missing_value = 'message'
+        # statusCode
+        if 'statusCode' in self.json_data_model.keys():
+            self._status_code = self.json_data_model['statusCode']
+        else:
+            missing_value = 'statusCode'
+
+        if missing_value is not None:
+            raise Exception("ContentError object cannot be instance because "
+                            "there is a missing value in json data: "
+                            "\"{val}\"".format(val=missing_value))
+
+    @property
+    def message(self):
+        """Returns the error message of the HTTP error response
+        """
+        return self._message
+
+    @property
+    def status_code(self):
+        """Returns the status code of the HTTP error response
+        """
+        return self._status_code
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the PageCrawler class to walk a confluence page tree
+with a bounded pool of workers
+"""
+
+import collections
+import concurrent.futures
+import logging
+import typing
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# result of the visit of one page
+# - page: Page instance with the content (None if not fetched or error)
+# - summary: ContentSummary from the children listing of the parent
+#   (None for the root page)
+# - error: exception raised while visiting the page (None if no error)
+# - analysis: result of the content analyzer of the crawler (None if not set)
+CrawlResult = collections.namedtuple(
+    'CrawlResult',
+    ['page_id', 'parent_id', 'depth', 'page', 'summary', 'error', 'analysis'],
+    defaults=[None]
+)
+
+# pending visit of a page
+# - summary: ContentSummary of the page if already known (None otherwise)
+CrawlTask = collections.namedtuple(
+    'CrawlTask',
+    ['page_id', 'parent_id', 'depth', 'summary']
+)
+
+
+class PageCrawler(object):
+    """Walks the tree of pages under a root page.
+
+    Pages are visited over a pool of workers (content + children listing)
+    and results are yielded as soon as each page is visited, so they
+    can be streamed to a report. Only the pending visits (page id and
+    the ContentSummary of the children listing, which is the metadata
+    of the results when the content is not fetched) are kept in memory,
+    results are never accumulated. The tree is walked depth first, so the
+    pending visits are the siblings of the pages of the current branches
+    (not a whole level of the tree, as a breadth first walk would need).
+    """
+
+    def __init__(self, confluence_api_obj, max_workers=8, fetch_content=True,
+                 content_analyzer=None):
+        # type: (ConfluenceApi, [int], [bool], [callable]) -> None
+        """
+
+        :param confluence_api_obj: ConfluenceApi instance
+        :param max_workers: (optional) max number of concurrent visits
+        :param fetch_content: (optional) if set, the full content of each
+            page is retrieved (otherwise only the metadata of the listing)
+        :param content_analyzer: (optional) function called by the workers
+            with the id of each visited page. Its return value is set
+            as the analysis of the CrawlResult.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers should be at least 1: '{}'".format(max_workers))
+        self._api = confluence_api_obj
+        self._max_workers = max_workers
+        self._fetch_content = fetch_content
+        self._content_analyzer = content_analyzer
+
+    def _visit(self, crawl_task, fetch_content, list_children=True, analyze_content=True):
+        # type: (CrawlTask, bool, [bool], [bool]) -> (CrawlResult, list)
+        """Visits one page: retrieves its content and lists its children.
+        Errors are returned into the result.
+        """
+        page = None
+        analysis = None
+        error = None
+        children = []
+        try:
+            if fetch_content:
+                page = self._api.get_content(crawl_task.page_id)
+            if analyze_content and self._content_analyzer is not None:
+                analysis = self._content_analyzer(crawl_task.page_id)
+            if list_children:
+                children = [
+                    CrawlTask(summary.id_number, crawl_task.page_id, crawl_task.depth + 1, summary)
+                    for summary in self._api.get_child_pages(crawl_task.page_id)
+                ]
+        except Exception as ex:
+            LOGGER.error("Page '%s' could not be visited: %s", crawl_task.page_id, ex)
+            error = ex
+        crawl_result = CrawlResult(
+            crawl_task.page_id,
+            crawl_task.parent_id,
+            crawl_task.depth,
+            page,
+            crawl_task.summary,
+            error,
+            analysis
+        )
+        return crawl_result, children
+
+    def crawl(self, root_page_id, skip_page_ids=None, max_depth=None):
+        # type: (str, [set], [int]) -> typing.Iterable[CrawlResult]
+        """Yields the result of every page of the tree (root included)
+        in the order they are visited (depth first).
+
+        :param root_page_id: id number of the root page of the tree
+        :param skip_page_ids: (optional) ids of pages already visited
+            (ex. resuming an interrupted crawl). Their content is not
+            fetched and they are not yielded, but their children are visited.
+        :param max_depth: (optional) max depth to visit (root is depth 0)
+        :return: generator of CrawlResult
+        """
+        skip_page_ids = skip_page_ids or set()
+        # bounded number of visits in flight, so consumers
+        # (ex. report writers) are never flooded with results
+        max_in_flight = self._max_workers * 2
+        # stack of pending visits (LIFO): the children of the last visited
+        # pages are visited first, so the frontier stays small in wide trees
+        frontier = [CrawlTask(str(root_page_id), None, 0, None)]
+        in_flight = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while frontier or in_flight:
+                while frontier and len(in_flight) < max_in_flight:
+                    crawl_task = frontier.pop()
+                    already_visited = crawl_task.page_id in skip_page_ids
+                    future = executor.submit(
+                        self._visit,
+                        crawl_task,
+                        self._fetch_content and not already_visited,
+                        True,
+                        not already_visited)
+                    in_flight[future] = crawl_task
+
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    crawl_task = in_flight.pop(future)
+                    crawl_result, children = future.result()
+                    if max_depth is None or crawl_task.depth < max_depth:
+                        # reversed: the first child is the next one to be visited
+                        frontier.extend(reversed(children))
+                    if crawl_task.page_id not in skip_page_ids:
+                        yield crawl_result
+
+    def visit(self, crawl_tasks):
+        # type: (typing.Iterable[CrawlTask]) -> typing.Iterable[CrawlResult]
+        """Yields the result of every given page (content only, children
+        are not visited) in the order they are visited.
+        The tasks are consumed lazily, so they can be streamed
+        (ex. from the results of a search).
+
+        :param crawl_tasks: iterable of CrawlTask
+        :return: generator of CrawlResult
+        """
+        max_in_flight = self._max_workers * 2
+        crawl_tasks = iter(crawl_tasks)
+        tasks_pending = True
+        in_flight = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while True:
+                while tasks_pending and len(in_flight) < max_in_flight:
+                    crawl_task = next(crawl_tasks, None)
+                    if crawl_task is None:
+                        tasks_pending = False
+                        break
+                    future = executor.submit(
+                        self._visit, crawl_task, self._fetch_content, False)
+                    in_flight[future] = crawl_task
+                if not in_flight:
+                    return
+
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    in_flight.pop(future)
+                    crawl_result, _ = future.result()
+                    yield crawl_result
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a streaming multipart/form-data encoder.
+
+The file part is read from disk in chunks while the request is sent,
+so big attachments are never loaded fully into memory.
+"""
+
+import logging
+import mimetypes
+import os
+import uuid
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# default size of the chunks read from the file
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class MultipartFileStream(object):
+    """File-like object with a multipart/form-data body
+    (simple form fields + one file field).
+
+    It can be given as 'data' to requests: its length is known
+    in advance (Content-Length is sent) and its content is produced
+    on each 'read' call.
+    """
+
+    def __init__(self, file_path, field_name='file', file_name=None, fields=None,
+                 progress_callback=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        # type: (str, [str], [str], [dict], [callable], [int]) -> None
+        """
+
+        :param file_path: path to the file to send
+        :param field_name: (optional) name of the form field for the file
+        :param file_name: (optional) name of the file sent to the server.
+            if None, the base name of the file path is used.
+        :param fields: (optional) dictionary with simple form fields
+            ex. {'comment': 'generated file', 'minorEdit': 'true'}
+        :param progress_callback: (optional) function called with
+            (bytes_sent, total_bytes) each time a chunk of the file is read
+        :param chunk_size: (optional) max size in bytes read from file on each call
+        """
+        if file_name is None:
+            file_name = os.path.basename(file_path)
+        self._file_path = file_path
+        self._chunk_size = chunk_size
+        self._progress_callback = progress_callback
+        self._boundary = uuid.uuid4().hex
+        self._file_size = os.path.getsize(file_path)
+        self._file_obj = None
+        self._file_sent = 0
+
+        content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        preamble = ''
+        for name, value in (fields or {}).items():
+            preamble += '--{boundary}\r\n' \
+                        'Content-Disposition: form-data; name="{name}"\r\n\r\n' \
+                        '{value}\r\n'.format(boundary=self._boundary, name=name, value=value)
+        preamble += '--{boundary}\r\n' \
+                    'Content-Disposition: form-data; name="{name}"; filename="{file_name}"\r\n' \
+                    'Content-Type: {content_type}\r\n\r\n'.format(
+                        boundary=self._boundary,
+                        name=field_name,
+                        file_name=file_name.replace('"', '%22'),
+                        content_type=content_type)
+        self._preamble = preamble.encode('utf-8')
+        self._epilogue = '\r\n--{boundary}--\r\n'.format(boundary=self._boundary).encode('utf-8')
+        # pending bytes of the preamble / epilogue to be read
+        self._buffer = self._preamble
+        self._epilogue_sent = False
+
+    @property
+    def content_type(self):
+        # type: () -> str
+        """Returns the value of the Content-Type header for this body
+        """
+        return 'multipart/form-data; boundary={}'.format(self._boundary)
+
+    @property
+    def len(self):
+        # type: () -> int
+        """Returns the total length in bytes of the body
+        """
+        return len(self._preamble) + self._file_size + len(self._epilogue)
+
+    def __len__(self):
+        # type: () -> int
+        return self.len
+
+    def _read_file_chunk(self, size):
+        # type: (int) -> bytes
+        """Reads the next chunk from the file and reports the progress
+        """
+        if self._file_obj is None:
+            self._file_obj = open(self._file_path, 'rb')
+        chunk = self._file_obj.read(min(size, self._chunk_size))
+        if chunk:
+            self._file_sent += len(chunk)
+            if self._progress_callback is not None:
+                self._progress_callback(self._file_sent, self._file_size)
+        else:
+            self._file_obj.close()
+        return chunk
+
+    def read(self, size=-1):
+        # type: ([int]) -> bytes
+        """Returns the next bytes of the multipart body.
+        An empty bytes string is returned when the body is complete.
+
+        :param size: (optional) max number of bytes to return
+        """
+        if size is None or size < 0:
+            size = self._chunk_size
+        if self._buffer:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+            return data
+        if self._file_obj is None or not self._file_obj.closed:
+            chunk = self._read_file_chunk(size)
+            if chunk:
+                return chunk
+        if not self._epilogue_sent:
+            self._epilogue_sent = True
+            self._buffer = self._epilogue
+            return self.read(size)
+        return b''
+
+    def close(self):
+        # type: () -> None
+        """Closes the file if it is still open
+        """
+        if self._file_obj is not None and not self._file_obj.closed:
+            self._file_obj.close()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a persistent local index of confluence pages.
+
+It maps (space, title) and page URLs to page ids and versions,
+so the resolution of a page does not need a round trip to the server.
+Entries are keyed by the confluence host too: one index can be shared
+by the pages of many hosts (see PageIndex.for_host).
+"""
+
+import collections
+import copy
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from confluence.exceptions import HttpNotFoundError
+from utils.cache_utils import get_cache_dir
+from utils.hash_utils import get_text_sha256
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# entry of the page index
+# - content_hash: sha256 of the last content published / read (None if unknown)
+PageIndexEntry = collections.namedtuple(
+    'PageIndexEntry',
+    ['page_id', 'space_key', 'title', 'version', 'updated_at', 'content_hash']
+)
+
+
+class PageIndex(object):
+    """Local index (SQLite) of confluence pages.
+
+    Entries are added every time a page is resolved from the server
+    and removed when the server answers 404 for them.
+    The index can be refreshed incrementally: only the entries older
+    than 'max_age' are validated with a version only request.
+
+    All the lookups and updates are done on the entries of one host:
+    'for_host' returns a view of the same index on the entries of
+    another host (same database connection).
+    """
+
+    DEFAULT_FILE_NAME = 'page_index.sqlite'
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS pages ("
+        "  host_url TEXT NOT NULL,"
+        "  page_id TEXT NOT NULL,"
+        "  space_key TEXT NOT NULL,"
+        "  title TEXT NOT NULL,"
+        "  version TEXT,"
+        "  updated_at REAL NOT NULL,"
+        "  content_hash TEXT,"
+        "  PRIMARY KEY (host_url, page_id))",
+        "CREATE UNIQUE INDEX IF NOT EXISTS pages_host_space_title "
+        "ON pages (host_url, space_key, title)",
+        "CREATE TABLE IF NOT EXISTS urls ("
+        "  host_url TEXT NOT NULL,"
+        "  url TEXT NOT NULL,"
+        "  page_id TEXT NOT NULL,"
+        "  PRIMARY KEY (host_url, url))",
+    )
+
+    def __init__(self, db_file=None, max_age=24 * 60 * 60, host_url=None):
+        # type: ([str], [float], [str]) -> None
+        """
+
+        :param db_file: (optional) path of the SQLite file of the index.
+            if None, the file is created in the local cache directory.
+            ':memory:' can be given for a non persistent index.
+        :param max_age: (optional) seconds after which an entry is
+            considered stale and is validated again on 'refresh'
+        :param host_url: (optional) confluence host of the entries
+            (see for_host). ex. http://confluence-host.net
+        """
+        if db_file is None:
+            db_file = os.path.join(get_cache_dir(), PageIndex.DEFAULT_FILE_NAME)
+        self._db_file = db_file
+        self._max_age = max_age
+        self._host_url = self.normalize_host_url(host_url)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_file, check_same_thread=False)
+        with self._lock, self._connection:
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(pages)")]
+            if columns and 'host_url' not in columns:
+                self._migrate_without_host(columns)
+            for statement in PageIndex._SCHEMA:
+                self._connection.execute(statement)
+
+    def _migrate_without_host(self, columns):
+        # type: (list[str]) -> None
+        """Moves the entries of an index created before the host was stored
+        to the empty host (they are not used by the indexes of a host)
+        """
+        LOGGER.info("Page index '%s' created without hosts is migrated", self._db_file)
+        self._connection.execute("ALTER TABLE pages RENAME TO pages_without_host")
+        self._connection.execute("DROP INDEX IF EXISTS pages_space_title")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, page_id TEXT NOT NULL)")
+        self._connection.execute("ALTER TABLE urls RENAME TO urls_without_host")
+        for statement in PageIndex._SCHEMA:
+            self._connection.execute(statement)
+        # indexes created before the content hash was stored
+        content_hash = 'content_hash' if 'content_hash' in columns else 'NULL'
+        self._connection.execute(
+            "INSERT INTO pages SELECT '', page_id, space_key, title, version, updated_at, {} "
+            "FROM pages_without_host".format(content_hash))
+        self._connection.execute("INSERT INTO urls SELECT '', url, page_id FROM urls_without_host")
+        self._connection.execute("DROP TABLE pages_without_host")
+        self._connection.execute("DROP TABLE urls_without_host")
+
+    @staticmethod
+    def normalize_host_url(host_url):
+        # type: ([str]) -> str
+        """Returns the host url as it is stored (without '/' at the end)
+        """
+        return (host_url or '').rstrip('/')
+
+    @property
+    def host_url(self):
+        # type: () -> str
+        """Returns the confluence host of the entries of this index
+        """
+        return self._host_url
+
+    def for_host(self, host_url):
+        # type: (str) -> PageIndex
+        """Returns the index of the entries of a confluence host
+        (same database connection, this instance if it is the same host)
+
+        :param host_url: URL of the confluence host. ex. http://confluence-host.net
+        :return: PageIndex instance
+        """
+        host_url = self.normalize_host_url(host_url)
+        if host_url == self._host_url:
+            return self
+        host_page_index = copy.copy(self)
+        host_page_index._host_url = host_url
+        return host_page_index
+
+    @property
+    def db_file(self):
+        # type: () -> str
+        """Returns the path of the SQLite file of the index
+        """
+        return self._db_file
+
+    def close(self):
+        # type: () -> None
+        """Closes the connection to the index database
+        """
+        with self._lock:
+            self._connection.close()
+
+    def lookup(self, space_key, title):
+        # type: (str, str) -> PageIndexEntry
+        """Returns the index entry of the page with the given title
+        inside the given space. None if the page is not indexed.
+
+        :param space_key: space in which the page is contained
+        :param title: title of the page
+        :return: PageIndexEntry or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT page_id, space_key, title, version, updated_at, content_hash "
+                "FROM pages WHERE host_url = ? AND space_key = ? AND title = ?",
+                (self._host_url, space_key, title)).fetchone()
+        if row is None:
+            return None
+        return PageIndexEntry(*row)
+
+    def lookup_id(self, page_id):
+        # type: (str) -> PageIndexEntry
+        """Returns the index entry of the page with the given id.
+        None if the page is not indexed.
+
+        :param page_id: id number of the page
+        :return: PageIndexEntry or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT page_id, space_key, title, version, updated_at, content_hash "
+                "FROM pages WHERE host_url = ? AND page_id = ?",
+                (self._host_url, str(page_id))).fetchone()
+        if row is None:
+            return None
+        return PageIndexEntry(*row)
+
+    def lookup_url(self, url):
+        # type: (str) -> PageIndexEntry
+        """Returns the index entry of the page that corresponds to the given URL.
+        None if the URL is not indexed.
+
+        :param url: full url of the confluence page
+        :return: PageIndexEntry or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT p.page_id, p.space_key, p.title, p.version, p.updated_at, p.content_hash "
+                "FROM urls u JOIN pages p ON p.host_url = u.host_url AND p.page_id = u.page_id "
+                "WHERE u.host_url = ? AND u.url = ?",
+                (self._host_url, url)).fetchone()
+        if row is None:
+            return None
+        return PageIndexEntry(*row)
+
+    def store(self, page_id, space_key, title, version=None, content_hash=None):
+        # type: (str, str, str, [str], [str]) -> None
+        """Adds or updates a page into the index
+
+        :param page_id: id number of the page
+        :param space_key: space in which the page is contained
+        :param title: title of the page
+        :param version: (optional) current version of the page
+        :param content_hash: (optional) sha256 of the content of that version
+        """
+        with self._lock, self._connection:
+            # title could be reused by another page id (deleted & created again)
+            self._connection.execute(
+                "DELETE FROM pages WHERE host_url = ? AND space_key = ? AND title = ? AND page_id != ?",
+                (self._host_url, space_key, title, str(page_id)))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(host_url, page_id, space_key, title, version, updated_at, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._host_url, str(page_id), space_key, title,
+                 None if version is None else str(version), time.time(), content_hash))
+
+    def store_page(self, page, content_hash=None):
+        # type: (Page, [str]) -> None
+        """Adds or updates a page into the index from a Page instance
+
+        :param page: confluence_api.Page instance
+        :param content_hash: (optional) sha256 of the content of the page
+            (hash of page.content if None)
+        """
+        if content_hash is None and page.content is not None:
+            content_hash = get_text_sha256(page.content)
+        if page.id_number and page.space_key and page.title:
+            self.store(page.id_number, page.space_key, page.title, page.version, content_hash)
+
+    def store_url(self, url, page_id):
+        # type: (str, str) -> None
+        """Maps a page URL to the given page id
+
+        :param url: full url of the confluence page
+        :param page_id: id number of the page
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO urls (host_url, url, page_id) VALUES (?, ?, ?)",
+                (self._host_url, url, str(page_id)))
+
+    def update_version(self, page_id, version):
+        # type: (str, str) -> None
+        """Updates the version of an indexed page (if indexed).
+        The content hash is dropped if the version changed.
+
+        :param page_id: id number of the page
+        :param version: current version of the page
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE pages SET content_hash = CASE WHEN version = ? THEN content_hash END, "
+                "version = ?, updated_at = ? WHERE host_url = ? AND page_id = ?",
+                (str(version), str(version), time.time(), self._host_url, str(page_id)))
+
+    def invalidate(self, page_id):
+        # type: (str) -> None
+        """Removes a page (and its URLs) from the index.
+        (ex. when the server answers 404 for it)
+
+        :param page_id: id number of the page
+        """
+        LOGGER.debug("Removing page '%s' from page index", page_id)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM urls WHERE host_url = ? AND page_id = ?", (self._host_url, str(page_id)))
+            self._connection.execute(
+                "DELETE FROM pages WHERE host_url = ? AND page_id = ?", (self._host_url, str(page_id)))
+
+    def stale_entries(self):
+        # type: () -> list[PageIndexEntry]
+        """Returns the entries (of the host of this index) that are older than 'max_age'
+        """
+        limit_time = time.time() - self._max_age
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT page_id, space_key, title, version, updated_at, content_hash "
+                "FROM pages WHERE host_url = ? AND updated_at < ?",
+                (self._host_url, limit_time)).fetchall()
+        return [PageIndexEntry(*row) for row in rows]
+
+    def refresh(self, confluence_api_obj):
+        # type: (ConfluenceApi) -> int
+        """Refreshes incrementally the stale entries of the index
+        (entries of the host of the confluence api).
+
+        Only the version of each stale page is requested (metadata only).
+        Pages not found anymore in the server are removed from the index.
+
+        :param confluence_api_obj: ConfluenceApi instance
+        :return: number of entries refreshed
+        """
+        page_index = self.for_host(confluence_api_obj.host_url)
+        refreshed = 0
+        for entry in page_index.stale_entries():
+            try:
+                version = confluence_api_obj.get_content_version(entry.page_id)
+            except HttpNotFoundError:
+                page_index.invalidate(entry.page_id)
+                continue
+            page_index.update_version(entry.page_id, version)
+            refreshed += 1
+        LOGGER.debug("Page index refreshed: %s entries", refreshed)
+        return refreshed
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a streaming analyzer of confluence storage format (XHTML) bodies.
+
+Bodies are processed chunk by chunk while they are received from the
+server, and statistics are aggregated across pages with stable memory
+(counters and fixed size buckets, no page content is kept).
+"""
+
+import codecs
+import collections
+import datetime
+import html.parser
+import json
+import logging
+import math
+import re
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# anchor macro written at the beginning of the sections generated by this tool.
+# the anchor name contains the generation date. ex. 'groovydoc-generated-20200131'
+GENERATED_MARKER_PREFIX = 'groovydoc-generated-'
+GENERATED_MARKER_DATE_FORMAT = '%Y%m%d'
+
+# anchor macro written at the end of the generated sections, so the section
+# can be replaced by the next generation (the ${groovy.target} placeholder
+# is only in the target page until its first generation)
+GENERATED_END_MARKER = 'groovydoc-generated-end'
+
+# placeholders of the groovydoc templates. ex. ${groovy.title}
+REGEX_GROOVY_PLACEHOLDER = re.compile(r'\$\{groovy\.[\w.]+\}')
+
+
+def get_generated_marker(generation_date=None):
+    # type: ([datetime.date]) -> str
+    """Returns the storage format of the (invisible) anchor macro that
+    marks a generated section, so audits can detect stale sections.
+
+    :param generation_date: (optional) date of generation (today by default)
+    :return: string with the anchor macro in storage format
+    """
+    if generation_date is None:
+        generation_date = datetime.date.today()
+    return '<ac:structured-macro ac:name="anchor">' \
+           '<ac:parameter ac:name="">{prefix}{date}</ac:parameter>' \
+           '</ac:structured-macro>'.format(
+               prefix=GENERATED_MARKER_PREFIX,
+               date=generation_date.strftime(GENERATED_MARKER_DATE_FORMAT))
+
+
+def get_generated_end_marker():
+    # type: () -> str
+    """Returns the storage format of the (invisible) anchor macro that
+    marks the end of a generated section.
+    """
+    return '<ac:structured-macro ac:name="anchor">' \
+           '<ac:parameter ac:name="">{}</ac:parameter>' \
+           '</ac:structured-macro>'.format(GENERATED_END_MARKER)
+
+
+class StorageBodyExtractor(object):
+    """Incremental extractor of the storage body value from the raw json
+    response of the content API (expand=body.storage).
+
+    Raw bytes are fed as they arrive and the decoded text of the
+    'body.storage.value' json string is returned chunk by chunk.
+    If the value is not found as the first key of the storage object
+    (other key order), the response is kept and parsed as json in 'close'
+    (up to a max size: bigger responses are not kept, the body is empty).
+    """
+
+    # default max number of characters of the response kept for the json fallback
+    DEFAULT_MAX_FALLBACK_SIZE = 16 * 1024 * 1024
+
+    # start of the storage value (any whitespace between the tokens)
+    _REGEX_MARKER = re.compile(r'"storage"\s*:\s*\{\s*"value"\s*:\s*"')
+
+    # text kept before the end of the searched text, the marker could be split between chunks
+    _MARKER_OVERLAP = 64
+
+    # simple json escape sequences
+    _ESCAPES = {
+        '"': '"',
+        '\\': '\\',
+        '/': '/',
+        'b': '\b',
+        'f': '\f',
+        'n': '\n',
+        'r': '\r',
+        't': '\t'
+    }
+
+    def __init__(self, max_fallback_size=DEFAULT_MAX_FALLBACK_SIZE):
+        # type: ([int]) -> None
+        """
+
+        :param max_fallback_size: (optional) max number of characters of the
+            response kept (while the start of the storage value is not found)
+            to be parsed as json in 'close'
+        """
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._max_fallback_size = max_fallback_size
+        self._pending = ''
+        self._inside_value = False
+        self._finished = False
+        self._fallback_dropped = False
+        self._high_surrogate = None
+
+    @property
+    def finished(self):
+        # type: () -> bool
+        """Returns True when the end of the storage value was found
+        """
+        return self._finished
+
+    def feed(self, raw_chunk):
+        # type: (bytes) -> str
+        """Processes a chunk of the raw json response
+
+        :param raw_chunk: bytes received from the server
+        :return: decoded text of the storage value found in this chunk
+        """
+        if self._finished:
+            return ''
+        search_start = max(0, len(self._pending) - self._MARKER_OVERLAP)
+        text = self._pending + self._decoder.decode(raw_chunk)
+        self._pending = ''
+
+        if not self._inside_value:
+            marker_match = self._REGEX_MARKER.search(text, search_start)
+            if marker_match is None:
+                # whole response is kept for the json fallback of 'close'
+                # (only the end of the text, for the marker search, once it is too big)
+                if not self._fallback_dropped and len(text) > self._max_fallback_size:
+                    LOGGER.warning("Storage value not found in the first %s characters of the response, "
+                                   "the response is not kept to be parsed as json", self._max_fallback_size)
+                    self._fallback_dropped = True
+                self._pending = text[-self._MARKER_OVERLAP:] if self._fallback_dropped else text
+                return ''
+            self._inside_value = True
+            text = text[marker_match.end():]
+        return self._decode_string(text)
+
+    def close(self):
+        # type: () -> str
+        """Ends the response. If the start of the storage value was never
+        found, the response is parsed as json.
+
+        :return: storage value not returned yet by 'feed' ('' if there is none)
+        """
+        if self._finished:
+            return ''
+        self._finished = True
+        if self._inside_value:
+            LOGGER.warning("Response ended inside the storage value, the body is incomplete")
+            return ''
+        text = self._pending + self._decoder.decode(b'', final=True)
+        self._pending = ''
+        if self._fallback_dropped:
+            LOGGER.warning("Storage value not found in the content response (too big to be parsed "
+                           "as json), the body is empty")
+            return ''
+        try:
+            storage_value = json.loads(text)['body']['storage']['value']
+        except (ValueError, KeyError, TypeError):
+            LOGGER.warning("Storage value not found in the content response, the body is empty")
+            return ''
+        LOGGER.debug("Storage value found by parsing the whole response as json")
+        return storage_value
+
+    def _decode_string(self, text):
+        # type: (str) -> str
+        """Decodes json string content until the closing quote
+        """
+        decoded = []
+        index = 0
+        text_length = len(text)
+        while index < text_length:
+            next_special = index
+            while next_special < text_length and text[next_special] not in '"\\':
+                next_special += 1
+            decoded.append(text[index:next_special])
+            index = next_special
+            if index >= text_length:
+                break
+            if text[index] == '"':
+                self._finished = True
+                break
+            # escape sequence
+            if index + 1 >= text_length:
+                self._pending = text[index:]
+                break
+            escape_char = text[index + 1]
+            if escape_char == 'u':
+                if index + 6 > text_length:
+                    self._pending = text[index:]
+                    break
+                decoded.append(self._decode_unicode_escape(text[index + 2:index + 6]))
+                index += 6
+            else:
+                decoded.append(self._ESCAPES.get(escape_char, escape_char))
+                index += 2
+        return ''.join(decoded)
+
+    def _decode_unicode_escape(self, hex_digits):
+        # type: (str) -> str
+        """Decodes a \\uXXXX escape (joining surrogate pairs)
+        """
+        code_point = int(hex_digits, 16)
+        if 0xD800 <= code_point <= 0xDBFF:
+            self._high_surrogate = code_point
+            return ''
+        if 0xDC00 <= code_point <= 0xDFFF and self._high_surrogate is not None:
+            code_point = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code_point - 0xDC00)
+            self._high_surrogate = None
+        return chr(code_point)
+
+
+class StorageAnalyzer(html.parser.HTMLParser):
+    """Streaming analyzer of one storage format body.
+    Text is fed chunk by chunk (see html.parser.HTMLParser.feed).
+    """
+
+    def __init__(self, stale_days=None, today=None):
+        # type: ([int], [datetime.date]) -> None
+        """
+
+        :param stale_days: (optional) age in days after which a generated
+            section is considered stale
+        :param today: (optional) reference date (today by default)
+        """
+        super(StorageAnalyzer, self).__init__(convert_charrefs=True)
+        self._stale_days = stale_days
+        self._today = today or datetime.date.today()
+        self.size = 0
+        self.macros = collections.Counter()
+        self.placeholders = collections.Counter()
+        self.generated_sections = 0
+        self.stale_sections = 0
+        self._in_anchor_parameter = False
+        self._macro_stack = []
+
+    def feed(self, data):
+        # type: (str) -> None
+        """Processes a chunk of the storage body
+        """
+        self.size += len(data.encode('utf-8'))
+        super(StorageAnalyzer, self).feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == 'ac:structured-macro':
+            macro_name = attributes.get('ac:name', '')
+            self.macros[macro_name] += 1
+            self._macro_stack.append(macro_name)
+        elif tag == 'ac:parameter' and self._macro_stack and self._macro_stack[-1] == 'anchor':
+            self._in_anchor_parameter = True
+        for value in attributes.values():
+            if value:
+                self._find_placeholders(value)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'ac:structured-macro':
+            self.macros[dict(attrs).get('ac:name', '')] += 1
+        for value in dict(attrs).values():
+            if value:
+                self._find_placeholders(value)
+
+    def handle_endtag(self, tag):
+        if tag == 'ac:structured-macro' and self._macro_stack:
+            self._macro_stack.pop()
+        elif tag == 'ac:parameter':
+            self._in_anchor_parameter = False
+
+    def handle_data(self, data):
+        self._find_placeholders(data)
+        if self._in_anchor_parameter and data.startswith(GENERATED_MARKER_PREFIX) \
+                and data.strip() != GENERATED_END_MARKER:
+            self._check_generated_marker(data[len(GENERATED_MARKER_PREFIX):])
+
+    def unknown_decl(self, data):
+        # CDATA sections (ex. code macro bodies)
+        self._find_placeholders(data)
+
+    def _find_placeholders(self, text):
+        # type: (str) -> None
+        """Counts the groovydoc placeholders left in a text
+        """
+        if '${groovy.' in text:
+            self.placeholders.update(REGEX_GROOVY_PLACEHOLDER.findall(text))
+
+    def _check_generated_marker(self, marker_date):
+        # type: (str) -> None
+        """Counts a generated section and checks if it is stale
+        """
+        self.generated_sections += 1
+        if self._stale_days is None:
+            return
+        try:
+            generation_date = datetime.datetime.strptime(
+                marker_date.strip(), GENERATED_MARKER_DATE_FORMAT).date()
+        except ValueError:
+            return
+        if (self._today - generation_date).days > self._stale_days:
+            self.stale_sections += 1
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns the results of the analysis of the page
+        """
+        return {
+            'size': self.size,
+            'macros': dict(self.macros),
+            'placeholders': dict(self.placeholders),
+            'generated_sections': self.generated_sections,
+            'stale_sections': self.stale_sections
+        }
+
+
+class StorageStatistics(object):
+    """Aggregated statistics of the analysis of many pages.
+    Memory does not depend on the number of pages.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.total_size = 0
+        self.max_size = 0
+        # page size distribution: {power of 2 upper bound (bytes): pages}
+        self.size_buckets = collections.Counter()
+        self.macros = collections.Counter()
+        self.pages_with_macro = collections.Counter()
+        self.placeholders = collections.Counter()
+        self.pages_with_placeholders = 0
+        self.generated_sections = 0
+        self.stale_sections = 0
+        self.pages_with_stale_sections = 0
+
+    def add(self, analyzer):
+        # type: (StorageAnalyzer) -> None
+        """Adds the results of the analysis of one page
+        """
+        self.pages += 1
+        self.total_size += analyzer.size
+        self.max_size = max(self.max_size, analyzer.size)
+        bucket = 2 ** max(0, int(math.ceil(math.log(analyzer.size, 2)))) if analyzer.size else 0
+        self.size_buckets[bucket] += 1
+        self.macros.update(analyzer.macros)
+        self.pages_with_macro.update(analyzer.macros.keys())
+        self.placeholders.update(analyzer.placeholders)
+        if analyzer.placeholders:
+            self.pages_with_placeholders += 1
+        self.generated_sections += analyzer.generated_sections
+        self.stale_sections += analyzer.stale_sections
+        if analyzer.stale_sections:
+            self.pages_with_stale_sections += 1
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns the aggregated statistics
+        """
+        return {
+            'pages': self.pages,
+            'total_size': self.total_size,
+            'average_size': self.total_size / self.pages if self.pages else 0,
+            'max_size': self.max_size,
+            'size_distribution': dict(
+                ('<= {}'.format(bucket), count) for bucket, count in sorted(self.size_buckets.items())),
+            'macros': dict(self.macros.most_common()),
+            'pages_with_macro': dict(self.pages_with_macro.most_common()),
+            'placeholders': dict(self.placeholders.most_common()),
+            'pages_with_placeholders': self.pages_with_placeholders,
+            'generated_sections': self.generated_sections,
+            'stale_sections': self.stale_sections,
+            'pages_with_stale_sections': self.pages_with_stale_sections
+        }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a local cache of confluence pages used as templates.
+
+Cached templates are keyed by confluence host, page id and version
+(page ids are only unique in a host: each host has its own subdirectory).
+They are revalidated with a version only request, and the full page is
+only downloaded when the version in the server changed. Each template is
+stored in two files: its metadata (version, validation time) and its
+content, so a revalidation only rewrites the small metadata file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+
+from utils.cache_utils import get_cache_dir
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+
+class TemplateCache(object):
+    """Local cache (memory + disk) of template pages content
+    """
+
+    CACHE_SUB_DIR = 'templates'
+
+    def __init__(self, cache_dir=None, offline_ttl=None):
+        # type: ([str], [float]) -> None
+        """
+
+        :param cache_dir: (optional) directory in which templates are stored.
+            if None, the local cache directory is used.
+        :param offline_ttl: (optional) offline mode. Seconds during which a
+            cached template is used without asking the server for its version.
+            if None, cached templates are always revalidated.
+        """
+        if cache_dir is None:
+            cache_dir = get_cache_dir(TemplateCache.CACHE_SUB_DIR)
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._cache_dir = cache_dir
+        self._offline_ttl = offline_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_host_dir(self, host_url):
+        # type: (str) -> str
+        """Returns the directory of the templates of a confluence host:
+        readable name of the host + short hash of its url (never ambiguous)
+        """
+        host_url = (host_url or '').rstrip('/')
+        readable_name = re.sub(r'[^\w.-]+', '_', re.sub(r'^\w+://', '', host_url)).strip('_')
+        url_hash = hashlib.sha256(host_url.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self._cache_dir, '{}-{}'.format(readable_name or 'host', url_hash))
+
+    def _get_entry_file(self, host_dir, page_id):
+        # type: (str, str) -> str
+        """Returns the path of the metadata file of a page
+        """
+        return os.path.join(host_dir, '{}.json'.format(page_id))
+
+    def _get_content_file(self, host_dir, page_id):
+        # type: (str, str) -> str
+        """Returns the path of the content file of a page
+        """
+        return os.path.join(host_dir, '{}.xml'.format(page_id))
+
+    def _load_entry(self, host_dir, page_id):
+        # type: (str, str) -> dict
+        """Returns the cached entry of a page (memory first, then disk).
+        None if the page is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get((host_dir, page_id))
+        if entry is not None:
+            return entry
+        entry_file = self._get_entry_file(host_dir, page_id)
+        if not os.path.exists(entry_file):
+            return None
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as file_obj:
+                entry = json.load(file_obj)
+            if 'content' not in entry:
+                with open(self._get_content_file(host_dir, page_id), 'r', encoding='utf-8') as file_obj:
+                    entry['content'] = file_obj.read()
+        except (IOError, ValueError) as ex:
+            LOGGER.warning("Template cache file '%s' could not be read: %s", entry_file, ex)
+            return None
+        with self._lock:
+            self._entries[(host_dir, page_id)] = entry
+        return entry
+
+    @staticmethod
+    def _write_file(target_file, text):
+        # type: (str, str) -> None
+        """Writes a cache file (temporary file renamed over the target)
+        """
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_file), suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file_obj:
+                file_obj.write(text)
+            os.replace(temp_path, target_file)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _store_entry(self, host_dir, entry, content_changed=True):
+        # type: (str, dict, [bool]) -> None
+        """Stores an entry in memory and on disk (atomic writes)
+
+        :param host_dir: directory of the templates of the confluence host
+        :param entry: entry with the metadata and the content of the page
+        :param content_changed: (optional) if not set, only the metadata file is written
+        """
+        with self._lock:
+            self._entries[(host_dir, entry['page_id'])] = entry
+        os.makedirs(host_dir, exist_ok=True)
+        content_file = self._get_content_file(host_dir, entry['page_id'])
+        if content_changed or not os.path.exists(content_file):
+            # content first: metadata never points to a version whose content is missing
+            self._write_file(content_file, entry['content'])
+        metadata = dict((key, value) for key, value in entry.items() if key != 'content')
+        self._write_file(self._get_entry_file(host_dir, entry['page_id']), json.dumps(metadata))
+
+    def invalidate(self, host_url, page_id):
+        # type: (str, str) -> None
+        """Removes a page from the cache
+
+        :param host_url: URL of the confluence host of the page
+        :param page_id: id number of the template page
+        """
+        page_id = str(page_id)
+        host_dir = self.get_host_dir(host_url)
+        with self._lock:
+            self._entries.pop((host_dir, page_id), None)
+        for entry_file in (self._get_entry_file(host_dir, page_id), self._get_content_file(host_dir, page_id)):
+            if os.path.exists(entry_file):
+                os.remove(entry_file)
+
+    def get_content(self, confluence_api_obj, page_id):
+        # type: (ConfluenceApi, str) -> str
+        """Returns the content (storage format) of the template page.
+
+        - in offline mode, a cached template validated less than
+          'offline_ttl' seconds ago is returned without any request.
+        - otherwise the version of the page is requested (metadata only)
+          and the cached template is returned if it has the same version.
+        - the full page is downloaded only if it is not cached or
+          its version changed.
+
+        :param confluence_api_obj: ConfluenceApi instance
+        :param page_id: id number of the template page
+        :return: string with the content of the template page
+        """
+        page_id = str(page_id)
+        host_dir = self.get_host_dir(confluence_api_obj.host_url)
+        entry = self._load_entry(host_dir, page_id)
+
+        if entry is not None and self._offline_ttl is not None \
+                and time.time() - entry['validated_at'] < self._offline_ttl:
+            LOGGER.debug("Template page '%s' (v.%s) used from cache without revalidation",
+                         page_id, entry['version'])
+            return entry['content']
+
+        if entry is not None:
+            try:
+                current_version = confluence_api_obj.get_content_version(page_id)
+            except requests.exceptions.ConnectionError as ex:
+                LOGGER.warning("Template page '%s' could not be revalidated, "
+                               "cached version 'v.%s' will be used: %s",
+                               page_id, entry['version'], ex)
+                return entry['content']
+            if current_version == entry['version']:
+                LOGGER.debug("Template page '%s' (v.%s) did not change, cache is used",
+                             page_id, current_version)
+                entry = dict(entry, validated_at=time.time())
+                self._store_entry(host_dir, entry, content_changed=False)
+                return entry['content']
+
+        LOGGER.info("Downloading template page '%s'", page_id)
+        page = confluence_api_obj.get_content(page_id)
+        entry = {
+            'page_id': page_id,
+            'title': page.title,
+            'version': page.version,
+            'content': page.content,
+            'validated_at': time.time()
+        }
+        self._store_entry(host_dir, entry)
+        return entry['content']
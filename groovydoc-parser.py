@@ -1,237 +1,268 @@
-#!/usr/bin/env python
-# coding=utf-8
-"""
-Main script to ...
-"""
-
-# get common libraries
-import argparse
-import collections
-import logging
-import os
-import sys
-import re
-
-from confluence import confluence_api
-from utils.parser import GroovyDocParser
-
-LOGGER = logging.getLogger()
-
-
-def configure_logger(global_logger, log_level):
-    # type: (logging.Logger, str) -> None
-    """Configures the main common object.
-    log level is set for logging level.
-
-    :param global_logger: main common instance
-    :param log_level:
-        logging level [ error > warning > info > debug > off ]
-    :return:
-    """
-    log_levels = {
-        'off': logging.NOTSET,
-        'debug': logging.DEBUG,
-        'info': logging.INFO,
-        'warning': logging.WARNING,
-        'error': logging.ERROR,
-        'critical': logging.CRITICAL
-    }
-    if log_level not in log_levels.keys():
-        raise ValueError("Logging level not valid: '{}'".format(log_level))
-    else:
-        log_level = log_levels[log_level]
-    global_logger.setLevel(logging.DEBUG)
-    # script file reference
-    this_script_file_name = os.path.basename(__file__)
-    scripts_log_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), 'logs'))
-    # logs directory
-    if not os.path.exists(scripts_log_dir):
-        os.mkdir(scripts_log_dir)
-    # logs file for this script
-    log_file_basename = "{}.log".format(os.path.splitext(this_script_file_name)[0])
-    log_file_path = os.path.normpath(os.path.join(scripts_log_dir, log_file_basename))
-    # create file handler which logs even debug messages
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setLevel(log_level)
-    # create console handler with a higher log level
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
-    # create formatter and add it to the handlers
-    formatter = logging.Formatter(
-        fmt='%(asctime)s :%(module)-20s: [%(levelname)s] -> %(message)s',
-        datefmt='%Y-%m-%d,%H:%M:%S'
-    )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    # add the handlers to the common
-    global_logger.addHandler(file_handler)
-    global_logger.addHandler(console_handler)
-
-
-# -----------------------------------
-# MAIN
-# -----------------------------------
-def main():
-    """Main Function
-    """
-
-    this_script_name = os.path.basename(__file__)
-
-    # Script Argument Parser
-    parser = argparse.ArgumentParser(description=this_script_name)
-    # parser.add_argument(
-    #     '-u', '--user',
-    #     default=None,
-    #     required=True,
-    #     help='user to be used to authenticate to the Confluence API. '
-    #          'This will be used if it is not configured in json file')
-    # parser.add_argument(
-    #     '-p', '--password',
-    #     default=None,
-    #     required=True,
-    #     help='password for the user used to authenticate to the Helix Swarm API. '
-    #          'This will be used if it is not configured in json file')
-    # parser.add_argument(
-    #     '-U', '--confluence-url',
-    #     required=True,
-    #     help='Confluence base URL. (Ex. http://confluence-host.net)')
-    # parser.add_argument(
-    #     '-P', '--page',
-    #     required=True,
-    #     help='Helix Swarm review number. (Ex. 10233)')
-    # parser.add_argument(
-    #     '-o', '--output-only',
-    #     action='store_true',
-    #     required=False,
-    #     help='if this flag is set, script will only print to STDOUT the data output expected'
-    #          '(Ex. -d email / -d username)')
-    # parser.add_argument(
-    #     '-l', '--log-level',
-    #     default="warning",
-    #     required=False,
-    #     help='debugging script log level '
-    #          '[ critical > error > warning > info > debug > off ]')
-    # args = parser.parse_args()
-
-    # parser.add_argument(
-    #     '-c', '--config_file',
-    #     required=True,
-    #     help='Script configuration file (JSON Format)')
-    # parser.add_argument(
-    #     '-u', '--user',
-    #     default=None,
-    #     required=False,
-    #     help='user to be used to authenticate to the Confluence API. '
-    #          'This will be used if it is not configured in json file')
-    # parser.add_argument(
-    #     '-p', '--password',
-    #     default=None,
-    #     required=False,
-    #     help='password for the user used to authenticate to the Confluence API. '
-    #          'This will be used if it is not configured in json file')
-    # parser.add_argument(
-    #     '-o', '--overwrite',
-    #     action='store_true',
-    #     required=False,
-    #     help='If set, this will overwrite the content of the page'
-    #          'if the configured page is an existing one.')
-    # parser.add_argument(
-    #     '-l', '--log_level',
-    #     default="warning",
-    #     required=False,
-    #     help='debugging script log level '
-    #          '[ error > warning > info > debug > off ]')
-
-    #args = parser.parse_args()
-
-    # script here
-    # -------------------------------------------------------------------
-    # Create a confluence page manager instance that
-    # will read & validate all values from config file.
-    # This manager object will work as an API
-    # to create, delete, retrieve confluence pages.
-    confluence_api_obj = confluence_api.ConfluenceApi(
-        'https://confluence-oc.osramcontinental.net/',
-        'ocg00007',
-        'J3nk1nsAme.'
-    )
-
-    template_page = confluence_api_obj.get_content('55900721')
-    template_raw_content = template_page.content
-    base_formatted_content = ''
-
-    re_function_section = re.compile(r'\${groovy.function_block.open}(.*)\${groovy.function_block.close}')
-    template_function_section = re.findall(re_function_section, template_raw_content)
-    template_function_section = template_function_section[0]
-
-    base_formatted_content = template_function_section
-    formatted_groovy_functions = []
-
-    parsed_groovy_obj = GroovyDocParser.parse_file('D:/pipeline-utils-jenkins.groovy')
-    for function_obj in parsed_groovy_obj.get_groovy_functions().values():
-        current_function_format = ''
-        current_function_format = base_formatted_content.replace(
-            '${groovy.title}',
-            function_obj.name
-        )
-
-        current_function_format = current_function_format.replace(
-            '${groovy.header}',
-            function_obj.header
-        )
-
-        current_function_format = current_function_format.replace(
-            '${groovy.description}',
-            function_obj.description_confluence_format()
-        )
-
-        # parameters section
-        function_parameter_section = ''
-        function_parameter_section += '<ul>\n'
-        for parameter_obj in function_obj.parameters.values():
-            function_parameter_section += '<li>\n'
-            function_parameter_section += parameter_obj.confluence_format()
-            function_parameter_section += '</li>\n'
-        function_parameter_section += '</ul>\n'
-
-        current_function_format = current_function_format.replace(
-            '${groovy.parameters}',
-            function_parameter_section
-        )
-
-        current_function_format = current_function_format.replace(
-            '${groovy.returns}',
-            function_obj.returns
-        )
-
-        current_function_format = current_function_format.replace(
-            '${groovy.function_code}',
-            function_obj.code_definition
-        )
-        formatted_groovy_functions.append(current_function_format)
-
-    final_content_page = ''
-    for formatted_function in formatted_groovy_functions:
-        final_content_page += formatted_function
-
-    target_page = confluence_api_obj.get_content('55900864')
-    target_page_raw_content = target_page.content
-    target_page_final_content = target_page_raw_content.replace(
-        '${groovy.target}',
-        final_content_page
-    )
-
-    new_version = str(int(target_page.version) + 1)
-
-    confluence_api_obj.update_page(
-        '55900864',
-        target_page_final_content,
-        'TemplateTarget',
-        new_version
-    )
-
-    LOGGER.info("[{script}] Finish [OK]".format(script=this_script_name))
-
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Main script to generate the documentation of a groovy file
+into a confluence page.
+
+The function block of a template page is rendered for every documented
+function of the groovy file and the result replaces the ${groovy.target}
+placeholder of the target page. Next generations replace the generated
+section (between its start and end markers).
+"""
+
+# get common libraries
+import argparse
+import logging
+import os
+import sys
+
+from app.git_incremental import get_affected_files
+from app.groovydoc_publisher import GroovydocPublisher
+from app.page_sharding import DEFAULT_SHARD_BUDGETS
+from app.page_sharding import SHARD_BY_COUNT
+from app.page_sharding import SHARD_BY_SIZE
+from app.page_sharding import SHARD_STRATEGIES
+from app.page_sharding import ShardPublishError
+from confluence import confluence_api
+from confluence.template_cache import TemplateCache
+from utils import git_utils
+from utils import profiler
+from utils.log_utils import LOG_FORMATS
+from utils.log_utils import configure_logger
+
+LOGGER = logging.getLogger()
+
+# environment variable with the password when it is not given as argument
+# (arguments are visible in the process list)
+PASSWORD_ENV_VAR = 'CONFLUENCE_PASSWORD'
+
+
+def write_profile_reports(args, stage_profiler):
+    # type: (argparse.Namespace, profiler.StageProfiler) -> None
+    """Prints and writes the profile reports configured in the arguments
+    """
+    if not (args.profile or args.memory_profile):
+        return
+    print(stage_profiler.get_report(top_functions=10 if args.profile_cprofile else 0))
+    for report_file in (args.profile, args.memory_profile):
+        if report_file:
+            stage_profiler.write_report(report_file)
+    if args.profile and args.profile_cprofile:
+        stats_file = '{}.pstats'.format(os.path.splitext(args.profile)[0])
+        if stage_profiler.dump_stats(stats_file):
+            LOGGER.info("Merged cProfile stats written into: %s", stats_file)
+
+
+def publish_groovy_file(args, stage_profiler):
+    # type: (argparse.Namespace, profiler.StageProfiler) -> None
+    """Runs the publish pipeline of the groovy file with the script arguments.
+    Each stage is measured in the given profiler.
+    """
+    if args.git_range:
+        base, head = git_utils.parse_git_range(args.git_range)
+        affected_files = get_affected_files(args.file, base, head, [args.file])
+        if not affected_files:
+            LOGGER.info("No documentation changed in '%s' (%s). Nothing to publish",
+                        args.file, args.git_range)
+            return
+        for affected_file in affected_files:
+            LOGGER.info("Documentation changed in '%s': %s",
+                        affected_file.path, ', '.join(affected_file.functions))
+
+    # Create a confluence API object to interact with server API
+    with confluence_api.ConfluenceApi(
+        args.confluence_url,
+        args.user,
+        args.password
+    ) as confluence_api_obj:
+        publisher = GroovydocPublisher(
+            confluence_api_obj,
+            template_cache=TemplateCache(offline_ttl=args.offline_ttl),
+            stage_profiler=stage_profiler
+        )
+        jobs = [{'source': args.file, 'target_page': args.target_page}]
+        symbol_table = None
+        if args.index_page:
+            # the symbol table reuses the parsed files of the publish
+            symbol_table = publisher.build_symbol_table(jobs)
+        if args.shard:
+            publish_result = publisher.publish_sharded(
+                args.file, args.template_page, args.target_page, args.shard,
+                args.shard_budget, symbol_table, force=args.shard_force)
+        else:
+            publish_result = publisher.publish(
+                args.file, args.template_page, args.target_page, symbol_table)
+        if args.index_page:
+            symbol_table.set_page_title(args.target_page, publish_result.title)
+            publisher.publish_index(symbol_table, args.index_page)
+
+        if args.search_index:
+            publisher.build_search_index(jobs).write(args.search_index)
+            LOGGER.info("Search index written into: %s", args.search_index)
+            if args.attach_search_index:
+                confluence_api_obj.upload_attachment(
+                    args.index_page or args.target_page, args.search_index)
+
+
+# -----------------------------------
+# MAIN
+# -----------------------------------
+def main():
+    """Main Function
+    """
+
+    this_script_name = os.path.basename(__file__)
+
+    # Script Argument Parser
+    parser = argparse.ArgumentParser(description=this_script_name)
+    parser.add_argument(
+        '-f', '--file',
+        required=True,
+        help='groovy file (or directory with groovy files) to document')
+    parser.add_argument(
+        '-U', '--confluence-url',
+        required=True,
+        help='Confluence base URL. (Ex. http://confluence-host.net)')
+    parser.add_argument(
+        '-u', '--user',
+        required=True,
+        help='user to be used to authenticate to the Confluence API.')
+    parser.add_argument(
+        '-p', '--password',
+        default=None,
+        required=False,
+        help='password for the user used to authenticate to the Confluence API. '
+             'Prefer the {} environment variable (arguments are visible in the '
+             'process list)'.format(PASSWORD_ENV_VAR))
+    parser.add_argument(
+        '-t', '--template-page',
+        required=True,
+        help='ID of the template page with the function block. (Ex. 55900721)')
+    parser.add_argument(
+        '-T', '--target-page',
+        required=True,
+        help='ID of the page in which the documentation is generated. (Ex. 55900864)')
+    parser.add_argument(
+        '--offline-ttl',
+        type=float,
+        default=None,
+        required=False,
+        help='seconds during which the cached template page is used '
+             'without asking the server for its version')
+    parser.add_argument(
+        '-i', '--index-page',
+        default=None,
+        required=False,
+        help='ID of a page in which an A-Z index of the functions is generated '
+             '(in its ${groovy.target} placeholder)')
+    parser.add_argument(
+        '-s', '--search-index',
+        default=None,
+        required=False,
+        help='path of a file in which a search index of the functions is exported '
+             '(json, gzip compressed if it ends with .gz). See scripts/search_docs.py')
+    parser.add_argument(
+        '--attach-search-index',
+        action='store_true',
+        required=False,
+        help='if this flag is set (with --search-index), the search index is attached '
+             'to the index page (or to the target page if there is no index page)')
+    parser.add_argument(
+        '--shard',
+        default=None,
+        choices=SHARD_STRATEGIES,
+        required=False,
+        help='if set, the documentation is split into child pages of the target page '
+             '(by size budget, function count or source file) and the target page gets '
+             'an overview of them. Only the child pages that changed are published')
+    parser.add_argument(
+        '--shard-budget',
+        type=int,
+        default=None,
+        required=False,
+        help='max bytes (--shard size, default: {size}) or functions (--shard count, '
+             'default: {count}) of each child page'.format(
+                 size=DEFAULT_SHARD_BUDGETS[SHARD_BY_SIZE], count=DEFAULT_SHARD_BUDGETS[SHARD_BY_COUNT]))
+    parser.add_argument(
+        '--shard-force',
+        action='store_true',
+        required=False,
+        help='if this flag is set (with --shard), all the child pages are published')
+    parser.add_argument(
+        '--git-range',
+        default=None,
+        required=False,
+        help='git range (base..head) of the changes to publish. The page is only '
+             'published if the documentation of a function of the file changed in it')
+    parser.add_argument(
+        '--profile',
+        default=None,
+        required=False,
+        help='if set, each stage of the pipeline is timed (wall and CPU time) and '
+             'the report is written into this path (json). The report is also printed.')
+    parser.add_argument(
+        '--profile-cprofile',
+        action='store_true',
+        required=False,
+        help='if this flag is set (with --profile), stages are run under cProfile '
+             'and the merged stats are written next to the report (.pstats)')
+    parser.add_argument(
+        '--memory-profile',
+        default=None,
+        required=False,
+        help='if set, tracemalloc snapshots are taken at the boundaries of each stage '
+             'and the top allocators and RSS (at its end and its change) per stage are '
+             'written into this path (json). The report is also printed. '
+             '(timings of --profile are slower while memory is traced)')
+    parser.add_argument(
+        '--memory-budget',
+        type=float,
+        default=None,
+        required=False,
+        help='max memory of the run in MiB (peak RSS). The run fails '
+             'as soon as a stage ends above it')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="warning",
+        required=False,
+        help='debugging script log level '
+             '[ critical > error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--log-format',
+        default="text",
+        choices=LOG_FORMATS,
+        required=False,
+        help='format of the log records (json: one json object per line)')
+    args = parser.parse_args()
+    if args.password is None:
+        args.password = os.environ.get(PASSWORD_ENV_VAR)
+        if not args.password:
+            parser.error('the password is required: set the {} environment variable '
+                         '(or -p/--password)'.format(PASSWORD_ENV_VAR))
+
+    configure_logger(LOGGER, args.log_level, __file__, args.log_format)
+
+    stage_profiler = profiler.NULL_PROFILER
+    memory_budget = None
+    if args.memory_budget is not None:
+        memory_budget = int(args.memory_budget * 1024 * 1024)
+    if args.profile or args.memory_profile or memory_budget is not None:
+        stage_profiler = profiler.StageProfiler(
+            use_cprofile=args.profile_cprofile,
+            trace_memory=args.memory_profile is not None,
+            memory_budget=memory_budget
+        )
+
+    try:
+        publish_groovy_file(args, stage_profiler)
+    except (profiler.MemoryBudgetExceeded, ShardPublishError) as ex:
+        LOGGER.error("[%s] %s", this_script_name, ex)
+        write_profile_reports(args, stage_profiler)
+        sys.exit(1)
+    write_profile_reports(args, stage_profiler)
+
+    LOGGER.info("[{script}] Finish [OK]".format(script=this_script_name))
+
+
+if __name__ == "__main__":
+    main()
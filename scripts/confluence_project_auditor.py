@@ -1,124 +1,454 @@
-#!/usr/bin/env python
-# coding=utf-8
-"""
-Main script to...
-"""
-
-import argparse
-import logging
-import os
-from confluence import confluence_api
-
-# get logger instance
-LOGGER = logging.getLogger()
-
-
-def configure_logger(global_logger, log_level):
-    # type: (logging.Logger, str) -> None
-    """Configures the main common object.
-    log level is set for logging level.
-
-    :param global_logger: main common instance
-    :param log_level:
-        logging level [ error > warning > info > debug > off ]
-    :return:
-    """
-    log_levels = {
-        'off': logging.NOTSET,
-        'debug': logging.DEBUG,
-        'info': logging.INFO,
-        'warning': logging.WARNING,
-        'error': logging.ERROR,
-        'critical': logging.CRITICAL
-    }
-    if log_level not in log_levels.keys():
-        raise ValueError("Logging level not valid: '{}'".format(log_level))
-    else:
-        log_level = log_levels[log_level]
-    global_logger.setLevel(logging.DEBUG)
-    # script file reference
-    this_script_file_name = os.path.basename(__file__)
-    scripts_log_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), 'logs'))
-    # logs directory
-    if not os.path.exists(scripts_log_dir):
-        os.mkdir(scripts_log_dir)
-    # logs file for this script
-    log_file_basename = "{}.log".format(os.path.splitext(this_script_file_name)[0])
-    log_file_path = os.path.normpath(os.path.join(scripts_log_dir, log_file_basename))
-    # create file handler which logs even debug messages
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setLevel(log_level)
-    # create console handler with a higher log level
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
-    # create formatter and add it to the handlers
-    formatter = logging.Formatter('%(asctime)s :%(name)-24s: [%(levelname)s] -> %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    # add the handlers to the common
-    global_logger.addHandler(file_handler)
-    global_logger.addHandler(console_handler)
-
-
-# ---------------
-# MAIN
-# ---------------
-def main():
-    """Main Function
-    """
-
-    # Script Argument Parser
-    parser = argparse.ArgumentParser(description='confluence_project_auditor.py')
-    parser.add_argument(
-        '-u', '--user',
-        default=None,
-        required=True,
-        help='user to be used to authenticate to the Confluence API. '
-             'This will be used if it is not configured in json file')
-    parser.add_argument(
-        '-p', '--password',
-        default=None,
-        required=True,
-        help='password for the user used to authenticate to the Helix Swarm API. '
-             'This will be used if it is not configured in json file')
-    parser.add_argument(
-        '-U', '--confluence-url',
-        required=True,
-        help='Confluence base URL. (Ex. http://confluence-host.net)')
-    parser.add_argument(
-        '-P', '--page',
-        required=True,
-        help='Helix Swarm review number. (Ex. 10233)')
-    parser.add_argument(
-        '-o', '--output-only',
-        action='store_true',
-        required=False,
-        help='if this flag is set, script will only print to STDOUT the data output expected' 
-             '(Ex. -d email / -d username)')
-    parser.add_argument(
-        '-l', '--log-level',
-        default="warning",
-        required=False,
-        help='debugging script log level '
-             '[ critical > error > warning > info > debug > off ]')
-    args = parser.parse_args()
-
-    if args.output_only:
-        # turn off the logger. Not needed
-        configure_logger(LOGGER, 'critical')
-    else:
-        # configure logging properties with configuration given
-        configure_logger(LOGGER, args.log_level)
-
-    # Create a Confluence API object to interact with server API
-    confluence_api_obj = confluence_api.ConfluenceApi(
-        args.confluence_url,
-        args.user,
-        args.password
-    )
-
-    page = confluence_api_obj.get_content(args.page)
-    
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Main script to audit a tree of confluence pages.
+
+The pages under a root page are crawled concurrently and one record
+per page is streamed into a JSONL / CSV report as soon as it is visited.
+An interrupted audit can be resumed with the same report file.
+
+With a checkpoint store, only the pages modified since the last run
+are audited and merged into the stored audit state.
+
+With the analyze option, the storage format body of each page is streamed
+and analyzed (macros, broken ${groovy.*} placeholders, size, stale generated
+sections) and the aggregated statistics are written at the end.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import typing
+from confluence import confluence_api
+from confluence.audit_checkpoint import AuditCheckpoint
+from confluence.crawler import CrawlTask
+from confluence.crawler import PageCrawler
+from confluence.storage_analyzer import StorageAnalyzer
+from confluence.storage_analyzer import StorageStatistics
+from utils.log_utils import LOG_FORMATS
+from utils.log_utils import configure_logger
+from utils.report_utils import ReportWriter
+
+# get logger instance
+LOGGER = logging.getLogger()
+
+
+# max number of ids of failed pages searched in one CQL query
+FAILED_PAGES_BATCH_SIZE = 100
+
+# fields of each record of the audit report
+REPORT_FIELDS = [
+    'page_id',
+    'parent_id',
+    'depth',
+    'title',
+    'space_key',
+    'version',
+    'last_modified',
+    'content_size',
+    'macro_count',
+    'broken_placeholders',
+    'generated_sections',
+    'stale_sections',
+    'error'
+]
+
+
+def get_audit_record(crawl_result):
+    # type: (CrawlResult) -> dict
+    """Returns the report record of a visited page
+
+    :param crawl_result: CrawlResult of the page
+    :return: dictionary with the REPORT_FIELDS values
+    """
+    page = crawl_result.page
+    summary = crawl_result.summary
+    record = {
+        'page_id': crawl_result.page_id,
+        'parent_id': crawl_result.parent_id,
+        'depth': crawl_result.depth,
+        'title': None,
+        'space_key': None,
+        'version': None,
+        'last_modified': None,
+        'content_size': None,
+        'macro_count': None,
+        'broken_placeholders': None,
+        'generated_sections': None,
+        'stale_sections': None,
+        'error': None if crawl_result.error is None else str(crawl_result.error)
+    }
+    if summary is not None:
+        record['title'] = summary.title
+        record['space_key'] = summary.space_key
+        record['version'] = summary.version
+        record['last_modified'] = summary.last_modified
+    if page is not None:
+        record['title'] = page.title
+        record['space_key'] = page.space_key
+        record['version'] = page.version
+        if page.content is not None:
+            record['content_size'] = len(page.content.encode('utf-8'))
+    analyzer = crawl_result.analysis
+    if analyzer is not None:
+        record['content_size'] = analyzer.size
+        record['macro_count'] = sum(analyzer.macros.values())
+        record['broken_placeholders'] = ' '.join(sorted(analyzer.placeholders))
+        record['generated_sections'] = analyzer.generated_sections
+        record['stale_sections'] = analyzer.stale_sections
+    return record
+
+
+def analyze_page(confluence_api_obj, page_id, stale_days=None):
+    # type: (ConfluenceApi, str, [int]) -> StorageAnalyzer
+    """Analyzes the storage format body of a page while it is received.
+    The body is never loaded in memory as a whole.
+
+    :param confluence_api_obj: ConfluenceApi instance
+    :param page_id: id of the page to analyze
+    :param stale_days: (optional) age in days of stale generated sections
+    :return: StorageAnalyzer with the results of the page
+    """
+    analyzer = StorageAnalyzer(stale_days=stale_days)
+    for text_chunk in confluence_api_obj.iter_content_body(page_id):
+        analyzer.feed(text_chunk)
+    analyzer.close()
+    return analyzer
+
+
+def get_search_since(last_run, last_modified, overlap_minutes):
+    # type: (datetime.datetime, [str], int) -> datetime.datetime
+    """Returns the time since which modified pages are searched: the last
+    modification (server time) of the pages audited until the last run,
+    or the start time of the last run (local clock) if it is unknown.
+
+    :param last_run: start time of the last run
+    :param last_modified: (optional) last modification in ISO format (ex. '2020-01-31T10:00:00.000Z')
+    :param overlap_minutes: minutes subtracted to the time
+    """
+    since = last_run
+    if last_modified:
+        try:
+            # the server time zone is kept: CQL dates are in server time
+            since = datetime.datetime.fromisoformat(last_modified.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            LOGGER.warning("Last modification '%s' of the checkpoint is not valid, "
+                           "the start time of the last run is used", last_modified)
+    return since - datetime.timedelta(minutes=overlap_minutes)
+
+
+def get_crawl_task(summary, root_page_id):
+    # type: (ContentSummary, str) -> CrawlTask
+    """Returns the visit of a page found with a search (ancestors expanded)
+    """
+    ancestor_ids = summary.ancestor_ids
+    parent_id = ancestor_ids[-1] if ancestor_ids else None
+    depth = None
+    if root_page_id in ancestor_ids:
+        depth = len(ancestor_ids) - ancestor_ids.index(root_page_id)
+    return CrawlTask(summary.id_number, parent_id, depth, summary)
+
+
+def iter_changed_pages(confluence_api_obj, root_page_id, since, known_versions,
+                       failed_page_ids=None):
+    # type: (ConfluenceApi, str, datetime.datetime, dict, [list]) -> typing.Iterable[CrawlTask]
+    """Yields the pages of the tree (root included) whose version changed
+    since the last audit, and the pages whose last audit failed. Only CQL
+    searches (plus a version request of the root page) are needed, not
+    a request per page.
+
+    :param confluence_api_obj: ConfluenceApi instance
+    :param root_page_id: id of the root page of the tree
+    :param since: time since which modified pages are searched
+    :param known_versions: versions of the audited pages {page_id: version}
+    :param failed_page_ids: (optional) ids of the pages whose last audit failed
+    :return: generator of CrawlTask
+    """
+    root_page_id = str(root_page_id)
+    expand = ['version', 'space', 'ancestors']
+    yielded_page_ids = set()
+    if confluence_api_obj.get_content_version(root_page_id) != known_versions.get(root_page_id):
+        yielded_page_ids.add(root_page_id)
+        yield CrawlTask(root_page_id, None, 0, None)
+
+    for summary in confluence_api_obj.search_modified_since(
+            since, ancestor_id=root_page_id, expand=expand):
+        if known_versions.get(summary.id_number) == summary.version:
+            continue
+        yielded_page_ids.add(summary.id_number)
+        yield get_crawl_task(summary, root_page_id)
+
+    failed_page_ids = [page_id for page_id in failed_page_ids or []
+                       if page_id not in yielded_page_ids]
+    for batch_start in range(0, len(failed_page_ids), FAILED_PAGES_BATCH_SIZE):
+        batch_ids = failed_page_ids[batch_start:batch_start + FAILED_PAGES_BATCH_SIZE]
+        # pages that no longer exist are not found
+        for summary in confluence_api_obj.search(
+                'id in ({})'.format(', '.join(batch_ids)), expand=expand):
+            yield get_crawl_task(summary, root_page_id)
+
+
+def iter_tree_page_ids(confluence_api_obj, root_page_id):
+    # type: (ConfluenceApi, str) -> typing.Iterable[str]
+    """Yields the ids of the current pages of the tree (root included).
+    Only a CQL search of ids is needed (no version, no content).
+
+    :param confluence_api_obj: ConfluenceApi instance
+    :param root_page_id: id of the root page of the tree
+    :return: generator of page ids
+    """
+    yield str(root_page_id)
+    for summary in confluence_api_obj.search(
+            'type = page and ancestor = {}'.format(root_page_id), expand=[]):
+        yield summary.id_number
+
+
+# ---------------
+# MAIN
+# ---------------
+def main():
+    """Main Function
+    """
+
+    # Script Argument Parser
+    parser = argparse.ArgumentParser(description='confluence_project_auditor.py')
+    parser.add_argument(
+        '-u', '--user',
+        default=None,
+        required=True,
+        help='user to be used to authenticate to the Confluence API. '
+             'This will be used if it is not configured in json file')
+    parser.add_argument(
+        '-p', '--password',
+        default=None,
+        required=True,
+        help='password for the user used to authenticate to the Confluence API. '
+             'This will be used if it is not configured in json file')
+    parser.add_argument(
+        '-U', '--confluence-url',
+        required=True,
+        help='Confluence base URL. (Ex. http://confluence-host.net)')
+    parser.add_argument(
+        '-P', '--page',
+        required=True,
+        help='ID of the root page of the tree to audit. (Ex. 10233)')
+    parser.add_argument(
+        '-r', '--report',
+        default=None,
+        required=False,
+        help='path of the report file (.jsonl or .csv). '
+             'Records are written as pages are visited.')
+    parser.add_argument(
+        '-f', '--report-format',
+        default=None,
+        choices=['jsonl', 'csv'],
+        required=False,
+        help='format of the report file (taken from report extension by default)')
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        required=False,
+        help='if this flag is set, pages already in the report (without error) are not '
+             'audited again and new records are appended to it')
+    parser.add_argument(
+        '-c', '--checkpoint',
+        default=None,
+        required=False,
+        help='path of the checkpoint store (SQLite). If set, only the pages '
+             'modified since the last run are audited and merged into the '
+             'stored audit state (the report will contain the full state)')
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        required=False,
+        help='if this flag is set, the whole tree is audited even if there is '
+             'a checkpoint (pages deleted from the tree are removed from it)')
+    parser.add_argument(
+        '--overlap-minutes',
+        type=int,
+        default=60,
+        required=False,
+        help='minutes subtracted to the last run time when searching modified pages '
+             '(covers clock / time zone differences with the server)')
+    parser.add_argument(
+        '-a', '--analyze',
+        action='store_true',
+        required=False,
+        help='if this flag is set, the storage format body of each page is '
+             'streamed and analyzed (macros, broken placeholders, stale sections)')
+    parser.add_argument(
+        '--stale-days',
+        type=int,
+        default=90,
+        required=False,
+        help='age in days after which a generated section is reported as stale')
+    parser.add_argument(
+        '-s', '--stats',
+        default=None,
+        required=False,
+        help='path of the json file with the aggregated statistics of the analysis '
+             '(of the pages audited in this run)')
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=8,
+        required=False,
+        help='max number of pages visited at the same time')
+    parser.add_argument(
+        '-d', '--max-depth',
+        type=int,
+        default=None,
+        required=False,
+        help='max depth of the tree to audit (root page is depth 0)')
+    parser.add_argument(
+        '-o', '--output-only',
+        action='store_true',
+        required=False,
+        help='if this flag is set, script will only print to STDOUT the data output expected'
+             ' (one json record per page)')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="warning",
+        required=False,
+        help='debugging script log level '
+             '[ critical > error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--log-format',
+        default="text",
+        choices=LOG_FORMATS,
+        required=False,
+        help='format of the log records (json: one json object per line)')
+    args = parser.parse_args()
+
+    if args.output_only:
+        # turn off the logger. Not needed
+        configure_logger(LOGGER, 'critical', __file__, args.log_format)
+    else:
+        # configure logging properties with configuration given
+        configure_logger(LOGGER, args.log_level, __file__, args.log_format)
+
+    checkpoint = None
+    last_run = None
+    last_modified = None
+    known_versions = {}
+    if args.checkpoint:
+        checkpoint = AuditCheckpoint(args.checkpoint)
+        known_versions = checkpoint.get_known_versions(args.page)
+        if not args.full:
+            last_run = checkpoint.get_last_run(args.page)
+            last_modified = checkpoint.get_last_modified(args.page)
+    started_at = datetime.datetime.now()
+
+    # pages already audited by an interrupted run
+    skip_page_ids = set()
+    if args.resume:
+        if checkpoint is not None:
+            # pages whose audit failed have no version
+            skip_page_ids = set(page_id for page_id, version in known_versions.items()
+                                if version is not None)
+        elif args.report:
+            # pages whose audit failed are audited again
+            skip_page_ids = set(ReportWriter.read_values(
+                args.report, 'page_id', report_format=args.report_format, skip_field='error'))
+        LOGGER.info("Resuming audit: %s pages already audited", len(skip_page_ids))
+
+    # with a checkpoint, the report is written at the end with the merged state
+    report_writer = None
+    if args.report and checkpoint is None:
+        report_writer = ReportWriter.create(
+            args.report,
+            REPORT_FIELDS,
+            report_format=args.report_format,
+            append=args.resume
+        )
+
+    # Create a Confluence API object to interact with server API
+    with confluence_api.ConfluenceApi(
+        args.confluence_url,
+        args.user,
+        args.password,
+        pool_size=args.workers
+    ) as confluence_api_obj:
+        content_analyzer = None
+        if args.analyze:
+            def content_analyzer(page_id):
+                return analyze_page(confluence_api_obj, page_id, args.stale_days)
+        # with analysis, the body is streamed instead of fetched with the page
+        crawler = PageCrawler(
+            confluence_api_obj,
+            max_workers=args.workers,
+            fetch_content=not args.analyze,
+            content_analyzer=content_analyzer
+        )
+        statistics = StorageStatistics()
+        if last_run is None:
+            LOGGER.info("Auditing the whole tree of page '%s'", args.page)
+            crawl_results = crawler.crawl(args.page, skip_page_ids, args.max_depth)
+        else:
+            since = get_search_since(last_run, last_modified, args.overlap_minutes)
+            LOGGER.info("Auditing pages of tree '%s' modified since %s", args.page, since)
+            failed_page_ids = [record['page_id'] for record in checkpoint.get_failed_records(args.page)]
+            crawl_results = crawler.visit(iter_changed_pages(
+                confluence_api_obj, args.page, since, known_versions, failed_page_ids))
+
+        audited_pages = 0
+        visited_page_ids = set(skip_page_ids)
+        try:
+            for crawl_result in crawl_results:
+                record = get_audit_record(crawl_result)
+                if crawl_result.analysis is not None:
+                    statistics.add(crawl_result.analysis)
+                if checkpoint is not None:
+                    checkpoint.store_record(args.page, record)
+                    visited_page_ids.add(record['page_id'])
+                if report_writer is not None:
+                    report_writer.write(record)
+                if args.output_only:
+                    print(json.dumps(record))
+                audited_pages += 1
+        finally:
+            if report_writer is not None:
+                report_writer.close()
+
+        # pages not found anymore in the tree are removed from the checkpoint
+        removed_page_ids = set()
+        if checkpoint is not None:
+            if last_run is None and args.max_depth is None:
+                removed_page_ids = set(known_versions.keys()) - visited_page_ids
+            elif last_run is not None:
+                # deleted pages are not found by the search of modified pages
+                removed_page_ids = set(known_versions.keys()) - set(
+                    iter_tree_page_ids(confluence_api_obj, args.page))
+
+    if checkpoint is not None:
+        for page_id in removed_page_ids:
+            checkpoint.remove_record(args.page, page_id)
+        if removed_page_ids:
+            LOGGER.info("%s pages removed from the tree since the last run", len(removed_page_ids))
+        checkpoint.finish_run(args.page, started_at, audited_pages)
+        if args.report:
+            with ReportWriter.create(args.report, REPORT_FIELDS,
+                                     report_format=args.report_format) as merged_writer:
+                for record in checkpoint.iter_records(args.page):
+                    merged_writer.write(record)
+        checkpoint.close()
+
+    if args.analyze:
+        statistics_dict = statistics.to_dict()
+        LOGGER.info(
+            "Analysis: %s pages, %s bytes, %s pages with broken placeholders, "
+            "%s stale generated sections",
+            statistics_dict['pages'],
+            statistics_dict['total_size'],
+            statistics_dict['pages_with_placeholders'],
+            statistics_dict['stale_sections'])
+        if args.stats:
+            with open(args.stats, 'w') as stats_file:
+                json.dump(statistics_dict, stats_file, indent=2)
+
+    LOGGER.info("Audit finished: %s pages audited", audited_pages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Main script to generate the confluence pages of many json
+configuration files in one process (fleet mode)
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from app.fleet import FleetRunner
+from confluence.template_cache import TemplateCache
+from utils.profiler import StageProfiler
+from utils.log_utils import LOG_FORMATS
+from utils.log_utils import configure_logger
+
+# get logger instance
+LOGGER = logging.getLogger()
+
+
+# ---------------
+# MAIN
+# ---------------
+def main():
+    """Main Function
+    """
+
+    # Script Argument Parser
+    parser = argparse.ArgumentParser(description='fleet_generate.py')
+    parser.add_argument(
+        'configs',
+        help='directory with json config files or manifest file '
+             '(json list or one config path per line)')
+    parser.add_argument(
+        '-u', '--user',
+        default=None,
+        required=False,
+        help='user to be used to authenticate to the Confluence API. '
+             'This will be used instead of the one configured in json files')
+    parser.add_argument(
+        '-p', '--password',
+        default=None,
+        required=False,
+        help='password for the user used to authenticate to the Confluence API. '
+             'This will be used instead of the one configured in json files')
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=4,
+        required=False,
+        help='max number of pages generated at the same time')
+    parser.add_argument(
+        '-o', '--overwrite',
+        action='store_true',
+        required=False,
+        help='If set, this will overwrite the content of the pages '
+             'that already exist.')
+    parser.add_argument(
+        '--offline-ttl',
+        type=float,
+        default=None,
+        required=False,
+        help='seconds during which cached template pages are used '
+             'without asking the server for their version')
+    parser.add_argument(
+        '-r', '--report',
+        default=None,
+        required=False,
+        help='path of a json file in which the per config results are written')
+    parser.add_argument(
+        '--profile',
+        default=None,
+        required=False,
+        help='if set, the stages of the generation of all the pages are timed '
+             '(wall and CPU time) and the report is written into this path (json)')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="warning",
+        required=False,
+        help='debugging script log level '
+             '[ critical > error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--log-format',
+        default="text",
+        choices=LOG_FORMATS,
+        required=False,
+        help='format of the log records (json: one json object per line)')
+    args = parser.parse_args()
+
+    # configure logging properties with configuration given
+    configure_logger(LOGGER, args.log_level, __file__, args.log_format)
+
+    stage_profiler = StageProfiler() if args.profile else None
+    config_files = FleetRunner.find_config_files(args.configs)
+    fleet_runner = FleetRunner(
+        config_files,
+        max_workers=args.workers,
+        overwrite_page=args.overwrite,
+        user=args.user,
+        password=args.password,
+        template_cache=TemplateCache(offline_ttl=args.offline_ttl),
+        stage_profiler=stage_profiler
+    )
+    report = fleet_runner.run()
+
+    for result in report.results:
+        print("{status:<7} {load:>8.3f}s {generate:>8.3f}s  {config}{error}".format(
+            status='OK' if result.error is None else 'FAILED',
+            load=result.load_time,
+            generate=result.generate_time,
+            config=result.config_file,
+            error='' if result.error is None else ' -> {}'.format(result.error)))
+    print(report.summary())
+
+    if stage_profiler is not None:
+        print(stage_profiler.get_report())
+        stage_profiler.write_report(args.profile)
+
+    if args.report:
+        with open(args.report, 'w') as file_obj:
+            json.dump(report.to_dict(), file_obj, indent=2)
+
+    if report.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Main script to generate the documentation of groovy files as static
+HTML files into a local directory (preview / doc builds without
+publishing to Confluence).
+
+The function block of the template (local file, or template page of
+the Confluence server) is rendered like in groovydoc-parser.py. Builds
+are incremental: only the changed HTML files are written again.
+
+Example (from repository root):
+    python -m scripts.html_docs -f vars/ --template-file template.html -o build/docs
+"""
+
+# get common libraries
+import argparse
+import logging
+import os
+import sys
+
+from app.html_output import HtmlOutputBuilder
+from app.html_output import OUTPUT_MODES
+from app.html_output import OUTPUT_PER_FILE
+from confluence import confluence_api
+from confluence.template_cache import TemplateCache
+from utils.log_utils import LOG_FORMATS
+from utils.log_utils import configure_logger
+
+LOGGER = logging.getLogger()
+
+
+def read_text_file(text_file):
+    # type: (str) -> str
+    with open(text_file, 'r', encoding='utf-8') as file_obj:
+        return file_obj.read()
+
+
+def get_template_content(args):
+    # type: (argparse.Namespace) -> str
+    """Returns the template with the function block: content of the
+    local template file, or of the template page of the Confluence server
+    """
+    if args.template_file:
+        return read_text_file(args.template_file)
+    with confluence_api.ConfluenceApi(
+        args.confluence_url,
+        args.user,
+        args.password
+    ) as confluence_api_obj:
+        # template page is only downloaded again when its version changes
+        return TemplateCache().get_content(confluence_api_obj, args.template_page)
+
+
+# -----------------------------------
+# MAIN
+# -----------------------------------
+def main():
+    """Main Function
+    """
+
+    this_script_name = os.path.basename(__file__)
+
+    # Script Argument Parser
+    parser = argparse.ArgumentParser(description=this_script_name)
+    parser.add_argument(
+        '-f', '--file',
+        required=True,
+        help='groovy file (or directory with groovy files) to document')
+    parser.add_argument(
+        '-o', '--output-dir',
+        required=True,
+        help='directory in which the HTML files are written')
+    template_group = parser.add_mutually_exclusive_group(required=True)
+    template_group.add_argument(
+        '--template-file',
+        default=None,
+        help='local file with the function block template')
+    template_group.add_argument(
+        '-t', '--template-page',
+        default=None,
+        help='ID of the template page with the function block (read from the '
+             'Confluence server: requires --confluence-url, --user and --password)')
+    parser.add_argument(
+        '-U', '--confluence-url',
+        default=None,
+        required=False,
+        help='Confluence base URL. (Ex. http://confluence-host.net)')
+    parser.add_argument(
+        '-u', '--user',
+        default=None,
+        required=False,
+        help='user to be used to authenticate to the Confluence API.')
+    parser.add_argument(
+        '-p', '--password',
+        default=None,
+        required=False,
+        help='password for the user used to authenticate to the Confluence API.')
+    parser.add_argument(
+        '--page-template',
+        default=None,
+        required=False,
+        help='local HTML file of each page with the ${groovy.target} and '
+             '${groovy.page_title} placeholders (a minimal HTML page by default)')
+    parser.add_argument(
+        '--mode',
+        default=OUTPUT_PER_FILE,
+        choices=OUTPUT_MODES,
+        required=False,
+        help='one HTML file per groovy file or per function')
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        required=False,
+        help='if this flag is set, all the files are parsed and written again')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="warning",
+        required=False,
+        help='debugging script log level '
+             '[ critical > error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--log-format',
+        default="text",
+        choices=LOG_FORMATS,
+        required=False,
+        help='format of the log records (json: one json object per line)')
+    args = parser.parse_args()
+
+    if args.template_page and not (args.confluence_url and args.user and args.password):
+        parser.error('--template-page requires --confluence-url, --user and --password')
+
+    configure_logger(LOGGER, args.log_level, __file__, args.log_format)
+
+    page_template = read_text_file(args.page_template) if args.page_template else None
+    try:
+        html_builder = HtmlOutputBuilder(
+            args.output_dir, get_template_content(args), page_template, args.mode)
+    except ValueError as ex:
+        LOGGER.error("[%s] %s", this_script_name, ex)
+        sys.exit(1)
+    report = html_builder.build(args.file, force=args.force)
+    print("{} written, {} unchanged, {} removed ({} groovy files parsed) in {:.3f}s".format(
+        report.written, report.unchanged, report.removed, report.parsed, report.seconds))
+
+    LOGGER.info("[{script}] Finish [OK]".format(script=this_script_name))
+
+
+if __name__ == "__main__":
+    main()
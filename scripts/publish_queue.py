@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Main script to publish many pages through a durable job queue.
+
+- enqueue: adds the jobs of a manifest to a run. Jobs already done
+  with the same sources and template page version are not published
+  again, so an interrupted run is resumed by enqueueing the same
+  manifest again (the versions are read from the server). With --git-range
+  only the jobs whose documentation changed in the range are added.
+- work: drains the pending jobs of a run. Several processes (on
+  the same queue file) can work on the same run at the same time.
+- status: prints the jobs of a run.
+- retry: sets the failed jobs of a run pending again.
+
+Manifest: json list of {"source": ..., "template_page": ..., "target_page": ...}
+(relative sources are relative to the manifest directory).
+
+Example (from repository root):
+    python -m scripts.publish_queue enqueue manifest.json -r nightly -U http://confluence-host.net -u user -p pass
+    python -m scripts.publish_queue work -r nightly -U http://confluence-host.net -u user -p pass
+"""
+
+# get common libraries
+import argparse
+import concurrent.futures
+import json
+import logging
+import os
+import sys
+
+from app.git_incremental import select_affected_jobs
+from app.groovydoc_publisher import GroovydocPublisher
+from app.job_queue import JOB_FAILED
+from app.job_queue import JobQueue
+from app.job_queue import get_content_hash
+from app.job_queue import get_worker_id
+from confluence import confluence_api
+from confluence.template_cache import TemplateCache
+from utils.log_utils import LOG_FORMATS
+from utils.log_utils import configure_logger
+
+LOGGER = logging.getLogger()
+
+
+def load_manifest(manifest_file):
+    # type: (str) -> list[dict]
+    """Returns the jobs of a manifest file (sources relative to the manifest directory)
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_file))
+    with open(manifest_file, 'r') as file_obj:
+        jobs = json.load(file_obj)
+    for job in jobs:
+        job['source'] = os.path.normpath(os.path.join(manifest_dir, job['source']))
+    return jobs
+
+
+def enqueue_manifest(job_queue, run_id, manifest_file, confluence_api_obj, git_range=None):
+    # type: (JobQueue, str, str, ConfluenceApi, [str]) -> int
+    """Adds the jobs of a manifest to a run
+
+    :param confluence_api_obj: ConfluenceApi instance used to read the versions
+        of the template pages (one metadata only request per template page)
+    :param git_range: (optional) 'base..head' revisions. If set, only the jobs
+        whose documentation changed in the range are added
+    :return: number of jobs pending after the call (new or changed)
+    """
+    jobs = load_manifest(manifest_file)
+    if git_range:
+        jobs = select_affected_jobs(jobs, git_range)
+    template_versions = {}
+    pending = 0
+    for job in jobs:
+        template_page = str(job['template_page'])
+        if template_page not in template_versions:
+            template_versions[template_page] = confluence_api_obj.get_content_version(template_page)
+        if job_queue.enqueue(
+                run_id,
+                job['source'],
+                template_page,
+                job['target_page'],
+                get_content_hash(GroovydocPublisher.get_source_hash(job['source']),
+                                 template_versions[template_page])):
+            pending += 1
+    return pending
+
+
+def work(job_queue, run_id, publisher, symbol_table=None):
+    # type: (JobQueue, str, GroovydocPublisher, [SymbolTable]) -> int
+    """Claims and publishes jobs of a run until there is nothing left to claim
+
+    :param symbol_table: (optional) SymbolTable of the library (links between pages)
+    :return: number of jobs published by this worker
+    """
+    worker = get_worker_id()
+    published = 0
+    while True:
+        job = job_queue.claim(run_id, worker)
+        if job is None:
+            return published
+        try:
+            publisher.publish(job.source, job.template_page, job.target_page, symbol_table)
+        except Exception as ex:
+            LOGGER.error("Job %s (page '%s', attempt %s) failed: %s",
+                         job.job_id, job.target_page, job.attempts, ex)
+            job_queue.fail(job, ex)
+            continue
+        if job_queue.complete(job):
+            published += 1
+
+
+# -----------------------------------
+# MAIN
+# -----------------------------------
+def main():
+    """Main Function
+    """
+
+    this_script_name = os.path.basename(__file__)
+
+    # Script Argument Parser
+    parser = argparse.ArgumentParser(description=this_script_name)
+    parser.add_argument(
+        'command',
+        choices=['enqueue', 'work', 'status', 'retry'],
+        help='action on the run')
+    parser.add_argument(
+        'manifest',
+        nargs='?',
+        default=None,
+        help='manifest file with the jobs (enqueue and work)')
+    parser.add_argument(
+        '-r', '--run',
+        default='default',
+        required=False,
+        help='name of the publish run')
+    parser.add_argument(
+        '-q', '--queue',
+        default=None,
+        required=False,
+        help='SQLite file of the queue (default: in the local cache directory)')
+    parser.add_argument(
+        '--git-range',
+        default=None,
+        required=False,
+        help='git range (base..head). If set, only the jobs of the manifest whose '
+             'documentation changed in the range are added (enqueue and work)')
+    parser.add_argument(
+        '-i', '--index-page',
+        default=None,
+        required=False,
+        help='ID of a page in which an A-Z index of all the functions of the manifest '
+             'is generated. Functions referenced from other pages are linked too (work)')
+    parser.add_argument(
+        '-s', '--search-index',
+        default=None,
+        required=False,
+        help='path of a file in which a search index of all the functions of the manifest '
+             'is exported (json, gzip compressed if it ends with .gz). It is attached '
+             'to the index page if --index-page is set (work)')
+    parser.add_argument(
+        '-U', '--confluence-url',
+        default=None,
+        required=False,
+        help='Confluence base URL. (Ex. http://confluence-host.net) (enqueue and work)')
+    parser.add_argument(
+        '-u', '--user',
+        default=None,
+        required=False,
+        help='user to be used to authenticate to the Confluence API. (enqueue and work)')
+    parser.add_argument(
+        '-p', '--password',
+        default=None,
+        required=False,
+        help='password for the user used to authenticate to the Confluence API. (enqueue and work)')
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=4,
+        required=False,
+        help='number of jobs published at the same time by this process (work)')
+    parser.add_argument(
+        '--max-attempts',
+        type=int,
+        default=3,
+        required=False,
+        help='number of attempts of a job before it is failed')
+    parser.add_argument(
+        '--lease-timeout',
+        type=float,
+        default=600.0,
+        required=False,
+        help='seconds after which a running job of a dead worker can be claimed again')
+    parser.add_argument(
+        '--release-running',
+        action='store_true',
+        required=False,
+        help='if this flag is set, running jobs of the run are claimed again '
+             'without waiting for their lease (only if no other worker is alive) (work)')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="warning",
+        required=False,
+        help='debugging script log level '
+             '[ critical > error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--log-format',
+        default="text",
+        choices=LOG_FORMATS,
+        required=False,
+        help='format of the log records (json: one json object per line)')
+    args = parser.parse_args()
+
+    configure_logger(LOGGER, args.log_level, __file__, args.log_format)
+
+    if args.command == 'enqueue' and args.manifest is None:
+        parser.error("a manifest is required by 'enqueue'")
+    if args.command in ('enqueue', 'work') and not (args.confluence_url and args.user and args.password):
+        parser.error("--confluence-url, --user and --password are required by '{}'".format(args.command))
+    if (args.index_page or args.search_index) and args.manifest is None:
+        parser.error("a manifest is required by --index-page and --search-index")
+
+    job_queue = JobQueue(args.queue, max_attempts=args.max_attempts,
+                         lease_timeout=args.lease_timeout)
+    try:
+        if args.command == 'enqueue':
+            with confluence_api.ConfluenceApi(
+                args.confluence_url,
+                args.user,
+                args.password
+            ) as confluence_api_obj:
+                pending = enqueue_manifest(job_queue, args.run, args.manifest, confluence_api_obj,
+                                           args.git_range)
+            print("{} jobs pending in run '{}'".format(pending, args.run))
+
+        elif args.command == 'retry':
+            print("{} failed jobs set pending".format(job_queue.retry_failed(args.run)))
+
+        elif args.command == 'work':
+            with confluence_api.ConfluenceApi(
+                args.confluence_url,
+                args.user,
+                args.password,
+                pool_size=args.workers
+            ) as confluence_api_obj:
+                if args.manifest:
+                    enqueue_manifest(job_queue, args.run, args.manifest, confluence_api_obj,
+                                     args.git_range)
+                if args.release_running:
+                    LOGGER.info("%s running jobs released", job_queue.release_running(args.run))
+                publisher = GroovydocPublisher(confluence_api_obj, template_cache=TemplateCache())
+                symbol_table = None
+                if args.index_page:
+                    # symbols of the whole library (the publishes reuse the parsed files)
+                    symbol_table = publisher.build_symbol_table(load_manifest(args.manifest))
+                    publisher.resolve_page_titles(symbol_table)
+                with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+                    futures = [executor.submit(work, job_queue, args.run, publisher, symbol_table)
+                               for _ in range(args.workers)]
+                    published = sum(future.result() for future in futures)
+                if symbol_table is not None:
+                    publisher.publish_index(symbol_table, args.index_page)
+                if args.search_index:
+                    publisher.build_search_index(load_manifest(args.manifest)).write(args.search_index)
+                    if args.index_page:
+                        confluence_api_obj.upload_attachment(args.index_page, args.search_index)
+            print("{} jobs published by this process".format(published))
+
+        if args.command == 'status':
+            for job in job_queue.get_jobs(args.run):
+                print("{status:<8} {attempts:>3} {page:>12}  {source}{error}".format(
+                    status=job.status,
+                    attempts=job.attempts,
+                    page=job.target_page,
+                    source=job.source,
+                    error='' if job.error is None else ' -> {}'.format(job.error)))
+        counts = job_queue.get_counts(args.run)
+        print(', '.join('{}: {}'.format(status, count) for status, count in counts.items()))
+    finally:
+        job_queue.close()
+
+    if args.command == 'work' and counts[JOB_FAILED]:
+        sys.exit(1)
+
+    LOGGER.info("[{script}] Finish [OK]".format(script=this_script_name))
+
+
+if __name__ == "__main__":
+    main()
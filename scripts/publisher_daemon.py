@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Main script to run a long running publisher of groovy documentation.
+
+The parse, render and template caches and the pooled connections to
+the Confluence server stay warm between the publish jobs.
+
+Only the sources inside the source roots are published. With a token
+(--token or PUBLISHER_DAEMON_TOKEN), the clients must send it.
+
+Example (from repository root):
+    export PUBLISHER_DAEMON_TOKEN=secret
+    python -m scripts.publisher_daemon -U http://confluence-host.net -u user -p pass --port 8765 \\
+        --source-root /abs/path
+    curl localhost:8765/jobs -H 'Content-Type: application/json' -H "Authorization: Bearer $PUBLISHER_DAEMON_TOKEN" \\
+        -d '{"source": "/abs/path/vars", "template_page": "55900721", "target_page": "55900864"}'
+    curl localhost:8765/metrics -H "Authorization: Bearer $PUBLISHER_DAEMON_TOKEN"
+"""
+
+# get common libraries
+import argparse
+import logging
+import os
+
+from app.groovydoc_publisher import GroovydocPublisher
+from app.publisher_daemon import PublisherDaemon
+from app.publisher_daemon import create_server
+from confluence import confluence_api
+from confluence.template_cache import TemplateCache
+from utils.log_utils import LOG_FORMATS
+from utils.log_utils import configure_logger
+
+LOGGER = logging.getLogger()
+
+# environment variable with the shared token of the clients
+TOKEN_ENV_VAR = 'PUBLISHER_DAEMON_TOKEN'
+
+
+# -----------------------------------
+# MAIN
+# -----------------------------------
+def main():
+    """Main Function
+    """
+
+    this_script_name = os.path.basename(__file__)
+
+    # Script Argument Parser
+    parser = argparse.ArgumentParser(description=this_script_name)
+    parser.add_argument(
+        '-U', '--confluence-url',
+        required=True,
+        help='Confluence base URL. (Ex. http://confluence-host.net)')
+    parser.add_argument(
+        '-u', '--user',
+        required=True,
+        help='user to be used to authenticate to the Confluence API.')
+    parser.add_argument(
+        '-p', '--password',
+        required=True,
+        help='password for the user used to authenticate to the Confluence API.')
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        required=False,
+        help='host in which the daemon listens')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        required=False,
+        help='HTTP port in which the daemon listens')
+    parser.add_argument(
+        '--socket',
+        default=None,
+        required=False,
+        help='unix socket path in which the daemon listens (instead of the HTTP port)')
+    parser.add_argument(
+        '--source-root',
+        action='append',
+        required=True,
+        help='directory in which the sources of the jobs must be (can be repeated)')
+    parser.add_argument(
+        '--token',
+        default=os.environ.get(TOKEN_ENV_VAR),
+        required=False,
+        help='shared token the clients must send in an "Authorization: Bearer <token>" header '
+             '(default: ${} environment variable)'.format(TOKEN_ENV_VAR))
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=4,
+        required=False,
+        help='max number of jobs published at the same time')
+    parser.add_argument(
+        '--max-queue',
+        type=int,
+        default=100,
+        required=False,
+        help='max number of jobs waiting for a worker (new jobs are rejected over it)')
+    parser.add_argument(
+        '--offline-ttl',
+        type=float,
+        default=None,
+        required=False,
+        help='seconds during which cached template pages are used '
+             'without asking the server for their version')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="info",
+        required=False,
+        help='debugging script log level '
+             '[ critical > error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--log-format',
+        default="text",
+        choices=LOG_FORMATS,
+        required=False,
+        help='format of the log records (json: one json object per line)')
+    args = parser.parse_args()
+
+    configure_logger(LOGGER, args.log_level, __file__, args.log_format)
+
+    with confluence_api.ConfluenceApi(
+        args.confluence_url,
+        args.user,
+        args.password,
+        pool_size=args.workers
+    ) as confluence_api_obj:
+        publisher = GroovydocPublisher(
+            confluence_api_obj,
+            template_cache=TemplateCache(offline_ttl=args.offline_ttl)
+        )
+        publisher_daemon = PublisherDaemon(
+            publisher, max_workers=args.workers, max_queue=args.max_queue,
+            source_roots=args.source_root)
+        server = create_server(publisher_daemon, args.host, args.port, args.socket, args.token)
+        publisher_daemon.start()
+        LOGGER.info("[%s] Listening on %s", this_script_name,
+                    args.socket or 'http://{}:{}'.format(*server.server_address[:2]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            LOGGER.info("[%s] Interrupted", this_script_name)
+        finally:
+            server.server_close()
+            publisher_daemon.stop()
+
+    LOGGER.info("[{script}] Finish [OK]".format(script=this_script_name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Main script to search the functions of an exported search index
+(see --search-index of groovydoc-parser.py) without any request
+to the Confluence server.
+
+Example (from repository root):
+    python -m scripts.search_docs library-index.json.gz deploy app
+"""
+
+# get common libraries
+import argparse
+import json
+import logging
+import os
+import time
+
+from utils.log_utils import LOG_FORMATS
+from utils.log_utils import configure_logger
+from utils.search_index import SearchIndex
+
+LOGGER = logging.getLogger()
+
+
+# -----------------------------------
+# MAIN
+# -----------------------------------
+def main():
+    """Main Function
+    """
+
+    this_script_name = os.path.basename(__file__)
+
+    # Script Argument Parser
+    parser = argparse.ArgumentParser(description=this_script_name)
+    parser.add_argument(
+        'index',
+        help='search index file (json or json.gz)')
+    parser.add_argument(
+        'query',
+        nargs='+',
+        help='words to search')
+    parser.add_argument(
+        '-n', '--limit',
+        type=int,
+        default=10,
+        required=False,
+        help='max number of results')
+    parser.add_argument(
+        '--exact',
+        action='store_true',
+        required=False,
+        help='if this flag is set, the last word is not used as a prefix')
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        required=False,
+        help='if this flag is set, results are printed as json')
+    parser.add_argument(
+        '-l', '--log-level',
+        default="warning",
+        required=False,
+        help='debugging script log level '
+             '[ critical > error > warning > info > debug > off ]')
+    parser.add_argument(
+        '--log-format',
+        default="text",
+        choices=LOG_FORMATS,
+        required=False,
+        help='format of the log records (json: one json object per line)')
+    args = parser.parse_args()
+
+    configure_logger(LOGGER, args.log_level, __file__, args.log_format)
+
+    load_start = time.perf_counter()
+    search_index = SearchIndex.load(args.index)
+    search_start = time.perf_counter()
+    results = search_index.search(' '.join(args.query), limit=args.limit, prefix=not args.exact)
+    search_end = time.perf_counter()
+    LOGGER.info("[%s] Index loaded in %.1f ms, searched in %.1f ms", this_script_name,
+                (search_start - load_start) * 1000, (search_end - search_start) * 1000)
+
+    if args.json:
+        print(json.dumps([dict(result._asdict()) for result in results], indent=2))
+        return
+    for result in results:
+        print("{score:>4}  {name:<32} {file:<32} page {page}\n      {header}".format(
+            score=result.score,
+            name=result.name,
+            file=result.file,
+            page=result.page_id,
+            header=result.header or ''))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# coding=utf-8
+"""
+Common fixtures of the tests (run from the repository root: python -m pytest)
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# modules of the repository are imported as in the scripts (from its root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import upstream_stubs  # noqa: E402
+
+# the config file model is an upstream module: stubs are used if it is not installed
+if not upstream_stubs.is_upstream_installed():
+    upstream_stubs.install()
+
+from benchmarks.fake_confluence import FakeConfluenceServer  # noqa: E402
+from confluence.confluence_api import ConfluenceApi  # noqa: E402
+from confluence.models import json_model  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Local cache directory of the test (the user cache is never used)"""
+    cache_path = tmp_path / 'cache'
+    monkeypatch.setenv('GROOVYDOC_CACHE_DIR', str(cache_path))
+    return cache_path
+
+
+@pytest.fixture
+def fake_server():
+    """Fake Confluence server (see benchmarks/fake_confluence.py)"""
+    with FakeConfluenceServer() as server:
+        yield server
+
+
+@pytest.fixture
+def api(fake_server):
+    """ConfluenceApi client of the fake server"""
+    with ConfluenceApi(fake_server.url, 'user', 'password') as confluence_api_obj:
+        yield confluence_api_obj
+
+
+@pytest.fixture
+def write_config():
+    """Returns a function that writes the config file of a page generated
+    from a template page of the fake server
+    """
+
+    def write_config_file(config_file, server, template_page_id, page_title, name='groovydoc',
+                          user='user', password='password'):
+        # type: (str, FakeConfluenceServer, str, str, [str], [str], [str]) -> str
+        with open(str(config_file), 'w') as file_obj:
+            json.dump({
+                json_model.JSON_ATTR_HOST_URL: server.url,
+                json_model.JSON_ATTR_USER: user,
+                json_model.JSON_ATTR_PASS: password,
+                json_model.JSON_ATTR_SOURCE: '{}/pages/viewpage.action?pageId={}'.format(
+                    server.url, template_page_id),
+                json_model.JSON_ATTR_SPACE_KEY: 'BENCH',
+                json_model.JSON_ATTR_PARENT_PAGE_ID: None,
+                json_model.JSON_ATTR_PAGE_TITLE: page_title,
+                '$Name': name
+            }, file_obj)
+        return str(config_file)
+    return write_config_file
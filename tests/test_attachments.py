@@ -0,0 +1,82 @@
+# coding=utf-8
+"""
+Tests of the streamed multipart uploads and of the attachment downloads
+against the fake Confluence server
+"""
+
+import pytest
+import requests
+
+from confluence.multipart import MultipartFileStream
+
+
+@pytest.fixture
+def page_id(fake_server):
+    return fake_server.create_page('Page', '<p>attachments</p>')
+
+
+def read_stream(stream):
+    body = b''
+    chunk = stream.read(7)
+    while chunk:
+        body += chunk
+        chunk = stream.read(7)
+    return body
+
+
+@pytest.mark.parametrize('content', [b'', b'0123456789' * 100])
+def test_multipart_body_length_is_the_content_length(tmp_path, content):
+    file_path = tmp_path / 'report.txt'
+    file_path.write_bytes(content)
+
+    stream = MultipartFileStream(str(file_path), fields={'comment': 'generated'}, chunk_size=16)
+    body = read_stream(stream)
+
+    assert len(body) == stream.len
+    assert content + b'\r\n--' in body and body.endswith(b'--\r\n')
+
+
+@pytest.mark.parametrize('content', [b'', b'\x00\x01binary\r\n' * 1000])
+def test_upload_and_download(api, fake_server, page_id, tmp_path, content):
+    file_path = tmp_path / 'report.bin'
+    file_path.write_bytes(content)
+    progress = []
+
+    attachment = api.upload_attachment(page_id, str(file_path), chunk_size=1024)
+    target_path = api.download_attachment(page_id, 'report.bin', str(tmp_path / 'downloaded.bin'),
+                                          progress_callback=lambda received, total: progress.append(total))
+
+    assert attachment.title == 'report.bin'
+    assert fake_server.store.find_attachment(page_id, 'report.bin')['data'] == content
+    assert open(target_path, 'rb').read() == content
+    assert set(progress) <= {len(content)}
+
+
+def test_unchanged_attachment_is_not_uploaded_again(api, fake_server, page_id, tmp_path):
+    file_path = tmp_path / 'report.txt'
+    file_path.write_text('first')
+    api.upload_attachment(page_id, str(file_path))
+    fake_server.reset_stats()
+
+    api.upload_attachment(page_id, str(file_path))
+    # only the request of the existing attachment
+    assert fake_server.stats['requests'] == 1
+
+    file_path.write_text('second')
+    api.upload_attachment(page_id, str(file_path))
+    attachment = fake_server.store.find_attachment(page_id, 'report.txt')
+    assert (attachment['version'], attachment['data']) == (2, b'second')
+
+
+def test_interrupted_download_leaves_no_partial_file(api, fake_server, page_id, tmp_path):
+    file_path = tmp_path / 'report.txt'
+    file_path.write_bytes(b'0123456789' * 1000)
+    api.upload_attachment(page_id, str(file_path))
+    target_dir = tmp_path / 'downloads'
+    target_dir.mkdir()
+    fake_server.interrupt_downloads = True
+
+    with pytest.raises(requests.exceptions.RequestException):
+        api.download_attachment(page_id, 'report.txt', str(target_dir))
+
+    assert list(target_dir.iterdir()) == []
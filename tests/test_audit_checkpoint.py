@@ -0,0 +1,81 @@
+# coding=utf-8
+"""
+Tests of the audit checkpoint store
+"""
+
+import datetime
+import sqlite3
+
+from confluence.audit_checkpoint import AuditCheckpoint
+from scripts.confluence_project_auditor import get_search_since
+from scripts.confluence_project_auditor import iter_changed_pages
+from scripts.confluence_project_auditor import iter_tree_page_ids
+
+STARTED_AT = datetime.datetime(2020, 1, 31, 12, 0)
+
+
+def get_record(page_id, version, last_modified, error=None):
+    return {'page_id': page_id, 'version': version, 'last_modified': last_modified, 'error': error}
+
+
+def test_failed_records_have_no_version(tmp_path):
+    checkpoint = AuditCheckpoint(str(tmp_path / 'checkpoint.sqlite'))
+    checkpoint.store_record('1', get_record('1', '3', '2020-01-31T10:00:00.000Z'))
+    checkpoint.store_record('1', get_record('2', '5', None, error='HTTP 500'))
+
+    assert checkpoint.get_known_versions('1') == {'1': '3', '2': None}
+    assert [record['page_id'] for record in checkpoint.get_failed_records('1')] == ['2']
+
+    checkpoint.store_record('1', get_record('2', '6', '2020-01-31T11:00:00.000Z'))
+    assert checkpoint.get_failed_records('1') == []
+    checkpoint.close()
+
+
+def test_finish_run_stores_last_modification_of_the_server(tmp_path):
+    checkpoint = AuditCheckpoint(str(tmp_path / 'checkpoint.sqlite'))
+    assert checkpoint.get_last_modified('1') is None
+    checkpoint.store_record('1', get_record('1', '3', '2020-01-31T10:00:00.000Z'))
+    checkpoint.store_record('1', get_record('2', '1', '2020-01-31T11:30:00.000Z'))
+    checkpoint.store_record('9', get_record('3', '1', '2021-01-01T00:00:00.000Z'))
+    checkpoint.finish_run('1', STARTED_AT, 2)
+
+    assert checkpoint.get_last_run('1') == STARTED_AT
+    assert checkpoint.get_last_modified('1') == '2020-01-31T11:30:00.000Z'
+    checkpoint.close()
+
+
+def test_checkpoint_without_last_modification_is_migrated(tmp_path):
+    db_file = str(tmp_path / 'checkpoint.sqlite')
+    connection = sqlite3.connect(db_file)
+    with connection:
+        connection.execute("CREATE TABLE runs (root_id TEXT PRIMARY KEY, "
+                           "started_at TEXT NOT NULL, pages_audited INTEGER NOT NULL)")
+        connection.execute("INSERT INTO runs VALUES ('1', '2020-01-31T12:00:00', 4)")
+    connection.close()
+
+    checkpoint = AuditCheckpoint(db_file)
+    assert checkpoint.get_last_run('1') == STARTED_AT
+    assert checkpoint.get_last_modified('1') is None
+    checkpoint.close()
+
+
+def test_search_since_uses_server_last_modification():
+    assert get_search_since(STARTED_AT, '2020-01-31T09:15:00.000+02:00', 60) == \
+        datetime.datetime(2020, 1, 31, 8, 15)
+    assert get_search_since(STARTED_AT, None, 60) == datetime.datetime(2020, 1, 31, 11, 0)
+    assert get_search_since(STARTED_AT, 'not a date', 0) == STARTED_AT
+
+
+def test_changed_pages_of_the_tree(api, fake_server):
+    root_id = fake_server.create_page('Root', '<p></p>')
+    child_id = fake_server.create_page('Child', '<p></p>', parent_id=root_id)
+    grandchild_id = fake_server.create_page('Grandchild', '<p></p>', parent_id=child_id)
+    fake_server.create_page('Outside', '<p></p>')
+    known_versions = {root_id: '1', child_id: '1', grandchild_id: '1'}
+    fake_server.store.update(grandchild_id, 'Grandchild', '<p>changed</p>', 2)
+
+    tasks = list(iter_changed_pages(api, root_id, STARTED_AT, known_versions, failed_page_ids=[child_id]))
+
+    assert [(task.page_id, task.parent_id, task.depth) for task in tasks] == [
+        (grandchild_id, child_id, 2), (child_id, root_id, 1)]
+    assert list(iter_tree_page_ids(api, root_id)) == [root_id, child_id, grandchild_id]
@@ -0,0 +1,45 @@
+# coding=utf-8
+"""
+Tests of the retries of the base api client
+"""
+
+import pytest
+
+from benchmarks.fake_confluence import FakeConfluenceServer
+from confluence.confluence_api import ConfluenceApi
+
+
+@pytest.fixture
+def unavailable_server():
+    """Fake server that answers every request with 503"""
+    with FakeConfluenceServer(error_rate=1.0, error_status=503) as server:
+        yield server
+
+
+def test_get_is_retried_on_503(unavailable_server):
+    with ConfluenceApi(unavailable_server.url, 'user', 'password', throttle_retries=1) as api:
+        with pytest.raises(Exception):
+            api.get_content_version('100000')
+    assert unavailable_server.stats['requests'] == 2
+
+
+def test_post_is_not_retried_on_503(unavailable_server):
+    with ConfluenceApi(unavailable_server.url, 'user', 'password', throttle_retries=1) as api:
+        with pytest.raises(Exception):
+            api.create_page('Page', 'BENCH', '<p>page</p>')
+    assert unavailable_server.stats['requests'] == 1
+
+
+def test_put_is_not_retried_on_503(unavailable_server):
+    with ConfluenceApi(unavailable_server.url, 'user', 'password', throttle_retries=1) as api:
+        with pytest.raises(Exception):
+            api.update_page('100000', '<p>page</p>', 'Page', '2')
+    assert unavailable_server.stats['requests'] == 1
+
+
+def test_post_is_retried_on_429():
+    with FakeConfluenceServer(error_rate=1.0, error_status=429) as server:
+        with ConfluenceApi(server.url, 'user', 'password', throttle_retries=1) as api:
+            with pytest.raises(Exception):
+                api.create_page('Page', 'BENCH', '<p>page</p>')
+        assert server.stats['requests'] == 2
@@ -0,0 +1,62 @@
+# coding=utf-8
+"""
+Tests of the BulkPublisher against the fake Confluence server
+"""
+
+import sqlite3
+
+from confluence.bulk_publisher import PageSpec
+from confluence.page_index import PageIndex
+
+
+def get_actions(report):
+    return [result.action for result in report.results]
+
+
+def test_indexed_pages_are_only_updated_when_changed(fake_server, api):
+    parent_id = fake_server.create_page('Parent', '<p>parent</p>')
+    page_index = PageIndex(':memory:')
+    page_specs = [PageSpec('Child {}'.format(index), parent_id, '<p>{}</p>'.format(index))
+                  for index in range(3)]
+
+    report = api.publish_pages(page_specs, 'BENCH', page_index=page_index)
+    assert get_actions(report) == ['created'] * 3
+
+    report = api.publish_pages(page_specs, 'BENCH', page_index=page_index)
+    assert get_actions(report) == ['unchanged'] * 3
+    assert all(fake_server.store.find(spec.title, 'BENCH')['version'] == 1 for spec in page_specs)
+
+    page_specs[1] = page_specs[1]._replace(content='<p>changed</p>')
+    report = api.publish_pages(page_specs, 'BENCH', page_index=page_index)
+    assert get_actions(report) == ['unchanged', 'updated', 'unchanged']
+    assert fake_server.store.find('Child 1', 'BENCH')['version'] == 2
+
+
+def test_indexed_page_edited_in_server_is_updated(fake_server, api):
+    page_index = PageIndex(':memory:')
+    page_specs = [PageSpec('Page', None, '<p>generated</p>')]
+    api.publish_pages(page_specs, 'BENCH', page_index=page_index)
+
+    page = fake_server.store.find('Page', 'BENCH')
+    fake_server.store.update(page['id'], 'Page', '<p>edited</p>', 2)
+
+    report = api.publish_pages(page_specs, 'BENCH', page_index=page_index)
+    assert get_actions(report) == ['updated']
+    assert fake_server.store.get(page['id'])['body'] == '<p>generated</p>'
+
+
+def test_page_index_without_content_hash_is_migrated(tmp_path):
+    db_file = str(tmp_path / 'index.sqlite')
+    connection = sqlite3.connect(db_file)
+    connection.execute("CREATE TABLE pages (page_id TEXT PRIMARY KEY, space_key TEXT NOT NULL, "
+                       "title TEXT NOT NULL, version TEXT, updated_at REAL NOT NULL)")
+    connection.execute("INSERT INTO pages VALUES ('1', 'BENCH', 'Page', '3', 0)")
+    connection.commit()
+    connection.close()
+
+    page_index = PageIndex(db_file)
+    assert page_index.lookup('BENCH', 'Page').content_hash is None
+    page_index.store('1', 'BENCH', 'Page', '4', 'hash')
+    assert page_index.lookup('BENCH', 'Page').content_hash == 'hash'
+    page_index.update_version('1', '5')
+    assert page_index.lookup('BENCH', 'Page').content_hash is None
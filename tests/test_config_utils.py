@@ -0,0 +1,39 @@
+# coding=utf-8
+"""
+Tests of the config snapshots
+"""
+
+from app import config_utils
+
+
+def test_env_values_are_resolved_on_every_load(tmp_path, fake_server, write_config, monkeypatch):
+    config_file = write_config(tmp_path / 'config.json', fake_server, '1', 'Page',
+                               user='env.GROOVYDOC_TEST_USER', password='env.GROOVYDOC_TEST_PASS')
+    monkeypatch.setenv('GROOVYDOC_TEST_USER', 'first user')
+    monkeypatch.setenv('GROOVYDOC_TEST_PASS', 'first password')
+    first_config = config_utils.Config(config_file)
+
+    monkeypatch.setenv('GROOVYDOC_TEST_PASS', 'second password')
+    second_config = config_utils.Config(config_file)
+
+    assert first_config.get_password() == 'first password'
+    assert second_config.get_user() == 'first user'
+    assert second_config.get_password() == 'second password'
+    assert second_config.snapshot.password_ref == 'env.GROOVYDOC_TEST_PASS'
+    assert second_config.template_substitution is first_config.template_substitution
+
+
+def test_snapshot_repr_masks_the_password(tmp_path, fake_server, write_config, monkeypatch):
+    config_file = write_config(tmp_path / 'config.json', fake_server, '1', 'Page',
+                               password='plain secret')
+    monkeypatch.setenv('GROOVYDOC_TEST_PASS', 'env secret')
+    env_config_file = write_config(tmp_path / 'env_config.json', fake_server, '1', 'Page',
+                                   password='env.GROOVYDOC_TEST_PASS')
+
+    snapshot_repr = repr(config_utils.Config(config_file).snapshot)
+    env_snapshot_repr = repr(config_utils.Config(env_config_file).snapshot)
+
+    assert 'plain secret' not in snapshot_repr
+    assert config_utils.MASKED_VALUE in snapshot_repr
+    assert 'env secret' not in env_snapshot_repr
+    assert 'env.GROOVYDOC_TEST_PASS' in env_snapshot_repr
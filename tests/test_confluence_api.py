@@ -0,0 +1,113 @@
+# coding=utf-8
+"""
+Tests of the ConfluenceApi client against the fake Confluence server
+"""
+
+import datetime
+
+import pytest
+
+from confluence.confluence_api import ConfluenceApi
+from confluence.exceptions import HttpConflictError
+
+SINCE = datetime.datetime(2020, 1, 31, 10, 0)
+
+
+@pytest.fixture
+def page_id(fake_server):
+    return fake_server.create_page('Page', '<p>first</p>')
+
+
+def test_update_is_retried_after_a_version_conflict(api, fake_server, page_id):
+    # edited by someone else after the version 1 was read
+    fake_server.store.update(page_id, 'Page', '<p>other</p>', 2)
+
+    page = api.update_page_with_retry(page_id, '<p>generated</p>', 'Page', '2')
+
+    assert str(page.version) == '3'
+    assert fake_server.store.get(page_id)['body'] == '<p>generated</p>'
+
+
+def test_conflict_is_raised_after_max_attempts(api, fake_server, page_id, monkeypatch):
+    # the page is always edited again between the version request and the update
+    monkeypatch.setattr(api, 'get_content_version', lambda content_id: '0')
+    fake_server.store.update(page_id, 'Page', '<p>other</p>', 2)
+    fake_server.reset_stats()
+
+    with pytest.raises(HttpConflictError):
+        api.update_page_with_retry(page_id, '<p>generated</p>', 'Page', '2', max_attempts=3)
+
+    assert fake_server.stats['requests'] == 3
+    assert fake_server.store.get(page_id)['body'] == '<p>other</p>'
+
+
+def test_update_without_version_fetches_the_current_one(api, fake_server, page_id):
+    fake_server.store.update(page_id, 'Page', '<p>other</p>', 2)
+    fake_server.reset_stats()
+
+    page = api.update_page_with_retry(page_id, '<p>generated</p>', 'Page')
+
+    assert str(page.version) == '3'
+    # version request and update, no conflict
+    assert fake_server.stats['requests'] == 2
+
+
+def test_max_attempts_should_be_positive(api, page_id):
+    with pytest.raises(ValueError):
+        api.update_page_with_retry(page_id, '<p>generated</p>', 'Page', max_attempts=0)
+
+
+@pytest.fixture
+def modified_pages(fake_server):
+    """Pages of two spaces modified before and after SINCE"""
+    page_ids = {}
+    for title, space_key, minutes in [('Old', 'DOC', -60), ('First', 'DOC', 0), ('Second', 'DOC', 30),
+                                      ('Other space', 'OTHER', 30)]:
+        page_ids[title] = fake_server.create_page(title, '<p>{}</p>'.format(title), space_key=space_key)
+        fake_server.store.set_last_modified(page_ids[title], SINCE + datetime.timedelta(minutes=minutes))
+    return page_ids
+
+
+def test_modified_since_cql():
+    assert ConfluenceApi.build_modified_since_cql(SINCE, 'DOC', '123') == \
+        'type = page and space = "DOC" and ancestor = 123 and lastmodified >= "2020/01/31 10:00" ' \
+        'order by lastmodified asc'
+    assert ConfluenceApi.build_modified_since_cql('2020/01/31 10:00', 'A"B\\', content_type=None) == \
+        'space = "A\\"B\\\\" and lastmodified >= "2020/01/31 10:00" order by lastmodified asc'
+
+
+def test_search_requests_the_pages_of_results(api, fake_server):
+    page_ids = [fake_server.create_page('Page {}'.format(index), '<p></p>') for index in range(5)]
+    fake_server.reset_stats()
+
+    assert [summary.id_number for summary in api.search('type = page', limit=2)] == page_ids
+    assert fake_server.stats['requests'] == 3
+
+    fake_server.reset_stats()
+    assert len(list(api.search('type = page', limit=2, max_results=3))) == 3
+    assert fake_server.stats['requests'] == 2
+
+
+def test_search_modified_since_in_a_space(api, modified_pages):
+    summaries = list(api.search_modified_since(SINCE, space_key='DOC', limit=1))
+
+    assert [summary.title for summary in summaries] == ['First', 'Second']
+    assert [summary.space_key for summary in summaries] == ['DOC', 'DOC']
+
+
+def test_search_of_a_space_with_a_quote(api, fake_server):
+    page_id = fake_server.create_page('Quoted', '<p></p>', space_key='A"B')
+
+    summaries = list(api.search_modified_since(SINCE, space_key='A"B'))
+
+    assert [summary.id_number for summary in summaries] == [page_id]
+
+
+def test_changed_pages_have_a_new_version(api, fake_server, modified_pages):
+    fake_server.store.update(modified_pages['Second'], 'Second', '<p>changed</p>', 2)
+    known_versions = {modified_pages['First']: '1', modified_pages['Second']: '1'}
+
+    changed_pages = list(api.get_changed_pages(known_versions, SINCE))
+
+    assert [summary.title for summary in changed_pages] == ['Other space', 'Second']
+    assert changed_pages[1].version == '2'
@@ -0,0 +1,41 @@
+# coding=utf-8
+"""
+Tests of the PageCrawler against the fake Confluence server
+"""
+
+import pytest
+
+from confluence.crawler import PageCrawler
+
+
+@pytest.fixture
+def tree(fake_server):
+    """Root page with two branches of two levels: {title: page_id}"""
+    page_ids = {'Root': fake_server.create_page('Root', '<p></p>')}
+    for branch in ('A', 'B'):
+        page_ids[branch] = fake_server.create_page(branch, '<p></p>', parent_id=page_ids['Root'])
+        for leaf in range(3):
+            title = '{}{}'.format(branch, leaf)
+            page_ids[title] = fake_server.create_page(title, '<p></p>', parent_id=page_ids[branch])
+    return page_ids
+
+
+def test_every_page_is_visited_after_its_parent(api, tree):
+    results = list(PageCrawler(api, max_workers=2).crawl(tree['Root']))
+
+    titles = [result.page.title for result in results]
+    assert sorted(titles) == sorted(tree)
+    for result in results[1:]:
+        assert result.parent_id in [parent.page_id for parent in results[:results.index(result)]]
+    assert {result.page.title: result.depth for result in results}['A0'] == 2
+
+
+def test_crawl_with_skipped_pages_and_max_depth(api, tree):
+    crawler = PageCrawler(api, max_workers=4, fetch_content=False)
+
+    skipped_titles = sorted(result.summary.title for result in crawler.crawl(
+        tree['Root'], skip_page_ids={tree['Root'], tree['A']}))
+    assert skipped_titles == ['A0', 'A1', 'A2', 'B', 'B0', 'B1', 'B2']
+
+    assert sorted(result.page_id for result in crawler.crawl(tree['Root'], max_depth=1)) == \
+        sorted([tree['Root'], tree['A'], tree['B']])
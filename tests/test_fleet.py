@@ -0,0 +1,72 @@
+# coding=utf-8
+"""
+Tests of the FleetRunner against the fake Confluence server
+"""
+
+from app.fleet import FleetRunner
+from benchmarks.fake_confluence import FakeConfluenceServer
+from confluence.page_index import PageIndex
+from confluence.template_cache import TemplateCache
+
+
+def test_fleet_generates_the_page_of_every_config(tmp_path, fake_server, write_config):
+    template_page_id = fake_server.create_page('Template', '<p>Hello $Name</p>')
+    config_files = [
+        write_config(tmp_path / 'config_{}.json'.format(index), fake_server, template_page_id,
+                     'Page {}'.format(index), name='config {}'.format(index))
+        for index in range(3)]
+    config_files.append(str(tmp_path / 'missing.json'))
+
+    fleet_runner = FleetRunner(
+        config_files,
+        max_workers=2,
+        overwrite_page=True,
+        page_index=PageIndex(':memory:'),
+        template_cache=TemplateCache(str(tmp_path / 'templates'))
+    )
+    report = fleet_runner.run()
+
+    assert [result.config_file for result in report.results] == config_files
+    assert [result.config_file for result in report.failed] == [config_files[-1]]
+    for index, result in enumerate(report.results[:3]):
+        page = fake_server.store.find('Page {}'.format(index), 'BENCH')
+        assert result.page_id == page['id']
+        assert page['body'] == '<p>Hello config {}</p>'.format(index)
+    assert report.summary().startswith('4 configs in ')
+
+
+def test_fleet_run_again_keeps_the_pages(tmp_path, fake_server, write_config):
+    template_page_id = fake_server.create_page('Template', '<p>Hello $Name</p>')
+    config_files = [
+        write_config(tmp_path / 'config_{}.json'.format(index), fake_server, template_page_id,
+                     'Page {}'.format(index))
+        for index in range(2)]
+    page_index = PageIndex(':memory:')
+
+    first_report = FleetRunner(config_files, overwrite_page=True, page_index=page_index).run()
+    second_report = FleetRunner(config_files, overwrite_page=True, page_index=page_index).run()
+
+    assert not first_report.failed and not second_report.failed
+    assert [result.page_id for result in first_report.results] == \
+        [result.page_id for result in second_report.results]
+
+
+def test_fleet_with_the_same_page_in_two_hosts(tmp_path, fake_server, write_config):
+    page_index = PageIndex(':memory:')
+    with FakeConfluenceServer() as other_server:
+        config_files = []
+        for index, server in enumerate((fake_server, other_server)):
+            template_page_id = server.create_page('Template', '<p>Hello $Name</p>')
+            config_files.append(write_config(tmp_path / 'config_{}.json'.format(index), server,
+                                             template_page_id, 'Page', name='host {}'.format(index)))
+        # same id as the page generated in the first host
+        unrelated_page_id = other_server.create_page('Unrelated', '<p>unrelated</p>')
+        for config_file in config_files:
+            report = FleetRunner([config_file], overwrite_page=True, page_index=page_index).run()
+            assert not report.failed
+
+        for index, server in enumerate((fake_server, other_server)):
+            assert server.store.find('Page', 'BENCH')['body'] == '<p>Hello host {}</p>'.format(index)
+            assert server.store.find('Template', 'BENCH')['body'] == '<p>Hello $Name</p>'
+        assert fake_server.store.find('Page', 'BENCH')['id'] == unrelated_page_id
+        assert other_server.store.get(unrelated_page_id)['body'] == '<p>unrelated</p>'
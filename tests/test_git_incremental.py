@@ -0,0 +1,109 @@
+# coding=utf-8
+"""
+Tests of the selection of the publish jobs affected by a git range
+(on a temporary git repository)
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from app.git_incremental import get_affected_files
+from app.git_incremental import select_affected_jobs
+from utils.git_utils import get_changed_lines
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+GROOVY_CONTENT = (
+    'import groovy.transform.Field\n'
+    '\n'
+    '/**\n'
+    ' * Builds the project.\n'
+    ' * @param name (String) name of the project\n'
+    ' */\n'
+    'def build(String name) {\n'
+    '    return name\n'
+    '}\n'
+    '\n'
+    '/**\n'
+    ' * Deploys the project.\n'
+    ' * @param name (String) name of the project\n'
+    ' */\n'
+    'def deploy(String name) {\n'
+    '    return name\n'
+    '}\n'
+)
+
+
+def git(repo_dir, *git_args):
+    subprocess.run(['git', '-C', str(repo_dir)] + list(git_args), check=True,
+                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def commit_file(repo_dir, relative_path, content):
+    file_path = repo_dir / relative_path
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(content)
+    git(repo_dir, 'add', relative_path)
+    git(repo_dir, '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+        'commit', '-q', '-m', 'change {}'.format(relative_path))
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    repo_path = tmp_path / 'repo'
+    repo_path.mkdir()
+    git(repo_path, 'init', '-q')
+    commit_file(repo_path, 'vars/pipeline.groovy', GROOVY_CONTENT)
+    commit_file(repo_path, 'vars/other.groovy', GROOVY_CONTENT)
+    return repo_path
+
+
+def test_only_the_changed_functions_are_affected(repo_dir):
+    commit_file(repo_dir, 'vars/pipeline.groovy',
+                GROOVY_CONTENT.replace('Deploys the project.', 'Deploys the whole project.'))
+
+    affected_files = get_affected_files(str(repo_dir), 'HEAD~1', 'HEAD')
+
+    assert [(affected_file.path.endswith('pipeline.groovy'), affected_file.functions)
+            for affected_file in affected_files] == [(True, ['deploy'])]
+
+
+def test_changes_outside_the_functions_are_ignored(repo_dir):
+    commit_file(repo_dir, 'vars/pipeline.groovy',
+                GROOVY_CONTENT.replace('import groovy.transform.Field', 'import groovy.json.JsonOutput'))
+    commit_file(repo_dir, 'README.md', 'documentation\n')
+
+    assert get_affected_files(str(repo_dir), 'HEAD~2', 'HEAD') == []
+
+
+def test_removed_function_is_affected(repo_dir):
+    commit_file(repo_dir, 'vars/other.groovy', GROOVY_CONTENT.split('\n/**\n * Deploys')[0])
+
+    affected_files = get_affected_files(str(repo_dir), 'HEAD~1', 'HEAD')
+
+    assert [affected_file.functions for affected_file in affected_files] == [['deploy']]
+
+
+def test_select_affected_jobs_by_source(repo_dir):
+    commit_file(repo_dir, 'vars/other.groovy',
+                GROOVY_CONTENT.replace('Builds the project.', 'Builds the whole project.'))
+    jobs = [
+        {'source': str(repo_dir / 'vars' / 'pipeline.groovy'), 'target_page': '1'},
+        {'source': str(repo_dir / 'vars' / 'other.groovy'), 'target_page': '2'},
+        {'source': str(repo_dir / 'vars'), 'target_page': '3'},
+    ]
+
+    assert [job['target_page'] for job in select_affected_jobs(jobs, 'HEAD~1..HEAD')] == ['2', '3']
+
+
+@pytest.mark.parametrize('file_name', ['my step.groovy', 'tab\tstep.groovy', 'quoted "step".groovy', 'étape.groovy'])
+def test_changed_lines_of_special_file_names(repo_dir, file_name):
+    commit_file(repo_dir, 'vars/' + file_name, GROOVY_CONTENT)
+    commit_file(repo_dir, 'vars/' + file_name, GROOVY_CONTENT.replace('Deploys', 'Deploys again'))
+
+    changes = get_changed_lines(str(repo_dir), 'HEAD~1', 'HEAD')
+
+    assert list(changes) == ['vars/' + file_name]
+    assert changes['vars/' + file_name].new_lines == [(12, 12)]
@@ -0,0 +1,57 @@
+# coding=utf-8
+"""
+Tests of the main script (groovydoc-parser.py) against the fake Confluence server
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+from benchmarks.throughput import TARGET_CONTENT
+from benchmarks.throughput import TEMPLATE_CONTENT
+from benchmarks.throughput import write_groovy_file
+
+SCRIPT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'groovydoc-parser.py')
+
+
+@pytest.fixture
+def script():
+    """groovydoc-parser.py loaded as a module"""
+    spec = importlib.util.spec_from_file_location('groovydoc_parser', SCRIPT_FILE)
+    script_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script_module)
+    return script_module
+
+
+def run_script(script, monkeypatch, arguments):
+    monkeypatch.setattr(sys, 'argv', ['groovydoc-parser.py'] + arguments)
+    # no log file next to the script, no handlers left in the root logger
+    monkeypatch.setattr(script, 'configure_logger', lambda *args: None)
+    script.main()
+
+
+def get_publish_arguments(tmp_path, fake_server):
+    groovy_file = str(tmp_path / 'library.groovy')
+    write_groovy_file(groovy_file, 3)
+    return ['-f', groovy_file, '-U', fake_server.url, '-u', 'user',
+            '-t', fake_server.create_page('Template', TEMPLATE_CONTENT),
+            '-T', fake_server.create_page('Target', TARGET_CONTENT)]
+
+
+def test_password_from_environment(script, tmp_path, fake_server, monkeypatch):
+    arguments = get_publish_arguments(tmp_path, fake_server)
+    monkeypatch.setenv(script.PASSWORD_ENV_VAR, 'password')
+    run_script(script, monkeypatch, arguments)
+
+    assert 'runStep0' in fake_server.store.find('Target', 'BENCH')['body']
+
+
+def test_password_is_required(script, tmp_path, fake_server, monkeypatch, capsys):
+    arguments = get_publish_arguments(tmp_path, fake_server)
+    monkeypatch.delenv(script.PASSWORD_ENV_VAR, raising=False)
+    with pytest.raises(SystemExit):
+        run_script(script, monkeypatch, arguments)
+    assert script.PASSWORD_ENV_VAR in capsys.readouterr().err
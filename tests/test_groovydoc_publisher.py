@@ -0,0 +1,65 @@
+# coding=utf-8
+"""
+Tests of the GroovydocPublisher against the fake Confluence server
+"""
+
+import pytest
+
+from app.groovydoc_publisher import GroovydocPublisher
+from benchmarks.throughput import TARGET_CONTENT
+from benchmarks.throughput import TEMPLATE_CONTENT
+from benchmarks.throughput import write_groovy_file
+from confluence.template_cache import TemplateCache
+from utils.symbol_table import SymbolTable
+
+
+@pytest.fixture
+def publisher(api, tmp_path):
+    return GroovydocPublisher(api, TemplateCache(str(tmp_path / 'templates')))
+
+
+def test_second_publish_replaces_the_generated_section(publisher, fake_server, tmp_path):
+    groovy_file = str(tmp_path / 'library.groovy')
+    template_page_id = fake_server.create_page('Template', TEMPLATE_CONTENT)
+    target_page_id = fake_server.create_page('Target', TARGET_CONTENT + '<p>Footer</p>')
+
+    write_groovy_file(groovy_file, 2)
+    publisher.publish(groovy_file, template_page_id, target_page_id)
+    write_groovy_file(groovy_file, 3)
+    result = publisher.publish(groovy_file, template_page_id, target_page_id)
+
+    body = fake_server.store.get(target_page_id)['body']
+    assert str(result.version) == '3'
+    assert 'runStep2' in body
+    assert body.count('>runStep0<') == 1
+    assert body.startswith('<p>Generated documentation:</p>')
+    assert body.endswith('<p>Footer</p>')
+    assert '${groovy.target}' not in body
+
+
+def test_second_index_publish_replaces_the_index(publisher, fake_server, tmp_path):
+    groovy_file = str(tmp_path / 'library.groovy')
+    target_page_id = fake_server.create_page('Target', TARGET_CONTENT)
+    index_page_id = fake_server.create_page('Index', TARGET_CONTENT)
+
+    for functions_count in (1, 2):
+        write_groovy_file(groovy_file, functions_count)
+        symbol_table = publisher.build_symbol_table(
+            [{'source': groovy_file, 'target_page': target_page_id}])
+        publisher.resolve_page_titles(symbol_table)
+        publisher.publish_index(symbol_table, index_page_id)
+
+    body = fake_server.store.get(index_page_id)['body']
+    assert 'runStep1' in body
+    assert body.count('groovydoc-generated-') == 2  # one start and one end marker
+
+
+def test_target_without_placeholder_is_rejected(publisher, fake_server, tmp_path):
+    groovy_file = str(tmp_path / 'library.groovy')
+    write_groovy_file(groovy_file, 1)
+    template_page_id = fake_server.create_page('Template', TEMPLATE_CONTENT)
+    target_page_id = fake_server.create_page('Target', '<p>No placeholder</p>')
+
+    with pytest.raises(ValueError):
+        publisher.publish(groovy_file, template_page_id, target_page_id, SymbolTable())
+    assert fake_server.store.get(target_page_id)['body'] == '<p>No placeholder</p>'
@@ -0,0 +1,102 @@
+# coding=utf-8
+"""
+Tests of the incremental HTML output builder
+"""
+
+import pytest
+
+from app.html_output import HtmlOutputBuilder
+from app.html_output import OUTPUT_PER_FUNCTION
+from benchmarks.throughput import TEMPLATE_CONTENT
+from benchmarks.throughput import write_groovy_file
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    source_path = tmp_path / 'vars'
+    source_path.mkdir()
+    write_groovy_file(str(source_path / 'first.groovy'), 2)
+    write_groovy_file(str(source_path / 'second.groovy'), 1)
+    return source_path
+
+
+def test_code_macro_is_rendered_as_escaped_code(tmp_path):
+    source_path = tmp_path / 'vars'
+    source_path.mkdir()
+    (source_path / 'deploy.groovy').write_text(
+        '/**\n'
+        ' * Deploys the services.\n'
+        ' * @param services (Map) services by name\n'
+        ' */\n'
+        'def deploy(Map<String, Object> services) {\n'
+        '}\n')
+    output_dir = tmp_path / 'html'
+    HtmlOutputBuilder(str(output_dir), TEMPLATE_CONTENT).build(str(source_path))
+
+    page = (output_dir / 'files' / 'deploy.html').read_text(encoding='utf-8')
+    assert '<pre><code>def deploy( Map&lt;String, Object&gt; services )</code></pre>' in page
+    assert '<a id="groovydoc-deploy.deploy"></a>' in page
+    assert 'ac:' not in page and 'CDATA' not in page
+
+
+def test_template_with_other_macros_is_rejected(tmp_path):
+    template_content = TEMPLATE_CONTENT.replace(
+        '<h3>Returns</h3>', '<ac:structured-macro ac:name="info"><ac:rich-text-body>'
+                            '<p>Returns</p></ac:rich-text-body></ac:structured-macro>')
+    with pytest.raises(ValueError) as error_info:
+        HtmlOutputBuilder(str(tmp_path / 'html'), template_content)
+    assert 'ac:rich-text-body' in str(error_info.value)
+
+
+def test_incremental_build(source_dir, tmp_path):
+    output_dir = tmp_path / 'html'
+    first_report = HtmlOutputBuilder(str(output_dir), TEMPLATE_CONTENT).build(str(source_dir))
+    assert (first_report.written, first_report.parsed) == (3, 2)
+
+    write_groovy_file(str(source_dir / 'second.groovy'), 2)
+    second_report = HtmlOutputBuilder(str(output_dir), TEMPLATE_CONTENT).build(str(source_dir))
+    # second.html and the index page
+    assert (second_report.written, second_report.unchanged, second_report.parsed) == (2, 1, 1)
+
+
+def test_removed_function_and_its_empty_directory(source_dir, tmp_path):
+    output_dir = tmp_path / 'html'
+    builder = HtmlOutputBuilder(str(output_dir), TEMPLATE_CONTENT, mode=OUTPUT_PER_FUNCTION)
+    builder.build(str(source_dir))
+    assert (output_dir / 'files' / 'second' / 'runStep0.html').exists()
+
+    write_groovy_file(str(source_dir / 'first.groovy'), 1)
+    (source_dir / 'second.groovy').unlink()
+    report = builder.build(str(source_dir))
+
+    assert report.removed == 2
+    assert not (output_dir / 'files' / 'first' / 'runStep1.html').exists()
+    assert (output_dir / 'files' / 'first' / 'runStep0.html').exists()
+    assert not (output_dir / 'files' / 'second').exists()
+
+
+def test_force_build_still_removes_stale_outputs(source_dir, tmp_path):
+    output_dir = tmp_path / 'html'
+    builder = HtmlOutputBuilder(str(output_dir), TEMPLATE_CONTENT)
+    builder.build(str(source_dir))
+
+    (source_dir / 'second.groovy').unlink()
+    report = builder.build(str(source_dir), force=True)
+
+    assert (report.written, report.unchanged, report.removed) == (2, 0, 1)
+    assert not (output_dir / 'files' / 'second.html').exists()
+
+
+def test_index_groovy_does_not_overwrite_the_index_page(source_dir, tmp_path):
+    write_groovy_file(str(source_dir / 'index.groovy'), 1)
+    output_dir = tmp_path / 'html'
+    builder = HtmlOutputBuilder(str(output_dir), TEMPLATE_CONTENT)
+
+    first_report = builder.build(str(source_dir))
+    second_report = builder.build(str(source_dir))
+
+    index_page = (output_dir / 'index.html').read_text(encoding='utf-8')
+    assert '<a href="files/index.html">index.groovy</a>' in index_page
+    assert '<a href="files/first.html">first.groovy</a>' in index_page
+    assert 'runStep0' in (output_dir / 'files' / 'index.html').read_text(encoding='utf-8')
+    assert (first_report.written, second_report.written, second_report.unchanged) == (4, 0, 4)
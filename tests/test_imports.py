@@ -0,0 +1,46 @@
+# coding=utf-8
+"""
+Smoke test: every module of the repository can be imported
+"""
+
+import glob
+import importlib
+import importlib.util
+import os
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# upstream modules that are not part of this repository
+# (modules that depend on them are skipped when they are not installed)
+UPSTREAM_MODULES = ('confluence.models', 'utilities')
+
+MODULE_NAMES = sorted(
+    os.path.splitext(os.path.relpath(module_file, REPO_ROOT))[0].replace(os.sep, '.')
+    for package in ('app', 'benchmarks', 'confluence', 'scripts', 'utils')
+    for module_file in glob.glob(os.path.join(REPO_ROOT, package, '*.py'))
+    if not module_file.endswith('__init__.py'))
+
+
+def import_or_skip(import_function, name):
+    try:
+        return import_function()
+    except ModuleNotFoundError as ex:
+        if ex.name and ex.name.startswith(UPSTREAM_MODULES):
+            pytest.skip("{} requires the upstream module '{}'".format(name, ex.name))
+        raise
+
+
+@pytest.mark.parametrize('module_name', MODULE_NAMES)
+def test_import_module(module_name):
+    import_or_skip(lambda: importlib.import_module(module_name), module_name)
+
+
+def test_import_main_script():
+    spec = importlib.util.spec_from_file_location(
+        'groovydoc_parser', os.path.join(REPO_ROOT, 'groovydoc-parser.py'))
+
+    def load_script():
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    import_or_skip(load_script, 'groovydoc-parser.py')
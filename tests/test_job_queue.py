@@ -0,0 +1,81 @@
+# coding=utf-8
+"""
+Tests of the durable JobQueue and of the enqueue of the publish_queue script
+"""
+
+import json
+
+import pytest
+
+from app.job_queue import JOB_DONE
+from app.job_queue import JOB_FAILED
+from app.job_queue import JOB_PENDING
+from app.job_queue import JobQueue
+from app.job_queue import get_content_hash
+from benchmarks.throughput import TARGET_CONTENT
+from benchmarks.throughput import TEMPLATE_CONTENT
+from benchmarks.throughput import write_groovy_file
+from scripts.publish_queue import enqueue_manifest
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue.sqlite'), max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def test_done_job_is_only_enqueued_again_when_its_hash_changes(job_queue):
+    content_hash = get_content_hash('sources', '1')
+    assert job_queue.enqueue('run', 'vars', '10', '20', content_hash)
+    job = job_queue.claim('run', 'worker')
+    assert job.target_page == '20' and job.attempts == 1
+    assert job_queue.complete(job)
+
+    assert not job_queue.enqueue('run', 'vars', '10', '20', content_hash)
+    assert job_queue.get_counts('run')[JOB_DONE] == 1
+    # same sources, new version of the template page
+    assert job_queue.enqueue('run', 'vars', '10', '20', get_content_hash('sources', '2'))
+    assert job_queue.get_counts('run')[JOB_PENDING] == 1
+
+
+def test_failed_job_is_claimed_until_max_attempts(job_queue):
+    job_queue.enqueue('run', 'vars', '10', '20', get_content_hash('sources', '1'))
+    for _ in range(2):
+        job_queue.fail(job_queue.claim('run', 'worker'), 'boom')
+    assert job_queue.claim('run', 'worker') is None
+    assert job_queue.get_jobs('run', JOB_FAILED)[0].error == 'boom'
+
+    assert job_queue.retry_failed('run') == 1
+    assert job_queue.claim('run', 'worker').attempts == 1
+
+
+def test_expired_lease_is_claimed_by_another_worker(tmp_path):
+    job_queue = JobQueue(str(tmp_path / 'queue.sqlite'), lease_timeout=-1.0)
+    job_queue.enqueue('run', 'vars', '10', '20')
+    first_job = job_queue.claim('run', 'first')
+    second_job = job_queue.claim('run', 'second')
+    assert second_job.job_id == first_job.job_id
+    # the first worker no longer owns the job
+    assert not job_queue.complete(first_job)
+    assert job_queue.complete(second_job)
+    job_queue.close()
+
+
+def test_enqueue_manifest_with_a_new_template_version(job_queue, api, fake_server, tmp_path):
+    write_groovy_file(str(tmp_path / 'library.groovy'), 2)
+    template_page_id = fake_server.create_page('Template', TEMPLATE_CONTENT)
+    manifest_file = tmp_path / 'manifest.json'
+    manifest_file.write_text(json.dumps([
+        {'source': 'library.groovy', 'template_page': template_page_id,
+         'target_page': fake_server.create_page('Target {}'.format(index), TARGET_CONTENT)}
+        for index in range(2)]))
+
+    assert enqueue_manifest(job_queue, 'run', str(manifest_file), api) == 2
+    for _ in range(2):
+        job_queue.complete(job_queue.claim('run', 'worker'))
+    assert enqueue_manifest(job_queue, 'run', str(manifest_file), api) == 0
+
+    page = fake_server.store.get(template_page_id)
+    fake_server.store.update(template_page_id, page['title'], page['body'], int(page['version']) + 1)
+    assert enqueue_manifest(job_queue, 'run', str(manifest_file), api) == 2
@@ -0,0 +1,66 @@
+# coding=utf-8
+"""
+Tests of the queue-based logging setup
+"""
+
+import json
+import logging
+import threading
+
+import pytest
+
+from utils.log_utils import LOG_FORMAT_JSON
+from utils.log_utils import configure_logger
+from utils.log_utils import stop_loggers
+
+
+@pytest.fixture
+def logger(request):
+    """Logger of the test (its queue handler is removed at the end)"""
+    test_logger = logging.getLogger('tests.log_utils.{}'.format(request.node.name))
+    yield test_logger
+    stop_loggers()
+    for handler in list(test_logger.handlers):
+        test_logger.removeHandler(handler)
+
+
+def read_log_lines(tmp_path):
+    return (tmp_path / 'logs' / 'script.log').read_text(encoding='utf-8').splitlines()
+
+
+def test_records_of_worker_threads_are_written_by_the_listener(logger, tmp_path):
+    configure_logger(logger, 'info', script_file=str(tmp_path / 'script.py'))
+    worker = threading.Thread(target=lambda: logger.info('logged from %s', 'worker'))
+    worker.start()
+    worker.join()
+    logger.debug('debug record')
+    stop_loggers()
+
+    log_lines = read_log_lines(tmp_path)
+    assert len(log_lines) == 1
+    assert log_lines[0].endswith(':test_log_utils      : [INFO] -> logged from worker')
+
+
+def test_json_records_with_exception(logger, tmp_path):
+    configure_logger(logger, 'info', script_file=str(tmp_path / 'script.py'), log_format=LOG_FORMAT_JSON)
+    try:
+        raise ValueError('invalid value')
+    except ValueError:
+        logger.exception('failed with %s', 'error')
+    stop_loggers()
+
+    log_entry = json.loads(read_log_lines(tmp_path)[0])
+    assert (log_entry['level'], log_entry['logger'], log_entry['message']) == \
+        ('ERROR', logger.name, 'failed with error')
+    assert 'ValueError: invalid value' in log_entry['exception']
+
+
+def test_stop_loggers_writes_the_pending_records(logger, tmp_path):
+    configure_logger(logger, 'info', script_file=str(tmp_path / 'script.py'))
+    for index in range(1000):
+        logger.info('record %s', index)
+    stop_loggers()
+
+    log_lines = read_log_lines(tmp_path)
+    assert len(log_lines) == 1000
+    assert log_lines[-1].endswith('record 999')
@@ -0,0 +1,51 @@
+# coding=utf-8
+"""
+Tests of the PageManager against the fake Confluence server
+"""
+
+import pytest
+
+from app.page_manager import PageManager
+from confluence.page_index import PageIndex
+
+PAGE_TITLE = 'Generated Page'
+
+
+@pytest.fixture
+def config_file(tmp_path, fake_server, write_config):
+    template_page_id = fake_server.create_page('Template', '<p>Hello $Name</p>')
+    return write_config(tmp_path / 'config.json', fake_server, template_page_id, PAGE_TITLE)
+
+
+def test_construction_does_not_open_page_index(tmp_path, config_file):
+    index_file = tmp_path / 'index.sqlite'
+    with PageManager(config_file, page_index_file=str(index_file)):
+        pass
+    assert not index_file.exists()
+
+
+def test_generate_page_recreates_deleted_indexed_page(fake_server, config_file):
+    with PageManager(config_file, page_index=PageIndex(':memory:')) as page_manager:
+        first_page = page_manager.generate_page(overwrite_page=True)
+        assert fake_server.store.get(first_page.id_number)['body'] == '<p>Hello groovydoc</p>'
+
+        # page deleted in the server: the indexed id is stale
+        fake_server.store.delete(first_page.id_number)
+        assert not page_manager.page_exists(PAGE_TITLE, 'BENCH')
+
+        fake_server.store.create(PAGE_TITLE, 'BENCH', '<p>stale</p>')
+        page_manager.page_index.store(first_page.id_number, 'BENCH', PAGE_TITLE, '1')
+        second_page = page_manager.generate_page(overwrite_page=True)
+
+    assert second_page.id_number != first_page.id_number
+    assert fake_server.store.get(second_page.id_number)['body'] == '<p>Hello groovydoc</p>'
+
+
+def test_generate_page_creates_page_when_indexed_page_was_deleted(fake_server, config_file):
+    with PageManager(config_file, page_index=PageIndex(':memory:')) as page_manager:
+        first_page = page_manager.generate_page(overwrite_page=True)
+        fake_server.store.delete(first_page.id_number)
+        second_page = page_manager.generate_page(overwrite_page=True)
+
+    assert second_page.id_number != first_page.id_number
+    assert fake_server.store.find(PAGE_TITLE, 'BENCH')['id'] == second_page.id_number
@@ -0,0 +1,75 @@
+# coding=utf-8
+"""
+Tests of the shard planning and of the sharded publish against the fake Confluence server
+"""
+
+import itertools
+
+import pytest
+
+from app import page_sharding
+from app.groovydoc_publisher import GroovydocPublisher
+from benchmarks.throughput import TARGET_CONTENT
+from benchmarks.throughput import TEMPLATE_CONTENT
+from benchmarks.throughput import write_groovy_file
+from confluence.template_cache import TemplateCache
+
+
+def get_items(function_names):
+    return [page_sharding.ShardItem('library.groovy', function_name, 100)
+            for function_name in function_names]
+
+
+def test_inserted_function_keeps_the_shard_titles():
+    function_names = ['function{}'.format(index) for index in range(20)]
+    shards = page_sharding.plan_shards(get_items(function_names), 'Library',
+                                       page_sharding.SHARD_BY_COUNT, 4)
+    inserted_shards = page_sharding.plan_shards(get_items(['aFirst'] + function_names), 'Library',
+                                                page_sharding.SHARD_BY_COUNT, 4)
+
+    titles = [shard.title for shard in shards]
+    assert titles[:3] == ['Library - Part 1', 'Library - Part 2', 'Library - Part 3']
+    assert [shard.title for shard in inserted_shards][:len(titles)] == titles
+
+
+def test_is_shard_title():
+    assert page_sharding.is_shard_title('Library - Part 12', 'Library')
+    assert page_sharding.is_shard_title('Library - vars/build.groovy', 'Library')
+    assert page_sharding.is_shard_title('Library - vars/build.groovy (2)', 'Library')
+    assert not page_sharding.is_shard_title('Library - Release notes', 'Library')
+    assert not page_sharding.is_shard_title('Other - Part 1', 'Library')
+
+
+@pytest.fixture
+def publish(api, fake_server, tmp_path):
+    """Publishes a groovy file of some functions into the shards of a target page,
+    with a new publisher and shard manifest directory each time (new build agent)
+    """
+    groovy_file = str(tmp_path / 'library.groovy')
+    template_page_id = fake_server.create_page('Template', TEMPLATE_CONTENT)
+    target_page_id = fake_server.create_page('Library', TARGET_CONTENT + '<p>Footer</p>')
+    manifest_dirs = itertools.count()
+
+    def publish_functions(functions_count):
+        write_groovy_file(groovy_file, functions_count)
+        publisher = GroovydocPublisher(api, TemplateCache(str(tmp_path / 'templates')))
+        publisher.publish_sharded(
+            groovy_file, template_page_id, target_page_id, page_sharding.SHARD_BY_COUNT, 2,
+            manifest_dir=str(tmp_path / 'shards{}'.format(next(manifest_dirs))))
+        return fake_server.store.get(target_page_id), sorted(
+            page['title'] for page in fake_server.store.children(target_page_id))
+    return publish_functions
+
+
+def test_sharded_publish_updates_the_overview_and_deletes_stale_shards(publish, fake_server):
+    first_target, first_titles = publish(6)
+    assert 'Library - Part 1' in first_titles and len(first_titles) > 1
+
+    fake_server.create_page('Library - Release notes', '<p>notes</p>', parent_id=first_target['id'])
+    second_target, second_titles = publish(1)
+
+    assert second_titles == ['Library - Part 1', 'Library - Release notes']
+    assert 'Library - Part 2' in first_target['body']
+    assert 'Library - Part 2' not in second_target['body']
+    assert second_target['body'].count('groovydoc-generated-end') == 1
+    assert second_target['body'].endswith('<p>Footer</p>')
@@ -0,0 +1,48 @@
+# coding=utf-8
+"""
+Tests of the stage profiler
+"""
+
+import tracemalloc
+
+import pytest
+
+from utils import profiler
+
+
+@pytest.fixture(autouse=True)
+def stop_tracemalloc():
+    yield
+    tracemalloc.stop()
+
+
+def test_memory_budget_alone_does_not_trace_memory():
+    if profiler.get_peak_rss() is None:
+        pytest.skip('peak RSS is not available in this platform')
+    stage_profiler = profiler.StageProfiler(memory_budget=1024 ** 4)
+    with stage_profiler.stage(profiler.STAGE_PARSE):
+        pass
+    assert not tracemalloc.is_tracing()
+    assert stage_profiler.get_memory() == []
+
+
+def test_memory_budget_is_checked_at_the_end_of_the_stages():
+    stage_profiler = profiler.StageProfiler(memory_budget=1)
+    with pytest.raises(profiler.MemoryBudgetExceeded):
+        with stage_profiler.stage(profiler.STAGE_RENDER):
+            bytearray(1024)
+
+
+def test_memory_of_each_stage_is_traced():
+    stage_profiler = profiler.StageProfiler(trace_memory=True)
+    with stage_profiler.stage(profiler.STAGE_PARSE):
+        kept_memory = b'x' * (8 * 1024 * 1024)
+    with stage_profiler.stage(profiler.STAGE_RENDER):
+        pass
+
+    parse_memory, render_memory = stage_profiler.get_memory()
+    assert parse_memory.allocated >= len(kept_memory)
+    if profiler.get_current_rss() is not None:
+        # RSS of the stage, not the peak of the whole process
+        assert parse_memory.rss_delta > render_memory.rss_delta
+    assert 'RSS delta' in stage_profiler.get_report()
@@ -0,0 +1,145 @@
+# coding=utf-8
+"""
+Tests of the publisher daemon and its HTTP interface
+(with a publisher that does not publish anything)
+"""
+
+import collections
+import threading
+
+import pytest
+import requests
+
+from app.publisher_daemon import JOB_DONE
+from app.publisher_daemon import JOB_FAILED
+from app.publisher_daemon import PublisherDaemon
+from app.publisher_daemon import QueueFullError
+from app.publisher_daemon import SourceNotAllowedError
+from app.publisher_daemon import create_server
+
+TOKEN = 'secret'
+
+FakeResult = collections.namedtuple('FakeResult', ['source', 'target_page'])
+
+
+class FakePublisher(object):
+    """Publisher that only records the published sources"""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, source, template_page, target_page):
+        if source.endswith('broken'):
+            raise ValueError('broken source')
+        self.published.append(source)
+        return FakeResult(source, target_page)
+
+    @staticmethod
+    def get_cache_info():
+        return {'parse': {'hits': 0}}
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    source_path = tmp_path / 'sources'
+    source_path.mkdir()
+    return source_path
+
+
+@pytest.fixture
+def run_server():
+    """Returns a function that serves a daemon over HTTP, returns the url of the server"""
+    servers = []
+
+    def run(publisher_daemon, token=TOKEN):
+        server = create_server(publisher_daemon, token=token)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return 'http://{}:{}'.format(*server.server_address[:2])
+    yield run
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post_job(server_url, source, token=TOKEN, wait=False):
+    return requests.post(
+        server_url + '/jobs',
+        json={'source': str(source), 'template_page': '1', 'target_page': '2', 'wait': wait},
+        headers={'Authorization': 'Bearer {}'.format(token)})
+
+
+def test_full_queue_is_rejected_with_503(run_server, source_dir):
+    # workers not started: jobs stay in the queue
+    publisher_daemon = PublisherDaemon(FakePublisher(), max_queue=1, source_roots=[str(source_dir)])
+    server_url = run_server(publisher_daemon)
+
+    assert post_job(server_url, source_dir / 'vars').status_code == 202
+    response = post_job(server_url, source_dir / 'vars')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert publisher_daemon.get_metrics()['rejected'] == 1
+    with pytest.raises(QueueFullError):
+        publisher_daemon.submit(str(source_dir / 'vars'), '1', '2')
+
+
+def test_wait_returns_the_finished_job_and_metrics(run_server, source_dir):
+    publisher_daemon = PublisherDaemon(FakePublisher(), max_workers=2, source_roots=[str(source_dir)])
+    publisher_daemon.start()
+    server_url = run_server(publisher_daemon)
+    try:
+        response = post_job(server_url, source_dir / 'vars', wait=True)
+        failed_response = post_job(server_url, source_dir / 'broken', wait=True)
+        metrics = requests.get(server_url + '/metrics', headers={'Authorization': 'Bearer ' + TOKEN}).json()
+        job = requests.get('{}/jobs/{}'.format(server_url, response.json()['id']),
+                           headers={'Authorization': 'Bearer ' + TOKEN}).json()
+    finally:
+        publisher_daemon.stop()
+
+    assert response.status_code == 200
+    assert (job['status'], job['result']['target_page']) == (JOB_DONE, '2')
+    assert (failed_response.json()['status'], failed_response.json()['error']) == (JOB_FAILED, 'broken source')
+    assert (metrics['submitted'], metrics['done'], metrics['failed'], metrics['running']) == (2, 1, 1, 0)
+    assert metrics['caches'] == {'parse': {'hits': 0}}
+
+
+def test_history_keeps_the_last_finished_jobs(source_dir):
+    publisher_daemon = PublisherDaemon(FakePublisher(), max_workers=1, history_size=2)
+    publisher_daemon.start()
+    try:
+        jobs = []
+        for index in range(4):
+            jobs.append(publisher_daemon.submit(str(source_dir / 'vars{}'.format(index)), '1', '2'))
+            jobs[-1].wait()
+    finally:
+        publisher_daemon.stop()
+
+    # the history is trimmed when a job is submitted (the last one is kept too)
+    assert [publisher_daemon.get_job(job.id) is not None for job in jobs] == [False, False, True, True]
+
+
+def test_jobs_are_only_accepted_as_json_with_the_token(run_server, source_dir):
+    server_url = run_server(PublisherDaemon(FakePublisher(), source_roots=[str(source_dir)]))
+    job_request = {'source': str(source_dir / 'vars'), 'template_page': '1', 'target_page': '2'}
+
+    # form-encoded body (curl -d without Content-Type)
+    assert requests.post(server_url + '/jobs', data=job_request,
+                         headers={'Authorization': 'Bearer ' + TOKEN}).status_code == 415
+    assert post_job(server_url, source_dir / 'vars', token='other').status_code == 401
+    assert requests.get(server_url + '/metrics').status_code == 401
+    assert requests.get(server_url + '/health').status_code == 200
+    assert post_job(server_url, source_dir / 'vars').status_code == 202
+
+
+def test_sources_outside_the_roots_are_rejected(run_server, source_dir, tmp_path):
+    publisher_daemon = PublisherDaemon(FakePublisher(), source_roots=[str(source_dir)])
+    server_url = run_server(publisher_daemon)
+    (source_dir / 'link').symlink_to(tmp_path)
+
+    assert post_job(server_url, tmp_path / 'other').status_code == 403
+    assert post_job(server_url, source_dir / '..' / 'other').status_code == 403
+    assert post_job(server_url, source_dir / 'link' / 'other').status_code == 403
+    with pytest.raises(SourceNotAllowedError):
+        publisher_daemon.submit(str(source_dir) + '-other', '1', '2')
+    assert publisher_daemon.is_allowed_source(str(source_dir / 'vars' / 'build.groovy'))
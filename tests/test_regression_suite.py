@@ -0,0 +1,32 @@
+# coding=utf-8
+"""
+Tests of the comparison of the regression suite with its baselines
+"""
+
+from benchmarks.regression_suite import CALIBRATION
+from benchmarks.regression_suite import MIN_GATED_SECONDS
+from benchmarks.regression_suite import compare_with_baselines
+
+
+def test_regressions_over_the_tolerance():
+    baselines = {'slow': 1.0, 'same': 1.0}
+    results = compare_with_baselines({'slow': 1.5, 'same': 1.1, 'new': 1.0}, baselines, 0.25)
+
+    assert [(result.name, result.regression) for result in results] == \
+        [('slow', True), ('same', False), ('new', False)]
+
+
+def test_fast_benchmarks_are_not_gated():
+    fast_baseline = MIN_GATED_SECONDS / 10
+    results = compare_with_baselines({'fast': fast_baseline * 2}, {'fast': fast_baseline}, 0.25)
+
+    assert results[0].ratio == 2.0
+    assert not results[0].gated and not results[0].regression
+
+
+def test_ratios_are_normalized_with_the_calibration():
+    baselines = {'bench': 1.0, CALIBRATION: 1.0}
+    # this machine is two times slower than the one of the baselines
+    results = compare_with_baselines({'bench': 2.0}, baselines, 0.25, calibration=2.0)
+
+    assert results[0].ratio == 1.0 and not results[0].regression
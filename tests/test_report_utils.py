@@ -0,0 +1,41 @@
+# coding=utf-8
+"""
+Tests of the report writers
+"""
+
+import pytest
+
+from utils.report_utils import ReportWriter
+
+FIELDS = ['page_id', 'title', 'error']
+
+RECORDS = [
+    {'page_id': '1', 'title': 'Audited', 'error': None},
+    {'page_id': '2', 'title': None, 'error': 'HTTP 500'},
+    {'page_id': '3', 'title': 'Audited too', 'error': None},
+]
+
+
+@pytest.mark.parametrize('report_format', ['jsonl', 'csv'])
+def test_read_values_skips_records_with_error(tmp_path, report_format):
+    # the extension does not match the format on purpose
+    report_file = str(tmp_path / 'report.txt')
+    with ReportWriter.create(report_file, FIELDS, report_format=report_format) as report_writer:
+        for record in RECORDS:
+            report_writer.write(record)
+
+    assert list(ReportWriter.read_values(report_file, 'page_id', report_format=report_format)) == \
+        ['1', '2', '3']
+    assert list(ReportWriter.read_values(report_file, 'page_id', report_format=report_format,
+                                         skip_field='error')) == ['1', '3']
+
+
+def test_read_values_ignores_incomplete_last_line(tmp_path):
+    report_file = tmp_path / 'report.jsonl'
+    report_file.write_text('{"page_id": "1", "error": null}\n{"page_id": "2", "er', encoding='utf-8')
+
+    assert list(ReportWriter.read_values(str(report_file), 'page_id', skip_field='error')) == ['1']
+
+
+def test_read_values_of_missing_report(tmp_path):
+    assert list(ReportWriter.read_values(str(tmp_path / 'missing.csv'), 'page_id')) == []
@@ -0,0 +1,114 @@
+# coding=utf-8
+"""
+Tests of the inverted index of the documented groovy functions
+"""
+
+import pytest
+
+from utils.parser import GroovyDocParser
+from utils.search_index import FIELD_BITS
+from utils.search_index import FIELD_FILE
+from utils.search_index import FIELD_NAME
+from utils.search_index import SearchIndex
+from utils.search_index import SearchIndexBuilder
+from utils.search_index import tokenize
+
+FUNCTION_CONTENT = (
+    '/**\n'
+    ' * {description}\n'
+    ' * @param {parameter} (String) parameter of the function\n'
+    ' */\n'
+    'def {name}(String {parameter}) {{\n'
+    '    return {parameter}\n'
+    '}}\n'
+    '\n'
+)
+
+
+def write_groovy_file(file_path, functions):
+    """Writes a groovy file with the (name, parameter, description) functions"""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(''.join(
+        FUNCTION_CONTENT.format(name=name, parameter=parameter, description=description)
+        for name, parameter, description in functions))
+    return GroovyDocParser.parse_file(str(file_path))
+
+
+@pytest.fixture
+def builder(tmp_path):
+    search_index_builder = SearchIndexBuilder()
+    search_index_builder.add_file(write_groovy_file(tmp_path / 'src' / 'utils.groovy', [
+        ('deployApp', 'serverName', 'Deploys the application with its config.'),
+        ('readConfig', 'configFile', 'Reads the deployment configuration.'),
+    ]), '1', 'src/utils.groovy')
+    for step_name, description in (('build', 'Builds the project.'), ('publishReport', 'Publishes the report.')):
+        search_index_builder.add_file(write_groovy_file(
+            tmp_path / 'vars' / '{}.groovy'.format(step_name), [('call', 'name', description)]),
+            '2', 'vars/{}.groovy'.format(step_name))
+    return search_index_builder
+
+
+def test_tokenize():
+    assert tokenize('deployApp to the HTTPServer v2') == \
+        ['deployapp', 'deploy', 'app', 'httpserver', 'http', 'server', 'v2']
+    assert tokenize('read_config_file') == ['read', 'config', 'file']
+    assert tokenize(None) == []
+
+
+def test_postings_are_delta_encoded(builder):
+    index_data = builder.to_dict()
+
+    # first posting: doc index and field bits, then the deltas of the sorted postings
+    postings = index_data['terms']['build']
+    assert postings[0] == (2 << FIELD_BITS) | FIELD_NAME | FIELD_FILE
+    assert all(delta > 0 for terms in index_data['terms'].values() for delta in terms)
+    assert SearchIndex(index_data)._get_postings('server') == {0: 2}
+    assert SearchIndex(index_data)._get_postings('config') == {0: 4, 1: 3}
+
+
+def test_search_ranks_the_names_first(builder):
+    search_index = SearchIndex(builder.to_dict())
+
+    assert [(result.name, result.score) for result in search_index.search('config')] == \
+        [('readConfig', 13), ('deployApp', 1)]
+    assert [result.name for result in search_index.search('read config')] == ['readConfig']
+    assert search_index.search('unknown') == [] and search_index.search('the') == []
+
+
+def test_prefix_search(builder):
+    search_index = SearchIndex(builder.to_dict())
+
+    assert [result.name for result in search_index.search('depl')] == ['deployApp', 'readConfig']
+    assert search_index.search('depl', prefix=False) == []
+    # only the last word of the query is a prefix
+    assert search_index.search('depl app') == []
+
+
+def test_steps_are_found_by_their_name(builder):
+    search_index = SearchIndex(builder.to_dict())
+
+    results = search_index.search('publish')
+    assert [(result.name, result.file, result.page_id) for result in results] == \
+        [('publishReport', 'vars/publishReport.groovy', '2')]
+    assert search_index.search('call') == []
+
+
+@pytest.mark.parametrize('file_name', ['index.json', 'index.json.gz'])
+def test_written_index_is_deterministic(builder, tmp_path, file_name):
+    first_file = str(tmp_path / 'first')
+    second_file = str(tmp_path / 'second')
+    builder.write(first_file + file_name)
+    builder.write(second_file + file_name)
+
+    with open(first_file + file_name, 'rb') as first_obj, open(second_file + file_name, 'rb') as second_obj:
+        assert first_obj.read() == second_obj.read()
+    assert SearchIndex.load(first_file + file_name).search('build') == \
+        SearchIndex(builder.to_dict()).search('build')
+
+
+def test_unsupported_version_is_rejected(builder):
+    index_data = builder.to_dict()
+    index_data['version'] = 1
+
+    with pytest.raises(ValueError):
+        SearchIndex(index_data)
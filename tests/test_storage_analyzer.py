@@ -0,0 +1,71 @@
+# coding=utf-8
+"""
+Tests of the streaming extraction and analysis of storage bodies
+"""
+
+import json
+import logging
+
+import pytest
+
+from confluence.storage_analyzer import StorageBodyExtractor
+
+BODY = '<p>café \U0001F600 "quoted" ${groovy.title}</p>'
+
+
+def extract(raw_response, chunk_size=7):
+    # type: (bytes, int) -> str
+    extractor = StorageBodyExtractor()
+    text_chunks = []
+    for start in range(0, len(raw_response), chunk_size):
+        text_chunks.append(extractor.feed(raw_response[start:start + chunk_size]))
+        if extractor.finished:
+            break
+    text_chunks.append(extractor.close())
+    return ''.join(text_chunks)
+
+
+@pytest.mark.parametrize('json_options', [
+    {'separators': (',', ':')},
+    {'indent': 2},
+    {'indent': 2, 'ensure_ascii': False},
+])
+def test_storage_value_is_extracted(json_options):
+    response = {'id': '1', 'body': {'storage': {'value': BODY, 'representation': 'storage'}}}
+    assert extract(json.dumps(response, **json_options).encode('utf-8')) == BODY
+
+
+def test_storage_value_after_other_keys_is_parsed_as_json():
+    response = {'id': '1', 'body': {'storage': {'representation': 'storage', 'value': BODY}}}
+    assert extract(json.dumps(response).encode('utf-8')) == BODY
+
+
+def test_missing_storage_value_is_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger='confluence.storage_analyzer'):
+        assert extract(json.dumps({'id': '1', 'body': {}}).encode('utf-8')) == ''
+    assert 'Storage value not found' in caplog.text
+
+
+def test_iter_content_body(fake_server, api):
+    page_id = fake_server.create_page('Page', BODY)
+    assert ''.join(api.iter_content_body(page_id, chunk_size=16)) == BODY
+
+
+def test_fallback_buffer_is_capped(caplog):
+    response = {'padding': 'x' * 1000, 'body': {'storage': {'representation': 'storage', 'value': BODY}}}
+    extractor = StorageBodyExtractor(max_fallback_size=100)
+    raw_response = json.dumps(response).encode('utf-8')
+    with caplog.at_level(logging.WARNING, logger='confluence.storage_analyzer'):
+        for start in range(0, len(raw_response), 7):
+            extractor.feed(raw_response[start:start + 7])
+            assert len(extractor._pending) <= 107
+        assert extractor.close() == ''
+    assert 'not kept to be parsed as json' in caplog.text
+
+
+def test_storage_value_after_the_fallback_size_is_extracted():
+    response = {'padding': 'x' * 1000, 'body': {'storage': {'value': BODY, 'representation': 'storage'}}}
+    extractor = StorageBodyExtractor(max_fallback_size=100)
+    raw_response = json.dumps(response).encode('utf-8')
+    text_chunks = [extractor.feed(raw_response[start:start + 7]) for start in range(0, len(raw_response), 7)]
+    assert ''.join(text_chunks) + extractor.close() == BODY
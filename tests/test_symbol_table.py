@@ -0,0 +1,85 @@
+# coding=utf-8
+"""
+Tests of the symbol table of a library of Jenkins steps (vars/*.groovy)
+"""
+
+import pytest
+
+from benchmarks.throughput import TEMPLATE_CONTENT
+from utils.groovy_renderer import GroovyPageRenderer
+from utils.parser import GroovyDocParser
+from utils.symbol_table import SymbolTable
+
+STEP_CONTENT = (
+    '/**\n'
+    ' * {description}\n'
+    ' * @param name (String) name of the project\n'
+    ' */\n'
+    'def call(String name) {{\n'
+    '    return name\n'
+    '}}\n'
+    '\n'
+    '/**\n'
+    ' * Helper of the step.\n'
+    ' * @param name (String) name of the project\n'
+    ' */\n'
+    'def helper(String name) {{\n'
+    '    return name\n'
+    '}}\n'
+)
+
+
+@pytest.fixture
+def symbol_table(tmp_path):
+    vars_dir = tmp_path / 'vars'
+    vars_dir.mkdir()
+    table = SymbolTable()
+    for step_name, description in (('build', 'Builds the project.'), ('deploy', 'Runs build then deploys.')):
+        step_file = vars_dir / '{}.groovy'.format(step_name)
+        step_file.write_text(STEP_CONTENT.format(description=description))
+        table.add_file(GroovyDocParser.parse_file(str(step_file)), '1', 'vars/{}.groovy'.format(step_name))
+    return table
+
+
+def test_call_functions_are_named_by_their_step(symbol_table):
+    symbols = symbol_table.get_symbols()
+
+    assert [(symbol.name, symbol.file, symbol.anchor) for symbol in symbols] == [
+        ('build', 'vars/build.groovy', 'groovydoc-build'),
+        ('deploy', 'vars/deploy.groovy', 'groovydoc-deploy'),
+        ('helper', 'vars/build.groovy', 'groovydoc-build.helper'),
+        ('helper', 'vars/deploy.groovy', 'groovydoc-deploy.helper'),
+    ]
+    assert 'call' not in symbol_table and 'deploy' in symbol_table
+    # references to a duplicated name are linked to the first function
+    assert symbol_table.get('helper').file == 'vars/build.groovy'
+
+
+def test_steps_are_linked_and_indexed(symbol_table):
+    symbol_table.set_page_title('1', 'Steps')
+
+    assert symbol_table.link_references('Runs build then deploys.', '1', 'deploy') == \
+        'Runs <ac:link ac:anchor="groovydoc-build"><ac:plain-text-link-body><![CDATA[build]]>' \
+        '</ac:plain-text-link-body></ac:link> then deploys.'
+    index = symbol_table.render_index()
+    assert index.count('<code>vars/deploy.groovy</code>') == 2
+    assert 'ac:anchor="groovydoc-deploy.helper"' in index
+
+
+def test_step_is_rendered_with_its_name(symbol_table, tmp_path):
+    groovy_file_obj = GroovyDocParser.parse_file(str(tmp_path / 'vars' / 'deploy.groovy'))
+    rendered_functions = GroovyPageRenderer(TEMPLATE_CONTENT).render_functions(
+        groovy_file_obj.get_groovy_functions().values(), symbol_table, '1', 'vars/deploy.groovy')
+
+    assert '<ac:parameter ac:name="">groovydoc-deploy</ac:parameter></ac:structured-macro><h2>deploy</h2>' \
+        in rendered_functions
+    assert '<h2>helper</h2>' in rendered_functions and '<h2>call</h2>' not in rendered_functions
+    assert 'groovydoc-deploy.helper' in rendered_functions
+
+
+def test_moved_symbol_is_the_one_of_its_file(symbol_table):
+    signature = symbol_table.get_signature()
+    symbol_table.set_symbol_page('vars/deploy.groovy', 'helper', 'Steps - Part 2', '1')
+
+    assert [symbol.page_id for symbol in symbol_table.get_symbols()] == ['1', '1', '1', 'Steps - Part 2']
+    assert symbol_table.get_signature() != signature
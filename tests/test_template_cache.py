@@ -0,0 +1,73 @@
+# coding=utf-8
+"""
+Tests of the TemplateCache against the fake Confluence server
+"""
+
+import json
+import os
+
+from benchmarks.fake_confluence import FakeConfluenceServer
+from confluence.confluence_api import ConfluenceApi
+from confluence.template_cache import TemplateCache
+
+
+def test_unchanged_template_only_rewrites_metadata(fake_server, api, tmp_path):
+    page_id = fake_server.create_page('Template', '<p>template</p>')
+    cache_dir = str(tmp_path / 'templates')
+    assert TemplateCache(cache_dir).get_content(api, page_id) == '<p>template</p>'
+    host_dir = TemplateCache(cache_dir).get_host_dir(api.host_url)
+    content_file = os.path.join(host_dir, '{}.xml'.format(page_id))
+    content_inode = os.stat(content_file).st_ino
+
+    # new instance: entry is read from disk and revalidated
+    assert TemplateCache(cache_dir).get_content(api, page_id) == '<p>template</p>'
+    assert os.stat(content_file).st_ino == content_inode
+    with open(os.path.join(host_dir, '{}.json'.format(page_id)), 'r', encoding='utf-8') as file_obj:
+        assert 'content' not in json.load(file_obj)
+
+    page = fake_server.store.get(page_id)
+    fake_server.store.update(page_id, page['title'], '<p>changed</p>', page['version'] + 1)
+    assert TemplateCache(cache_dir).get_content(api, page_id) == '<p>changed</p>'
+    assert os.stat(content_file).st_ino != content_inode
+
+
+def test_offline_ttl_skips_revalidation(fake_server, api, tmp_path):
+    page_id = fake_server.create_page('Template', '<p>template</p>')
+    cache_dir = str(tmp_path / 'templates')
+    TemplateCache(cache_dir).get_content(api, page_id)
+
+    fake_server.reset_stats()
+    assert TemplateCache(cache_dir, offline_ttl=60).get_content(api, page_id) == '<p>template</p>'
+    assert fake_server.stats['requests'] == 0
+
+
+def test_legacy_entry_with_content_is_read(fake_server, api, tmp_path):
+    page_id = fake_server.create_page('Template', '<p>template</p>')
+    cache_dir = tmp_path / 'templates'
+    cache_dir.mkdir()
+    host_dir = cache_dir / os.path.basename(TemplateCache(str(cache_dir)).get_host_dir(api.host_url))
+    host_dir.mkdir()
+    (host_dir / '{}.json'.format(page_id)).write_text(json.dumps({
+        'page_id': page_id, 'title': 'Template', 'version': '1',
+        'content': '<p>cached</p>', 'validated_at': 0}), encoding='utf-8')
+
+    assert TemplateCache(str(cache_dir)).get_content(api, page_id) == '<p>cached</p>'
+    # revalidated legacy entry is split into metadata and content files
+    assert TemplateCache(str(cache_dir)).get_content(api, page_id) == '<p>cached</p>'
+    assert (host_dir / '{}.xml'.format(page_id)).read_text(encoding='utf-8') == '<p>cached</p>'
+
+
+def test_same_page_id_in_two_hosts(fake_server, api, tmp_path):
+    page_id = fake_server.create_page('Template', '<p>first host</p>')
+    template_cache = TemplateCache(str(tmp_path / 'templates'))
+    assert template_cache.get_content(api, page_id) == '<p>first host</p>'
+
+    with FakeConfluenceServer() as other_server, \
+            ConfluenceApi(other_server.url, 'user', 'password') as other_api:
+        # same id and version in the other host
+        assert other_server.create_page('Template', '<p>second host</p>') == page_id
+
+        assert template_cache.get_content(other_api, page_id) == '<p>second host</p>'
+        assert TemplateCache(str(tmp_path / 'templates')).get_content(other_api, page_id) == '<p>second host</p>'
+    assert template_cache.get_content(api, page_id) == '<p>first host</p>'
+    assert template_cache.get_host_dir(api.host_url) != template_cache.get_host_dir(other_api.host_url)
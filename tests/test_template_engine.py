@@ -0,0 +1,26 @@
+# coding=utf-8
+"""
+Tests of the one pass substitution of template variables
+"""
+
+from utils.template_engine import VariableSubstitution
+
+
+def test_substitute_reports_unmatched_variables():
+    substitution = VariableSubstitution({'$Name': 'Foo', '$Missing': 'Bar'})
+    assert substitution.substitute('<p>$Name</p>') == ('<p>Foo</p>', ['$Missing'])
+
+
+def test_prefix_variable_does_not_break_longer_one():
+    substitution = VariableSubstitution({'$Var': 'a', '$Var2': 'b'})
+    assert substitution.substitute('$Var $Var2')[0] == 'a b'
+
+
+def test_variables_inside_values_are_not_expanded():
+    substitution = VariableSubstitution({'$Title': 'Docs of $Project', '$Project': 'Foo'})
+    assert substitution.substitute('$Title / $Project')[0] == 'Docs of $Project / Foo'
+
+
+def test_values_are_converted_to_strings():
+    substitution = VariableSubstitution({'$Version': 3, '$Enabled': True})
+    assert substitution.substitute('v$Version $Enabled')[0] == 'v3 True'
@@ -0,0 +1,76 @@
+# coding=utf-8
+"""
+Stubs of the upstream modules that are not part of this repository
+(config file model and json data file).
+
+They are only installed by conftest.py when the upstream modules are not
+importable, so the tests of the modules that read config files always run.
+The stubs only implement what this repository uses.
+"""
+
+import json
+import sys
+import types
+
+# attributes of the config files (same names as the upstream json model)
+JSON_ATTRIBUTES = {
+    'JSON_ATTR_HOST_URL': 'host_url',
+    'JSON_ATTR_USER': 'user',
+    'JSON_ATTR_PASS': 'pass',
+    'JSON_ATTR_SOURCE': 'source',
+    'JSON_ATTR_SPACE_KEY': 'space_key',
+    'JSON_ATTR_PARENT_PAGE_ID': 'parent_page_id',
+    'JSON_ATTR_PAGE_TITLE': 'page_title',
+}
+
+
+class JsonDataFile(object):
+    """Stub of utilities.json_utils.JsonDataFile: json object of a file
+    """
+
+    def __init__(self, file_name):
+        # type: (str) -> None
+        self.file_name = file_name
+        with open(file_name, 'r', encoding='utf-8') as file_obj:
+            self.json_model_dict = json.load(file_obj)
+
+    def has_json_attribute(self, attribute):
+        # type: (str) -> bool
+        return attribute in self.json_model_dict
+
+    def get_value_from_json_ref(self, attribute):
+        # type: (str) -> object
+        return self.json_model_dict[attribute]
+
+
+def is_upstream_installed():
+    # type: () -> bool
+    """Returns True if the real upstream modules can be imported
+    """
+    try:
+        import confluence.models.json_model  # noqa: F401
+        import utilities.json_utils  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def install():
+    # type: () -> None
+    """Adds the stub modules to sys.modules
+    """
+    json_model = types.ModuleType('confluence.models.json_model')
+    for attribute, value in JSON_ATTRIBUTES.items():
+        setattr(json_model, attribute, value)
+    models = types.ModuleType('confluence.models')
+    models.json_model = json_model
+    json_utils = types.ModuleType('utilities.json_utils')
+    json_utils.JsonDataFile = JsonDataFile
+    utilities = types.ModuleType('utilities')
+    utilities.json_utils = json_utils
+    sys.modules.update({
+        'confluence.models': models,
+        'confluence.models.json_model': json_model,
+        'utilities': utilities,
+        'utilities.json_utils': json_utils,
+    })
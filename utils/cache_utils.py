@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with utilities to manage the local cache directory
+shared by the persistent caches of the application
+"""
+
+import os
+
+# environment variable to override the default cache directory
+ENV_CACHE_DIR = 'GROOVYDOC_CACHE_DIR'
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'auto-groovydoc-parser')
+
+
+def get_cache_dir(sub_dir=None):
+    # type: ([str]) -> str
+    """Returns the path of the local cache directory (it is created if needed).
+
+    The directory can be configured with the environment
+    variable 'GROOVYDOC_CACHE_DIR'.
+
+    :param sub_dir: (optional) name of a sub directory inside the cache
+    :return: path to the cache directory
+    """
+    cache_dir = os.environ.get(ENV_CACHE_DIR) or DEFAULT_CACHE_DIR
+    if sub_dir:
+        cache_dir = os.path.join(cache_dir, sub_dir)
+    cache_dir = os.path.normpath(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with utilities to read the changes of a local git repository
+(git plumbing only, no remote access)
+"""
+
+import collections
+import os
+import re
+import subprocess
+
+# changed lines of a file between two revisions
+# - old_lines / new_lines: list of (first line, last line) ranges (1-based, inclusive)
+#   in the base / head version of the file
+FileChanges = collections.namedtuple('FileChanges', ['path', 'old_lines', 'new_lines'])
+
+REGEX_HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+# escape sequences of the paths quoted by git (C style: "a/tab\there.groovy")
+REGEX_QUOTED_PATH_ESCAPE = re.compile(r'\\([0-7]{3}|.)')
+QUOTED_PATH_ESCAPES = {
+    'a': '\a',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'v': '\v'
+}
+
+
+class GitError(Exception):
+    """Raised when a git command fails"""
+
+
+def run_git(repo_dir, *git_args):
+    # type: (str, str) -> str
+    """Runs a git command in a repository and returns its output
+
+    :param repo_dir: directory inside the repository
+    :param git_args: arguments of the git command
+    :return: output of the command (utf-8)
+    :raises GitError: if git is not available or the command fails
+    """
+    try:
+        return subprocess.check_output(
+            ['git'] + list(git_args),
+            cwd=repo_dir,
+            stderr=subprocess.PIPE
+        ).decode('utf-8', 'replace')
+    except OSError as ex:
+        raise GitError("git could not be run: {}".format(ex))
+    except subprocess.CalledProcessError as ex:
+        raise GitError("git {} failed: {}".format(
+            ' '.join(git_args), ex.stderr.decode('utf-8', 'replace').strip()))
+
+
+def get_repo_root(path):
+    # type: (str) -> str
+    """Returns the root directory of the repository of a path
+
+    :param path: file or directory inside the repository
+    """
+    repo_dir = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+    return os.path.realpath(run_git(repo_dir, 'rev-parse', '--show-toplevel').strip())
+
+
+def parse_git_range(git_range):
+    # type: (str) -> (str, str)
+    """Returns the (base, head) revisions of a 'base..head' range
+    (head is HEAD if it is not given)
+    """
+    base, _, head = git_range.partition('..')
+    if not base:
+        raise ValueError("Invalid git range (expected base..head): '{}'".format(git_range))
+    return base, head or 'HEAD'
+
+
+def get_changed_files(repo_dir, base, head, paths=None):
+    # type: (str, str, str, [list[str]]) -> list[str]
+    """Returns the files changed between two revisions
+    (renames are reported as the old and the new path)
+
+    :param repo_dir: directory inside the repository
+    :param base: base revision
+    :param head: head revision
+    :param paths: (optional) only the changes of these paths (or pathspecs)
+    :return: paths relative to the repository root
+    """
+    output = run_git(repo_dir, 'diff', '--name-only', '--no-renames', '-z',
+                     base, head, '--', *(paths or []))
+    return [path for path in output.split('\0') if path]
+
+
+def _unquote_path(quoted_path):
+    # type: (str) -> str
+    """Returns a path quoted by git in C style (without the surrounding quotes).
+    Octal escapes are the bytes of the utf-8 path.
+    """
+    path_bytes = bytearray()
+    position = 0
+    for escape_match in REGEX_QUOTED_PATH_ESCAPE.finditer(quoted_path):
+        path_bytes += quoted_path[position:escape_match.start()].encode('utf-8')
+        escape = escape_match.group(1)
+        if len(escape) == 3:
+            path_bytes.append(int(escape, 8))
+        else:
+            path_bytes += QUOTED_PATH_ESCAPES.get(escape, escape).encode('utf-8')
+        position = escape_match.end()
+    path_bytes += quoted_path[position:].encode('utf-8')
+    return path_bytes.decode('utf-8', 'replace')
+
+
+def _parse_header_path(header_value, prefix):
+    # type: (str, str) -> str
+    """Returns the path of a '---' / '+++' file header of a diff
+    (None for /dev/null)
+
+    :param header_value: header line without the '--- ' / '+++ '
+    :param prefix: prefix of the paths of the header ('a/' or 'b/')
+    """
+    if header_value == '/dev/null':
+        return None
+    if header_value.startswith('"'):
+        # paths with special characters (ex. tabs, quotes) are quoted
+        header_value = _unquote_path(header_value.rstrip('\t')[1:-1])
+    elif header_value.endswith('\t'):
+        # paths with spaces are followed by a tab
+        header_value = header_value[:-1]
+    return header_value[len(prefix):] if header_value.startswith(prefix) else header_value
+
+
+def get_changed_lines(repo_dir, base, head, paths=None):
+    # type: (str, str, str, [list[str]]) -> dict[str, FileChanges]
+    """Returns the changed lines of the files changed between two revisions
+    (hunks of the diff without context lines)
+
+    Removed lines are only reported in the base version and added lines
+    only in the head version (a modified line is reported in both).
+
+    :param repo_dir: directory inside the repository
+    :param base: base revision
+    :param head: head revision
+    :param paths: (optional) only the changes of these paths (or pathspecs)
+    :return: dictionary {path relative to the repository root: FileChanges}
+    """
+    output = run_git(repo_dir, '-c', 'core.quotePath=false', 'diff', '-U0', '--no-renames',
+                     '--no-color', '--no-ext-diff', '--src-prefix=a/', '--dst-prefix=b/',
+                     base, head, '--', *(paths or []))
+    changes = collections.OrderedDict()
+    old_path = new_path = None
+    # file headers (---/+++) are only read before the first hunk of each file,
+    # so removed / added lines starting with '--' / '++' are not taken as headers
+    in_header = False
+    # (not splitlines: changed lines can contain other line boundaries, ex. form feeds)
+    for line in output.split('\n'):
+        if line.startswith('diff --git '):
+            old_path = new_path = None
+            in_header = True
+        elif in_header and line.startswith('--- '):
+            old_path = _parse_header_path(line[len('--- '):], 'a/')
+        elif in_header and line.startswith('+++ '):
+            new_path = _parse_header_path(line[len('+++ '):], 'b/')
+            path = new_path or old_path
+            changes[path] = FileChanges(path, [], [])
+        elif line.startswith('@@'):
+            in_header = False
+            hunk_match = REGEX_HUNK_HEADER.match(line)
+            if hunk_match is None or (new_path or old_path) not in changes:
+                continue
+            old_start, old_count, new_start, new_count = [
+                int(value) if value is not None else 1 for value in hunk_match.groups()]
+            file_changes = changes[new_path or old_path]
+            if old_count:
+                file_changes.old_lines.append((old_start, old_start + old_count - 1))
+            if new_count:
+                file_changes.new_lines.append((new_start, new_start + new_count - 1))
+    return changes
+
+
+def get_file_at_revision(repo_dir, revision, path):
+    # type: (str, str, str) -> str
+    """Returns the content of a file in a revision
+
+    :param repo_dir: directory inside the repository
+    :param revision: git revision
+    :param path: path relative to the repository root
+    """
+    return run_git(repo_dir, 'show', '{}:{}'.format(revision, path))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the GroovyPageRenderer class to render the parsed
+groovy functions into confluence storage format (XHTML) using
+the function section of a template page.
+"""
+
+import re
+import typing
+
+from confluence.storage_analyzer import GENERATED_END_MARKER
+from confluence.storage_analyzer import GENERATED_MARKER_PREFIX
+from confluence.storage_analyzer import get_generated_end_marker
+from confluence.storage_analyzer import get_generated_marker
+from utils.symbol_table import get_anchor_macro
+from utils.symbol_table import get_function_anchor
+from utils.symbol_table import get_symbol_name
+
+# placeholder of the target page replaced by the rendered functions
+TARGET_PLACEHOLDER = '${groovy.target}'
+
+# generated section of a target page: from the generated marker (any date)
+# to the end marker. The server may add attributes to the macros on save.
+REGEX_GENERATED_SECTION = re.compile(
+    r'<ac:structured-macro[^>]*ac:name="anchor"[^>]*>\s*'
+    r'<ac:parameter ac:name="">' + re.escape(GENERATED_MARKER_PREFIX) + r'\d+</ac:parameter>'
+    r'.*?'
+    r'<ac:parameter ac:name="">' + re.escape(GENERATED_END_MARKER) + r'</ac:parameter>\s*'
+    r'</ac:structured-macro>',
+    re.DOTALL)
+
+
+class GroovyPageRenderer(object):
+    """Renders groovy functions with the function block of a template.
+
+    The template page contains a function block between
+    ${groovy.function_block.open} and ${groovy.function_block.close}
+    that is rendered once per groovy function.
+    """
+
+    REGEX_FUNCTION_SECTION = re.compile(
+        r'\${groovy.function_block.open}(.*)\${groovy.function_block.close}')
+
+    def __init__(self, template_content):
+        # type: (str) -> None
+        """
+
+        :param template_content: storage format content of the template page
+        :raises ValueError: if the template has no function block
+        """
+        self.function_section = self.extract_function_section(template_content)
+
+    @classmethod
+    def extract_function_section(cls, template_content):
+        # type: (str) -> str
+        """Returns the function block of the template content
+
+        :param template_content: storage format content of the template page
+        :return: the template of one function
+        :raises ValueError: if the template has no function block
+        """
+        function_section_match = cls.REGEX_FUNCTION_SECTION.search(template_content)
+        if function_section_match is None:
+            raise ValueError("Template does not contain a function block "
+                             "(${groovy.function_block.open} ... ${groovy.function_block.close})")
+        return function_section_match.group(1)
+
+    @staticmethod
+    def render_parameters(function_obj):
+        # type: (GroovyFunction) -> str
+        """Returns the list of parameters of a function in storage format
+        """
+        function_parameter_section = '<ul>\n'
+        for parameter_obj in function_obj.parameters.values():
+            function_parameter_section += '<li>\n'
+            function_parameter_section += parameter_obj.confluence_format()
+            function_parameter_section += '</li>\n'
+        function_parameter_section += '</ul>\n'
+        return function_parameter_section
+
+    def render_function(self, function_obj, symbol_table=None, page_id=None, file_name=None):
+        # type: (GroovyFunction, [SymbolTable], [str], [str]) -> str
+        """Returns the function block rendered for one function.
+        The block starts with the anchor of the function (target of the links).
+
+        :param function_obj: GroovyFunction instance
+        :param symbol_table: (optional) SymbolTable. If set, the functions
+            referenced in the description are linked
+        :param page_id: (optional) id of the page in which the function is rendered
+        :param file_name: (optional) path of the groovy file of the function.
+            If set, the anchor is unique per file and the 'call' function
+            of a step file is titled with the step name.
+        :return: storage format of the function
+        """
+        function_name = get_symbol_name(function_obj.name, file_name)
+        format_line = None
+        if symbol_table is not None:
+            def format_line(line):
+                return symbol_table.link_references(line, page_id, function_name)
+        current_function_format = self.function_section.replace(
+            '${groovy.title}',
+            function_name
+        )
+        current_function_format = current_function_format.replace(
+            '${groovy.header}',
+            function_obj.header
+        )
+        current_function_format = current_function_format.replace(
+            '${groovy.description}',
+            function_obj.description_confluence_format(format_line)
+        )
+        current_function_format = current_function_format.replace(
+            '${groovy.parameters}',
+            self.render_parameters(function_obj)
+        )
+        current_function_format = current_function_format.replace(
+            '${groovy.returns}',
+            function_obj.returns
+        )
+        current_function_format = current_function_format.replace(
+            '${groovy.function_code}',
+            function_obj.code_definition
+        )
+        return get_anchor_macro(get_function_anchor(function_obj.name, file_name)) + current_function_format
+
+    def render_functions(self, groovy_functions, symbol_table=None, page_id=None, file_name=None):
+        # type: (typing.Iterable[GroovyFunction], [SymbolTable], [str], [str]) -> str
+        """Returns the function block rendered for all the functions
+        (without the generated marker)
+
+        :param groovy_functions: iterable of GroovyFunction instances
+        :param symbol_table: (optional) SymbolTable to link the referenced functions
+        :param page_id: (optional) id of the page in which the functions are rendered
+        :param file_name: (optional) path of the groovy file of the functions
+        :return: storage format of the functions
+        """
+        return ''.join(self.render_function(function_obj, symbol_table, page_id, file_name)
+                       for function_obj in groovy_functions)
+
+    @staticmethod
+    def render_generated_section(rendered_functions):
+        # type: (str) -> str
+        """Returns the generated section of already rendered functions.
+
+        The generated section starts with a marker with the generation date,
+        so audits can report sections that were not generated for a long time,
+        and ends with an end marker, so the next generation replaces it.
+
+        :param rendered_functions: storage format of the functions (see render_functions)
+        :return: storage format of the generated section
+        """
+        return get_generated_marker() + rendered_functions + get_generated_end_marker()
+
+    def render(self, groovy_functions):
+        # type: (typing.Iterable[GroovyFunction]) -> str
+        """Returns the content generated for all the functions
+        (generated marker + rendered functions)
+
+        :param groovy_functions: iterable of GroovyFunction instances
+        :return: storage format of the generated section
+        """
+        return self.render_generated_section(self.render_functions(groovy_functions))
+
+    @staticmethod
+    def render_target(target_content, generated_content):
+        # type: (str, str) -> str
+        """Returns the content of the target page with the generated section.
+
+        The generated section of a previous generation is replaced;
+        on the first generation, the ${groovy.target} placeholder.
+
+        :param target_content: storage format content of the target page
+        :param generated_content: generated section (see render)
+        :return: new content of the target page
+        :raises ValueError: if the target page has neither a generated section
+            nor the ${groovy.target} placeholder
+        """
+        target_content, replaced = REGEX_GENERATED_SECTION.subn(
+            lambda section_match: generated_content, target_content)
+        if replaced:
+            return target_content
+        if TARGET_PLACEHOLDER not in target_content:
+            raise ValueError("Target page contains neither a generated section nor the "
+                             "{} placeholder".format(TARGET_PLACEHOLDER))
+        return target_content.replace(TARGET_PLACEHOLDER, generated_content)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with utilities to compute content hashes
+(used to detect changes without comparing full contents)
+"""
+
+import hashlib
+
+# default size of the chunks read from files
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_sha256(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    # type: (str, [int]) -> str
+    """Returns the sha256 hex digest of a file.
+    The file is read in chunks, so it is never loaded fully into memory.
+
+    :param file_path: path to the file
+    :param chunk_size: (optional) size in bytes of each chunk read
+    :return: hex digest string
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_text_sha256(text):
+    # type: (str) -> str
+    """Returns the sha256 hex digest of a text (utf-8 encoded)
+
+    :param text: string to hash
+    :return: hex digest string
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the common logging setup of the scripts.
+
+Log records are put into a queue by the threads that log them and
+they are formatted and written (console / file) by a background thread,
+so logging I/O never blocks the publish pipeline.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+# logging levels accepted by the scripts
+LOG_LEVELS = {
+    'off': logging.NOTSET,
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL
+}
+
+# output formats of the log records
+LOG_FORMAT_TEXT = 'text'
+LOG_FORMAT_JSON = 'json'
+LOG_FORMATS = [LOG_FORMAT_TEXT, LOG_FORMAT_JSON]
+
+TEXT_FORMAT = '%(asctime)s :%(module)-20s: [%(levelname)s] -> %(message)s'
+TEXT_DATE_FORMAT = '%Y-%m-%d,%H:%M:%S'
+
+# listeners started by configure_logger (stopped at exit)
+_LISTENERS = []
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats the log records as one json object per line
+    """
+
+    def format(self, record):
+        # type: (logging.LogRecord) -> str
+        log_entry = {
+            'time': datetime.datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            log_entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(log_entry)
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler for a listener in the same process:
+    records are not copied (only their message is merged, so
+    arguments are not kept alive nor formatted twice).
+    """
+
+    def prepare(self, record):
+        # type: (logging.LogRecord) -> logging.LogRecord
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+def get_log_level(log_level):
+    # type: (str) -> int
+    """Returns the logging level of a level name
+
+    :param log_level: level name [ critical > error > warning > info > debug > off ]
+    :return: logging level
+    :raises ValueError: if the level name is not valid
+    """
+    if log_level not in LOG_LEVELS.keys():
+        raise ValueError("Logging level not valid: '{}'".format(log_level))
+    return LOG_LEVELS[log_level]
+
+
+def get_script_log_file(script_file):
+    # type: (str) -> str
+    """Returns the path of the log file of a script (inside 'logs'
+    directory next to the script). The directory is created if needed.
+
+    :param script_file: path of the script (__file__)
+    :return: path of the log file
+    """
+    scripts_log_dir = os.path.normpath(os.path.join(os.path.dirname(script_file), 'logs'))
+    if not os.path.exists(scripts_log_dir):
+        os.mkdir(scripts_log_dir)
+    log_file_basename = "{}.log".format(os.path.splitext(os.path.basename(script_file))[0])
+    return os.path.normpath(os.path.join(scripts_log_dir, log_file_basename))
+
+
+def configure_logger(global_logger, log_level, script_file=None, log_format=LOG_FORMAT_TEXT):
+    # type: (logging.Logger, str, [str], [str]) -> logging.handlers.QueueListener
+    """Configures the main logger object.
+
+    Only a queue handler is attached to the logger; the console
+    and file handlers are run by a background listener thread.
+    The logger level is the configured level, so disabled levels
+    are discarded before any record is created.
+
+    :param global_logger: main logger instance
+    :param log_level:
+        logging level [ critical > error > warning > info > debug > off ]
+    :param script_file: (optional) path of the script (__file__).
+        If set, records are also written into its log file
+    :param log_format: (optional) format of the records [ text | json ]
+    :return: the started QueueListener (stopped at exit)
+    """
+    log_level = get_log_level(log_level)
+    if log_format == LOG_FORMAT_JSON:
+        formatter = JsonFormatter()
+    elif log_format == LOG_FORMAT_TEXT:
+        formatter = logging.Formatter(TEXT_FORMAT, datefmt=TEXT_DATE_FORMAT)
+    else:
+        raise ValueError("Logging format not valid: '{}'".format(log_format))
+
+    # create console handler (and file handler for the script)
+    handlers = [logging.StreamHandler()]
+    if script_file is not None:
+        handlers.append(logging.FileHandler(get_script_log_file(script_file)))
+    for handler in handlers:
+        handler.setLevel(log_level)
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _LocalQueueHandler(log_queue)
+    queue_handler.setLevel(log_level)
+    global_logger.setLevel(log_level)
+    global_logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    if not _LISTENERS:
+        atexit.register(stop_loggers)
+    _LISTENERS.append(listener)
+    return listener
+
+
+def stop_loggers():
+    # type: () -> None
+    """Writes the pending log records and stops the listener threads
+    """
+    while _LISTENERS:
+        listener = _LISTENERS.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
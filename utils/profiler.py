@@ -0,0 +1,439 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the StageProfiler class to time the stages of the publish pipeline
+(and optionally to trace their memory with tracemalloc).
+
+The stage names are defined here once, so all the flows
+(groovydoc-parser.py, PageManager) report the same stages.
+"""
+
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    # peak RSS is not available on windows
+    import resource
+except ImportError:
+    resource = None
+
+# main logger instance
+LOGGER = logging.getLogger(__name__)
+
+# stages of the publish pipeline
+STAGE_PARSE = 'parse'                       # parse of the groovy source file
+STAGE_FETCH_TEMPLATE = 'fetch_template'     # retrieval of the template page
+STAGE_EXTRACT_TEMPLATE = 'extract_template' # extraction of the template sections
+STAGE_RENDER = 'render'                     # rendering of the page content
+STAGE_FETCH_TARGET = 'fetch_target'         # retrieval / resolution of the target page
+STAGE_PUBLISH = 'publish'                   # create / update of the target page
+
+PIPELINE_STAGES = (
+    STAGE_PARSE,
+    STAGE_FETCH_TEMPLATE,
+    STAGE_EXTRACT_TEMPLATE,
+    STAGE_RENDER,
+    STAGE_FETCH_TARGET,
+    STAGE_PUBLISH,
+)
+
+# accumulated timing of one stage
+# - calls: number of times the stage was run
+# - wall_time: elapsed seconds
+# - cpu_time: CPU seconds of the thread that ran the stage
+StageTiming = collections.namedtuple(
+    'StageTiming',
+    ['stage', 'calls', 'wall_time', 'cpu_time']
+)
+
+# memory traced for one stage (sizes in bytes)
+# - allocated: net size of the python memory allocated by the stage
+# - traced_peak: max python memory traced while the stage was run
+# - rss: max current RSS of the process at the end of the stage (None if not available)
+# - rss_delta: change of the current RSS during the stage (None if not available)
+# - top_allocators: lines that allocated the most memory during the stage
+#   (of the call with the highest traced peak)
+StageMemory = collections.namedtuple(
+    'StageMemory',
+    ['stage', 'calls', 'allocated', 'traced_peak', 'rss', 'rss_delta', 'top_allocators']
+)
+
+# memory allocated by one source line during a stage
+Allocator = collections.namedtuple(
+    'Allocator',
+    ['location', 'size', 'count']
+)
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a stage exceeds the memory budget of the profiler
+    """
+
+
+def get_peak_rss():
+    # type: () -> int
+    """Returns the peak resident set size of the process in bytes
+    since it started (None if it is not available in this platform)
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macOS reports bytes
+    if sys.platform != 'darwin':
+        peak_rss *= 1024
+    return peak_rss
+
+
+def get_current_rss():
+    # type: () -> int
+    """Returns the current resident set size of the process in bytes
+    (None if it is not available in this platform: only read on linux)
+    """
+    try:
+        with open('/proc/self/statm', 'r') as file_obj:
+            return int(file_obj.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def format_size(size):
+    # type: (int) -> str
+    """Returns a readable size. ex. 10.5 MiB
+    """
+    if size is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return '{:.1f} {}'.format(size, unit)
+        size /= 1024.0
+    return '{:.1f} GiB'.format(size)
+
+
+class StageProfiler(object):
+    """Measures wall and CPU time of the pipeline stages and optionally
+    profiles them with cProfile (one profile per stage, merged on dump).
+
+    Timings are accumulated per stage name (stages run many times or by
+    many threads are added up). A disabled profiler has no overhead.
+    """
+
+    # traces of the profiler, tracemalloc and the import system are not reported
+    MEMORY_TRACE_FILTERS = (
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    )
+
+    def __init__(self, enabled=True, use_cprofile=False, trace_memory=False,
+                 memory_budget=None, top_allocators=10):
+        # type: ([bool], [bool], [bool], [int], [int]) -> None
+        """
+
+        :param enabled: (optional) if not set, stages are not measured
+        :param use_cprofile: (optional) if set, stages are run under cProfile
+        :param trace_memory: (optional) if set, tracemalloc snapshots are taken
+            at the boundaries of each stage. Meant for single pipeline runs
+            (peaks of stages run at the same time by many threads overlap).
+        :param memory_budget: (optional) max memory in bytes. When a stage ends
+            above it, MemoryBudgetExceeded is raised. The peak RSS of the process
+            is checked (traced python memory if RSS is not available: only then
+            the budget alone starts tracemalloc).
+        :param top_allocators: (optional) number of top allocators kept per stage
+        """
+        self._enabled = enabled
+        self._use_cprofile = use_cprofile
+        self._trace_memory = enabled and trace_memory
+        self._memory_budget = memory_budget if enabled else None
+        budget_needs_trace = self._memory_budget is not None and get_peak_rss() is None
+        self._top_allocators = top_allocators
+        self._lock = threading.Lock()
+        self._timings = collections.OrderedDict()
+        self._profiles = collections.OrderedDict()
+        self._memory = collections.OrderedDict()
+        if (self._trace_memory or budget_needs_trace) and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @property
+    def enabled(self):
+        # type: () -> bool
+        return self._enabled
+
+    @contextlib.contextmanager
+    def stage(self, stage_name):
+        # type: (str) -> None
+        """Context manager that measures the code run inside of it
+        as the given stage.
+
+        :param stage_name: name of the stage (see PIPELINE_STAGES)
+        """
+        if not self._enabled:
+            yield
+            return
+        start_snapshot = None
+        start_rss = None
+        if self._trace_memory:
+            start_rss = get_current_rss()
+            start_snapshot = self._take_snapshot()
+            tracemalloc.reset_peak()
+        profile = self._start_cprofile()
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start_wall
+            cpu_time = time.thread_time() - start_cpu
+            if profile is not None:
+                profile.disable()
+            self._add_timing(stage_name, wall_time, cpu_time, profile)
+        if start_snapshot is not None:
+            self._add_memory(stage_name, start_snapshot, start_rss)
+        if self._memory_budget is not None:
+            self._check_memory_budget(stage_name)
+
+    def _take_snapshot(self):
+        # type: () -> tracemalloc.Snapshot
+        """Returns a tracemalloc snapshot without the traces of the profiler
+        """
+        return tracemalloc.take_snapshot().filter_traces(self.MEMORY_TRACE_FILTERS)
+
+    def _add_memory(self, stage_name, start_snapshot, start_rss):
+        # type: (str, tracemalloc.Snapshot, [int]) -> StageMemory
+        """Compares the memory at the end of a stage with its start snapshot
+        (and RSS) and accumulates the results of the stage.
+        """
+        _, traced_peak = tracemalloc.get_traced_memory()
+        rss = get_current_rss()
+        rss_delta = None if rss is None or start_rss is None else rss - start_rss
+        end_snapshot = self._take_snapshot()
+        statistics = end_snapshot.compare_to(start_snapshot, 'lineno')
+        allocated = sum(statistic.size_diff for statistic in statistics)
+        top_allocators = [
+            Allocator(
+                '{}:{}'.format(statistic.traceback[0].filename, statistic.traceback[0].lineno),
+                statistic.size_diff,
+                statistic.count_diff)
+            for statistic in statistics[:self._top_allocators]
+            if statistic.size_diff > 0
+        ]
+        with self._lock:
+            stage_memory = self._memory.get(stage_name)
+            if stage_memory is None or traced_peak > stage_memory.traced_peak:
+                stage_top_allocators = top_allocators
+            else:
+                stage_top_allocators = stage_memory.top_allocators
+            if stage_memory is not None:
+                allocated += stage_memory.allocated
+                traced_peak = max(traced_peak, stage_memory.traced_peak)
+                if stage_memory.rss is not None:
+                    rss = stage_memory.rss if rss is None else max(rss, stage_memory.rss)
+                if stage_memory.rss_delta is not None:
+                    rss_delta = stage_memory.rss_delta + (rss_delta or 0)
+            stage_memory = StageMemory(
+                stage_name,
+                1 if stage_memory is None else stage_memory.calls + 1,
+                allocated,
+                traced_peak,
+                rss,
+                rss_delta,
+                stage_top_allocators
+            )
+            self._memory[stage_name] = stage_memory
+        LOGGER.debug("Stage '%s' memory: traced peak %s, RSS %s (%s)",
+                     stage_name, format_size(traced_peak), format_size(rss), format_size(rss_delta))
+        return stage_memory
+
+    def _check_memory_budget(self, stage_name):
+        # type: (str) -> None
+        """Raises MemoryBudgetExceeded if the memory of the process is over
+        budget at the end of a stage
+        """
+        used_memory = get_peak_rss()
+        if used_memory is None:
+            _, used_memory = tracemalloc.get_traced_memory()
+        if used_memory > self._memory_budget:
+            raise MemoryBudgetExceeded(
+                "Stage '{stage}' exceeded the memory budget: {used} > {budget}".format(
+                    stage=stage_name,
+                    used=format_size(used_memory),
+                    budget=format_size(self._memory_budget)))
+
+    def _start_cprofile(self):
+        # type: () -> cProfile.Profile
+        """Returns a started cProfile instance (None if it is not used)
+        """
+        if not self._use_cprofile:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is already active (ex. nested stages)
+            return None
+        return profile
+
+    def _add_timing(self, stage_name, wall_time, cpu_time, profile):
+        # type: (str, float, float, [cProfile.Profile]) -> None
+        """Accumulates the measures of a finished stage
+        """
+        with self._lock:
+            timing = self._timings.get(stage_name)
+            if timing is None:
+                timing = StageTiming(stage_name, 0, 0.0, 0.0)
+            self._timings[stage_name] = StageTiming(
+                stage_name,
+                timing.calls + 1,
+                timing.wall_time + wall_time,
+                timing.cpu_time + cpu_time
+            )
+            if profile is not None:
+                self._profiles.setdefault(stage_name, []).append(profile)
+        LOGGER.debug("Stage '%s' finished in %.3fs (cpu %.3fs)", stage_name, wall_time, cpu_time)
+
+    def get_timings(self):
+        # type: () -> list[StageTiming]
+        """Returns the accumulated timings, pipeline stages first
+        """
+        with self._lock:
+            timings = dict(self._timings)
+        ordered_stages = [stage for stage in PIPELINE_STAGES if stage in timings]
+        ordered_stages += [stage for stage in timings if stage not in PIPELINE_STAGES]
+        return [timings[stage] for stage in ordered_stages]
+
+    def get_memory(self):
+        # type: () -> list[StageMemory]
+        """Returns the memory traced per stage, pipeline stages first
+        """
+        with self._lock:
+            memory = dict(self._memory)
+        ordered_stages = [stage for stage in PIPELINE_STAGES if stage in memory]
+        ordered_stages += [stage for stage in memory if stage not in PIPELINE_STAGES]
+        return [memory[stage] for stage in ordered_stages]
+
+    def get_report(self, top_functions=0):
+        # type: ([int]) -> str
+        """Returns a printable report with the timings of each stage
+
+        :param top_functions: (optional) number of functions with the highest
+            cumulative time shown per stage (when cProfile is used)
+        :return: report string
+        """
+        timings = self.get_timings()
+        total_wall_time = sum(timing.wall_time for timing in timings)
+        lines = ['{:<18} {:>6} {:>10} {:>10} {:>7}'.format(
+            'stage', 'calls', 'wall (s)', 'cpu (s)', 'wall %')]
+        for timing in timings:
+            lines.append('{:<18} {:>6} {:>10.4f} {:>10.4f} {:>6.1f}%'.format(
+                timing.stage,
+                timing.calls,
+                timing.wall_time,
+                timing.cpu_time,
+                100.0 * timing.wall_time / total_wall_time if total_wall_time else 0.0))
+        lines.append('{:<18} {:>6} {:>10.4f}'.format('total', '', total_wall_time))
+
+        memory = self.get_memory()
+        if memory:
+            lines.append('')
+            lines.append('{:<18} {:>12} {:>12} {:>12} {:>12}'.format(
+                'stage', 'allocated', 'traced peak', 'RSS', 'RSS delta'))
+            for stage_memory in memory:
+                lines.append('{:<18} {:>12} {:>12} {:>12} {:>12}'.format(
+                    stage_memory.stage,
+                    format_size(stage_memory.allocated),
+                    format_size(stage_memory.traced_peak),
+                    format_size(stage_memory.rss),
+                    format_size(stage_memory.rss_delta)))
+            lines.append('{:<18} {:>12}'.format('peak RSS', format_size(get_peak_rss())))
+            for stage_memory in memory:
+                if not stage_memory.top_allocators:
+                    continue
+                lines.append('')
+                lines.append('[{}] top allocators'.format(stage_memory.stage))
+                for allocator in stage_memory.top_allocators:
+                    lines.append('  {:>12} {:>8} blocks  {}'.format(
+                        format_size(allocator.size), allocator.count, allocator.location))
+
+        if top_functions:
+            for timing in timings:
+                stats = self._get_stage_stats(timing.stage)
+                if stats is None:
+                    continue
+                stream = io.StringIO()
+                stats.stream = stream
+                stats.sort_stats('cumulative').print_stats(top_functions)
+                lines.append('')
+                lines.append('[{}]'.format(timing.stage))
+                lines.append(stream.getvalue().rstrip())
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns the timings of each stage
+        """
+        return {
+            'stages': [dict(timing._asdict()) for timing in self.get_timings()],
+            'memory': [
+                dict(stage_memory._asdict(), top_allocators=[
+                    dict(allocator._asdict()) for allocator in stage_memory.top_allocators])
+                for stage_memory in self.get_memory()
+            ],
+            'peak_rss': get_peak_rss(),
+            'memory_budget': self._memory_budget
+        }
+
+    def write_report(self, report_file):
+        # type: (str) -> None
+        """Writes the timings of each stage into a json file
+
+        :param report_file: path of the json file
+        """
+        with open(report_file, 'w') as file_obj:
+            json.dump(self.to_dict(), file_obj, indent=2)
+
+    def dump_stats(self, stats_file):
+        # type: (str) -> bool
+        """Writes the cProfile stats of all the stages merged
+        into one file (readable with pstats / snakeviz).
+
+        :param stats_file: path of the .pstats file
+        :return: False if there are no cProfile stats to write
+        """
+        merged_stats = None
+        for stage_name in list(self._profiles.keys()):
+            stats = self._get_stage_stats(stage_name)
+            if merged_stats is None:
+                merged_stats = stats
+            else:
+                merged_stats.add(stats)
+        if merged_stats is None:
+            return False
+        merged_stats.dump_stats(stats_file)
+        return True
+
+    def _get_stage_stats(self, stage_name):
+        # type: (str) -> pstats.Stats
+        """Returns the merged cProfile stats of one stage (None if not profiled)
+        """
+        with self._lock:
+            profiles = list(self._profiles.get(stage_name, []))
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+# profiler used when profiling is not configured
+NULL_PROFILER = StageProfiler(enabled=False)
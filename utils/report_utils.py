@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with report writers that stream records (dictionaries)
+into JSONL or CSV files, one record at a time
+"""
+
+import csv
+import json
+import os
+import typing
+
+
+class ReportWriter(object):
+    """Base class for the report writers.
+    Records are flushed after each write, so an interrupted run
+    keeps all the records written until then.
+    """
+
+    def __init__(self, report_file, fields, append=False):
+        # type: (str, list[str], [bool]) -> None
+        """
+
+        :param report_file: path of the report file
+        :param fields: names of the fields of each record (in order)
+        :param append: (optional) if set, records are added to an existing report
+        """
+        self._report_file = report_file
+        self._fields = list(fields)
+        self._is_new_file = not (append and os.path.exists(report_file)
+                                 and os.path.getsize(report_file) > 0)
+        self._file_obj = open(report_file, 'w' if self._is_new_file else 'a',
+                              newline='', encoding='utf-8')
+        self.records_written = 0
+
+    @staticmethod
+    def create(report_file, fields, report_format=None, append=False):
+        # type: (str, list[str], [str], [bool]) -> ReportWriter
+        """Returns the report writer for the given format.
+
+        :param report_file: path of the report file
+        :param fields: names of the fields of each record (in order)
+        :param report_format: (optional) 'jsonl' or 'csv'.
+            if None, the format is taken from the file extension.
+        :param append: (optional) if set, records are added to an existing report
+        """
+        report_format = ReportWriter.get_report_format(report_file, report_format)
+        if report_format == 'csv':
+            return CsvReportWriter(report_file, fields, append)
+        if report_format in ('jsonl', 'json'):
+            return JsonlReportWriter(report_file, fields, append)
+        raise ValueError("Report format not valid: '{}'".format(report_format))
+
+    @staticmethod
+    def get_report_format(report_file, report_format=None):
+        # type: (str, [str]) -> str
+        """Returns the format of a report: the given one, or the
+        file extension if it is None
+        """
+        if report_format is None:
+            report_format = os.path.splitext(report_file)[1].lstrip('.').lower()
+        return report_format
+
+    @staticmethod
+    def _iter_json_records(file_obj):
+        # type: (typing.TextIO) -> typing.Iterable[dict]
+        """Yields the records of a jsonl report
+        """
+        for line in file_obj:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # last line could be incomplete after an interruption
+                continue
+
+    @staticmethod
+    def read_values(report_file, field, report_format=None, skip_field=None):
+        # type: (str, str, [str], [str]) -> typing.Iterable[str]
+        """Yields the values of one field of all the records of an existing
+        report (jsonl or csv), while the file is read. Nothing if it does not exist.
+        Records without a value in the field are ignored.
+
+        :param report_file: path of the report file
+        :param field: name of the field
+        :param report_format: (optional) 'jsonl' or 'csv'.
+            if None, the format is taken from the file extension.
+        :param skip_field: (optional) records with a value in this field
+            are ignored (ex. 'error')
+        :return: generator of values (a value is repeated if several records have it)
+        """
+        if not os.path.exists(report_file):
+            return
+        with open(report_file, 'r', newline='', encoding='utf-8') as file_obj:
+            if ReportWriter.get_report_format(report_file, report_format) == 'csv':
+                records = csv.DictReader(file_obj)
+            else:
+                records = ReportWriter._iter_json_records(file_obj)
+            for record in records:
+                # empty csv values are read as ''
+                if skip_field is None or not record.get(skip_field):
+                    value = record.get(field)
+                    if value is not None:
+                        yield value
+
+    def write(self, record):
+        # type: (dict) -> None
+        """Writes one record into the report
+
+        :param record: dictionary with the fields of the record
+        """
+        raise NotImplementedError("abstract method not implemented in child!")
+
+    def close(self):
+        # type: () -> None
+        """Closes the report file
+        """
+        self._file_obj.close()
+
+    def __enter__(self):
+        # type: () -> ReportWriter
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class JsonlReportWriter(ReportWriter):
+    """Writes one json object per line
+    """
+
+    def write(self, record):
+        # type: (dict) -> None
+        """Writes one record into the report
+        """
+        ordered_record = dict((field, record.get(field)) for field in self._fields)
+        self._file_obj.write(json.dumps(ordered_record) + '\n')
+        self._file_obj.flush()
+        self.records_written += 1
+
+
+class CsvReportWriter(ReportWriter):
+    """Writes one CSV row per record (header is written on new files)
+    """
+
+    def __init__(self, report_file, fields, append=False):
+        # type: (str, list[str], [bool]) -> None
+        super(CsvReportWriter, self).__init__(report_file, fields, append)
+        self._csv_writer = csv.DictWriter(self._file_obj, fieldnames=self._fields,
+                                          extrasaction='ignore')
+        if self._is_new_file:
+            self._csv_writer.writeheader()
+
+    def write(self, record):
+        # type: (dict) -> None
+        """Writes one record into the report
+        """
+        self._csv_writer.writerow(record)
+        self._file_obj.flush()
+        self.records_written += 1
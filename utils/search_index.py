@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a compact inverted index of the documented groovy functions,
+to search the generated documentation locally (offline).
+
+The index is exported as json (gzip compressed if the file name ends
+with '.gz'), small enough to be attached to a page or served statically:
+- docs: one [name, file, header, page id] entry per function
+  (the name of the 'call' function of a Jenkins step is the step name)
+- terms: {term: postings}. Postings are sorted integers
+  (doc index * 16 + field bits), delta encoded.
+
+The export is deterministic (same functions, same bytes), so an
+unchanged index is not uploaded again (see ConfluenceApi.upload_attachment).
+"""
+
+import bisect
+import collections
+import gzip
+import json
+import re
+
+from utils.symbol_table import get_file_base_name
+from utils.symbol_table import get_symbol_name
+
+# version of the exported format
+INDEX_FORMAT_VERSION = 2
+
+# fields of the functions in which a term is found (bits of the postings)
+FIELD_NAME = 1
+FIELD_PARAMETER = 2
+FIELD_DESCRIPTION = 4
+FIELD_FILE = 8
+
+# score of a term found in each field
+FIELD_WEIGHTS = {
+    FIELD_NAME: 10,
+    FIELD_FILE: 5,
+    FIELD_PARAMETER: 3,
+    FIELD_DESCRIPTION: 1
+}
+
+FIELD_BITS = 4
+
+# words that are not indexed
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'if', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with'
+])
+
+REGEX_WORD = re.compile(r'[A-Za-z0-9]+')
+REGEX_WORD_PARTS = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+# result of a search
+SearchResult = collections.namedtuple(
+    'SearchResult',
+    ['name', 'file', 'header', 'page_id', 'score']
+)
+
+
+def tokenize(text):
+    # type: (str) -> list[str]
+    """Returns the terms of a text: lowercase words and the parts of
+    camelCase / snake_case words (ex. 'deployApp' -> deployapp, deploy, app)
+    """
+    terms = []
+    for word in REGEX_WORD.findall(text or ''):
+        word_lower = word.lower()
+        if word_lower not in STOP_WORDS:
+            terms.append(word_lower)
+        word_parts = REGEX_WORD_PARTS.findall(word)
+        if len(word_parts) > 1:
+            terms.extend(part.lower() for part in word_parts
+                         if len(part) > 1 and part.lower() not in STOP_WORDS)
+    return terms
+
+
+class SearchIndexBuilder(object):
+    """Builds the inverted index of the functions of parsed groovy files
+    """
+
+    def __init__(self):
+        self._docs = []
+        self._postings = collections.defaultdict(dict)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add_file(self, groovy_file_obj, page_id=None, file_name=None):
+        # type: (GroovyFile, [str], [str]) -> None
+        """Adds the functions of a parsed groovy file
+
+        :param groovy_file_obj: parsed GroovyFile
+        :param page_id: (optional) id of the target page of the file
+        :param file_name: (optional) name of the file stored in the index
+            (path of the parsed file by default)
+        """
+        file_name = file_name or groovy_file_obj.groovy_file
+        for function_obj in groovy_file_obj.get_groovy_functions().values():
+            doc_index = len(self._docs)
+            self._docs.append([
+                get_symbol_name(function_obj.name, file_name),
+                file_name,
+                function_obj.header,
+                None if page_id is None else str(page_id)
+            ])
+            fields = (
+                (FIELD_NAME, get_symbol_name(function_obj.name, file_name)),
+                (FIELD_FILE, get_file_base_name(file_name)),
+                (FIELD_PARAMETER, ' '.join(function_obj.parameters.keys())),
+                (FIELD_DESCRIPTION, function_obj.description)
+            )
+            for field, text in fields:
+                for term in tokenize(text):
+                    doc_fields = self._postings[term]
+                    doc_fields[doc_index] = doc_fields.get(doc_index, 0) | field
+
+    def to_dict(self):
+        # type: () -> dict
+        """Returns the index as a json serializable dictionary
+        """
+        terms = collections.OrderedDict()
+        for term in sorted(self._postings):
+            postings = []
+            previous = 0
+            for doc_index, fields in sorted(self._postings[term].items()):
+                posting = (doc_index << FIELD_BITS) | fields
+                postings.append(posting - previous)
+                previous = posting
+            terms[term] = postings
+        return collections.OrderedDict([
+            ('version', INDEX_FORMAT_VERSION),
+            ('docs', self._docs),
+            ('terms', terms)
+        ])
+
+    def write(self, index_file):
+        # type: (str) -> None
+        """Writes the index into a json file (gzip compressed if its name ends with '.gz')
+        """
+        data = json.dumps(self.to_dict(), separators=(',', ':')).encode('utf-8')
+        if index_file.endswith('.gz'):
+            # mtime 0: same functions, same bytes
+            data = gzip.compress(data, mtime=0)
+        with open(index_file, 'wb') as file_obj:
+            file_obj.write(data)
+
+
+class SearchIndex(object):
+    """Query helper of an exported index
+    """
+
+    def __init__(self, index_data):
+        # type: (dict) -> None
+        """
+
+        :param index_data: exported index (see SearchIndexBuilder.to_dict)
+        """
+        if index_data.get('version') != INDEX_FORMAT_VERSION:
+            raise ValueError("Unsupported search index version: '{}'".format(
+                index_data.get('version')))
+        self._docs = index_data['docs']
+        self._terms = index_data['terms']
+        self._sorted_terms = sorted(self._terms)
+
+    @classmethod
+    def load(cls, index_file):
+        # type: (str) -> SearchIndex
+        """Loads an exported index file (gzip compressed if its name ends with '.gz')
+        """
+        open_function = gzip.open if index_file.endswith('.gz') else open
+        with open_function(index_file, 'rt', encoding='utf-8') as file_obj:
+            return cls(json.load(file_obj))
+
+    def _get_postings(self, term):
+        # type: (str) -> dict
+        """Returns {doc index: field bits} of a term
+        """
+        postings = {}
+        posting = 0
+        for delta in self._terms.get(term, ()):
+            posting += delta
+            postings[posting >> FIELD_BITS] = posting & ((1 << FIELD_BITS) - 1)
+        return postings
+
+    def _get_prefix_terms(self, prefix):
+        # type: (str) -> list[str]
+        """Returns the indexed terms that start with a prefix
+        """
+        first = bisect.bisect_left(self._sorted_terms, prefix)
+        last = bisect.bisect_left(self._sorted_terms, prefix + '\uffff')
+        return self._sorted_terms[first:last]
+
+    def search(self, query, limit=10, prefix=True):
+        # type: (str, [int], [bool]) -> list[SearchResult]
+        """Returns the functions that match all the terms of the query,
+        sorted by score (term found in the name > file name > parameters > description)
+
+        :param query: words to search
+        :param limit: (optional) max number of results
+        :param prefix: (optional) if set, the last word of the query
+            also matches the terms that start with it
+        """
+        query_terms = [term for term in tokenize(query) if term]
+        if not query_terms:
+            return []
+        scores = None
+        for term_index, term in enumerate(query_terms):
+            matching_terms = [term]
+            if prefix and term_index == len(query_terms) - 1:
+                matching_terms = self._get_prefix_terms(term) or [term]
+            term_scores = collections.Counter()
+            for matching_term in matching_terms:
+                for doc_index, fields in self._get_postings(matching_term).items():
+                    score = sum(weight for field, weight in FIELD_WEIGHTS.items() if fields & field)
+                    term_scores[doc_index] = max(term_scores[doc_index], score)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = collections.Counter(dict(
+                    (doc_index, score + term_scores[doc_index])
+                    for doc_index, score in scores.items() if doc_index in term_scores))
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._docs[item[0]][0]))
+        return [SearchResult(*(self._docs[doc_index] + [score]))
+                for doc_index, score in ranked[:limit]]
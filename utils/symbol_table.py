@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with the cross-reference symbol table of the documented groovy
+functions of a library.
+
+The table is built from the already parsed GroovyFile instances (no
+extra parsing). It is used to link the functions referenced in the
+descriptions and to render an A-Z index page of the whole library.
+
+Functions are keyed by file and name: the steps of a Jenkins library
+(vars/<step>.groovy) all define a 'call' function, they are referenced
+by their step name (the file name).
+"""
+
+import collections
+import html
+import os
+import re
+
+from utils.hash_utils import get_text_sha256
+
+# prefix of the anchors of the rendered functions
+FUNCTION_ANCHOR_PREFIX = 'groovydoc-'
+
+# prefix of the anchors of the letters of the index page
+INDEX_ANCHOR_PREFIX = 'groovydoc-index-'
+
+# letter of the index of the names that do not start with a letter
+INDEX_OTHER_LETTER = '#'
+
+# function of the Jenkins steps (vars/<step>.groovy), called by the step name
+STEP_FUNCTION_NAME = 'call'
+
+# documented function of the library
+# - name: name by which the function is referenced (step name for 'call')
+# - file: path of the groovy file
+# - parameters: names of the parameters
+# - page_id / page_title: target page in which the function is rendered
+#   (page_title is None until it is known)
+Symbol = collections.namedtuple(
+    'Symbol',
+    ['name', 'file', 'parameters', 'header', 'page_id', 'page_title', 'anchor']
+)
+
+
+def get_file_base_name(file_name):
+    # type: (str) -> str
+    """Returns the name of a groovy file without directory and extension
+    """
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def get_symbol_name(function_name, file_name=None):
+    # type: (str, [str]) -> str
+    """Returns the name by which a function is referenced:
+    the step name (file name) for the 'call' function of a step file
+
+    :param function_name: name of the function
+    :param file_name: (optional) path of the groovy file of the function
+    """
+    if function_name == STEP_FUNCTION_NAME and file_name:
+        return get_file_base_name(file_name)
+    return function_name
+
+
+def get_function_anchor(function_name, file_name=None):
+    # type: (str, [str]) -> str
+    """Returns the anchor name of a rendered function. With the file, it is
+    unique in a page of several files: 'groovydoc-<file>.<function>'
+    ('groovydoc-<step>' for the 'call' function of a step file)
+
+    :param function_name: name of the function
+    :param file_name: (optional) path of the groovy file of the function
+    """
+    if not file_name:
+        return '{}{}'.format(FUNCTION_ANCHOR_PREFIX, function_name)
+    if function_name == STEP_FUNCTION_NAME:
+        return '{}{}'.format(FUNCTION_ANCHOR_PREFIX, get_file_base_name(file_name))
+    return '{}{}.{}'.format(FUNCTION_ANCHOR_PREFIX, get_file_base_name(file_name), function_name)
+
+
+def get_anchor_macro(anchor):
+    # type: (str) -> str
+    """Returns the storage format of an (invisible) anchor macro
+    """
+    return '<ac:structured-macro ac:name="anchor">' \
+           '<ac:parameter ac:name="">{}</ac:parameter>' \
+           '</ac:structured-macro>'.format(anchor)
+
+
+def get_anchor_link(anchor, text, page_title=None):
+    # type: (str, str, [str]) -> str
+    """Returns the storage format of a link to an anchor
+
+    :param anchor: anchor name
+    :param text: text of the link
+    :param page_title: (optional) title of the page of the anchor (current page if None)
+    """
+    page_resource = ''
+    if page_title is not None:
+        page_resource = '<ri:page ri:content-title="{}"/>'.format(html.escape(page_title))
+    return '<ac:link ac:anchor="{anchor}">{page}' \
+           '<ac:plain-text-link-body><![CDATA[{text}]]></ac:plain-text-link-body>' \
+           '</ac:link>'.format(anchor=anchor, page=page_resource, text=text)
+
+
+class SymbolTable(object):
+    """Symbols of the documented functions of a library (by file and function name)
+    """
+
+    def __init__(self):
+        self._symbols = collections.OrderedDict()
+        # key of the symbol linked by each name (the first one added with that name)
+        self._names = {}
+        self._page_titles = {}
+        self._regex_references = None
+        self._signature = None
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def add_file(self, groovy_file_obj, page_id=None, file_name=None):
+        # type: (GroovyFile, [str], [str]) -> None
+        """Adds the functions of a parsed groovy file. Functions with the name
+        of a function of another file are added too, but the references
+        to that name are linked to the function added first.
+
+        :param groovy_file_obj: parsed GroovyFile
+        :param page_id: (optional) id of the target page of the file
+        :param file_name: (optional) name of the file shown in the index
+            (path of the parsed file by default)
+        """
+        page_id = None if page_id is None else str(page_id)
+        file_name = file_name or groovy_file_obj.groovy_file
+        for function_obj in groovy_file_obj.get_groovy_functions().values():
+            symbol_key = (file_name, function_obj.name)
+            if symbol_key in self._symbols:
+                continue
+            symbol_name = get_symbol_name(function_obj.name, file_name)
+            self._symbols[symbol_key] = Symbol(
+                symbol_name,
+                file_name,
+                list(function_obj.parameters.keys()),
+                function_obj.header,
+                page_id,
+                None,
+                get_function_anchor(function_obj.name, file_name)
+            )
+            self._names.setdefault(symbol_name, symbol_key)
+        self._regex_references = None
+        self._signature = None
+
+    def set_page_title(self, page_id, page_title):
+        # type: (str, str) -> None
+        """Sets the title of a target page (used by the links from other pages)
+        """
+        self._page_titles[str(page_id)] = page_title
+        self._signature = None
+
+    def set_symbol_page(self, file_name, function_name, page_id, previous_page_id=None):
+        # type: (str, str, str, [str]) -> None
+        """Moves a symbol to another page (ex. a shard of its target page)
+
+        :param file_name: name of the file of the function (as it was added)
+        :param function_name: name of the function
+        :param page_id: id (or title) of the new page of the function
+        :param previous_page_id: (optional) only moved if it is in this page
+        """
+        symbol = self._symbols.get((file_name, function_name))
+        if symbol is None or (previous_page_id is not None and symbol.page_id != str(previous_page_id)):
+            return
+        self._symbols[(file_name, function_name)] = symbol._replace(page_id=str(page_id))
+        self._signature = None
+
+    def get_page_ids(self):
+        # type: () -> list[str]
+        """Returns the ids of the target pages of the symbols
+        """
+        return sorted(set(symbol.page_id for symbol in self._symbols.values()
+                          if symbol.page_id is not None))
+
+    def _with_page_title(self, symbol):
+        # type: (Symbol) -> Symbol
+        """Returns the symbol with the title of its page (if it is known)
+        """
+        if symbol is None or symbol.page_id not in self._page_titles:
+            return symbol
+        return symbol._replace(page_title=self._page_titles[symbol.page_id])
+
+    def get(self, name):
+        # type: (str) -> Symbol
+        """Returns the symbol linked by a name (None if it is unknown)
+
+        :param name: function name (step name for the 'call' function of a step)
+        """
+        symbol_key = self._names.get(name)
+        return None if symbol_key is None else self._with_page_title(self._symbols[symbol_key])
+
+    def get_symbols(self):
+        # type: () -> list[Symbol]
+        """Returns all the symbols sorted by name (case insensitive) and file
+        """
+        return sorted((self._with_page_title(symbol) for symbol in self._symbols.values()),
+                      key=lambda symbol: (symbol.name.lower(), symbol.name, symbol.file))
+
+    def get_signature(self):
+        # type: () -> str
+        """Returns a hash of the names and pages of the symbols
+        (rendered links only change when it changes)
+        """
+        if self._signature is None:
+            self._signature = get_text_sha256('\n'.join(
+                '{} {} {} {}'.format(symbol.name, symbol.anchor, symbol.page_id, symbol.page_title)
+                for symbol in self.get_symbols()))
+        return self._signature
+
+    def link_references(self, text, page_id=None, current_function=None):
+        # type: (str, [str], [str]) -> str
+        """Returns the text with the names of the known functions replaced by links.
+
+        References to functions of the same page are linked to their anchor;
+        references to other pages only if the title of the page is known.
+
+        :param text: text (description line) in which the references are searched
+        :param page_id: (optional) id of the page in which the text is rendered
+        :param current_function: (optional) name of the function of the text (not linked)
+        """
+        if not self._symbols:
+            return text
+        if self._regex_references is None:
+            names = sorted(self._names, key=len, reverse=True)
+            self._regex_references = re.compile(
+                r'\b({})\b'.format('|'.join(re.escape(name) for name in names)))
+        page_id = None if page_id is None else str(page_id)
+
+        def replace_reference(reference_match):
+            symbol = self.get(reference_match.group(1))
+            if symbol.name == current_function:
+                return symbol.name
+            if symbol.page_id is None or symbol.page_id == page_id:
+                return get_anchor_link(symbol.anchor, symbol.name)
+            if symbol.page_title is not None:
+                return get_anchor_link(symbol.anchor, symbol.name, symbol.page_title)
+            return symbol.name
+        return self._regex_references.sub(replace_reference, text)
+
+    def render_index(self):
+        # type: () -> str
+        """Returns the A-Z index of the symbols in storage format:
+        links to the letters, then one table per letter with the links
+        to the functions, their header, parameters and file.
+        """
+        letters = collections.OrderedDict()
+        for symbol in self.get_symbols():
+            letter = symbol.name[:1].upper()
+            if not letter.isalpha():
+                letter = INDEX_OTHER_LETTER
+            letters.setdefault(letter, []).append(symbol)
+
+        index_content = ['<p>{}</p>'.format(' | '.join(
+            get_anchor_link('{}{}'.format(INDEX_ANCHOR_PREFIX, letter), letter)
+            for letter in letters))]
+        for letter, symbols in letters.items():
+            index_content.append('<h2>{}{}</h2>'.format(
+                get_anchor_macro('{}{}'.format(INDEX_ANCHOR_PREFIX, letter)), html.escape(letter)))
+            index_content.append('<table><tbody><tr><th>Function</th><th>Description</th>'
+                                 '<th>Parameters</th><th>File</th></tr>')
+            for symbol in symbols:
+                if symbol.page_title is not None:
+                    function_link = get_anchor_link(symbol.anchor, symbol.name, symbol.page_title)
+                else:
+                    function_link = html.escape(symbol.name)
+                index_content.append(
+                    '<tr><td>{link}</td><td>{header}</td><td>{parameters}</td>'
+                    '<td><code>{file}</code></td></tr>'.format(
+                        link=function_link,
+                        header=html.escape(symbol.header or ''),
+                        parameters=html.escape(', '.join(symbol.parameters)),
+                        file=html.escape(symbol.file or '')))
+            index_content.append('</tbody></table>')
+        return ''.join(index_content)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Module with a one pass substitution engine for template variables
+"""
+
+import re
+
+
+class VariableSubstitution(object):
+    """Replaces a set of variables in a template in a single pass.
+
+    All the variable names are combined into one regex pattern
+    (compiled once), so the template is scanned only once whatever
+    the number of variables is. Longer names are tried first, so
+    a variable that is a prefix of another one ($Var / $Var2)
+    does not break the longer one.
+
+    Differences with the former sequential str.replace of each variable:
+    - values are inserted as they are: a variable name inside a value
+      ($A = 'x $B') is not replaced (it was, if $B came after $A).
+    - values that are not strings (ex. numbers of the json config)
+      are converted with str() (str.replace raised TypeError).
+    """
+
+    def __init__(self, variables):
+        # type: (dict) -> None
+        """
+
+        :param variables: dictionary with the variables {name: value}
+            ex. {'$ProjectName': 'Foo'}
+        """
+        self._variables = dict((name, str(value)) for name, value in variables.items())
+        # keep the original order of the variables for the report
+        self._variable_names = list(variables.keys())
+        self._pattern = None
+        if self._variables:
+            sorted_names = sorted(self._variables.keys(), key=len, reverse=True)
+            self._pattern = re.compile('|'.join(re.escape(name) for name in sorted_names))
+
+    @property
+    def variable_names(self):
+        # type: () -> list[str]
+        """Returns the names of the variables to replace
+        """
+        return list(self._variable_names)
+
+    def substitute(self, template):
+        # type: (str) -> (str, list[str])
+        """Replaces all the variables found in the template
+
+        :param template: string with the template content
+        :return: tuple with the new content and the list of
+            variable names that were not found in the template
+        """
+        if self._pattern is None:
+            return template, []
+        variables_found = set()
+
+        def _replace(match):
+            variables_found.add(match.group(0))
+            return self._variables[match.group(0)]
+
+        new_content = self._pattern.sub(_replace, template)
+        unmatched = [name for name in self._variable_names if name not in variables_found]
+        return new_content, unmatched